@@ -32,10 +32,23 @@ SCHEMA_CONFIG = "config.schema"
 
 def _shutdown() -> None:
     """スケジューラ等を停止する (my_lib.webapp.runner の term フック)"""
+    import rasp_shutter.backup
+    import rasp_shutter.control.job
+    import rasp_shutter.control.leader
     import rasp_shutter.control.scheduler
     import rasp_shutter.control.webapi.schedule
+    import rasp_shutter.log_store
+    import rasp_shutter.metrics.collector
+    import rasp_shutter.metrics.dashboard
+    import rasp_shutter.notify
 
     rasp_shutter.control.scheduler.term()
+    rasp_shutter.control.job.term()
+    rasp_shutter.control.leader.term()
+    rasp_shutter.metrics.dashboard.term()
+    rasp_shutter.backup.stop_scheduler()
+    rasp_shutter.metrics.collector.stop_migration()
+    rasp_shutter.log_store.stop_compactor()
 
     # スケジュールワーカーの終了を待機（最大10秒）
     try:
@@ -48,10 +61,19 @@ def _shutdown() -> None:
     except Exception:
         logging.exception("Error waiting for schedule worker")
 
+    # NOTE: キューに残っている実行ログを書き込んでから終了する
+    rasp_shutter.notify.stop()
     my_lib.webapp.log.term()
 
 
-def create_app(config: rasp_shutter.config.AppConfig, dummy_mode: bool = False) -> flask.Flask:
+def create_app(
+    config: rasp_shutter.config.AppConfig, dummy_mode: bool = False, multi_process: bool = False
+) -> flask.Flask:
+    """Flask アプリを作成する
+
+    multi_process=True の場合（src/wsgi.py）は、複数の Web ワーカープロセスのうち
+    リーダーに選出された 1 プロセスだけがスケジューラを動かす（rasp_shutter.control.leader）。
+    """
     # NOTE: オプションでダミーモードが指定された場合、環境変数もそれに揃えておく
     # control.py がモジュールロード時に DUMMY_MODE を参照するため、インポート前に設定する
     if dummy_mode:
@@ -60,10 +82,20 @@ def create_app(config: rasp_shutter.config.AppConfig, dummy_mode: bool = False)
         os.environ["DUMMY_MODE"] = "false"
 
     # NOTE: DUMMY_MODE 環境変数を設定した後にモジュールをインポート
+    import rasp_shutter.backup
+    import rasp_shutter.control.leader
+    import rasp_shutter.control.scheduler
     import rasp_shutter.control.webapi.control
+    import rasp_shutter.control.webapi.healthz
+    import rasp_shutter.control.webapi.log
     import rasp_shutter.control.webapi.schedule
     import rasp_shutter.control.webapi.sensor
+    import rasp_shutter.log_store
+    import rasp_shutter.metrics.collector
+    import rasp_shutter.metrics.dashboard
+    import rasp_shutter.metrics.webapi.export
     import rasp_shutter.metrics.webapi.page
+    import rasp_shutter.notify
 
     # NOTE: テストのため、環境変数 DUMMY_MODE をセットしてからロードしたいのでこの位置
     environment = rasp_shutter.config.build_environment(config)
@@ -74,19 +106,34 @@ def create_app(config: rasp_shutter.config.AppConfig, dummy_mode: bool = False)
     # NOTE: アクセスログは無効にする
     logging.getLogger("werkzeug").setLevel(logging.ERROR)
 
-    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+    # NOTE: gunicorn などのワーカープロセスには WERKZEUG_RUN_MAIN が無いので、multi_process で判定する
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true" or multi_process:
         if dummy_mode:
             logging.warning("Set dummy mode")
         else:  # pragma: no cover
             pass
 
         rasp_shutter.control.webapi.control.init()
-        rasp_shutter.control.webapi.schedule.init(config)
+        if not multi_process:
+            rasp_shutter.control.webapi.schedule.init(config)
+        # NOTE: メトリクスの初期化（DB のスキーマ作成など）は制御・スケジューラの起動を待たせない
+        rasp_shutter.metrics.collector.warm_up(config.metrics.data)
+        rasp_shutter.metrics.dashboard.warm_up(config.metrics.data)
+        if not multi_process:
+            rasp_shutter.metrics.dashboard.start_materializer(
+                config.metrics.data, rasp_shutter.metrics.webapi.page.load_current_schedule
+            )
+            rasp_shutter.backup.start_scheduler(config)
+            rasp_shutter.metrics.collector.start_migration(config.metrics.data)
+            rasp_shutter.log_store.start_compactor(config)
         if environment.log_file_path is None:
             raise RuntimeError("webapp.data.log_file_path is required")
         my_lib.webapp.log.init(config.slack, environment.log_file_path)
+        # NOTE: 実行ログの書き込みスレッドは Web リクエストの制御でも使うので、全プロセスで動かす
+        rasp_shutter.notify.start()
 
         def notify_terminate() -> None:  # pragma: no cover
+            rasp_shutter.notify.stop()
             my_lib.webapp.log.info("🏃 アプリを再起動します。")
             my_lib.webapp.log.term()
 
@@ -103,9 +150,12 @@ def create_app(config: rasp_shutter.config.AppConfig, dummy_mode: bool = False)
     url_prefix = rasp_shutter.config.URL_PREFIX
 
     app.register_blueprint(rasp_shutter.control.webapi.control.blueprint, url_prefix=url_prefix)
+    app.register_blueprint(rasp_shutter.control.webapi.healthz.blueprint, url_prefix=url_prefix)
+    app.register_blueprint(rasp_shutter.control.webapi.log.blueprint, url_prefix=url_prefix)
     app.register_blueprint(rasp_shutter.control.webapi.schedule.blueprint, url_prefix=url_prefix)
     app.register_blueprint(rasp_shutter.control.webapi.sensor.blueprint, url_prefix=url_prefix)
     app.register_blueprint(rasp_shutter.metrics.webapi.page.blueprint, url_prefix=url_prefix)
+    app.register_blueprint(rasp_shutter.metrics.webapi.export.blueprint, url_prefix=url_prefix)
 
     app.register_blueprint(my_lib.webapp.base.create_root_redirect_blueprint(url_prefix=url_prefix))
     app.register_blueprint(
@@ -122,6 +172,29 @@ def create_app(config: rasp_shutter.config.AppConfig, dummy_mode: bool = False)
         app.register_blueprint(rasp_shutter.control.webapi.test.time.blueprint, url_prefix=url_prefix)
         app.register_blueprint(rasp_shutter.control.webapi.test.sync.blueprint, url_prefix=url_prefix)
 
+    if multi_process:
+
+        def on_elected() -> None:
+            # NOTE: フォロワーの間にリーダーが更新したスケジュールを読み直してから起動する
+            rasp_shutter.control.scheduler.reset_current_schedule()
+            rasp_shutter.control.webapi.schedule.init(config)
+            # NOTE: メトリクスを書き込むのはリーダーだけなので、ダッシュボードのファイルもリーダーが作る
+            rasp_shutter.metrics.dashboard.start_materializer(
+                config.metrics.data, rasp_shutter.metrics.webapi.page.load_current_schedule
+            )
+            # NOTE: 複数のプロセスが同じスナップショットを作らないよう、バックアップもリーダーだけが行う
+            rasp_shutter.backup.start_scheduler(config)
+            # NOTE: フォロワーの間に他のプロセスが記録した見合わせイベントを読み直す
+            rasp_shutter.metrics.collector.get_collector(config.metrics.data).invalidate_cache()
+            # NOTE: マイグレーションの backfill も書き込みなので、リーダーだけが進める
+            rasp_shutter.metrics.collector.start_migration(config.metrics.data)
+            # NOTE: 古いログの削除も 1 プロセスだけで行う
+            rasp_shutter.log_store.start_compactor(config)
+
+        rasp_shutter.control.leader.install(app)
+        rasp_shutter.control.leader.start(app, on_elected)
+        atexit.register(_shutdown)
+
     my_lib.webapp.config.show_handler_list(app)
 
     return app
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+metrics.db と log.db のスナップショットの作成・整合性チェック・リストアと、log.db のメンテナンスを行います
+
+Usage:
+  backup_db.py [-c CONFIG] [-o DIR] [-D]
+  backup_db.py [-c CONFIG] check [PATH...] [-D]
+  backup_db.py [-c CONFIG] restore SNAPSHOT [-D]
+  backup_db.py [-c CONFIG] vacuum [-D]
+
+Options:
+  -c CONFIG         : CONFIG を設定ファイルとして読み込んで実行します。[default: config.yaml]
+  -o DIR            : DIR にスナップショットを作成します（省略時は backup.dir_path）。
+  -D                : デバッグモードで動作します。
+
+Commands:
+  check             : PATH（省略時は metrics.db と log.db）の整合性をチェックします。
+  restore           : SNAPSHOT の内容で、ファイル名が対応する DB を置き換えます（アプリを停止して実行）。
+  vacuum            : log.db を incremental auto_vacuum に切り替えます（ファイル全体を作り直すので、
+                      アプリを停止して実行）。切り替え後は古いログの削除で空いた領域がファイルから返されます。
+"""
+
+import logging
+import pathlib
+import sys
+
+import docopt
+import my_lib.logger
+
+import rasp_shutter.backup
+import rasp_shutter.config
+import rasp_shutter.log_store
+
+SCHEMA_CONFIG = "config.schema"
+
+
+def create(config: rasp_shutter.config.AppConfig, backup_dir: str | None) -> None:
+    if backup_dir is None:
+        if config.backup is None:
+            raise rasp_shutter.backup.BackupError("backup.dir_path is not configured (use -o DIR)")
+        keep: int | None = config.backup.keep
+        dir_path = config.backup.dir_path
+    else:
+        keep = None
+        dir_path = pathlib.Path(backup_dir)
+
+    for db_path in rasp_shutter.backup.target_list(config):
+        logging.info("Snapshot created: %s", rasp_shutter.backup.snapshot(db_path, dir_path, keep))
+
+
+def check(config: rasp_shutter.config.AppConfig, path_list: list[str]) -> bool:
+    ok = True
+    for db_path in [pathlib.Path(path) for path in path_list] or rasp_shutter.backup.target_list(config):
+        problems = rasp_shutter.backup.integrity_check(db_path)
+        if problems:
+            ok = False
+            for problem in problems:
+                logging.error("%s: %s", db_path, problem)
+        else:
+            logging.info("%s: OK", db_path)
+    return ok
+
+
+def restore(config: rasp_shutter.config.AppConfig, snapshot_path: str) -> None:
+    # NOTE: スナップショットの名前は <DB 名>-YYYYMMDD-HHMMSS.db なので、DB 名で対応する DB を決める
+    name = pathlib.Path(snapshot_path).name
+    db_path = next(
+        (
+            db_path
+            for db_path in rasp_shutter.backup.target_list(config)
+            if name.startswith(f"{db_path.stem}-")
+        ),
+        None,
+    )
+    if db_path is None:
+        raise rasp_shutter.backup.BackupError(f"No database corresponds to snapshot: {name}")
+
+    rasp_shutter.backup.restore(pathlib.Path(snapshot_path), db_path)
+    logging.info("Restored %s from %s", db_path, snapshot_path)
+
+
+def vacuum(config: rasp_shutter.config.AppConfig) -> None:
+    log_file_path = config.webapp.data.log_file_path
+    if rasp_shutter.log_store.enable_incremental_vacuum(log_file_path):
+        logging.info("Switched to incremental auto_vacuum: %s", log_file_path)
+    else:
+        logging.info("Already in incremental auto_vacuum: %s", log_file_path)
+
+
+if __name__ == "__main__":
+    assert __doc__ is not None  # noqa: S101
+    args = docopt.docopt(__doc__)
+
+    my_lib.logger.init("hems.rasp-shutter", level=logging.DEBUG if args["-D"] else logging.INFO)
+
+    config = rasp_shutter.config.load(args["-c"], pathlib.Path(SCHEMA_CONFIG))
+    try:
+        if args["check"]:
+            if not check(config, args["PATH"]):
+                sys.exit(1)
+        elif args["restore"]:
+            restore(config, args["SNAPSHOT"])
+        elif args["vacuum"]:
+            vacuum(config)
+        else:
+            create(config, args["-o"])
+    except rasp_shutter.backup.BackupError as e:
+        logging.error("%s", e)
+        sys.exit(1)
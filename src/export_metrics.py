@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+メトリクスのテーブルを CSV・NDJSON・Parquet で書き出します
+
+Usage:
+  export_metrics.py [-c CONFIG] -t TABLE [-f FORMAT] [--from DATE] [--to DATE] [-o OUTPUT] [-D]
+
+Options:
+  -c CONFIG         : CONFIG を設定ファイルとして読み込んで実行します。[default: config.yaml]
+  -t TABLE          : 書き出すテーブル（operation_metrics / postpone_events /
+                      daily_failures / sensor_samples）を指定します。
+  -f FORMAT         : 出力形式（csv / ndjson / parquet）を指定します。[default: csv]
+  --from DATE       : DATE（YYYY-MM-DD）以降のデータだけを書き出します。
+  --to DATE         : DATE（YYYY-MM-DD）以前のデータだけを書き出します。
+  -o OUTPUT         : OUTPUT に書き出します（省略時は標準出力）。
+  -D                : デバッグモードで動作します。
+"""
+
+import contextlib
+import datetime
+import logging
+import pathlib
+import sys
+
+import docopt
+import my_lib.logger
+
+import rasp_shutter.config
+import rasp_shutter.metrics.export
+
+SCHEMA_CONFIG = "config.schema"
+
+
+def _parse_date(value: str | None) -> str | None:
+    return None if value is None else datetime.date.fromisoformat(value).isoformat()
+
+
+def main(
+    config: rasp_shutter.config.AppConfig,
+    table: str,
+    fmt: str,
+    start_date: str | None,
+    end_date: str | None,
+    output: str | None,
+) -> None:
+    chunks = rasp_shutter.metrics.export.stream(config.metrics.data, table, fmt, start_date, end_date)
+
+    size = 0
+    # NOTE: 標準出力は閉じない
+    with (
+        pathlib.Path(output).open("wb")
+        if output is not None
+        else contextlib.nullcontext(sys.stdout.buffer) as f
+    ):
+        for chunk in chunks:
+            f.write(chunk)
+            size += len(chunk)
+    logging.info("Exported %s as %s (%d bytes)", table, fmt, size)
+
+
+if __name__ == "__main__":
+    assert __doc__ is not None  # noqa: S101
+    args = docopt.docopt(__doc__)
+
+    my_lib.logger.init("hems.rasp-shutter", level=logging.DEBUG if args["-D"] else logging.INFO)
+
+    config = rasp_shutter.config.load(args["-c"], pathlib.Path(SCHEMA_CONFIG))
+    try:
+        main(
+            config,
+            args["-t"],
+            args["-f"],
+            _parse_date(args["--from"]),
+            _parse_date(args["--to"]),
+            args["-o"],
+        )
+    except (rasp_shutter.metrics.export.ExportError, ValueError) as e:
+        logging.error("%s", e)
+        sys.exit(1)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+SQLite データベース（metrics.db・log.db）のオンラインバックアップ
+
+アプリを止めずに DB をコピーするため、ファイルのコピーではなく SQLite のオンラインバックアップ API
+（sqlite3.Connection.backup）を使います。1 ステップで PAGES_PER_STEP ページずつ複製し、
+ステップの間は STEP_SLEEP_SEC だけ休むので、スケジューラやサンプリングの書き込みを長く待たせません
+（コピー中に書き込まれた場合は SQLite が自動的に複製をやり直すので、書きかけの状態は残りません）。
+
+スナップショットは `<DB 名>-YYYYMMDD-HHMMSS.db` としてバックアップ先ディレクトリに書き出し、
+DB ごとに新しいものから keep 個だけ残します。config.yaml の backup セクションを設定すると、
+リーダーのプロセスで interval_hour ごとに自動でスナップショットを作成します
+（手動の作成・整合性チェック・リストアは src/backup_db.py）。
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import pathlib
+import sqlite3
+import threading
+import time
+
+import rasp_shutter.config
+import rasp_shutter.metrics.collector
+
+# 1 ステップで複製するページ数
+PAGES_PER_STEP = 64
+# ステップの間に書き込みを受け付けるための待ち時間（秒）
+STEP_SLEEP_SEC = 0.05
+
+_TIMESTAMP_FORMAT = "%Y%m%d-%H%M%S"
+
+
+class BackupError(Exception):
+    """バックアップ・リストアできない（元の DB が無い、スナップショットが壊れているなど）"""
+
+
+def _snapshot_glob(db_path: pathlib.Path) -> str:
+    return f"{db_path.stem}-????????-??????{db_path.suffix}"
+
+
+def snapshot_list(backup_dir: pathlib.Path, db_path: pathlib.Path) -> list[pathlib.Path]:
+    """DB のスナップショットを古い順に返す（名前に作成日時が入っているので名前順）"""
+    return sorted(pathlib.Path(backup_dir).glob(_snapshot_glob(pathlib.Path(db_path))))
+
+
+def backup(
+    src_path: pathlib.Path,
+    dest_path: pathlib.Path,
+    pages: int = PAGES_PER_STEP,
+    sleep: float = STEP_SLEEP_SEC,
+) -> None:
+    """src_path の DB を dest_path に複製する（複製し終えるまで dest_path は作られない）"""
+    src_path = pathlib.Path(src_path)
+    dest_path = pathlib.Path(dest_path)
+    if not src_path.exists():
+        raise BackupError(f"Database not found: {src_path}")
+
+    temp_path = dest_path.with_name(f"{dest_path.name}.tmp")
+    temp_path.unlink(missing_ok=True)
+    src = rasp_shutter.metrics.collector.connect_read_only(src_path)
+    try:
+        dest = sqlite3.connect(temp_path)
+        try:
+            src.backup(dest, pages=pages, sleep=sleep)
+        finally:
+            dest.close()
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    finally:
+        src.close()
+    temp_path.replace(dest_path)
+
+
+def integrity_check(db_path: pathlib.Path) -> list[str]:
+    """PRAGMA integrity_check の結果を返す（問題が無ければ空リスト）"""
+    db_path = pathlib.Path(db_path)
+    if not db_path.exists():
+        raise BackupError(f"Database not found: {db_path}")
+
+    conn = rasp_shutter.metrics.collector.connect_read_only(db_path)
+    try:
+        result = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    except sqlite3.DatabaseError as e:
+        # NOTE: SQLite のファイルでない場合などは PRAGMA 自体が失敗する
+        return [str(e)]
+    finally:
+        conn.close()
+    return [] if result == ["ok"] else result
+
+
+def snapshot(db_path: pathlib.Path, backup_dir: pathlib.Path, keep: int | None = None) -> pathlib.Path:
+    """バックアップ先ディレクトリに DB のスナップショットを作成し、そのパスを返す
+
+    keep を指定すると、その個数を超えた古いスナップショットを削除する。
+    """
+    db_path = pathlib.Path(db_path)
+    backup_dir = pathlib.Path(backup_dir)
+    backup_dir.mkdir(parents=True, exist_ok=True)
+
+    timestamp = datetime.datetime.now().strftime(_TIMESTAMP_FORMAT)
+    dest_path = backup_dir / f"{db_path.stem}-{timestamp}{db_path.suffix}"
+    backup(db_path, dest_path)
+
+    if keep is not None:
+        rotate(backup_dir, db_path, keep)
+    return dest_path
+
+
+def rotate(backup_dir: pathlib.Path, db_path: pathlib.Path, keep: int) -> list[pathlib.Path]:
+    """新しいものから keep 個を残してスナップショットを削除し、削除したパスを返す"""
+    removed = snapshot_list(backup_dir, db_path)[: -keep if keep > 0 else None]
+    for path in removed:
+        path.unlink(missing_ok=True)
+    return removed
+
+
+def restore(snapshot_path: pathlib.Path, db_path: pathlib.Path) -> None:
+    """スナップショットの内容で DB を置き換える
+
+    整合性チェックに通らないスナップショットは BackupError で拒否する。
+    置き換えもバックアップ API で行うので、DB を開いているプロセスがあっても壊れない
+    （ただし、アプリが動いている場合はメモリ上の状態と食い違うので、停止してから実行する）。
+    """
+    snapshot_path = pathlib.Path(snapshot_path)
+    problems = integrity_check(snapshot_path)
+    if problems:
+        raise BackupError(f"Snapshot is corrupted: {snapshot_path}: {problems[0]}")
+
+    src = rasp_shutter.metrics.collector.connect_read_only(snapshot_path)
+    try:
+        dest = sqlite3.connect(pathlib.Path(db_path))
+        try:
+            src.backup(dest)
+        finally:
+            dest.close()
+    finally:
+        src.close()
+
+
+def target_list(config: rasp_shutter.config.AppConfig) -> list[pathlib.Path]:
+    """バックアップ対象の DB"""
+    return [config.metrics.data, config.webapp.data.log_file_path]
+
+
+class _Scheduler:
+    """interval_hour ごとに対象の DB のスナップショットを作成するスレッド"""
+
+    def __init__(self, db_path_list: list[pathlib.Path], backup_config: rasp_shutter.config.BackupConfig):
+        self.db_path_list = db_path_list
+        self.backup_config = backup_config
+        self._should_terminate = threading.Event()
+        self._thread = threading.Thread(target=self._worker, name="db-backup", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._should_terminate.set()
+
+    def _last_snapshot_time(self) -> float | None:
+        latest = [
+            path_list[-1].stat().st_mtime
+            for db_path in self.db_path_list
+            if (path_list := snapshot_list(self.backup_config.dir_path, db_path))
+        ]
+        return min(latest) if len(latest) == len(self.db_path_list) else None
+
+    def _worker(self) -> None:
+        # NOTE: 再起動のたびにスナップショットが増えないよう、初回は最新のスナップショットからの経過時間で待つ
+        interval_sec = self.backup_config.interval_hour * 3600
+        last_time = self._last_snapshot_time()
+        wait_sec = 0.0 if last_time is None else interval_sec - (time.time() - last_time)
+
+        while not self._should_terminate.wait(max(wait_sec, 0.0)):
+            for db_path in self.db_path_list:
+                try:
+                    path = snapshot(db_path, self.backup_config.dir_path, self.backup_config.keep)
+                    logging.info("Database snapshot created: %s", path)
+                except Exception:
+                    # NOTE: 失敗しても次の周期まで再試行しない（SD カードへの書き込みを繰り返さない）
+                    logging.exception("Failed to create database snapshot: %s", db_path)
+            wait_sec = interval_sec
+
+
+_scheduler: _Scheduler | None = None
+
+
+def start_scheduler(config: rasp_shutter.config.AppConfig) -> None:
+    """backup セクションが設定されていれば、スナップショットの定期作成を開始する"""
+    global _scheduler
+    if config.backup is None:
+        return
+
+    stop_scheduler()
+    _scheduler = _Scheduler(target_list(config), config.backup)
+    _scheduler.start()
+
+
+def stop_scheduler() -> None:
+    global _scheduler
+    scheduler, _scheduler = _scheduler, None
+    if scheduler is not None:
+        scheduler.stop()
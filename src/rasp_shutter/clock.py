@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+現在時刻・経過時間・待機と footprint の時計
+
+スケジューラ・制御・メトリクスは my_lib.time.now() / time.monotonic() / time.sleep() と
+footprint（制御の実行履歴などのタイムスタンプのファイル）を直接使わず、このモジュールを経由します。
+
+- SystemClock（既定）: 実際の時刻とファイルの footprint（my_lib.footprint）
+- VirtualClock: advance() / sleep() で明示的に進める仮想の時刻と、メモリ上の footprint。
+  install() すると、同じ制御ロジックが仮想の時刻で動く（rasp_shutter.control.scheduler.StepScheduler）。
+  footprint もこの時計の時刻で記録するので、実際の時間を待たずに制御間隔などの判定が進む
+"""
+
+from __future__ import annotations
+
+import contextlib
+import datetime
+import math
+import os
+import pathlib
+import threading
+import time
+from collections.abc import Iterator
+
+import my_lib.footprint
+import my_lib.time
+
+
+class SystemClock:
+    """実際の時刻とファイルの footprint"""
+
+    def now(self) -> datetime.datetime:
+        return my_lib.time.now()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, sec: float) -> None:
+        time.sleep(sec)
+
+    def footprint_update(self, path: pathlib.Path) -> None:
+        my_lib.footprint.update(path)
+
+    def footprint_clear(self, path: pathlib.Path) -> None:
+        my_lib.footprint.clear(path)
+
+    def footprint_exists(self, path: pathlib.Path) -> bool:
+        return my_lib.footprint.exists(path)
+
+    def footprint_compare(self, path_a: pathlib.Path, path_b: pathlib.Path) -> bool:
+        """path_a の方が新しければ True"""
+        return my_lib.footprint.compare(path_a, path_b)
+
+    def footprint_stamp(self, path: pathlib.Path) -> float | None:
+        """更新を検出するための値（ファイルの更新時刻。欠如時は None）"""
+        try:
+            return pathlib.Path(path).stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def footprint_elapsed(self, path: pathlib.Path) -> float:
+        """最終更新からの経過秒数（欠如・破損時は math.inf）
+
+        my_lib.footprint.elapsed() は、ファイルが存在しない・破損している場合の
+        戻り値がバージョンによって異なる（旧: time.time() 相当の巨大値、新: None）。
+        """
+        if not my_lib.footprint.exists(path):
+            return math.inf
+
+        elapsed = my_lib.footprint.elapsed(path)
+        if elapsed is None:  # 新バージョンの my_lib は欠如・破損時に None を返す
+            return math.inf
+        return elapsed
+
+
+class VirtualClock(SystemClock):
+    """明示的に進める仮想の時刻とメモリ上の footprint（テスト・シミュレーション用）"""
+
+    def __init__(self, start: datetime.datetime) -> None:
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=my_lib.time.get_zoneinfo())
+        self._now = start
+        self._monotonic = 0.0
+        # NOTE: キーは文字列のパス（制御のたびに参照するので、pathlib.Path の生成・ハッシュを避ける）
+        self._footprint: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def now(self) -> datetime.datetime:
+        with self._lock:
+            return self._now
+
+    def monotonic(self) -> float:
+        with self._lock:
+            return self._monotonic
+
+    def advance(self, sec: float) -> None:
+        with self._lock:
+            self._now += datetime.timedelta(seconds=sec)
+            self._monotonic += sec
+
+    def sleep(self, sec: float) -> None:
+        # NOTE: 待たずに時刻だけを進める
+        self.advance(sec)
+
+    def footprint_update(self, path: pathlib.Path) -> None:
+        with self._lock:
+            self._footprint[os.fspath(path)] = self._now.timestamp()
+
+    def footprint_clear(self, path: pathlib.Path) -> None:
+        with self._lock:
+            self._footprint.pop(os.fspath(path), None)
+
+    def footprint_exists(self, path: pathlib.Path) -> bool:
+        with self._lock:
+            return os.fspath(path) in self._footprint
+
+    def footprint_compare(self, path_a: pathlib.Path, path_b: pathlib.Path) -> bool:
+        with self._lock:
+            return self._footprint[os.fspath(path_a)] > self._footprint[os.fspath(path_b)]
+
+    def footprint_stamp(self, path: pathlib.Path) -> float | None:
+        with self._lock:
+            return self._footprint.get(os.fspath(path))
+
+    def footprint_elapsed(self, path: pathlib.Path) -> float:
+        with self._lock:
+            updated = self._footprint.get(os.fspath(path))
+            return math.inf if updated is None else self._now.timestamp() - updated
+
+
+_clock: SystemClock = SystemClock()
+
+
+def get() -> SystemClock:
+    return _clock
+
+
+def is_virtual() -> bool:
+    """仮想の時計に差し替えられているか（制御は StepScheduler が進める）"""
+    return isinstance(_clock, VirtualClock)
+
+
+def install(clock: SystemClock) -> None:
+    """時計を差し替える（プロセス全体。仮想の時計の間、スケジューラのスレッドは制御を実行しない）"""
+    global _clock
+    _clock = clock
+
+
+def uninstall() -> None:
+    install(SystemClock())
+
+
+@contextlib.contextmanager
+def use(clock: SystemClock) -> Iterator[SystemClock]:
+    """with の間だけ時計を差し替える"""
+    previous = _clock
+    install(clock)
+    try:
+        yield clock
+    finally:
+        install(previous)
+
+
+def now() -> datetime.datetime:
+    return _clock.now()
+
+
+def monotonic() -> float:
+    return _clock.monotonic()
+
+
+def sleep(sec: float) -> None:
+    _clock.sleep(sec)
@@ -12,7 +12,7 @@
 from __future__ import annotations
 
 import pathlib
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
 import my_lib.config
@@ -33,15 +33,20 @@ SlackConfigType = SlackErrorOnlyConfig | SlackEmptyConfig
 __all__ = [
     "URL_PREFIX",
     "AppConfig",
+    "BackupConfig",
+    "BrightnessFilterConfig",
     "InfluxDBConfig",
     "LivenessConfig",
     "LivenessFileConfig",
     "LocationConfig",
     "MetricsConfig",
+    "SceneActionConfig",
+    "SceneConfig",
     "SensorConfig",
     "SensorSpecConfig",
     "ShutterConfig",
     "ShutterEndpointConfig",
+    "ShutterGroupConfig",
     "SlackChannelConfig",
     "SlackConfigType",
     "SlackEmptyConfig",
@@ -84,6 +89,7 @@ class WebappDataConfig:
     schedule_file_path: pathlib.Path
     log_file_path: pathlib.Path
     stat_dir_path: pathlib.Path
+    log_retention_days: int | None = None  # 実行ログの保持期間（日、省略時は削除しない）
 
 
 @dataclass(frozen=True)
@@ -130,6 +136,16 @@ class MetricsConfig:
     data: pathlib.Path
 
 
+# === Backup ===
+@dataclass(frozen=True)
+class BackupConfig:
+    """backup セクションの設定（省略時は定期バックアップしない）"""
+
+    dir_path: pathlib.Path
+    interval_hour: float = 24.0  # スナップショットの作成間隔（時間）
+    keep: int = 7  # DB ごとに残すスナップショットの数
+
+
 # === Liveness ===
 @dataclass(frozen=True)
 class LivenessFileConfig:
@@ -162,6 +178,45 @@ class ShutterConfig:
     endpoint: ShutterEndpointConfig
 
 
+# === Brightness filter ===
+@dataclass(frozen=True)
+class BrightnessFilterConfig:
+    """brightness_filter セクションの設定（省略時はすべて 0 で、瞬時値で判定する）"""
+
+    window_sec: float = 0.0  # 移動平均の窓幅（秒）
+    hysteresis_ratio: float = 0.0  # 閾値に対する不感帯の割合
+    dwell_sec: float = 0.0  # 判定が反転するまでの最小継続時間（秒）
+
+
+# === Group / Scene ===
+@dataclass(frozen=True)
+class ShutterGroupConfig:
+    """シャッターグループ設定（名前付きのシャッター集合）"""
+
+    name: str
+    index_list: list[int]
+
+
+@dataclass(frozen=True)
+class SceneActionConfig:
+    """シーンの動作（対象シャッターと目標状態）"""
+
+    index_list: list[int]
+    state: str
+
+
+@dataclass(frozen=True)
+class SceneConfig:
+    """シーン設定（複数シャッターの目標状態をまとめたもの）"""
+
+    name: str
+    action: list[SceneActionConfig]
+
+    def target_list(self) -> list[tuple[int, str]]:
+        """(シャッターのインデックス, 目標状態) のリストに展開する"""
+        return [(index, action.state) for action in self.action for index in action.index_list]
+
+
 # === メイン設定クラス ===
 @dataclass(frozen=True)
 class AppConfig:
@@ -174,6 +229,18 @@ class AppConfig:
     liveness: LivenessConfig
     shutter: list[ShutterConfig]
     slack: SlackConfigType
+    group: list[ShutterGroupConfig] = field(default_factory=list)
+    scene: list[SceneConfig] = field(default_factory=list)
+    brightness_filter: BrightnessFilterConfig = field(default_factory=BrightnessFilterConfig)
+    backup: BackupConfig | None = None
+
+    def find_group(self, name: str) -> ShutterGroupConfig | None:
+        """名前からグループを検索する"""
+        return next((group for group in self.group if group.name == name), None)
+
+    def find_scene(self, name: str) -> SceneConfig | None:
+        """名前からシーンを検索する"""
+        return next((scene for scene in self.scene if scene.name == name), None)
 
 
 # === パース関数 ===
@@ -182,6 +249,7 @@ def _parse_webapp_data(data: dict[str, Any]) -> WebappDataConfig:
         schedule_file_path=pathlib.Path(data["schedule_file_path"]).resolve(),
         log_file_path=pathlib.Path(data["log_file_path"]).resolve(),
         stat_dir_path=pathlib.Path(data["stat_dir_path"]).resolve(),
+        log_retention_days=int(data["log_retention_days"]) if "log_retention_days" in data else None,
     )
 
 
@@ -278,16 +346,95 @@ def _parse_shutter_list(data: list[dict[str, Any]]) -> list[ShutterConfig]:
     return [_parse_shutter(item) for item in data]
 
 
+def _parse_brightness_filter(data: dict[str, Any] | None) -> BrightnessFilterConfig:
+    if data is None:
+        return BrightnessFilterConfig()
+    return BrightnessFilterConfig(
+        window_sec=float(data.get("window_sec", 0)),
+        hysteresis_ratio=float(data.get("hysteresis_ratio", 0)),
+        dwell_sec=float(data.get("dwell_sec", 0)),
+    )
+
+
+def _parse_backup(data: dict[str, Any] | None) -> BackupConfig | None:
+    if data is None:
+        return None
+    return BackupConfig(
+        dir_path=pathlib.Path(data["dir_path"]).resolve(),
+        interval_hour=float(data.get("interval_hour", 24)),
+        keep=int(data.get("keep", 7)),
+    )
+
+
+def _resolve_shutter_name(name: str, shutter_list: list[ShutterConfig]) -> int:
+    for index, shutter in enumerate(shutter_list):
+        if shutter.name == name:
+            return index
+    raise ValueError(f"Unknown shutter name: {name}")
+
+
+def _parse_group(data: dict[str, Any], shutter_list: list[ShutterConfig]) -> ShutterGroupConfig:
+    index_list = [_resolve_shutter_name(name, shutter_list) for name in data["shutter"]]
+    if len(set(index_list)) != len(index_list):
+        raise ValueError(f"Shutter is duplicated in group: {data['name']}")
+    return ShutterGroupConfig(name=data["name"], index_list=index_list)
+
+
+def _parse_group_list(
+    data: list[dict[str, Any]] | None, shutter_list: list[ShutterConfig]
+) -> list[ShutterGroupConfig]:
+    return [_parse_group(item, shutter_list) for item in data or []]
+
+
+def _parse_scene_action(
+    data: dict[str, Any], shutter_list: list[ShutterConfig], group_list: list[ShutterGroupConfig]
+) -> SceneActionConfig:
+    # NOTE: target にはグループ名とシャッター名のどちらも指定できる（グループ名を優先）
+    group = next((group for group in group_list if group.name == data["target"]), None)
+    index_list = (
+        group.index_list if group is not None else [_resolve_shutter_name(data["target"], shutter_list)]
+    )
+    return SceneActionConfig(index_list=index_list, state=data["state"])
+
+
+def _parse_scene(
+    data: dict[str, Any], shutter_list: list[ShutterConfig], group_list: list[ShutterGroupConfig]
+) -> SceneConfig:
+    scene = SceneConfig(
+        name=data["name"],
+        action=[_parse_scene_action(item, shutter_list, group_list) for item in data["action"]],
+    )
+    # NOTE: 同じシャッターに複数の目標状態があると、並列実行時の結果が不定になる
+    index_list = [index for index, _ in scene.target_list()]
+    if len(set(index_list)) != len(index_list):
+        raise ValueError(f"Shutter is duplicated in scene: {scene.name}")
+    return scene
+
+
+def _parse_scene_list(
+    data: list[dict[str, Any]] | None,
+    shutter_list: list[ShutterConfig],
+    group_list: list[ShutterGroupConfig],
+) -> list[SceneConfig]:
+    return [_parse_scene(item, shutter_list, group_list) for item in data or []]
+
+
 def parse_config(data: dict[str, Any]) -> AppConfig:
     """設定辞書をパースして AppConfig を返す"""
+    shutter_list = _parse_shutter_list(data["shutter"])
+    group_list = _parse_group_list(data.get("group"), shutter_list)
     return AppConfig(
         webapp=_parse_webapp(data["webapp"]),
         sensor=_parse_sensor(data["sensor"]),
         location=_parse_location(data["location"]),
         metrics=_parse_metrics(data["metrics"]),
         liveness=_parse_liveness(data["liveness"]),
-        shutter=_parse_shutter_list(data["shutter"]),
+        shutter=shutter_list,
         slack=_parse_slack(data.get("slack")),
+        group=group_list,
+        scene=_parse_scene_list(data.get("scene"), shutter_list, group_list),
+        brightness_filter=_parse_brightness_filter(data.get("brightness_filter")),
+        backup=_parse_backup(data.get("backup")),
     )
 
 
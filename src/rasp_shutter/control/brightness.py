@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+明るさ判定
+
+センサー値とスケジュールの閾値から明るさを判定します。
+
+自動制御では夜明け・夕暮れ付近の照度ノイズで判定が毎秒反転し、見合わせ記録や
+制御コマンドが繰り返し発生するため、BrightnessFilter で次の 3 つを組み合わせて
+判定を安定させます（いずれも 1 回の読み取りにつき O(1)）。
+
+- 移動平均: 時間窓内のセンサー値の平均で判定する
+- ヒステリシス: 現在の判定を反転させるには、閾値を不感帯の分だけ越える必要がある
+- 最小継続時間: 反転候補が一定時間続いてから判定を反転させる
+"""
+
+from __future__ import annotations
+
+import collections
+import enum
+import logging
+from dataclasses import dataclass
+from typing import Any
+
+import rasp_shutter.config
+import rasp_shutter.control.config
+import rasp_shutter.control.schedule_plan
+import rasp_shutter.type_defs
+
+FIELDS = ("lux", "solar_rad", "altitude")
+
+# 判定の履歴をリセットするまでの読み取りの途切れ（秒）に加える、スケジューラのループの遅れの余裕
+# NOTE: 自動制御は失敗後にリトライ間隔の間フィルタを読まないので、途切れはそれより長く取る
+# （BrightnessFilter.stale_sec）
+STALE_MARGIN_SEC = 60.0
+
+
+class BRIGHTNESS_STATE(enum.IntEnum):
+    DARK = 0
+    BRIGHT = 1
+    UNKNOWN = 2
+
+
+def is_valid(sense_data: rasp_shutter.type_defs.SensorData) -> bool:
+    """判定に必要なセンサー値が揃っているか"""
+    return sense_data.lux.valid and sense_data.solar_rad.valid
+
+
+def judge(
+    values: dict[str, float],
+    action: str,
+    entry: rasp_shutter.type_defs.ScheduleEntry | dict[str, Any],
+    margin: float = 0.0,
+) -> BRIGHTNESS_STATE:
+    """センサー値と閾値から明るさを判定する
+
+    閉める判定は OR 条件（いずれかが閾値未満なら DARK）、開ける判定は AND 条件
+    （すべてが閾値を超えれば BRIGHT）。margin は閾値に対する相対的なずらし幅で、
+    正なら閾値を上げ、負なら下げる。
+    """
+
+    def threshold(name: str) -> float:
+        value = entry[name]
+        return value + abs(value) * margin
+
+    if action == "close":
+        if any(values[name] < threshold(name) for name in FIELDS):
+            return BRIGHTNESS_STATE.DARK
+        return BRIGHTNESS_STATE.BRIGHT
+    else:
+        if all(values[name] > threshold(name) for name in FIELDS):
+            return BRIGHTNESS_STATE.BRIGHT
+        return BRIGHTNESS_STATE.DARK
+
+
+def sensor_values(sense_data: rasp_shutter.type_defs.SensorData) -> dict[str, float]:
+    """SensorData を判定用の値に変換（is_valid() が True であること）"""
+    values = {name: getattr(sense_data, name).value for name in FIELDS}
+    assert all(value is not None for value in values.values())  # noqa: S101
+    return values  # type: ignore[return-value]
+
+
+class RollingMean:
+    """時間窓の移動平均（追加・期限切れサンプルの除去とも償却 O(1)）"""
+
+    def __init__(self, window_sec: float) -> None:
+        self._window_sec = window_sec
+        self._samples: collections.deque[tuple[float, float]] = collections.deque()
+        self._sum = 0.0
+
+    def add(self, timestamp: float, value: float) -> None:
+        self._samples.append((timestamp, value))
+        self._sum += value
+        # NOTE: 最新のサンプルは窓幅によらず残す（window_sec=0 なら瞬時値になる）
+        while len(self._samples) > 1 and self._samples[0][0] <= timestamp - self._window_sec:
+            _, expired = self._samples.popleft()
+            self._sum -= expired
+
+    def clear(self) -> None:
+        self._samples.clear()
+        self._sum = 0.0
+
+    @property
+    def mean(self) -> float | None:
+        if not self._samples:
+            return None
+        return self._sum / len(self._samples)
+
+
+@dataclass
+class _Decision:
+    """閾値ごとの判定状態"""
+
+    state: BRIGHTNESS_STATE
+    candidate: BRIGHTNESS_STATE
+    candidate_since: float
+
+
+class BrightnessFilter:
+    """移動平均・ヒステリシス・最小継続時間で明るさ判定を安定させるフィルタ
+
+    判定状態は (action, 閾値) ごとに保持するため、閾値の異なるシャッターグループを
+    同じフィルタで扱える。読み取りが途切れた場合（自動制御の時間帯外など）は
+    古い状態を引きずらないようにリセットする。最初の判定（リセット直後を含む）も
+    最小継続時間が経つまでは UNKNOWN を返す。
+    """
+
+    def __init__(self, config: rasp_shutter.config.BrightnessFilterConfig) -> None:
+        self.config = config
+        self._windows = {name: RollingMean(config.window_sec) for name in FIELDS}
+        self._last_timestamp: float | None = None
+        # 最後に取り込んだセンサー値の測定時刻（キャッシュされた同じ値を二重に数えないため）
+        self._last_sample_time: tuple[Any, ...] | None = None
+        self._decisions: dict[tuple[str, rasp_shutter.control.schedule_plan.ThresholdKey], _Decision] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.window_sec > 0 or self.config.hysteresis_ratio > 0 or self.config.dwell_sec > 0
+
+    @property
+    def stale_sec(self) -> float:
+        """この時間（秒）以上読み取りが途切れたら、判定の履歴をリセットする"""
+        return (
+            max(self.config.window_sec, self.config.dwell_sec)
+            + rasp_shutter.control.config.AUTO_CONTROL_RETRY_INTERVAL_SEC
+            + STALE_MARGIN_SEC
+        )
+
+    def reset(self) -> None:
+        for window in self._windows.values():
+            window.clear()
+        self._last_timestamp = None
+        self._last_sample_time = None
+        self._decisions.clear()
+
+    def _observe(self, sense_data: rasp_shutter.type_defs.SensorData, timestamp: float) -> None:
+        if self._last_timestamp is not None:
+            if timestamp - self._last_timestamp > self.stale_sec:
+                self.reset()
+            elif timestamp <= self._last_timestamp:
+                # NOTE: 同じ時刻の読み取り（自動開け・自動閉めが同じ周回で読む場合）は二重に数えない
+                return
+        self._last_timestamp = timestamp
+
+        # NOTE: センサー値は数十秒ごとにしか更新されず、その間はキャッシュされた同じ値を読むので、
+        # 測定時刻が変わっていなければ移動平均に加えない
+        sample_time = tuple(getattr(sense_data, name).time for name in FIELDS)
+        if sample_time == self._last_sample_time and all(time is not None for time in sample_time):
+            return
+        self._last_sample_time = sample_time
+
+        for name, value in sensor_values(sense_data).items():
+            self._windows[name].add(timestamp, value)
+
+    def decide(
+        self,
+        sense_data: rasp_shutter.type_defs.SensorData,
+        action: str,
+        entry: rasp_shutter.type_defs.ScheduleEntry | dict[str, Any],
+        timestamp: float,
+    ) -> BRIGHTNESS_STATE:
+        """センサー値を取り込み、安定化した明るさ判定を返す"""
+        if not is_valid(sense_data):
+            return BRIGHTNESS_STATE.UNKNOWN
+        if not self.enabled:
+            return judge(sensor_values(sense_data), action, entry)
+
+        self._observe(sense_data, timestamp)
+        values: dict[str, float] = {name: self._windows[name].mean for name in FIELDS}  # type: ignore[misc]
+
+        key = (action, rasp_shutter.control.schedule_plan.threshold_key(entry))
+        decision = self._decisions.get(key)
+        if decision is None:
+            # NOTE: 最初の判定も反転と同じく、候補が最小継続時間続くまで確定しない
+            decision = _Decision(
+                state=BRIGHTNESS_STATE.UNKNOWN, candidate=BRIGHTNESS_STATE.UNKNOWN, candidate_since=timestamp
+            )
+            self._decisions[key] = decision
+
+        # NOTE: 現在 DARK なら閾値を上げ、BRIGHT なら下げることで、閾値付近での反転を防ぐ
+        ratio = self.config.hysteresis_ratio
+        if decision.state == BRIGHTNESS_STATE.DARK:
+            margin = ratio
+        elif decision.state == BRIGHTNESS_STATE.BRIGHT:
+            margin = -ratio
+        else:
+            margin = 0.0
+        candidate = judge(values, action, entry, margin)
+
+        # NOTE: 反転候補が途切れた（現在の判定に戻った、または別の候補に変わった）ら計測し直す
+        if candidate == decision.state or candidate != decision.candidate:
+            decision.candidate = candidate
+            decision.candidate_since = timestamp
+
+        if candidate != decision.state and timestamp - decision.candidate_since >= self.config.dwell_sec:
+            logging.info("Brightness for %s changed: %s -> %s", key, decision.state.name, candidate.name)
+            decision.state = candidate
+
+        return decision.state
@@ -70,7 +70,9 @@ class _DynamicPath(os.PathLike[str]):
 
 STAT_PENDING_OPEN = _DynamicPath("pending/open")
 STAT_PENDING_CLOSE = _DynamicPath("pending/close")
-STAT_AUTO_CLOSE = _DynamicPath("auto/close")
+# マルチプロセス構成のリーダー選出用ロックファイルと、リーダーへの転送用 Unix ソケット
+LEADER_LOCK = _DynamicPath("leader/lock")
+LEADER_SOCKET = _DynamicPath("leader/sock")
 
 # ======================================================================
 # 時間帯定数（時）
@@ -105,6 +107,20 @@ EXEC_INTERVAL_SCHEDULE_HOUR = 12
 EXEC_INTERVAL_MANUAL_MINUTES = 1
 # 自動制御が失敗した後、再試行するまでの間隔（秒）
 AUTO_CONTROL_RETRY_INTERVAL_SEC = 2 * 60
+# シーン（一括制御）でデバイスへ並列にリクエストする最大数
+DISPATCH_MAX_WORKERS = 8
+# シャッター状態の差分として保持する変化の履歴数
+STATE_HISTORY_SIZE = 256
+# 他のワーカー・プロセスによる制御をシャッター状態に取り込む間隔（秒）
+STATE_RECONCILE_INTERVAL_SEC = 2
+# 結果を参照できる非同期制御ジョブの数
+JOB_HISTORY_SIZE = 64
+# ロールバック用に保持する以前のスケジュールの数
+SCHEDULE_HISTORY_SIZE = 10
+# スケジューラループがこの時間（秒）以上止まっていたら liveness を失敗にする
+HEALTHZ_SCHEDULER_LAG_MAX_SEC = 30
+# この回数連続して制御に失敗したシャッターを通信異常として報告する
+DEVICE_FAILURE_THRESHOLD = 3
 
 
 # ======================================================================
@@ -135,3 +151,20 @@ def get_exec_stat_path(state: str, index: int) -> pathlib.Path:
 
     """
     return _get_stat_dir() / "exe" / f"{index}_{state}"
+
+
+def get_auto_close_stat_path(index: int) -> pathlib.Path:
+    """自動で閉めた履歴ファイルのパスを取得
+
+    NOTE: 閾値の異なるシャッターは暗くなる時刻が異なるため、シャッターごとに記録する
+
+    Args:
+    ----
+        index: シャッターのインデックス
+
+    Returns:
+    -------
+        pathlib.Path: 履歴ファイルのパス
+
+    """
+    return _get_stat_dir() / "auto" / f"{index}_close"
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+非同期の制御ジョブ
+
+制御コマンドを専用のエグゼキュータで実行し、ジョブ ID で進捗と結果を参照できるようにします。
+HTTP リクエストはジョブを登録した時点で返るため、デバイスの応答が遅くても
+Flask のワーカースレッドを占有しません。
+
+進捗と完了は SSE の "control" イベントで通知し、クライアントは
+GET /api/jobs/<id> で内容を取得します。
+"""
+
+from __future__ import annotations
+
+import collections
+import concurrent.futures
+import dataclasses
+import enum
+import logging
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from typing import Any
+
+import my_lib.pytest_util
+import my_lib.webapp.event
+
+import rasp_shutter.control.config
+import rasp_shutter.type_defs
+
+
+class JOB_STATUS(enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCESS = "success"
+    ERROR = "error"
+
+
+@dataclasses.dataclass
+class Job:
+    """制御ジョブ
+
+    Attributes
+    ----------
+        job_id: ジョブ ID
+        status: 状態
+        created: 登録時刻（UNIX 時刻）
+        progress: 完了したシャッターごとの実行結果
+        response: 完了後のレスポンス（ShutterStateResponse などを dict にしたもの）
+
+    """
+
+    job_id: str
+    status: JOB_STATUS = JOB_STATUS.PENDING
+    created: float = dataclasses.field(default_factory=time.time)
+    progress: list[rasp_shutter.type_defs.ShutterExecEntry] = dataclasses.field(default_factory=list)
+    response: dict[str, Any] | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status.value,
+            "created": self.created,
+            "progress": [dataclasses.asdict(entry) for entry in self.progress],
+            "response": self.response,
+        }
+
+
+# 進捗を報告する関数（ジョブの処理に渡される）
+ProgressCallback = Callable[[rasp_shutter.type_defs.ShutterExecEntry], None]
+
+_lock = threading.Lock()
+# ワーカー固有のジョブ（登録順、上限を超えたら古い完了済みジョブから破棄）
+_jobs: dict[str, collections.OrderedDict[str, Job]] = {}
+_executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+
+def _get_jobs() -> collections.OrderedDict[str, Job]:
+    worker_id = my_lib.pytest_util.get_worker_id()
+    if worker_id not in _jobs:
+        _jobs[worker_id] = collections.OrderedDict()
+    return _jobs[worker_id]
+
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        # NOTE: 制御は control_lock で直列化されるので、ワーカーは 1 つで十分
+        _executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="control-job")
+    return _executor
+
+
+def _prune(jobs: collections.OrderedDict[str, Job]) -> None:
+    for job_id in list(jobs.keys()):
+        if len(jobs) <= rasp_shutter.control.config.JOB_HISTORY_SIZE:
+            break
+        if jobs[job_id].status in (JOB_STATUS.SUCCESS, JOB_STATUS.ERROR):
+            del jobs[job_id]
+
+
+def _notify() -> None:
+    my_lib.webapp.event.notify_event(my_lib.webapp.event.EVENT_TYPE.CONTROL)
+
+
+def submit(func: Callable[[ProgressCallback], dict[str, Any]]) -> Job:
+    """ジョブを登録する
+
+    func は進捗を報告する関数を受け取り、完了後のレスポンスを dict で返す。
+    dict の "result" が "success" 以外ならジョブは ERROR になる。
+    """
+    job = Job(job_id=uuid.uuid4().hex)
+    with _lock:
+        jobs = _get_jobs()
+        jobs[job.job_id] = job
+        _prune(jobs)
+
+    def _progress(entry: rasp_shutter.type_defs.ShutterExecEntry) -> None:
+        with _lock:
+            job.progress.append(entry)
+        _notify()
+
+    def _run() -> None:
+        with _lock:
+            job.status = JOB_STATUS.RUNNING
+        try:
+            response = func(_progress)
+            status = JOB_STATUS.SUCCESS if response.get("result") == "success" else JOB_STATUS.ERROR
+        except Exception:
+            logging.exception("Control job failed (job_id=%s)", job.job_id)
+            response = {"result": "error"}
+            status = JOB_STATUS.ERROR
+        with _lock:
+            job.response = response
+            job.status = status
+        _notify()
+
+    _get_executor().submit(_run)
+    return job
+
+
+def get(job_id: str) -> dict[str, Any] | None:
+    """ジョブの内容を返す（存在しなければ None）"""
+    with _lock:
+        job = _get_jobs().get(job_id)
+        return None if job is None else job.to_dict()
+
+
+def term() -> None:
+    """実行中のジョブの完了を待ってエグゼキュータを停止する"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
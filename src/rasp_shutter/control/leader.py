@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+マルチプロセス構成でのリーダー選出と、リーダーへのリクエスト転送
+
+gunicorn などで複数の Web ワーカープロセスを起動する場合（src/wsgi.py）、
+スケジューラ（schedule_worker）を動かすのは 1 プロセスだけにする必要があります。
+
+- 選出は stat ディレクトリのロックファイルに対する flock で行う。ロックを取れたプロセスが
+  リーダーになり、プロセスが終了するとロックは OS が解放するので、残ったプロセスのうち
+  次にロックを取れたものが自動的にリーダーを引き継ぐ
+- リーダーは同じ Flask アプリを Unix ソケットでも公開する
+- スケジュール・制御・シャッター状態・ジョブ・SSE・センサー値のキャッシュなど、プロセス内の状態に依存する
+  ルート（LEADER_PATHS）は、フォロワーが受けた場合はそのままリーダーへ転送する
+
+単一プロセス構成（src/app.py）では常にリーダーとして振る舞い、ロックもソケットも使いません。
+"""
+
+from __future__ import annotations
+
+import fcntl
+import functools
+import http.client
+import logging
+import os
+import pathlib
+import socket
+import threading
+from collections.abc import Callable
+
+import flask
+import werkzeug.serving
+
+import rasp_shutter.config
+import rasp_shutter.control.config
+
+# フォロワーがリーダーの選出を再試行する間隔（秒）
+ELECTION_RETRY_SEC = 2.0
+# リーダーへ転送したリクエストの応答待ちの最大時間（秒、SSE を除く）
+FORWARD_TIMEOUT_SEC = 60.0
+
+# リーダーへ転送するルート（URL_PREFIX からの相対パスの前方一致）
+LEADER_PATHS = (
+    "/api/shutter_ctrl",
+    "/api/scene_ctrl",
+    "/api/jobs/",
+    "/api/schedule_ctrl",
+    "/api/schedule_history",
+    "/api/healthz",
+    "/api/event",
+    # NOTE: センサー値のキャッシュはスケジューラ（リーダー）が更新するので、フォロワーが受けると
+    # キャッシュが無く毎回 InfluxDB から取得し直してしまう
+    "/api/sensor",
+)
+
+# 転送しないリクエストヘッダー（接続ごとに決まるもの）
+_HOP_BY_HOP_HEADERS = {"connection", "content-length", "host", "keep-alive", "transfer-encoding"}
+
+
+class LeaderElection:
+    """ロックファイルの flock によるリーダー選出"""
+
+    def __init__(self, lock_path: pathlib.Path) -> None:
+        self.lock_path = lock_path
+        self._fd: int | None = None
+
+    @property
+    def is_acquired(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """リーダーになれたら True を返す（既にリーダーなら何もしない）"""
+        if self._fd is not None:
+            return True
+
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+
+        # NOTE: 調査用に現在のリーダーの PID を書いておく（選出には使わない）
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """Unix ソケットに接続する HTTPConnection"""
+
+    def __init__(self, socket_path: pathlib.Path, timeout: float | None) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(str(self.socket_path))
+        self.sock = sock
+
+
+_multi_process = False
+_elected = threading.Event()
+_election: LeaderElection | None = None
+_server: werkzeug.serving.BaseWSGIServer | None = None
+_should_terminate = threading.Event()
+
+
+def is_multi_process() -> bool:
+    return _multi_process
+
+
+def is_leader() -> bool:
+    """このプロセスがスケジューラを動かすべきなら True（単一プロセス構成では常に True）"""
+    return not _multi_process or _elected.is_set()
+
+
+def _serve(app: flask.Flask, socket_path: pathlib.Path) -> None:
+    global _server
+    # NOTE: 前のリーダーが残したソケットファイルがあると bind できない
+    socket_path.unlink(missing_ok=True)
+    _server = werkzeug.serving.make_server(f"unix://{socket_path}", 0, app, threaded=True)
+    threading.Thread(target=_server.serve_forever, name="leader-ipc", daemon=True).start()
+
+
+def _election_worker(app: flask.Flask, on_elected: Callable[[], None]) -> None:
+    assert _election is not None  # noqa: S101
+    while not _should_terminate.is_set():
+        if _election.try_acquire():
+            logging.info("Elected as leader (pid=%d)", os.getpid())
+            on_elected()
+            _serve(app, rasp_shutter.control.config.LEADER_SOCKET.to_path())
+            _elected.set()
+            return
+        _should_terminate.wait(ELECTION_RETRY_SEC)
+
+
+def start(app: flask.Flask, on_elected: Callable[[], None]) -> None:
+    """マルチプロセス構成でリーダー選出を開始する
+
+    リーダーになれなかった場合もバックグラウンドで再試行を続け、
+    リーダーのプロセスが終了したら引き継ぐ。
+    """
+    global _multi_process, _election
+    _multi_process = True
+    _should_terminate.clear()
+    _election = LeaderElection(rasp_shutter.control.config.LEADER_LOCK.to_path())
+    threading.Thread(
+        target=_election_worker, args=(app, on_elected), name="leader-election", daemon=True
+    ).start()
+
+
+def term() -> None:
+    global _server
+    _should_terminate.set()
+    if _server is not None:
+        _server.shutdown()
+        _server = None
+    if _election is not None:
+        _election.release()
+    _elected.clear()
+
+
+def _forward(socket_path: pathlib.Path) -> flask.Response:
+    request = flask.request
+    is_stream = request.path.endswith("/api/event")
+    conn = _UnixHTTPConnection(socket_path, timeout=None if is_stream else FORWARD_TIMEOUT_SEC)
+    headers = {key: value for key, value in request.headers.items() if key.lower() not in _HOP_BY_HOP_HEADERS}
+    conn.request(request.method, request.full_path, body=request.get_data(), headers=headers)
+    upstream = conn.getresponse()
+    response_headers = [
+        (key, value) for key, value in upstream.getheaders() if key.lower() not in _HOP_BY_HOP_HEADERS
+    ]
+
+    if upstream.getheader("Content-Type", "").startswith("text/event-stream"):
+
+        def _stream():
+            try:
+                while chunk := upstream.read1(4096):
+                    yield chunk
+            finally:
+                conn.close()
+
+        return flask.Response(_stream(), status=upstream.status, headers=response_headers)
+
+    body = upstream.read()
+    conn.close()
+    return flask.Response(body, status=upstream.status, headers=response_headers)
+
+
+def _forward_to_leader(view: Callable) -> Callable:
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if is_leader():
+            return view(*args, **kwargs)
+        try:
+            return _forward(rasp_shutter.control.config.LEADER_SOCKET.to_path())
+        except OSError:
+            # NOTE: リーダーの切り替わり中（ソケットが無い・応答しない）
+            logging.warning("Leader is unavailable: %s", flask.request.path)
+            return flask.jsonify({"result": "error", "reason": "leader unavailable"}), 503
+
+    return wrapper
+
+
+def install(app: flask.Flask) -> None:
+    """LEADER_PATHS に該当するルートを、フォロワーではリーダーへ転送するようにする"""
+    prefixes = tuple(f"{rasp_shutter.config.URL_PREFIX}{path}" for path in LEADER_PATHS)
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules() if rule.rule.startswith(prefixes)}
+    for endpoint in endpoints:
+        app.view_functions[endpoint] = _forward_to_leader(app.view_functions[endpoint])
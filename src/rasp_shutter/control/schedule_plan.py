@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+シャッター別スケジュールの展開
+
+スケジュールデータ（全シャッター共通の open/close と、シャッター別の override）を
+シャッターごとの実効エントリに展開し、スケジューラ用のジョブ表と
+閾値ごとのシャッターグループを生成します。
+
+エントリ数が増えても、スケジューラに登録するジョブ数は (state, 時刻, 曜日) の
+組み合わせ数で頭打ちになり、明るさ判定は同じ閾値を持つシャッター群につき 1 回で済みます。
+"""
+
+from __future__ import annotations
+
+import datetime
+from dataclasses import dataclass
+from typing import Any
+
+import rasp_shutter.type_defs
+
+STATES = ("open", "close")
+THRESHOLD_FIELDS = ("lux", "solar_rad", "altitude")
+
+# (lux, solar_rad, altitude) の閾値タプル
+ThresholdKey = tuple[int, int, int]
+
+
+def threshold_key(entry: rasp_shutter.type_defs.ScheduleEntry | dict[str, Any]) -> ThresholdKey:
+    """エントリの閾値をグループ化用のキーに変換"""
+    return (entry["lux"], entry["solar_rad"], entry["altitude"])
+
+
+def weekday_index(now: datetime.datetime) -> int:
+    """datetime を wday リストのインデックス（日曜始まり）に変換"""
+    return now.isoweekday() % 7
+
+
+def time_to_minutes(schedule_time: str) -> int:
+    """HH:MM をその日の 0 時からの分に変換"""
+    hour, minute = schedule_time.split(":")
+    return int(hour) * 60 + int(minute)
+
+
+def resolve_entries(
+    schedule_data: rasp_shutter.type_defs.ScheduleData | dict[str, Any], shutter_count: int, state: str
+) -> list[rasp_shutter.type_defs.ScheduleEntry]:
+    """シャッターごとの実効エントリを返す（override が無いシャッターは共通エントリ）
+
+    範囲外のインデックスを指す override は無視する（設定からシャッターが減った場合に備える）。
+    """
+    entries = [schedule_data[state]] * shutter_count
+    for override in schedule_data.get("override", []):
+        for index in override["target"]:
+            if 0 <= index < shutter_count:
+                entries[index] = override[state]
+    return entries
+
+
+def build_job_table(
+    schedule_data: rasp_shutter.type_defs.ScheduleData | dict[str, Any], shutter_count: int
+) -> dict[tuple[str, str, int], list[int]]:
+    """(state, 時刻, 曜日) → 対象シャッターのインデックスリスト を生成
+
+    同じ時刻・曜日に動くシャッターは 1 つのジョブにまとめる。
+    """
+    table: dict[tuple[str, str, int], list[int]] = {}
+    for state in STATES:
+        for index, entry in enumerate(resolve_entries(schedule_data, shutter_count, state)):
+            if not entry["is_active"]:
+                continue
+            for wday, enabled in enumerate(entry["wday"]):
+                if enabled:
+                    table.setdefault((state, entry["time"], wday), []).append(index)
+    return table
+
+
+@dataclass(frozen=True)
+class SchedulePlan:
+    """スケジュールを展開した結果（スケジュール更新時に 1 度だけ生成する）
+
+    Attributes
+    ----------
+        entries: state → シャッターごとの実効エントリ
+        groups: state → 閾値キー → その閾値を持つシャッターのインデックス
+
+    """
+
+    entries: dict[str, list[rasp_shutter.type_defs.ScheduleEntry]]
+    groups: dict[str, dict[ThresholdKey, list[int]]]
+
+    def group(
+        self, state: str, index_list: list[int]
+    ) -> list[tuple[rasp_shutter.type_defs.ScheduleEntry, list[int]]]:
+        """指定シャッターを閾値ごとにまとめ、(代表エントリ, インデックス) のリストで返す"""
+        targets = set(index_list)
+        result = []
+        for indices in self.groups[state].values():
+            members = [index for index in indices if index in targets]
+            if members:
+                result.append((self.entries[state][members[0]], members))
+        return result
+
+    def active_groups(
+        self, state: str, wday: int
+    ) -> list[tuple[rasp_shutter.type_defs.ScheduleEntry, list[int]]]:
+        """指定曜日に有効なシャッターを閾値ごとにまとめて返す"""
+        entries = self.entries[state]
+        active = [index for index, entry in enumerate(entries) if entry["is_active"] and entry["wday"][wday]]
+        return self.group(state, active)
+
+
+def build_plan(
+    schedule_data: rasp_shutter.type_defs.ScheduleData | dict[str, Any], shutter_count: int
+) -> SchedulePlan:
+    """スケジュールデータを SchedulePlan に展開する"""
+    entries = {state: resolve_entries(schedule_data, shutter_count, state) for state in STATES}
+    groups: dict[str, dict[ThresholdKey, list[int]]] = {}
+    for state in STATES:
+        groups[state] = {}
+        for index, entry in enumerate(entries[state]):
+            groups[state].setdefault(threshold_key(entry), []).append(index)
+    return SchedulePlan(entries=entries, groups=groups)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+スケジュールの永続化
+
+スケジュールをバージョン付きの JSON として 1 ファイルに保存します。
+直前のスケジュールを一定数だけ履歴として同じファイルに持つので、ロールバックは
+メモリ上の履歴から即座に行えます。
+
+書き込みは一時ファイルに書いて fsync してから rename で置き換えるため、
+書き込み中に電源が落ちてもファイルは更新前か更新後のどちらかになります。
+読み込み時は形式とスケジュールの内容を検証し、現在のスケジュールが不正な場合は
+履歴のうち最新の正しいものに戻します。履歴の中の壊れた版は読み飛ばします。
+ファイル全体を読み込めない場合は、既定のスケジュールで上書きする前に
+quarantine() で *.corrupt に退避します。
+
+旧形式（my_lib.serializer による pickle）のファイルも読み込めます。次回の保存で新形式になります。
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import logging
+import os
+import pathlib
+import pickle
+from collections.abc import Callable
+from typing import Any
+
+# ファイル形式のバージョン（構造を変えたら上げる）
+FORMAT_VERSION = 1
+
+
+class ScheduleStorageError(Exception):
+    """スケジュールファイルを読み込めない"""
+
+
+@dataclasses.dataclass(frozen=True)
+class ScheduleRevision:
+    """保存したスケジュールの版
+
+    Attributes
+    ----------
+        version: 版番号（保存のたびに 1 ずつ増え、再起動をまたいでも続く）
+        saved_at: 保存時刻（ISO 8601、旧形式から読み込んだ場合は None）
+        schedule: スケジュールデータ
+
+    """
+
+    version: int
+    saved_at: str | None
+    schedule: dict[str, Any]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"version": self.version, "saved_at": self.saved_at, "schedule": self.schedule}
+
+
+@dataclasses.dataclass(frozen=True)
+class ScheduleDocument:
+    """スケジュールファイルの内容
+
+    Attributes
+    ----------
+        current: 現在のスケジュール
+        history: 以前のスケジュール（新しい順）
+
+    """
+
+    current: ScheduleRevision
+    history: tuple[ScheduleRevision, ...] = ()
+
+    def find(self, version: int) -> ScheduleRevision | None:
+        """指定した版を返す（無ければ None）"""
+        for revision in (self.current, *self.history):
+            if revision.version == version:
+                return revision
+        return None
+
+    def revise(self, schedule: dict[str, Any], saved_at: str, history_size: int) -> ScheduleDocument:
+        """新しい版を現在のスケジュールにした内容を返す（現在の版は履歴に回る）"""
+        history = (self.current, *self.history) if self.current.version > 0 else self.history
+        return ScheduleDocument(
+            current=ScheduleRevision(version=self.current.version + 1, saved_at=saved_at, schedule=schedule),
+            history=history[:history_size],
+        )
+
+
+def initial(schedule: dict[str, Any]) -> ScheduleDocument:
+    """まだ保存していない状態（版番号 0）の内容を返す"""
+    return ScheduleDocument(current=ScheduleRevision(version=0, saved_at=None, schedule=schedule))
+
+
+def _parse_revision(value: Any) -> ScheduleRevision:
+    if (
+        not isinstance(value, dict)
+        or not isinstance(value.get("version"), int)
+        or not isinstance(value.get("schedule"), dict)
+        or not isinstance(value.get("saved_at"), str | None)
+    ):
+        raise ScheduleStorageError("Schedule revision is malformed")
+    return ScheduleRevision(version=value["version"], saved_at=value["saved_at"], schedule=value["schedule"])
+
+
+def _parse_history(value: Any) -> tuple[ScheduleRevision, ...]:
+    """履歴を読み込む
+
+    NOTE: 履歴の 1 版が壊れているだけでファイル全体を読み込めなくすると、既定の
+    スケジュールに戻って次回の保存で全ての版が失われるので、壊れた版は読み飛ばす。
+    """
+    if not isinstance(value, list):
+        logging.warning("Schedule history is malformed, ignore it")
+        return ()
+
+    history: list[ScheduleRevision] = []
+    for position, revision in enumerate(value):
+        try:
+            history.append(_parse_revision(revision))
+        except ScheduleStorageError:
+            logging.warning("Skip malformed schedule revision in history (position: %d)", position)
+    return tuple(history)
+
+
+def _parse(content: bytes, validate: Callable[[dict], bool]) -> ScheduleDocument:
+    try:
+        value = json.loads(content)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ScheduleStorageError("Schedule file is not valid JSON") from e
+
+    if not isinstance(value, dict) or value.get("format") != FORMAT_VERSION:
+        raise ScheduleStorageError("Schedule file format is unsupported")
+
+    current = _parse_revision(value.get("current"))
+    history = _parse_history(value.get("history"))
+    if validate(current.schedule):
+        return ScheduleDocument(current=current, history=history)
+
+    # NOTE: 版番号は進めずに、最新の正しい版を現在のスケジュールとして扱う
+    for revision in history:
+        if validate(revision.schedule):
+            logging.warning(
+                "Schedule version %d is invalid, use version %d instead", current.version, revision.version
+            )
+            return ScheduleDocument(
+                current=ScheduleRevision(
+                    version=current.version, saved_at=revision.saved_at, schedule=revision.schedule
+                ),
+                history=history,
+            )
+    raise ScheduleStorageError(f"Schedule version {current.version} is invalid")
+
+
+def load(path: pathlib.Path, validate: Callable[[dict], bool]) -> ScheduleDocument | None:
+    """スケジュールファイルを読み込む
+
+    ファイルが無い場合は None を返し、読み込めない場合は ScheduleStorageError を送出する。
+    """
+    try:
+        content = path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+    if content.lstrip().startswith(b"{"):
+        return _parse(content, validate)
+
+    # NOTE: 旧形式（my_lib.serializer による pickle）
+    try:
+        schedule = pickle.loads(content)  # noqa: S301
+    except Exception as e:
+        raise ScheduleStorageError("Schedule file is neither JSON nor pickle") from e
+    if not isinstance(schedule, dict) or not validate(schedule):
+        raise ScheduleStorageError("Legacy schedule file is invalid")
+    return ScheduleDocument(current=ScheduleRevision(version=1, saved_at=None, schedule=schedule))
+
+
+def quarantine(path: pathlib.Path) -> pathlib.Path | None:
+    """読み込めないスケジュールファイルを *.corrupt に退避する（ファイルが無ければ None）
+
+    NOTE: 退避せずに既定のスケジュールを保存すると、履歴も含めて上書きされてしまう
+    """
+    corrupt_path = path.with_name(f"{path.name}.corrupt")
+    try:
+        path.replace(corrupt_path)
+    except FileNotFoundError:
+        return None
+    return corrupt_path
+
+
+def store(path: pathlib.Path, document: ScheduleDocument) -> None:
+    """スケジュールファイルをアトミックに書き換える"""
+    content = json.dumps(
+        {
+            "format": FORMAT_VERSION,
+            "current": document.current.to_dict(),
+            "history": [revision.to_dict() for revision in document.history],
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.tmp")
+    with temp_path.open("wb") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    temp_path.replace(path)
+
+    # NOTE: rename 自体を確実に永続化するため、ディレクトリも fsync する
+    dir_fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
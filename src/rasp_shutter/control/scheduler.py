@@ -1,34 +1,36 @@
 #!/usr/bin/env python3
+import collections
 import datetime
-import enum
+import hashlib
+import json
 import logging
+import pathlib
 import re
 import threading
 import time
 import traceback
+from dataclasses import dataclass
 from typing import Any
 
 import my_lib.footprint
 import my_lib.pytest_util
-import my_lib.serializer
 import my_lib.time
-import my_lib.webapp.log
 import schedule
 
+import rasp_shutter.clock
 import rasp_shutter.config
+import rasp_shutter.control.brightness
 import rasp_shutter.control.config
+import rasp_shutter.control.schedule_plan
+import rasp_shutter.control.schedule_storage
 import rasp_shutter.control.webapi.control
 import rasp_shutter.control.webapi.sensor
 import rasp_shutter.metrics.collector
+import rasp_shutter.notify
 import rasp_shutter.type_defs
 import rasp_shutter.util
 
-
-class BRIGHTNESS_STATE(enum.IntEnum):
-    DARK = 0
-    BRIGHT = 1
-    UNKNOWN = 2
-
+BRIGHTNESS_STATE = rasp_shutter.control.brightness.BRIGHTNESS_STATE
 
 RETRY_COUNT = 3
 
@@ -45,7 +47,11 @@ should_terminate = threading.Event()
 # Worker-specific instances for pytest-xdist parallel execution
 _scheduler_instances: dict[str, schedule.Scheduler] = {}
 _schedule_data_instances: dict[str, rasp_shutter.type_defs.ScheduleData | None] = {}
+# スケジュールデータを展開した SchedulePlan のキャッシュ（元データ・シャッター数と組で保持）
+_schedule_plan_instances: dict[str, tuple[object, int, rasp_shutter.control.schedule_plan.SchedulePlan]] = {}
 _schedule_lock_instances: dict[str, threading.Lock] = {}
+# 自動制御の明るさ判定フィルタ（ワーカー別）
+_brightness_filter_instances: dict[str, rasp_shutter.control.brightness.BrightnessFilter] = {}
 _auto_control_events: dict[str, threading.Event] = {}
 
 # ワーカー固有のループシーケンス番号（テスト同期用）
@@ -53,6 +59,9 @@ _loop_sequence: dict[str, int] = {}
 _loop_condition: dict[str, threading.Condition] = {}
 _loop_condition_lock = threading.Lock()
 
+# ワーカー固有のループ最終実行時刻（time.monotonic、/api/healthz 用）
+_heartbeat: dict[str, float] = {}
+
 # ワーカー固有のスケジュール適用世代番号（テスト同期用）
 # キュー経由で受け取ったスケジュールを set_schedule() でジョブ登録し終えるたびに進む。
 # NOTE: ループシーケンスは「ループが回った」ことしか保証しない。スケジュール保存
@@ -63,6 +72,34 @@ _loop_condition_lock = threading.Lock()
 # 時刻を進める必要がある。
 _schedule_applied_generation: dict[str, int] = {}
 
+
+@dataclass(frozen=True)
+class ScheduleSnapshot:
+    """メモリ上で保持する現在のスケジュール
+
+    Attributes
+    ----------
+        document: スケジュールファイルの内容（現在の版と履歴）
+        etag: 内容から計算した ETag（再起動をまたいでも内容が同じなら一致する）
+
+    """
+
+    document: rasp_shutter.control.schedule_storage.ScheduleDocument
+    etag: str
+
+    @property
+    def version(self) -> int:
+        return self.document.current.version
+
+    @property
+    def data(self) -> dict[str, Any]:
+        return self.document.current.schedule
+
+
+# 現在のスケジュール（ワーカー別）。ディスクからの読み込みは初回のみ
+_current_schedule: dict[str, ScheduleSnapshot] = {}
+_current_schedule_lock = threading.Lock()
+
 # センサーサンプリング間隔（秒）と前回サンプル時刻（ワーカー別）
 SENSOR_SAMPLE_INTERVAL_SEC = 60.0
 _last_sensor_sample_time: dict[str, datetime.datetime] = {}
@@ -93,6 +130,20 @@ def get_schedule_lock() -> threading.Lock:
     return _schedule_lock_instances[worker_id]
 
 
+def get_brightness_filter(
+    config: rasp_shutter.config.AppConfig,
+) -> rasp_shutter.control.brightness.BrightnessFilter:
+    """Get worker-specific brightness filter for pytest-xdist parallel execution"""
+    worker_id = my_lib.pytest_util.get_worker_id()
+
+    brightness_filter = _brightness_filter_instances.get(worker_id)
+    if brightness_filter is None or brightness_filter.config != config.brightness_filter:
+        brightness_filter = rasp_shutter.control.brightness.BrightnessFilter(config.brightness_filter)
+        _brightness_filter_instances[worker_id] = brightness_filter
+
+    return brightness_filter
+
+
 def clear_scheduler_jobs() -> None:
     """スケジューラのジョブとスケジュールデータをクリア（テスト用）
 
@@ -112,6 +163,10 @@ def clear_scheduler_jobs() -> None:
         _schedule_data_instances[worker_id] = None
         logging.debug("Cleared schedule data for worker %s", worker_id)
 
+    # 明るさ判定の履歴をクリア
+    if worker_id in _brightness_filter_instances:
+        _brightness_filter_instances[worker_id].reset()
+
 
 def reset_loop_sequence() -> None:
     """ループシーケンス番号をリセット（テスト用）
@@ -161,6 +216,12 @@ def _get_loop_condition() -> threading.Condition:
         return _loop_condition[worker_id]
 
 
+def get_scheduler_lag() -> float | None:
+    """スケジューラループの最終実行からの経過秒を返す（未起動なら None）"""
+    heartbeat = _heartbeat.get(my_lib.pytest_util.get_worker_id())
+    return None if heartbeat is None else time.monotonic() - heartbeat
+
+
 def get_loop_sequence() -> int:
     """現在のループシーケンス番号を取得"""
     worker_id = my_lib.pytest_util.get_worker_id()
@@ -265,6 +326,29 @@ def set_schedule_data(data: rasp_shutter.type_defs.ScheduleData | dict[str, Any]
     _schedule_data_instances[worker_id] = data  # type: ignore[assignment]
 
 
+def get_schedule_plan(
+    config: rasp_shutter.config.AppConfig,
+) -> rasp_shutter.control.schedule_plan.SchedulePlan | None:
+    """現在のスケジュールデータを展開した SchedulePlan を取得
+
+    NOTE: 毎秒の自動制御から呼ばれるため、スケジュールデータが差し替わったとき
+    （オブジェクトの同一性で判定）だけ展開し直す。
+    """
+    schedule_data = get_schedule_data()
+    if schedule_data is None:
+        return None
+
+    worker_id = my_lib.pytest_util.get_worker_id()
+    shutter_count = len(config.shutter)
+    cached = _schedule_plan_instances.get(worker_id)
+    if cached is not None and cached[0] is schedule_data and cached[1] == shutter_count:
+        return cached[2]
+
+    plan = rasp_shutter.control.schedule_plan.build_plan(schedule_data, shutter_count)
+    _schedule_plan_instances[worker_id] = (schedule_data, shutter_count, plan)
+    return plan
+
+
 def init() -> None:
     global should_terminate
 
@@ -303,44 +387,30 @@ def brightness_text(
     return ", ".join(text)
 
 
-def check_brightness(sense_data: rasp_shutter.type_defs.SensorData, action: str) -> BRIGHTNESS_STATE:
-    if not sense_data.lux.valid or not sense_data.solar_rad.valid:
-        return BRIGHTNESS_STATE.UNKNOWN
-
-    schedule_data = get_schedule_data()
-    if schedule_data is None:
-        # テスト間のクリア中は不明として扱う
+def check_brightness(
+    sense_data: rasp_shutter.type_defs.SensorData,
+    action: str,
+    entry: rasp_shutter.type_defs.ScheduleEntry | None = None,
+) -> BRIGHTNESS_STATE:
+    """明るさを判定する（entry 省略時は全シャッター共通のエントリの閾値を使う）"""
+    if not rasp_shutter.control.brightness.is_valid(sense_data):
         return BRIGHTNESS_STATE.UNKNOWN
 
-    # validがTrueの場合、valueはNoneではない
-    lux_value = sense_data.lux.value
-    solar_rad_value = sense_data.solar_rad.value
-    altitude_value = sense_data.altitude.value
-    assert lux_value is not None and solar_rad_value is not None  # noqa: S101
-    assert altitude_value is not None  # noqa: S101
+    if entry is None:
+        schedule_data = get_schedule_data()
+        if schedule_data is None:
+            # テスト間のクリア中は不明として扱う
+            return BRIGHTNESS_STATE.UNKNOWN
+        entry = schedule_data[action]  # type: ignore[literal-required]
 
-    if action == "close":
-        close_data = schedule_data["close"]
-        if (
-            lux_value < close_data["lux"]
-            or solar_rad_value < close_data["solar_rad"]
-            or altitude_value < close_data["altitude"]
-        ):
-            logging.info("Getting darker %s", brightness_text(sense_data, close_data))
-            return BRIGHTNESS_STATE.DARK
-        else:
-            return BRIGHTNESS_STATE.BRIGHT
-    else:
-        open_data = schedule_data["open"]
-        if (
-            lux_value > open_data["lux"]
-            and solar_rad_value > open_data["solar_rad"]
-            and altitude_value > open_data["altitude"]
-        ):
-            logging.info("Getting brighter %s", brightness_text(sense_data, open_data))
-            return BRIGHTNESS_STATE.BRIGHT
-        else:
-            return BRIGHTNESS_STATE.DARK
+    brightness = rasp_shutter.control.brightness.judge(
+        rasp_shutter.control.brightness.sensor_values(sense_data), action, entry
+    )
+    if action == "close" and brightness == BRIGHTNESS_STATE.DARK:
+        logging.info("Getting darker %s", brightness_text(sense_data, entry))
+    elif action == "open" and brightness == BRIGHTNESS_STATE.BRIGHT:
+        logging.info("Getting brighter %s", brightness_text(sense_data, entry))
+    return brightness
 
 
 def exec_shutter_control_impl(
@@ -349,11 +419,15 @@ def exec_shutter_control_impl(
     mode: rasp_shutter.control.webapi.control.CONTROL_MODE,
     sense_data: rasp_shutter.type_defs.SensorData,
     user: str,
+    index_list: list[int] | None = None,
 ) -> bool:
+    if index_list is None:
+        index_list = list(range(len(config.shutter)))
+
     try:
         # NOTE: Web 経由だと認証つけた場合に困るので、直接関数を呼ぶ
         response = rasp_shutter.control.webapi.control.set_shutter_state(
-            config, list(range(len(config.shutter))), state, mode, sense_data, user
+            config, index_list, state, mode, sense_data, user
         )
         # NOTE: 1台でも制御に失敗した場合は result が "error" になる。
         # 成功したシャッターは実行履歴により次回リトライ時に見合わせられるため、
@@ -371,15 +445,16 @@ def exec_shutter_control(
     mode: rasp_shutter.control.webapi.control.CONTROL_MODE,
     sense_data: rasp_shutter.type_defs.SensorData,
     user: str,
+    index_list: list[int] | None = None,
 ) -> bool:
     logging.debug("Execute shutter control")
 
     for _ in range(RETRY_COUNT):
-        if exec_shutter_control_impl(config, state, mode, sense_data, user):
+        if exec_shutter_control_impl(config, state, mode, sense_data, user, index_list=index_list):
             return True
         logging.debug("Retry")
 
-    my_lib.webapp.log.info("😵 シャッターの制御に失敗しました。")
+    rasp_shutter.notify.info("😵 シャッターの制御に失敗しました。")
     return False
 
 
@@ -393,12 +468,12 @@ def _is_auto_control_retry_suppressed(action: str) -> bool:
     if last_failure is None:
         return False
 
-    elapsed = (my_lib.time.now() - last_failure).total_seconds()
+    elapsed = (rasp_shutter.clock.now() - last_failure).total_seconds()
     return elapsed < rasp_shutter.control.config.AUTO_CONTROL_RETRY_INTERVAL_SEC
 
 
 def _record_auto_control_failure(action: str) -> None:
-    _last_auto_control_failure[_auto_control_failure_key(action)] = my_lib.time.now()
+    _last_auto_control_failure[_auto_control_failure_key(action)] = rasp_shutter.clock.now()
 
 
 def _clear_auto_control_failure(action: str) -> None:
@@ -411,15 +486,72 @@ def reset_auto_control_failure_state() -> None:
         _last_auto_control_failure.pop(_auto_control_failure_key(action), None)
 
 
+def _check_brightness_groups(
+    config: rasp_shutter.config.AppConfig,
+    sense_data: rasp_shutter.type_defs.SensorData,
+    action: str,
+    groups: list[tuple[rasp_shutter.type_defs.ScheduleEntry, list[int]]],
+) -> list[tuple[rasp_shutter.type_defs.ScheduleEntry, list[int], BRIGHTNESS_STATE]]:
+    """閾値ごとのシャッターグループについて、1 回のセンサー値で明るさを判定する
+
+    自動制御は毎秒判定するため、BrightnessFilter を通して閾値付近での判定の反転を抑える。
+    """
+    brightness_filter = get_brightness_filter(config)
+    timestamp = rasp_shutter.clock.now().timestamp()
+    return [
+        (entry, indices, brightness_filter.decide(sense_data, action, entry, timestamp))
+        for entry, indices in groups
+    ]
+
+
+def _just_opened(index: int) -> bool:
+    """開けてから EXEC_INTERVAL_AUTO_MIN 分経っていなければ True"""
+    elapsed_open = rasp_shutter.util.footprint_elapsed(
+        rasp_shutter.control.webapi.control.exec_stat_file("open", index)
+    )
+    if elapsed_open < rasp_shutter.control.config.EXEC_INTERVAL_AUTO_MIN * 60:
+        logging.debug("just opened before %d sec (%d)", elapsed_open, index)
+        return True
+    return False
+
+
+def _auto_close_elapsed(index: int) -> float:
+    """自動で閉めてからの経過秒数（履歴が無ければ inf）"""
+    return rasp_shutter.util.footprint_elapsed(
+        rasp_shutter.control.webapi.control.auto_close_stat_file(index)
+    )
+
+
+def _sensor_value_or(sensor_value: rasp_shutter.type_defs.SensorValue, default: float) -> float:
+    """ログ表示用に、無効なセンサー値を default に置き換える"""
+    if not sensor_value.valid or sensor_value.value is None:
+        return default
+    return sensor_value.value
+
+
+def _minutes_of_day(now: datetime.datetime) -> float:
+    return now.hour * 60 + now.minute + now.second / 60.0
+
+
+def _open_time_reached(
+    plan: rasp_shutter.control.schedule_plan.SchedulePlan, index: int, now: datetime.datetime
+) -> bool:
+    """シャッターごとの開ける時刻を過ぎていれば True"""
+    open_minutes = rasp_shutter.control.schedule_plan.time_to_minutes(plan.entries["open"][index]["time"])
+    return open_minutes <= _minutes_of_day(now)
+
+
 def shutter_auto_open(config: rasp_shutter.config.AppConfig) -> None:
     logging.debug("try auto open")
 
-    schedule_data = get_schedule_data()
-    if schedule_data is None:
+    plan = get_schedule_plan(config)
+    if plan is None:
         # テスト間のクリア中は何もしない
         logging.debug("Schedule data not set, skipping auto open")
         return
-    if not schedule_data["open"]["is_active"]:
+    now = rasp_shutter.clock.now()
+    groups = plan.active_groups("open", rasp_shutter.control.schedule_plan.weekday_index(now))
+    if not groups:
         logging.debug("inactive")
         return
 
@@ -431,23 +563,68 @@ def shutter_auto_open(config: rasp_shutter.config.AppConfig) -> None:
         logging.debug("NOT pending")
         return
 
-    elapsed_auto_close = rasp_shutter.util.footprint_elapsed(
-        rasp_shutter.control.config.STAT_AUTO_CLOSE.to_path()
-    )
-    if elapsed_auto_close < rasp_shutter.control.config.EXEC_INTERVAL_AUTO_MIN * 60:
-        # NOTE: 自動で閉めてから時間が経っていない場合は、処理を行わない。
-        logging.debug("just closed before %d", elapsed_auto_close)
-        return
-
     if _is_auto_control_retry_suppressed("open"):
         # NOTE: 直前の自動制御が失敗している場合は、リトライ間隔が経過するまで再試行しない。
         logging.debug("retry suppressed after failure")
         return
 
+    # NOTE: 閾値の異なるシャッターは明るくなる時刻が異なるため、pending 中に既に開けた
+    # シャッターは対象から外す（毎秒の再制御で「見合わせ」ログが出続けるのを防ぐ）。
+    # pending はシャッター共通なので、開ける時刻がまだ来ていないシャッターも外す
+    # （そのシャッターは自身の時刻ジョブで開ける）。
+    groups = [
+        (entry, remaining)
+        for entry, indices in groups
+        if (
+            remaining := [
+                index
+                for index in indices
+                if _open_time_reached(plan, index, now)
+                and rasp_shutter.util.footprint_elapsed(
+                    rasp_shutter.control.webapi.control.exec_stat_file("open", index)
+                )
+                >= elapsed_pending_open
+            ]
+        )
+    ]
+    if not groups:
+        logging.info("Clear Pending OPEN (all due shutters are already opened)")
+        rasp_shutter.util.footprint_clear(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
+        return
+
+    # NOTE: 自動で閉めてから時間が経っていないシャッターは、処理を行わない。
+    groups = [
+        (entry, remaining)
+        for entry, indices in groups
+        if (
+            remaining := [
+                index
+                for index in indices
+                if _auto_close_elapsed(index) >= rasp_shutter.control.config.EXEC_INTERVAL_AUTO_MIN * 60
+            ]
+        )
+    ]
+    if not groups:
+        logging.debug("just closed")
+        return
+
     sense_data = rasp_shutter.control.webapi.sensor.get_sensor_data(config)
-    if check_brightness(sense_data, "open") == BRIGHTNESS_STATE.BRIGHT:
+    judged = _check_brightness_groups(config, sense_data, "open", groups)
+    bright_indices = sorted(
+        index
+        for _, indices, brightness in judged
+        if brightness == BRIGHTNESS_STATE.BRIGHT
+        for index in indices
+    )
+    dark_groups = [
+        (entry, indices) for entry, indices, brightness in judged if brightness != BRIGHTNESS_STATE.BRIGHT
+    ]
+
+    if bright_indices:
         sensor_text = rasp_shutter.control.webapi.control.sensor_text(sense_data)
-        my_lib.webapp.log.info(f"🌅 暗くて延期されていましたが、明るくなってきたので開けます。{sensor_text}")
+        rasp_shutter.notify.info(
+            f"🌅 暗くて延期されていましたが、明るくなってきたので開けます。{sensor_text}"
+        )
 
         if exec_shutter_control(
             config,
@@ -455,21 +632,30 @@ def shutter_auto_open(config: rasp_shutter.config.AppConfig) -> None:
             rasp_shutter.control.webapi.control.CONTROL_MODE.AUTO,
             sense_data,
             "sensor",
+            index_list=bright_indices,
         ):
             # NOTE: 制御に成功した場合のみ状態を進める。失敗時は pending を維持し、
             # リトライ間隔経過後に再試行できるようにする。
-            my_lib.footprint.clear(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
-            my_lib.footprint.clear(rasp_shutter.control.config.STAT_AUTO_CLOSE.to_path())
+            # まだ暗いシャッターが残っている場合も pending を維持する。
+            for index in bright_indices:
+                rasp_shutter.util.footprint_clear(
+                    rasp_shutter.control.webapi.control.auto_close_stat_file(index)
+                )
+            if not dark_groups:
+                rasp_shutter.util.footprint_clear(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
             _clear_auto_control_failure("open")
         else:
             _record_auto_control_failure("open")
     else:
         logging.debug(
             "Skip pendding open (solar_rad: %.1f W/m^2, lux: %.1f LUX)",
-            sense_data.solar_rad.value if sense_data.solar_rad.valid else -1,
-            sense_data.lux.value if sense_data.lux.valid else -1,
+            _sensor_value_or(sense_data.solar_rad, -1),
+            _sensor_value_or(sense_data.lux, -1),
         )
         sensor_unknown = not sense_data.lux.valid or not sense_data.solar_rad.valid
+        if not sensor_unknown and all(brightness == BRIGHTNESS_STATE.UNKNOWN for _, _, brightness in judged):
+            # NOTE: BrightnessFilter の判定が確定する（最小継続時間が経つ）までは見合わせとして記録しない
+            return
         reason = "sensor_invalid" if sensor_unknown else "too_dark"
         rasp_shutter.metrics.collector.record_postpone(
             config.metrics.data,
@@ -477,49 +663,62 @@ def shutter_auto_open(config: rasp_shutter.config.AppConfig) -> None:
             trigger="auto",
             reason=reason,
             sensor_data=sense_data,
-            threshold=dict(schedule_data["open"]),
+            threshold=dict(dark_groups[0][0]),
         )
 
 
 def conv_schedule_time_to_datetime(schedule_time: str) -> datetime.datetime:
-    now = my_lib.time.now()
+    now = rasp_shutter.clock.now()
     time_obj = datetime.datetime.strptime(schedule_time, "%H:%M").time()
     return datetime.datetime.combine(now.date(), time_obj, tzinfo=my_lib.time.get_zoneinfo())
 
 
+def _in_auto_close_window(
+    plan: rasp_shutter.control.schedule_plan.SchedulePlan, index: int, now: datetime.datetime
+) -> bool:
+    """開ける時刻の 1 分後から閉める時刻の前までの間なら True（シャッターごとの時刻で判定）"""
+    minutes = _minutes_of_day(now)
+    open_minutes = rasp_shutter.control.schedule_plan.time_to_minutes(plan.entries["open"][index]["time"])
+    close_minutes = rasp_shutter.control.schedule_plan.time_to_minutes(plan.entries["close"][index]["time"])
+    # NOTE: 開ける時刻付近・開ける時刻より前・閉める時刻以降（スケジュールで閉める）は処理しない
+    return open_minutes + 1 <= minutes < close_minutes
+
+
 def shutter_auto_close(config: rasp_shutter.config.AppConfig) -> None:
     logging.debug("try auto close")
 
-    schedule_data = get_schedule_data()
-    if schedule_data is None:
+    plan = get_schedule_plan(config)
+    if plan is None:
         # テスト間のクリア中は何もしない
         logging.debug("Schedule data not set, skipping auto close")
         return
-    if not schedule_data["close"]["is_active"]:
+
+    now = rasp_shutter.clock.now()
+    groups = plan.active_groups("close", rasp_shutter.control.schedule_plan.weekday_index(now))
+    if not groups:
         logging.debug("inactive")
         return
-    elif abs(
-        my_lib.time.now() - conv_schedule_time_to_datetime(schedule_data["open"]["time"])
-    ) < datetime.timedelta(minutes=1):
-        # NOTE: 開ける時刻付近の場合は処理しない
-        logging.debug("near open time")
-        return
-    elif (
-        my_lib.time.now() <= conv_schedule_time_to_datetime(schedule_data["open"]["time"])
-    ) or my_lib.footprint.exists(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path()):
-        # NOTE: 開ける時刻よりも早い場合は処理しない
+    elif rasp_shutter.util.footprint_exists(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path()):
+        # NOTE: 暗くて開けるのを延期している場合は処理しない
         logging.debug("before open time")
         return
-    elif conv_schedule_time_to_datetime(schedule_data["close"]["time"]) <= my_lib.time.now():
-        # NOTE: スケジュールで閉めていた場合は処理しない
-        logging.debug("after close time")
-        return
-    elif (
-        rasp_shutter.util.footprint_elapsed(rasp_shutter.control.config.STAT_AUTO_CLOSE.to_path())
-        <= rasp_shutter.control.config.ELAPSED_AUTO_CLOSE_MAX_SEC
-    ):
-        # NOTE: 12時間以内に自動で閉めていた場合は処理しない
-        logging.debug("already close")
+
+    # NOTE: 12時間以内に自動で閉めていたシャッターは処理しない（閾値の異なる他のシャッターは
+    # 暗くなる時刻が異なるので、シャッターごとに判定する）
+    groups = [
+        (entry, in_window)
+        for entry, indices in groups
+        if (
+            in_window := [
+                index
+                for index in indices
+                if _in_auto_close_window(plan, index, now)
+                and _auto_close_elapsed(index) > rasp_shutter.control.config.ELAPSED_AUTO_CLOSE_MAX_SEC
+            ]
+        )
+    ]
+    if not groups:
+        logging.debug("out of auto close window or already close")
         return
 
     if _is_auto_control_retry_suppressed("close"):
@@ -527,52 +726,66 @@ def shutter_auto_close(config: rasp_shutter.config.AppConfig) -> None:
         logging.debug("retry suppressed after failure")
         return
 
-    for index in range(len(config.shutter)):
-        elapsed_open = rasp_shutter.util.footprint_elapsed(
-            rasp_shutter.control.webapi.control.exec_stat_file("open", index)
-        )
-        if elapsed_open < rasp_shutter.control.config.EXEC_INTERVAL_AUTO_MIN * 60:
-            # NOTE: 自動で開けてから時間が経っていない場合は、処理を行わない。
-            logging.debug("just opened before %d sec (%d)", elapsed_open, index)
-            return
+    # NOTE: 開けてから時間が経っていないシャッターだけを対象から外す。他のシャッター
+    # （閾値の異なるグループを含む）の自動で閉める制御は止めない。
+    groups = [
+        (entry, remaining)
+        for entry, indices in groups
+        if (remaining := [index for index in indices if not _just_opened(index)])
+    ]
+    if not groups:
+        logging.debug("just opened")
+        return
 
     sense_data = rasp_shutter.control.webapi.sensor.get_sensor_data(config)
-    if check_brightness(sense_data, "close") == BRIGHTNESS_STATE.DARK:
+    dark_indices = sorted(
+        index
+        for _, indices, brightness in _check_brightness_groups(config, sense_data, "close", groups)
+        if brightness == BRIGHTNESS_STATE.DARK
+        for index in indices
+    )
+    if dark_indices:
         sensor_text = rasp_shutter.control.webapi.control.sensor_text(sense_data)
-        my_lib.webapp.log.info(
+        rasp_shutter.notify.info(
             f"🌇 予定より早いですが、暗くなってきたので閉めます。{sensor_text}",
         )
 
+        # NOTE: 自動で閉めた履歴は閉めたシャッターにだけ記録する。残りのシャッターは
+        # 暗くなった時点で自動で、または各自のスケジュール時刻に閉められる。
         if exec_shutter_control(
             config,
             "close",
             rasp_shutter.control.webapi.control.CONTROL_MODE.AUTO,
             sense_data,
             "sensor",
+            index_list=dark_indices,
         ):
             # NOTE: 制御に成功した場合のみ状態を進める。失敗時は AUTO_CLOSE を更新せず、
             # リトライ間隔経過後に再試行できるようにする。
-            logging.info("Set Auto CLOSE")
-            my_lib.footprint.update(rasp_shutter.control.config.STAT_AUTO_CLOSE.to_path())
+            logging.info("Set Auto CLOSE (%s)", ",".join(str(index) for index in dark_indices))
+            for index in dark_indices:
+                rasp_shutter.util.footprint_update(
+                    rasp_shutter.control.webapi.control.auto_close_stat_file(index)
+                )
             _clear_auto_control_failure("close")
 
             # NOTE: まだ明るくなる可能性がある時間帯の場合、再度自動的に開けるようにする
-            hour = my_lib.time.now().hour
+            hour = rasp_shutter.clock.now().hour
             if (
                 hour > rasp_shutter.control.config.HOUR_MORNING_START
                 and hour < rasp_shutter.control.config.HOUR_PENDING_OPEN_END
             ):
                 logging.info("Set Pending OPEN")
-                my_lib.footprint.update(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
+                rasp_shutter.util.footprint_update(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
         else:
             _record_auto_control_failure("close")
 
-    else:  # pragma: no cover
-        # NOTE: pending close の制御は無いのでここには来ない。
+    else:
+        # NOTE: どのグループもまだ暗くない（または判定が安定していない・センサー値が不明）
         logging.debug(
-            "Skip pendding close (solar_rad: %.1f W/m^2, lux: %.1f LUX)",
-            sense_data.solar_rad.value if sense_data.solar_rad.valid else -1,
-            sense_data.lux.value if sense_data.lux.valid else -1,
+            "Skip auto close (solar_rad: %.1f W/m^2, lux: %.1f LUX)",
+            _sensor_value_or(sense_data.solar_rad, -1),
+            _sensor_value_or(sense_data.lux, -1),
         )
 
 
@@ -584,14 +797,16 @@ def shutter_pending_close(config: rasp_shutter.config.AppConfig) -> None:
     上限時間を超えたら諦めて通知する。
     """
     pending_close_path = rasp_shutter.control.config.STAT_PENDING_CLOSE.to_path()
-    if not my_lib.footprint.exists(pending_close_path):
+    if not rasp_shutter.util.footprint_exists(pending_close_path):
         return
 
     elapsed_pending_close = rasp_shutter.util.footprint_elapsed(pending_close_path)
     if elapsed_pending_close > rasp_shutter.control.config.ELAPSED_PENDING_CLOSE_MAX_SEC:
         # NOTE: 上限を超えたら一度だけ通知して諦める（footprint を消すことで再通知を防ぐ）
-        my_lib.footprint.clear(pending_close_path)
-        my_lib.webapp.log.error("😵 閉め制御の再試行を諦めました。シャッターが開いたままの可能性があります。")
+        rasp_shutter.util.footprint_clear(pending_close_path)
+        rasp_shutter.notify.error(
+            "😵 閉め制御の再試行を諦めました。シャッターが開いたままの可能性があります。"
+        )
         return
 
     if _is_auto_control_retry_suppressed("close"):
@@ -599,7 +814,7 @@ def shutter_pending_close(config: rasp_shutter.config.AppConfig) -> None:
         return
 
     sense_data = rasp_shutter.control.webapi.sensor.get_sensor_data(config)
-    my_lib.webapp.log.info("🔁 スケジュールで閉められなかったので、再試行します。")
+    rasp_shutter.notify.info("🔁 スケジュールで閉められなかったので、再試行します。")
     if exec_shutter_control(
         config,
         "close",
@@ -607,7 +822,7 @@ def shutter_pending_close(config: rasp_shutter.config.AppConfig) -> None:
         sense_data,
         "scheduler",
     ):
-        my_lib.footprint.clear(pending_close_path)
+        rasp_shutter.util.footprint_clear(pending_close_path)
         _clear_auto_control_failure("close")
     else:
         _record_auto_control_failure("close")
@@ -634,7 +849,7 @@ def maybe_record_sensor_sample(config: rasp_shutter.config.AppConfig) -> None:
         return
 
     worker_id = my_lib.pytest_util.get_worker_id()
-    now = my_lib.time.now()
+    now = rasp_shutter.clock.now()
     last = _last_sensor_sample_time.get(worker_id)
     if last is not None and (now - last).total_seconds() < SENSOR_SAMPLE_INTERVAL_SEC:
         return
@@ -663,7 +878,7 @@ def reset_sensor_sample_state() -> None:
 
 
 def shutter_auto_control(config: rasp_shutter.config.AppConfig) -> None:
-    hour = my_lib.time.now().hour
+    hour = rasp_shutter.clock.now().hour
     cfg = rasp_shutter.control.config
 
     # NOTE: 時間帯によって自動制御の内容を分ける
@@ -694,7 +909,7 @@ def _schedule_pending_open(
     """
     rasp_shutter.control.webapi.control.cmd_hist_push({"cmd": "pending", "state": "open"})
     logging.info("Set Pending OPEN")
-    my_lib.footprint.update(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
+    rasp_shutter.util.footprint_update(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
     rasp_shutter.metrics.collector.record_postpone(
         config.metrics.data,
         intended_action="open",
@@ -706,21 +921,27 @@ def _schedule_pending_open(
     )
 
 
-def shutter_schedule_control(config: rasp_shutter.config.AppConfig, state: str) -> None:
+def shutter_schedule_control(
+    config: rasp_shutter.config.AppConfig, state: str, index_list: list[int] | None = None
+) -> None:
+    """スケジュールに従って制御する（index_list 省略時は全シャッター）
+
+    同じ時刻に動くシャッターは 1 つのジョブにまとめられており、センサー値の取得は 1 回、
+    明るさ判定は閾値の異なるグループごとに 1 回だけ行う。
+    """
     logging.info("Execute schedule control")
 
     sense_data = rasp_shutter.control.webapi.sensor.get_sensor_data(config)
 
-    schedule_data = get_schedule_data()
-    if schedule_data is None:
+    plan = get_schedule_plan(config)
+    if plan is None:
         # テスト間のクリア中は何もしない
         logging.debug("Schedule data not set, skipping schedule control")
         _signal_auto_control_completed()
         return
 
-    schedule_dict: dict[str, Any] = {**schedule_data}
-    scheduled_time = conv_schedule_time_to_datetime(schedule_dict[state]["time"])
-    threshold = {**schedule_dict[state]}
+    if index_list is None:
+        index_list = list(range(len(config.shutter)))
 
     sensor_unknown = not sense_data.lux.valid or not sense_data.solar_rad.valid
 
@@ -729,60 +950,83 @@ def shutter_schedule_control(config: rasp_shutter.config.AppConfig, state: str)
         # スケジュールに従って閉める。夕方にセンサーが一時的に落ちていても
         # シャッターが夜間開けっ放しにならないようにする。
         if sensor_unknown:
-            my_lib.webapp.log.info("⚠️ センサー値が不明ですが、スケジュールに従ってシャッターを閉めます。")
+            rasp_shutter.notify.info("⚠️ センサー値が不明ですが、スケジュールに従ってシャッターを閉めます。")
         if exec_shutter_control(
             config,
             state,
             rasp_shutter.control.webapi.control.CONTROL_MODE.SCHEDULE,
             sense_data,
             "scheduler",
+            index_list=index_list,
         ):
             # NOTE: 閉め制御に成功した場合のみ、暗くて延期されていた開ける制御を取り消す。
             # 失敗時は pending を維持し、状態を進めない。
-            my_lib.footprint.clear(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
+            rasp_shutter.util.footprint_clear(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
         else:
             # NOTE: 閉め時刻を過ぎると通常経路では誰も再試行しないため（夜間開けっ放しになる）、
             # footprint を設定して shutter_pending_close() による再試行を有効にする。
             logging.info("Set Pending CLOSE")
-            my_lib.footprint.update(rasp_shutter.control.config.STAT_PENDING_CLOSE.to_path())
+            rasp_shutter.util.footprint_update(rasp_shutter.control.config.STAT_PENDING_CLOSE.to_path())
             _record_auto_control_failure("close")
         _signal_auto_control_completed()
         return
 
     # state == "open"
-    brightness = check_brightness(sense_data, state)
-
-    if brightness == BRIGHTNESS_STATE.UNKNOWN:
-        # NOTE: センサー値が不明なので開けるのを見合わせるが、too_dark と同様に
-        # pending を設定し、センサー復旧後に明るければ shutter_auto_open() が開ける。
-        error_sensor = []
-        if not sense_data.solar_rad.valid:
-            error_sensor.append("日射センサ")
-        if not sense_data.lux.valid:
-            error_sensor.append("照度センサ")
-
-        error_sensor_text = "と".join(error_sensor)
-        my_lib.webapp.log.error(
-            f"😵 {error_sensor_text}の値が不明なので開けるのを見合わせました。明るくなり次第開けます。"
+    # NOTE: 時刻ジョブは 1 回きりの判定なので、フィルタを通さず瞬時値で判定する
+    judged = [
+        (entry, indices, check_brightness(sense_data, state, entry))
+        for entry, indices in plan.group(state, index_list)
+    ]
+    bright_indices = sorted(
+        index
+        for _, indices, brightness in judged
+        if brightness == BRIGHTNESS_STATE.BRIGHT
+        for index in indices
+    )
+    postponed = [
+        (entry, brightness) for entry, _, brightness in judged if brightness != BRIGHTNESS_STATE.BRIGHT
+    ]
+
+    if postponed:
+        entry, brightness = postponed[0]
+        scheduled_time = conv_schedule_time_to_datetime(entry["time"])
+        threshold = {**entry}
+
+        if brightness == BRIGHTNESS_STATE.UNKNOWN:
+            # NOTE: センサー値が不明なので開けるのを見合わせるが、too_dark と同様に
+            # pending を設定し、センサー復旧後に明るければ shutter_auto_open() が開ける。
+            error_sensor = []
+            if not sense_data.solar_rad.valid:
+                error_sensor.append("日射センサ")
+            if not sense_data.lux.valid:
+                error_sensor.append("照度センサ")
+
+            error_sensor_text = "と".join(error_sensor)
+            rasp_shutter.notify.error(
+                f"😵 {error_sensor_text}の値が不明なので開けるのを見合わせました。明るくなり次第開けます。"
+            )
+            _schedule_pending_open(config, sense_data, "sensor_invalid", threshold, scheduled_time)
+        else:
+            sensor_text = rasp_shutter.control.webapi.control.sensor_text(sense_data)
+            rasp_shutter.notify.info(f"📝 まだ暗いので開けるのを見合わせました。{sensor_text}")
+            _schedule_pending_open(config, sense_data, "too_dark", threshold, scheduled_time)
+
+    # NOTE: 明るいと判定されたシャッターのみ、スケジュールに従って開ける
+    if bright_indices and not exec_shutter_control(
+        config,
+        state,
+        rasp_shutter.control.webapi.control.CONTROL_MODE.SCHEDULE,
+        sense_data,
+        "scheduler",
+        index_list=bright_indices,
+    ):
+        # NOTE: 失敗時は pending open を設定し、shutter_auto_open() による
+        # 再試行（明るいままならリトライ間隔経過後に開ける）を有効にする。
+        entry = plan.entries[state][bright_indices[0]]
+        _schedule_pending_open(
+            config, sense_data, "control_failure", {**entry}, conv_schedule_time_to_datetime(entry["time"])
         )
-        _schedule_pending_open(config, sense_data, "sensor_invalid", threshold, scheduled_time)
-    elif brightness == BRIGHTNESS_STATE.DARK:
-        sensor_text = rasp_shutter.control.webapi.control.sensor_text(sense_data)
-        my_lib.webapp.log.info(f"📝 まだ暗いので開けるのを見合わせました。{sensor_text}")
-        _schedule_pending_open(config, sense_data, "too_dark", threshold, scheduled_time)
-    else:
-        # NOTE: ここにきたときのみ、スケジュールに従って開ける
-        if not exec_shutter_control(
-            config,
-            state,
-            rasp_shutter.control.webapi.control.CONTROL_MODE.SCHEDULE,
-            sense_data,
-            "scheduler",
-        ):
-            # NOTE: 失敗時は pending open を設定し、shutter_auto_open() による
-            # 再試行（明るいままならリトライ間隔経過後に開ける）を有効にする。
-            _schedule_pending_open(config, sense_data, "control_failure", threshold, scheduled_time)
-            _record_auto_control_failure("open")
+        _record_auto_control_failure("open")
 
     # テスト同期用の完了シグナル
     _signal_auto_control_completed()
@@ -797,48 +1041,97 @@ SCHEDULE_FIELD_TYPES: dict[str, type] = {
 }
 
 
-def schedule_validate(schedule_data: dict) -> bool:
-    if set(schedule_data.keys()) != {"open", "close"}:
-        # NOTE: キー名まで検証しないと、"open"/"close" 以外の state のジョブが
-        # スケジューラに登録され、不整合な制御が実行されてしまう。
-        logging.warning("Schedule keys are invalid: %s", sorted(schedule_data.keys()))
+def _schedule_entry_validate(entry: Any) -> bool:
+    if not isinstance(entry, dict):
+        logging.warning("Type of entry is invalid: %s", type(entry))
+        return False
+
+    for key in ["is_active", "time", "wday", "solar_rad", "lux", "altitude"]:
+        if key not in entry:
+            logging.warning("Does not contain %s", key)
+            return False
+
+    # 辞書ベースのループで型チェック
+    for field, expected_type in SCHEDULE_FIELD_TYPES.items():
+        if not isinstance(entry.get(field), expected_type):
+            logging.warning("Type of %s is invalid: %s", field, type(entry.get(field)))
+            return False
+
+    if not SCHEDULE_TIME_PATTERN.fullmatch(entry["time"]):
+        logging.warning("Format of time is invalid: %s", entry["time"])
+        return False
+    if len(entry["wday"]) != 7:
+        logging.warning("Count of wday is Invalid: %d", len(entry["wday"]))
         return False
+    for i, wday_flag in enumerate(entry["wday"]):
+        if not isinstance(wday_flag, bool):
+            logging.warning("Type of wday[%d] is Invalid: %s", i, type(entry["wday"][i]))
+            return False
+    return True
+
 
-    for entry in schedule_data.values():
-        for key in ["is_active", "time", "wday", "solar_rad", "lux", "altitude"]:
-            if key not in entry:
-                logging.warning("Does not contain %s", key)
-                return False
+def _schedule_override_validate(override_list: Any) -> bool:
+    if not isinstance(override_list, list):
+        logging.warning("Type of override is invalid: %s", type(override_list))
+        return False
 
-        # 辞書ベースのループで型チェック
-        for field, expected_type in SCHEDULE_FIELD_TYPES.items():
-            if not isinstance(entry.get(field), expected_type):
-                logging.warning("Type of %s is invalid: %s", field, type(entry.get(field)))
-                return False
+    seen: set[int] = set()
+    for override in override_list:
+        if not isinstance(override, dict) or set(override.keys()) != {"target", "open", "close"}:
+            logging.warning("Override keys are invalid: %s", override)
+            return False
 
-        if not SCHEDULE_TIME_PATTERN.fullmatch(entry["time"]):
-            logging.warning("Format of time is invalid: %s", entry["time"])
+        target = override["target"]
+        # NOTE: bool は int のサブクラスなので明示的に除外する
+        if (
+            not isinstance(target, list)
+            or len(target) == 0
+            or not all(isinstance(index, int) and not isinstance(index, bool) for index in target)
+        ):
+            logging.warning("Target of override is invalid: %s", target)
             return False
-        if len(entry["wday"]) != 7:
-            logging.warning("Count of wday is Invalid: %d", len(entry["wday"]))
+        if any(index < 0 for index in target):
+            logging.warning("Target of override contains negative index: %s", target)
+            return False
+        # NOTE: 同じシャッターが複数の override に含まれると、どちらに従うか曖昧になる
+        if seen.intersection(target) or len(set(target)) != len(target):
+            logging.warning("Target of override is duplicated: %s", target)
+            return False
+        seen.update(target)
+
+        if not _schedule_entry_validate(override["open"]) or not _schedule_entry_validate(override["close"]):
             return False
-        for i, wday_flag in enumerate(entry["wday"]):
-            if not isinstance(wday_flag, bool):
-                logging.warning("Type of wday[%d] is Invalid: %s", i, type(entry["wday"][i]))
-                return False
     return True
 
 
-def schedule_store(schedule_data: dict) -> None:
+def schedule_validate(schedule_data: dict) -> bool:
+    keys = set(schedule_data.keys())
+    if keys not in ({"open", "close"}, {"open", "close", "override"}):
+        # NOTE: キー名まで検証しないと、"open"/"close" 以外の state のジョブが
+        # スケジューラに登録され、不整合な制御が実行されてしまう。
+        logging.warning("Schedule keys are invalid: %s", sorted(schedule_data.keys()))
+        return False
+
+    if not all(_schedule_entry_validate(schedule_data[state]) for state in ["open", "close"]):
+        return False
+
+    return "override" not in schedule_data or _schedule_override_validate(schedule_data["override"])
+
+
+def _get_schedule_path() -> pathlib.Path:
     schedule_path = rasp_shutter.config.get_environment().schedule_file_path
     assert schedule_path is not None, "schedule_file_path not configured"  # noqa: S101
+    # NOTE: pytest-xdist 実行時はワーカーごとに別ファイルにする（旧 my_lib.serializer と同じ扱い）
+    return my_lib.pytest_util.get_path(schedule_path)
+
 
+def schedule_store(document: rasp_shutter.control.schedule_storage.ScheduleDocument) -> None:
     try:
         with get_schedule_lock():
-            my_lib.serializer.store(schedule_path, schedule_data)
+            rasp_shutter.control.schedule_storage.store(_get_schedule_path(), document)
     except Exception:
         logging.exception("Failed to save schedule settings.")
-        my_lib.webapp.log.error("😵 スケジュール設定の保存に失敗しました。")
+        rasp_shutter.notify.error("😵 スケジュール設定の保存に失敗しました。")
 
 
 def gen_schedule_default():
@@ -868,37 +1161,92 @@ def gen_schedule_default():
     }
 
 
-def schedule_load() -> dict:
+def schedule_load() -> rasp_shutter.control.schedule_storage.ScheduleDocument:
     schedule_default = gen_schedule_default()
-    schedule_path = rasp_shutter.config.get_environment().schedule_file_path
-    assert schedule_path is not None, "schedule_file_path not configured"  # noqa: S101
 
     try:
         with get_schedule_lock():
-            schedule_data = my_lib.serializer.load(schedule_path, schedule_default)
-            if schedule_validate(schedule_data):
-                return schedule_data
+            schedule_path = _get_schedule_path()
+            try:
+                document = rasp_shutter.control.schedule_storage.load(schedule_path, schedule_validate)
+            except rasp_shutter.control.schedule_storage.ScheduleStorageError:
+                # NOTE: 既定のスケジュールで上書き保存される前に、元のファイルを残しておく
+                corrupt_path = rasp_shutter.control.schedule_storage.quarantine(schedule_path)
+                logging.warning("Moved unreadable schedule file to %s", corrupt_path)
+                raise
+        if document is not None:
+            return document
     except Exception:
         logging.exception("Failed to load schedule settings.")
-        my_lib.webapp.log.error("😵 スケジュール設定の読み出しに失敗しました。")
+        rasp_shutter.notify.error("😵 スケジュール設定の読み出しに失敗しました。")
+
+    return rasp_shutter.control.schedule_storage.initial(schedule_default)
+
+
+def _schedule_etag(schedule_data: dict) -> str:
+    digest = hashlib.sha256(json.dumps(schedule_data, sort_keys=True).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _get_current_schedule_locked(worker_id: str) -> ScheduleSnapshot:
+    current = _current_schedule.get(worker_id)
+    if current is None:
+        document = schedule_load()
+        current = ScheduleSnapshot(document=document, etag=_schedule_etag(document.current.schedule))
+        _current_schedule[worker_id] = current
+    return current
+
+
+def get_current_schedule() -> ScheduleSnapshot:
+    """現在のスケジュールを返す（初回のみディスクから読み込む）"""
+    with _current_schedule_lock:
+        return _get_current_schedule_locked(my_lib.pytest_util.get_worker_id())
+
+
+def replace_current_schedule(schedule_data: dict) -> ScheduleSnapshot:
+    """スケジュールを新しい版として差し替え、ディスクに保存する（schedule_validate 済みであること）
+
+    NOTE: 読み出し側は ScheduleSnapshot を丸ごと受け取るので、差し替えはアトミックに見える。
+    保存に失敗してもメモリ上の差し替えは行う（次回の保存で書き込まれる）。
+    """
+    worker_id = my_lib.pytest_util.get_worker_id()
+    with _current_schedule_lock:
+        document = _get_current_schedule_locked(worker_id).document.revise(
+            schedule_data,
+            saved_at=rasp_shutter.clock.now().isoformat(),
+            history_size=rasp_shutter.control.config.SCHEDULE_HISTORY_SIZE,
+        )
+        replaced = ScheduleSnapshot(document=document, etag=_schedule_etag(schedule_data))
+        _current_schedule[worker_id] = replaced
+        # NOTE: 書き込み順が版の順と逆転しないよう、ロックを保持したまま保存する
+        schedule_store(document)
+    return replaced
+
 
-    return schedule_default
+def get_schedule_revision(version: int) -> rasp_shutter.control.schedule_storage.ScheduleRevision | None:
+    """現在のスケジュールまたは履歴から指定した版を返す（ロールバック用）"""
+    return get_current_schedule().document.find(version)
+
+
+def reset_current_schedule() -> None:
+    """メモリ上のスケジュールを破棄し、次回ディスクから読み直す（テスト用）"""
+    worker_id = my_lib.pytest_util.get_worker_id()
+    with _current_schedule_lock:
+        _current_schedule.pop(worker_id, None)
 
 
 def set_schedule(config: rasp_shutter.config.AppConfig, schedule_data: dict) -> None:
     scheduler = get_scheduler()
     scheduler.clear()
 
-    for state, entry in schedule_data.items():
-        if not entry["is_active"]:
-            continue
-
-        for i, wday_method_name in enumerate(WEEKDAY_METHODS):
-            if entry["wday"][i]:
-                wday_method = getattr(scheduler.every(), wday_method_name)
-                wday_method.at(entry["time"], my_lib.time.get_pytz()).do(
-                    shutter_schedule_control, config, state
-                )
+    # NOTE: シャッター別スケジュールが増えても、同じ (state, 時刻, 曜日) のシャッターは
+    # 1 つのジョブにまとめるため、毎ループ走査されるジョブ数はエントリ数に比例しない。
+    job_table = rasp_shutter.control.schedule_plan.build_job_table(schedule_data, len(config.shutter))
+    for (state, at_time, wday), index_list in job_table.items():
+        wday_method = getattr(scheduler.every(), WEEKDAY_METHODS[wday])
+        wday_method.at(at_time, my_lib.time.get_pytz()).do(
+            shutter_schedule_control, config, state, index_list
+        )
 
     for job in scheduler.get_jobs():
         logging.info("Next run: %s", job.next_run)
@@ -910,7 +1258,7 @@ def set_schedule(config: rasp_shutter.config.AppConfig, schedule_data: dict) ->
 
         logging.info(
             "Now is %s, time to next jobs is %d hour(s) %d minute(s) %d second(s)",
-            my_lib.time.now().strftime("%Y-%m-%d %H:%M"),
+            rasp_shutter.clock.now().strftime("%Y-%m-%d %H:%M"),
             hours,
             minutes,
             seconds,
@@ -919,6 +1267,116 @@ def set_schedule(config: rasp_shutter.config.AppConfig, schedule_data: dict) ->
     scheduler.every(1).seconds.do(shutter_auto_control, config)
 
 
+# StepScheduler の 1 ステップで進める時間（秒）
+# NOTE: 実際のループは毎秒自動制御を実行するが、判定は分単位の時刻と footprint の経過時間で
+# 行うため、1 分ごとに実行しても制御の結果は変わらない
+STEP_SEC = 60.0
+
+
+class StepScheduler:
+    """仮想の時計（rasp_shutter.clock.VirtualClock）を進めながらスケジュール制御と自動制御を実行する
+
+    schedule_worker と同じ制御を、実際の時間を待たずに実行する（テスト・シミュレーション用）。
+    schedule ライブラリは実際の時刻でジョブの実行時刻を判定するため使わず、set_schedule() と
+    同じジョブ表から、進めた区間に実行時刻が入るジョブを時刻順に実行する。
+    結果が決定的になるよう、センサー値のサンプリングと SSE の配信は行わない。
+
+    schedule_data を省略すると現在のスケジュール（get_current_schedule()）に従い、
+    API などで更新された場合は次に進めるときに反映する。
+    """
+
+    def __init__(
+        self,
+        config: rasp_shutter.config.AppConfig,
+        clock: rasp_shutter.clock.VirtualClock,
+        schedule_data: rasp_shutter.type_defs.ScheduleData | dict[str, Any] | None = None,
+        step_sec: float = STEP_SEC,
+    ) -> None:
+        self.config = config
+        self.clock = clock
+        self.step_sec = step_sec
+        self._follow_current = schedule_data is None
+        self._schedule_etag: str | None = None
+        self._job_table: dict[tuple[str, str, int], list[int]] = {}
+        if schedule_data is None:
+            self._sync_schedule()
+        else:
+            self.set_schedule(schedule_data)
+
+    def set_schedule(self, schedule_data: rasp_shutter.type_defs.ScheduleData | dict[str, Any]) -> None:
+        set_schedule_data(schedule_data)
+        self._job_table = rasp_shutter.control.schedule_plan.build_job_table(
+            schedule_data, len(self.config.shutter)
+        )
+
+    def _sync_schedule(self) -> None:
+        if not self._follow_current:
+            return
+        current = get_current_schedule()
+        if current.etag != self._schedule_etag:
+            self._schedule_etag = current.etag
+            self.set_schedule(current.data)
+
+    def due_jobs(
+        self, start: datetime.datetime, end: datetime.datetime
+    ) -> list[tuple[datetime.datetime, str, list[int]]]:
+        """実行時刻が (start, end] に入るジョブを (実行時刻, state, インデックスリスト) の時刻順で返す"""
+        job_list: list[tuple[datetime.datetime, str, list[int]]] = []
+        day = start.date()
+        while day <= end.date():
+            for (state, at_time, wday), index_list in self._job_table.items():
+                run_at = datetime.datetime.combine(
+                    day, datetime.time.fromisoformat(at_time), tzinfo=start.tzinfo
+                )
+                if wday == rasp_shutter.control.schedule_plan.weekday_index(run_at) and start < run_at <= end:
+                    job_list.append((run_at, state, index_list))
+            day += datetime.timedelta(days=1)
+
+        return sorted(job_list, key=lambda job: job[0])
+
+    def _advance_to(self, target: datetime.datetime) -> None:
+        # NOTE: 制御の中の sleep() で時計が target を過ぎていることがある
+        self.clock.advance(max((target - self.clock.now()).total_seconds(), 0.0))
+
+    def _step_to(
+        self,
+        end: datetime.datetime,
+        job_queue: collections.deque[tuple[datetime.datetime, str, list[int]]],
+    ) -> None:
+        while job_queue and job_queue[0][0] <= end:
+            run_at, state, index_list = job_queue.popleft()
+            self._advance_to(run_at)
+            shutter_schedule_control(self.config, state, index_list)
+
+        self._advance_to(end)
+        shutter_auto_control(self.config)
+
+    def step(self, sec: float | None = None) -> None:
+        """sec 秒（省略時は step_sec）進め、途中のスケジュール制御と、最後に自動制御を実行する
+
+        NOTE: 自動制御は最後に 1 回だけなので、長い sec は時刻を飛ばしたのと同じになる
+        """
+        self._sync_schedule()
+        start = self.clock.now()
+        end = start + datetime.timedelta(seconds=self.step_sec if sec is None else sec)
+        self._step_to(end, collections.deque(self.due_jobs(start, end)))
+
+    def advance(self, sec: float) -> None:
+        """sec 秒を step_sec ずつ進める"""
+        self._sync_schedule()
+        start = self.clock.now()
+        # NOTE: ジョブ表の走査は 1 ステップごとではなく、進める区間全体で 1 回だけ行う
+        job_queue = collections.deque(self.due_jobs(start, start + datetime.timedelta(seconds=sec)))
+        elapsed = 0.0
+        while elapsed < sec:
+            elapsed = min(elapsed + self.step_sec, sec)
+            self._step_to(start + datetime.timedelta(seconds=elapsed), job_queue)
+
+    def advance_to(self, target: datetime.datetime) -> None:
+        """target まで step_sec ずつ進める"""
+        self.advance((target - self.clock.now()).total_seconds())
+
+
 def schedule_worker(config: rasp_shutter.config.AppConfig, queue) -> None:
     global should_terminate
 
@@ -930,7 +1388,7 @@ def schedule_worker(config: rasp_shutter.config.AppConfig, queue) -> None:
     liveness_file = config.liveness.file.scheduler
 
     logging.info("Load schedule")
-    schedule_data = schedule_load()
+    schedule_data = get_current_schedule().data
     set_schedule_data(schedule_data)
 
     set_schedule(config, schedule_data)
@@ -951,16 +1409,24 @@ def schedule_worker(config: rasp_shutter.config.AppConfig, queue) -> None:
                 schedule_data = queue.get()
                 set_schedule_data(schedule_data)
                 set_schedule(config, schedule_data)
-                schedule_store(schedule_data)
                 _increment_schedule_applied_generation()
 
             idle_sec = scheduler.idle_seconds  # noqa: F841
 
-            run_pending_start = time.perf_counter()
-            scheduler.run_pending()
-            run_pending_elapsed = time.perf_counter() - run_pending_start
+            # NOTE: 仮想の時計の間は StepScheduler が制御を進めるので、ここではスケジュールの
+            # 受け取りだけを行う（schedule ライブラリは実際の時刻でジョブを実行してしまう）
+            if not rasp_shutter.clock.is_virtual():
+                run_pending_start = time.perf_counter()
+                scheduler.run_pending()
+                run_pending_elapsed = time.perf_counter() - run_pending_start
+
+                maybe_record_sensor_sample(config)
+                rasp_shutter.control.webapi.sensor.maybe_broadcast_sensor_data(config)
 
-            maybe_record_sensor_sample(config)
+            # NOTE: 他のワーカー・プロセスの制御や footprint の直接操作は、リクエストごとではなく
+            # ここで定期的に取り込む（変化していれば CONTROL イベントで通知される）
+            if i % (rasp_shutter.control.config.STATE_RECONCILE_INTERVAL_SEC / sleep_sec) == 0:
+                rasp_shutter.control.webapi.control.reconcile_shutter_state(config)
 
             time.sleep(sleep_sec)
 
@@ -986,7 +1452,9 @@ def schedule_worker(config: rasp_shutter.config.AppConfig, queue) -> None:
             # NOTE: 例外が発生してもシーケンス番号を更新する。
             # テスト同期で使用されるため、ループが動いていることを常に示す必要がある。
             _increment_loop_sequence()
+            _heartbeat[my_lib.pytest_util.get_worker_id()] = time.monotonic()
 
+        # NOTE: /api/healthz はメモリ上のハートビートを見る。ファイルは healthz.py（exec プローブ）用
         if i % (10 / sleep_sec) == 0:
             my_lib.footprint.update(liveness_file)
 
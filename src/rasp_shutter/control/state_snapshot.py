@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+シャッター状態のバージョン付きスナップショット
+
+シャッター状態（footprint から判定した開・閉・不明）をメモリ上に保持し、
+変化するたびにバージョン番号を進めます。変化の履歴を一定数保持するので、
+クライアントは手元のバージョン以降に変化したシャッターだけを取得できます。
+
+状態は判定に使った footprint の更新時刻の組（stamp）と一緒に保持します。
+制御に成功したタイミングでは update() で即座に反映し、他のワーカー・プロセスの
+制御や footprint の直接操作はスケジューラのループから reconcile() で取り込みます。
+"""
+
+from __future__ import annotations
+
+import collections
+import threading
+from collections.abc import Hashable
+
+
+class StateSnapshot:
+    """バージョン付きのシャッター状態
+
+    バージョンはプロセス内で単調増加し、状態が変化した場合だけ進む。
+    """
+
+    def __init__(self, history_size: int) -> None:
+        self._lock = threading.Lock()
+        self._state_list: list[int] | None = None
+        self._stamp: Hashable | None = None
+        self._version = 0
+        # 差分を返せる最古のバージョン（これより前は全体を返す）
+        self._base_version = 0
+        # (バージョン, シャッターのインデックス)
+        self._history: collections.deque[tuple[int, int]] = collections.deque(maxlen=history_size)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._state_list is not None
+
+    def is_current(self, stamp: Hashable) -> bool:
+        """指定した footprint の stamp で判定した状態を保持しているか"""
+        with self._lock:
+            return self._state_list is not None and self._stamp == stamp
+
+    def reconcile(self, state_list: list[int], stamp: Hashable) -> bool:
+        """footprint から判定し直した状態を反映する
+
+        NOTE: stamp は state_list を判定する前に取得したものを渡すこと
+        （判定中に footprint が更新されても、次回の is_current() で検出できる）
+
+        Returns:
+            読み込み済みの状態から変化した場合は True（初回の読み込みは False）
+        """
+        with self._lock:
+            self._stamp = stamp
+            if self._state_list == state_list:
+                return False
+
+            self._version += 1
+            if self._state_list is None or len(self._state_list) != len(state_list):
+                # NOTE: 初回の読み込み（またはシャッター数の変更）より前のバージョンとは
+                # 差分を求められないので、履歴を破棄する
+                loaded = self._state_list is not None
+                self._base_version = self._version
+                self._history.clear()
+                self._state_list = list(state_list)
+                return loaded
+
+            for index, (old_state, new_state) in enumerate(zip(self._state_list, state_list, strict=True)):
+                if old_state != new_state:
+                    self._append_history(index)
+            self._state_list = list(state_list)
+            return True
+
+    def update(self, index: int, state: int) -> int | None:
+        """1 台の状態を更新する。変化した場合は新しいバージョンを返す"""
+        with self._lock:
+            if self._state_list is None or self._state_list[index] == state:
+                return None
+            self._state_list[index] = state
+            self._version += 1
+            self._append_history(index)
+            return self._version
+
+    def _append_history(self, index: int) -> None:
+        if len(self._history) == self._history.maxlen:
+            # NOTE: あふれる履歴の分だけ、差分を返せる範囲が狭まる
+            self._base_version = self._history[0][0]
+        self._history.append((self._version, index))
+
+    def get(self) -> tuple[int, list[int]]:
+        """現在のバージョンと状態全体を返す"""
+        with self._lock:
+            assert self._state_list is not None  # noqa: S101
+            return self._version, list(self._state_list)
+
+    def since(self, version: int) -> tuple[int, list[int], list[int] | None]:
+        """指定バージョン以降に変化したシャッターを返す
+
+        Returns:
+            (現在のバージョン, 状態全体, 変化したインデックスの昇順リスト)。
+            履歴から差分を求められない場合（古すぎる・未来のバージョン）は None。
+        """
+        with self._lock:
+            assert self._state_list is not None  # noqa: S101
+            if version < self._base_version or version > self._version:
+                return self._version, list(self._state_list), None
+            changed = sorted({index for history_version, index in self._history if history_version > version})
+            return self._version, list(self._state_list), changed
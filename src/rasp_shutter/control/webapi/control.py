@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import concurrent.futures
 import dataclasses
 import enum
 import logging
@@ -8,19 +9,21 @@ import typing
 
 import flask
 import my_lib.flask_util
-import my_lib.footprint
 import my_lib.pytest_util
-import my_lib.webapp.log
+import my_lib.webapp.event
 import requests
 from flask_pydantic import validate
 
 import rasp_shutter.config
 import rasp_shutter.control.config
+import rasp_shutter.control.job
+import rasp_shutter.control.state_snapshot
 import rasp_shutter.control.webapi.sensor
 import rasp_shutter.metrics.collector
+import rasp_shutter.notify
 import rasp_shutter.type_defs
 import rasp_shutter.util
-from rasp_shutter.schemas import CtrlLogRequest, ShutterCtrlRequest
+from rasp_shutter.schemas import BulkCtrlRequest, CtrlLogRequest, SceneCtrlRequest, ShutterCtrlRequest
 
 
 class SHUTTER_STATE(enum.IntEnum):
@@ -73,6 +76,13 @@ control_lock = threading.Lock()
 # ワーカー固有の制御履歴（pytest-xdist並列実行対応）
 _cmd_hist: dict[str, list[dict]] = {}
 
+# ワーカー固有のシャッター状態スナップショット
+_state_snapshots: dict[str, rasp_shutter.control.state_snapshot.StateSnapshot] = {}
+_state_snapshot_lock = threading.Lock()
+
+# ワーカー固有のシャッターごとの連続制御失敗回数（/api/healthz 用）
+_device_failures: dict[str, dict[int, int]] = {}
+
 
 def _get_cmd_hist() -> list[dict]:
     """ワーカー固有の制御履歴リストを取得"""
@@ -90,6 +100,35 @@ def _clear_cmd_hist() -> None:
 
 def init() -> None:
     _clear_cmd_hist()
+    reset_device_failures()
+
+
+def _record_device_result(index: int, result: bool) -> None:
+    failures = _device_failures.setdefault(my_lib.pytest_util.get_worker_id(), {})
+    failures[index] = 0 if result else failures.get(index, 0) + 1
+
+
+def reset_device_failures() -> None:
+    """シャッターごとの連続制御失敗回数をリセット"""
+    _device_failures.pop(my_lib.pytest_util.get_worker_id(), None)
+
+
+def get_device_health(config: rasp_shutter.config.AppConfig) -> list[rasp_shutter.type_defs.DeviceHealth]:
+    """シャッターごとの通信状態を返す"""
+    failures = _device_failures.get(my_lib.pytest_util.get_worker_id(), {})
+    return [
+        rasp_shutter.type_defs.DeviceHealth(
+            index=index,
+            name=shutter.name,
+            consecutive_failures=failures.get(index, 0),
+            state=(
+                "failing"
+                if failures.get(index, 0) >= rasp_shutter.control.config.DEVICE_FAILURE_THRESHOLD
+                else "ok"
+            ),
+        )
+        for index, shutter in enumerate(config.shutter)
+    ]
 
 
 # 公開API: 制御履歴の取得・クリア用
@@ -143,6 +182,7 @@ def call_shutter_api(config: rasp_shutter.config.AppConfig, index: int, state: s
     )
 
     if rasp_shutter.util.is_dummy_mode():
+        _record_device_result(index, True)
         return True
 
     result = True
@@ -158,6 +198,7 @@ def call_shutter_api(config: rasp_shutter.config.AppConfig, index: int, state: s
         logging.exception("Failed to request %s", endpoint)
         result = False
 
+    _record_device_result(index, result)
     return result
 
 
@@ -165,39 +206,130 @@ def exec_stat_file(state: str, index: int) -> pathlib.Path:
     return rasp_shutter.control.config.get_exec_stat_path(state, index)
 
 
+def auto_close_stat_file(index: int) -> pathlib.Path:
+    return rasp_shutter.control.config.get_auto_close_stat_path(index)
+
+
 def clean_stat_exec(config: rasp_shutter.config.AppConfig) -> None:
     for index in range(len(config.shutter)):
-        my_lib.footprint.clear(exec_stat_file("open", index))
-        my_lib.footprint.clear(exec_stat_file("close", index))
+        rasp_shutter.util.footprint_clear(exec_stat_file("open", index))
+        rasp_shutter.util.footprint_clear(exec_stat_file("close", index))
+        rasp_shutter.util.footprint_clear(auto_close_stat_file(index))
 
-    my_lib.footprint.clear(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
-    my_lib.footprint.clear(rasp_shutter.control.config.STAT_PENDING_CLOSE.to_path())
-    my_lib.footprint.clear(rasp_shutter.control.config.STAT_AUTO_CLOSE.to_path())
+    rasp_shutter.util.footprint_clear(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
+    rasp_shutter.util.footprint_clear(rasp_shutter.control.config.STAT_PENDING_CLOSE.to_path())
 
+    # NOTE: footprint を直接操作したので、スケジューラのループを待たずに取り込む
+    reconcile_shutter_state(config)
 
-def get_shutter_state(config: rasp_shutter.config.AppConfig) -> rasp_shutter.type_defs.ShutterStateResponse:
-    state_list: list[rasp_shutter.type_defs.ShutterStateEntry] = []
-    for index, shutter in enumerate(config.shutter):
+
+def _get_state_snapshot() -> rasp_shutter.control.state_snapshot.StateSnapshot:
+    """ワーカー固有のシャッター状態スナップショットを取得"""
+    worker_id = my_lib.pytest_util.get_worker_id()
+    with _state_snapshot_lock:
+        if worker_id not in _state_snapshots:
+            _state_snapshots[worker_id] = rasp_shutter.control.state_snapshot.StateSnapshot(
+                rasp_shutter.control.config.STATE_HISTORY_SIZE
+            )
+        return _state_snapshots[worker_id]
+
+
+def _loaded_state_snapshot(
+    config: rasp_shutter.config.AppConfig,
+) -> rasp_shutter.control.state_snapshot.StateSnapshot:
+    """footprint から読み込み済みのスナップショットを返す（未読み込みなら読み込む）
+
+    NOTE: リクエストごとに footprint の更新時刻を確認すると、シャッター数の 2 倍の
+    stat が毎回走るので、読み込み後の突き合わせは reconcile_shutter_state() に任せる。
+    """
+    snapshot = _get_state_snapshot()
+    if not snapshot.is_loaded:
+        reconcile_shutter_state(config)
+    return snapshot
+
+
+def reconcile_shutter_state(config: rasp_shutter.config.AppConfig) -> None:
+    """footprint とスナップショットを突き合わせ、状態が変化していれば通知する
+
+    制御は他のワーカー・プロセスや footprint の直接操作でも行われるので、
+    スケジューラのループから定期的に呼び出す。
+    """
+    snapshot = _get_state_snapshot()
+    stamp = _footprint_stamp(config)
+    if not snapshot.is_current(stamp) and snapshot.reconcile(_load_shutter_state(config), stamp):
+        my_lib.webapp.event.notify_event(my_lib.webapp.event.EVENT_TYPE.CONTROL)
+
+
+def _footprint_stamp(config: rasp_shutter.config.AppConfig) -> tuple[float | None, ...]:
+    """シャッター状態の判定に使う footprint の更新時刻の組"""
+    return tuple(
+        rasp_shutter.util.footprint_stamp(exec_stat_file(state, index))
+        for index in range(len(config.shutter))
+        for state in ("open", "close")
+    )
+
+
+def _load_shutter_state(config: rasp_shutter.config.AppConfig) -> list[int]:
+    """footprint からシャッター状態を判定する"""
+    state_list: list[int] = []
+    for index in range(len(config.shutter)):
         exec_stat_open = exec_stat_file("open", index)
         exec_stat_close = exec_stat_file("close", index)
 
-        if my_lib.footprint.exists(exec_stat_open):
-            if my_lib.footprint.exists(exec_stat_close):
-                if my_lib.footprint.compare(exec_stat_open, exec_stat_close):
+        if rasp_shutter.util.footprint_exists(exec_stat_open):
+            if rasp_shutter.util.footprint_exists(exec_stat_close):
+                if rasp_shutter.util.footprint_compare(exec_stat_open, exec_stat_close):
                     state = SHUTTER_STATE.OPEN
                 else:
                     state = SHUTTER_STATE.CLOSE
             else:
                 state = SHUTTER_STATE.OPEN
         else:
-            if my_lib.footprint.exists(exec_stat_close):  # noqa: SIM108
+            if rasp_shutter.util.footprint_exists(exec_stat_close):
                 state = SHUTTER_STATE.CLOSE
             else:
                 state = SHUTTER_STATE.UNKNOWN
 
-        state_list.append(rasp_shutter.type_defs.ShutterStateEntry(name=shutter.name, state=state))
+        state_list.append(state)
 
-    return rasp_shutter.type_defs.ShutterStateResponse(state=state_list, result="success")
+    return state_list
+
+
+def get_shutter_state(config: rasp_shutter.config.AppConfig) -> rasp_shutter.type_defs.ShutterStateResponse:
+    version, state_list = _loaded_state_snapshot(config).get()
+    return rasp_shutter.type_defs.ShutterStateResponse(
+        state=[
+            rasp_shutter.type_defs.ShutterStateEntry(name=shutter.name, state=state)
+            for shutter, state in zip(config.shutter, state_list, strict=True)
+        ],
+        result="success",
+        version=version,
+    )
+
+
+def get_shutter_state_since(
+    config: rasp_shutter.config.AppConfig, version: int
+) -> rasp_shutter.type_defs.ShutterStateDeltaResponse:
+    """指定バージョン以降に変化したシャッター状態を返す（差分を求められなければ全体）"""
+    current_version, state_list, changed = _loaded_state_snapshot(config).since(version)
+    index_list = range(len(state_list)) if changed is None else changed
+    return rasp_shutter.type_defs.ShutterStateDeltaResponse(
+        version=current_version,
+        full=changed is None,
+        changed=[
+            rasp_shutter.type_defs.ShutterStateChange(
+                index=index, name=config.shutter[index].name, state=state_list[index]
+            )
+            for index in index_list
+        ],
+    )
+
+
+def _publish_shutter_state(index: int, state: str) -> None:
+    """制御に成功したシャッターの状態をスナップショットに反映し、変化したら通知する"""
+    shutter_state = SHUTTER_STATE.OPEN if state == "open" else SHUTTER_STATE.CLOSE
+    if _get_state_snapshot().update(index, shutter_state) is not None:
+        my_lib.webapp.event.notify_event(my_lib.webapp.event.EVENT_TYPE.CONTROL)
 
 
 def set_shutter_state_impl(
@@ -232,9 +364,10 @@ def set_shutter_state_impl(
     if (diff_sec / interval_config.divisor) < interval_config.interval_threshold:
         # NOTE: この分岐に入る場合、diff_sec は有限値（履歴が存在しない場合は inf になり入らない）
         time_diff_str = time_str(diff_sec)
-        my_lib.webapp.log.info(
+        rasp_shutter.notify.info(
             f"🔔 {interval_config.log_prefix}{shutter_name}のシャッターを{state_text}るのを見合わせました。"
-            f"{time_diff_str}前に{state_text}ています。{by_text}"
+            f"{time_diff_str}前に{state_text}ています。{by_text}",
+            subject=shutter_name,
         )
         return EXEC_RESULT.POSTPONED
 
@@ -243,16 +376,18 @@ def set_shutter_state_impl(
     if result:
         # NOTE: 実際に制御できた場合のみ実行履歴を更新する。
         # 失敗時に更新すると、制御間隔チェックによりリトライが抑止されてしまう。
-        my_lib.footprint.update(exec_hist)
+        rasp_shutter.util.footprint_update(exec_hist)
         exec_inv_hist = exec_stat_file("close" if state == "open" else "open", index)
-        my_lib.footprint.clear(exec_inv_hist)
+        rasp_shutter.util.footprint_clear(exec_inv_hist)
+        _publish_shutter_state(index, state)
 
     sensor_text_str = sensor_text(sense_data)
     by_newline_text = f"\n(by {user})" if user != "" else ""
 
     if result:
-        my_lib.webapp.log.info(
-            f"{shutter_name}のシャッターを{mode.value}で{state_text}ました。{sensor_text_str}{by_newline_text}"
+        rasp_shutter.notify.info(
+            f"{shutter_name}のシャッターを{mode.value}で{state_text}ました。{sensor_text_str}{by_newline_text}",
+            subject=shutter_name,
         )
 
         # メトリクス収集
@@ -270,9 +405,10 @@ def set_shutter_state_impl(
         except Exception as e:
             logging.warning("メトリクス記録に失敗しました: %s", e)
     else:
-        my_lib.webapp.log.error(
+        rasp_shutter.notify.error(
             f"{shutter_name}のシャッターを{mode.value}で{state_text}るのに失敗しました。"
-            f"{sensor_text_str}{by_newline_text}"
+            f"{sensor_text_str}{by_newline_text}",
+            subject=shutter_name,
         )
 
         # 失敗メトリクス収集
@@ -287,6 +423,121 @@ def set_shutter_state_impl(
     return EXEC_RESULT.SUCCESS if result else EXEC_RESULT.FAILURE
 
 
+def _update_control_state(state: str, mode: CONTROL_MODE, index_list: list[int]) -> None:
+    """制御に成功した後、自動制御の状態を進める"""
+    if state == "open":
+        if mode != CONTROL_MODE.MANUAL:
+            # NOTE: 手動以外でシャッターを開けた場合は、
+            # 自動で閉じた履歴を削除する。
+            for index in index_list:
+                rasp_shutter.util.footprint_clear(auto_close_stat_file(index))
+    else:
+        # NOTE: シャッターを閉じた場合は、
+        # 暗くて延期されていた開ける制御を取り消す。
+        rasp_shutter.util.footprint_clear(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
+
+
+def dispatch_shutter_state(
+    config: rasp_shutter.config.AppConfig,
+    target_list: list[tuple[int, str]],
+    mode: CONTROL_MODE,
+    sense_data: rasp_shutter.type_defs.SensorData | None,
+    user: str = "",
+) -> list[EXEC_RESULT]:
+    """複数シャッターをそれぞれの目標状態へ並列に制御する。
+
+    センサー値の取得とロックの獲得は 1 回だけで、デバイスへのリクエストは並列に発行する。
+
+    Returns:
+        target_list と同じ順序の実行結果のリスト
+    """
+    logging.debug(
+        "dispatch_shutter_state target=[%s], mode=%s",
+        ",".join(f"{index}:{state}" for index, state in target_list),
+        mode,
+    )
+    if not target_list:
+        return []
+
+    def _exec(target: tuple[int, str]) -> EXEC_RESULT:
+        index, state = target
+        try:
+            return set_shutter_state_impl(config, index, state, mode, sense_data, user)
+        except Exception:
+            logging.exception("Failed to control shutter (index=%d)", index)
+            return EXEC_RESULT.FAILURE
+
+    # NOTE: 制御間隔の判定と footprint はシャッターごとに独立しているので、
+    # 同じロックの中であればデバイスへのリクエストを並列にしても整合性は崩れない。
+    max_workers = min(len(target_list), rasp_shutter.control.config.DISPATCH_MAX_WORKERS)
+    with (
+        control_lock,
+        rasp_shutter.notify.batch(),
+        concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor,
+    ):
+        result_list = list(executor.map(_exec, target_list))
+
+    for state in ("open", "close"):
+        state_target_list = [
+            (index, result)
+            for (index, target_state), result in zip(target_list, result_list, strict=True)
+            if target_state == state
+        ]
+        if state_target_list and all(result != EXEC_RESULT.FAILURE for _, result in state_target_list):
+            _update_control_state(state, mode, [index for index, _ in state_target_list])
+
+    return result_list
+
+
+def set_scene_state(
+    config: rasp_shutter.config.AppConfig,
+    name: str,
+    target_list: list[tuple[int, str]],
+    mode: CONTROL_MODE,
+    sense_data: rasp_shutter.type_defs.SensorData | None,
+    user: str = "",
+) -> rasp_shutter.type_defs.SceneResponse:
+    """シーン（複数シャッターの目標状態）を一括で実行し、シャッターごとの結果を返す"""
+    result_list = dispatch_shutter_state(config, target_list, mode, sense_data, user)
+
+    return rasp_shutter.type_defs.SceneResponse(
+        name=name,
+        result="error" if EXEC_RESULT.FAILURE in result_list else "success",
+        detail=_exec_detail(config, target_list, result_list),
+        state=get_shutter_state(config).state,
+    )
+
+
+def set_bulk_state(
+    config: rasp_shutter.config.AppConfig,
+    target_list: list[tuple[int, str]],
+    mode: CONTROL_MODE,
+    sense_data: rasp_shutter.type_defs.SensorData | None,
+    user: str = "",
+) -> rasp_shutter.type_defs.BulkCtrlResponse:
+    """シャッター・目標状態の組を一括で実行し、操作ごとの結果を返す"""
+    result_list = dispatch_shutter_state(config, target_list, mode, sense_data, user)
+
+    return rasp_shutter.type_defs.BulkCtrlResponse(
+        result="error" if EXEC_RESULT.FAILURE in result_list else "success",
+        detail=_exec_detail(config, target_list, result_list),
+        state=get_shutter_state(config).state,
+    )
+
+
+def _exec_detail(
+    config: rasp_shutter.config.AppConfig,
+    target_list: list[tuple[int, str]],
+    result_list: list[EXEC_RESULT],
+) -> list[rasp_shutter.type_defs.ShutterExecEntry]:
+    return [
+        rasp_shutter.type_defs.ShutterExecEntry(
+            index=index, name=config.shutter[index].name, state=state, result=result.value
+        )
+        for (index, state), result in zip(target_list, result_list, strict=True)
+    ]
+
+
 def set_shutter_state(
     config: rasp_shutter.config.AppConfig,
     index_list: list[int],
@@ -294,38 +545,40 @@ def set_shutter_state(
     mode: CONTROL_MODE,
     sense_data: rasp_shutter.type_defs.SensorData | None,
     user: str = "",
+    on_progress: rasp_shutter.control.job.ProgressCallback | None = None,
 ) -> rasp_shutter.type_defs.ShutterStateResponse:
+    """シャッターを順に制御する。on_progress には 1 台終わるごとに実行結果が渡される"""
     logging.debug(
         "set_shutter_state index=[%s], state=%s, mode=%s", ",".join(str(n) for n in index_list), state, mode
     )
 
     success = True
     postponed: list[str] = []
-    with control_lock:
+    # NOTE: 複数台を制御した時のログは、まとめて書き込む（rasp_shutter.notify）
+    with control_lock, rasp_shutter.notify.batch():
         for index in index_list:
             try:
                 exec_result = set_shutter_state_impl(config, index, state, mode, sense_data, user)
-                if exec_result == EXEC_RESULT.FAILURE:
-                    success = False
-                elif exec_result == EXEC_RESULT.POSTPONED:
-                    postponed.append(config.shutter[index].name)
             except Exception:
                 logging.exception("Failed to control shutter (index=%d)", index)
+                exec_result = EXEC_RESULT.FAILURE
+
+            if exec_result == EXEC_RESULT.FAILURE:
                 success = False
-                continue
+            elif exec_result == EXEC_RESULT.POSTPONED:
+                postponed.append(config.shutter[index].name)
+
+            if on_progress is not None:
+                on_progress(
+                    rasp_shutter.type_defs.ShutterExecEntry(
+                        index=index, name=config.shutter[index].name, state=state, result=exec_result.value
+                    )
+                )
 
     # NOTE: 実際に制御できた場合のみ状態を進める。失敗時に進めると、
     # 暗くて延期されていた開ける制御などのリカバリ経路が失われる。
     if success:
-        if state == "open":
-            if mode != CONTROL_MODE.MANUAL:
-                # NOTE: 手動以外でシャッターを開けた場合は、
-                # 自動で閉じた履歴を削除する。
-                my_lib.footprint.clear(rasp_shutter.control.config.STAT_AUTO_CLOSE.to_path())
-        else:
-            # NOTE: シャッターを閉じた場合は、
-            # 暗くて延期されていた開ける制御を取り消す。
-            my_lib.footprint.clear(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
+        _update_control_state(state, mode, index_list)
 
     response = get_shutter_state(config)
     response.postponed = postponed
@@ -351,6 +604,21 @@ def sensor_text(sense_data: rasp_shutter.type_defs.SensorData | None) -> str:
     return f"(日射: {solar_rad} W/m^2, 照度: {lux} LUX, 高度: {altitude})"
 
 
+def submit_shutter_state_job(
+    config: rasp_shutter.config.AppConfig, index_list: list[int], state: str, user: str
+) -> rasp_shutter.control.job.Job:
+    """手動制御をジョブとして登録する（センサー値の取得も含めてジョブ内で行う）"""
+
+    def _run(on_progress: rasp_shutter.control.job.ProgressCallback) -> dict:
+        sense_data = rasp_shutter.control.webapi.sensor.get_sensor_data(config)
+        result = set_shutter_state(
+            config, index_list, state, CONTROL_MODE.MANUAL, sense_data, user, on_progress=on_progress
+        )
+        return dict({"cmd": "set"}, **dataclasses.asdict(result))
+
+    return rasp_shutter.control.job.submit(_run)
+
+
 # NOTE: テスト用のコード
 def cmd_hist_push(cmd: dict) -> None:  # pragma: no cover
     hist = _get_cmd_hist()
@@ -372,26 +640,125 @@ def api_shutter_ctrl(query: ShutterCtrlRequest) -> flask.Response | tuple[flask.
     # NOTE: シャッターが指定されていない場合は、全てを制御対象にする
     index_list = list(range(len(config.shutter))) if query.index == -1 else [query.index]
 
-    sense_data = rasp_shutter.control.webapi.sensor.get_sensor_data(config)
-
     if query.cmd == 1:
         # NOTE: 状態変更は POST 限定（GET だとプリフェッチや CSRF で誤発火し得る）
         if flask.request.method != "POST":
             return flask.jsonify({"result": "error", "reason": "control requires POST"}), 405
 
+        user = my_lib.flask_util.auth_user(flask.request)
+        if query.mode == "async":
+            job = submit_shutter_state_job(config, index_list, query.state, user)
+            return flask.jsonify({"cmd": "set", "result": "accepted", "job_id": job.job_id}), 202
+
+        sense_data = rasp_shutter.control.webapi.sensor.get_sensor_data(config)
         result = set_shutter_state(
             config,
             index_list,
             query.state,
             CONTROL_MODE.MANUAL,
             sense_data,
-            my_lib.flask_util.auth_user(flask.request),
+            user,
         )
         return flask.jsonify(dict({"cmd": "set"}, **dataclasses.asdict(result)))
+    elif query.since is not None:
+        delta = get_shutter_state_since(config, query.since)
+        return flask.jsonify(dict({"cmd": "get"}, **dataclasses.asdict(delta)))
     else:
         return flask.jsonify(dict({"cmd": "get"}, **dataclasses.asdict(get_shutter_state(config))))
 
 
+@blueprint.route("/api/jobs/<job_id>", methods=["GET"])
+def api_job(job_id: str) -> flask.Response | tuple[flask.Response, int]:
+    """非同期制御ジョブの進捗と結果を返す"""
+    job = rasp_shutter.control.job.get(job_id)
+    if job is None:
+        return flask.jsonify({"result": "error", "reason": "unknown job"}), 404
+    return flask.jsonify(job)
+
+
+@blueprint.route("/api/scene_ctrl", methods=["POST"])
+@validate(query=SceneCtrlRequest)
+def api_scene_ctrl(query: SceneCtrlRequest) -> flask.Response | tuple[flask.Response, int]:
+    """シーン、またはグループ + 目標状態を一括で実行する"""
+    config: rasp_shutter.config.AppConfig = flask.current_app.config["CONFIG"]
+
+    if query.scene is not None:
+        scene = config.find_scene(query.scene)
+        if scene is None:
+            return flask.jsonify({"result": "error", "reason": "unknown scene"}), 400
+        name = scene.name
+        target_list = scene.target_list()
+    elif query.group is not None and query.state is not None:
+        group = config.find_group(query.group)
+        if group is None:
+            return flask.jsonify({"result": "error", "reason": "unknown group"}), 400
+        name = group.name
+        target_list = [(index, query.state) for index in group.index_list]
+    else:
+        return flask.jsonify({"result": "error", "reason": "scene or group with state is required"}), 400
+
+    # NOTE: センサー値は一括制御全体で 1 回だけ取得する
+    sense_data = rasp_shutter.control.webapi.sensor.get_sensor_data(config)
+
+    result = set_scene_state(
+        config,
+        name,
+        target_list,
+        CONTROL_MODE.MANUAL,
+        sense_data,
+        my_lib.flask_util.auth_user(flask.request),
+    )
+    return flask.jsonify(dict({"cmd": "scene"}, **dataclasses.asdict(result)))
+
+
+@blueprint.route("/api/shutter_ctrl/bulk", methods=["POST"])
+@validate(body=BulkCtrlRequest)
+def api_shutter_ctrl_bulk(body: BulkCtrlRequest) -> flask.Response | tuple[flask.Response, int]:
+    """複数のシャッター・目標状態の組を 1 回のリクエストで実行する"""
+    config: rasp_shutter.config.AppConfig = flask.current_app.config["CONFIG"]
+
+    if any(operation.index >= len(config.shutter) for operation in body.operations):
+        return flask.jsonify({"result": "error", "reason": "invalid index"}), 400
+
+    target_list = [(operation.index, operation.state) for operation in body.operations]
+
+    # NOTE: センサー値の取得とロックの獲得は一括制御全体で 1 回だけ行う
+    sense_data = rasp_shutter.control.webapi.sensor.get_sensor_data(config)
+
+    result = set_bulk_state(
+        config,
+        target_list,
+        CONTROL_MODE.MANUAL,
+        sense_data,
+        my_lib.flask_util.auth_user(flask.request),
+    )
+    return flask.jsonify(dict({"cmd": "bulk"}, **dataclasses.asdict(result)))
+
+
+@blueprint.route("/api/scene_list", methods=["GET"])
+def api_scene_list() -> flask.Response:
+    config: rasp_shutter.config.AppConfig = flask.current_app.config["CONFIG"]
+
+    return flask.jsonify(
+        {
+            "group": [
+                {"name": group.name, "shutter": [config.shutter[index].name for index in group.index_list]}
+                for group in config.group
+            ],
+            "scene": [
+                {
+                    "name": scene.name,
+                    "action": [
+                        {"shutter": config.shutter[index].name, "state": state}
+                        for index, state in scene.target_list()
+                    ],
+                }
+                for scene in config.scene
+            ],
+        }
+    )
+
+
 # NOTE: テスト用
 @blueprint.route("/api/ctrl/log", methods=["GET"])
 @validate(query=CtrlLogRequest)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+プロセス内の liveness チェック
+
+Kubernetes の HTTP プローブから呼ばれる /api/healthz を提供します。
+ファイルやデバイス・センサーへのアクセスは行わず、メモリ上の状態だけを返すので、
+1 秒間隔のプローブでも負荷になりません。
+
+- スケジューラループの最終実行からの経過秒（HEALTHZ_SCHEDULER_LAG_MAX_SEC を超えたら 503）
+- キャッシュしたセンサー値の経過秒（参考値。センサー側の不調ではプロセスを再起動しない）
+- シャッター（ESP32）ごとの連続制御失敗回数（参考値）
+
+スケジューラは従来どおり liveness ファイルも更新するので、exec プローブ（src/healthz.py）も使えます。
+"""
+
+import dataclasses
+
+import flask
+
+import rasp_shutter.config
+import rasp_shutter.control.config
+import rasp_shutter.control.scheduler
+import rasp_shutter.control.webapi.control
+import rasp_shutter.control.webapi.sensor
+import rasp_shutter.type_defs
+
+blueprint = flask.Blueprint("rasp-shutter-healthz", __name__)
+
+
+def check(config: rasp_shutter.config.AppConfig) -> rasp_shutter.type_defs.HealthzResponse:
+    scheduler_lag = rasp_shutter.control.scheduler.get_scheduler_lag()
+    healthy = (
+        scheduler_lag is not None
+        and scheduler_lag < rasp_shutter.control.config.HEALTHZ_SCHEDULER_LAG_MAX_SEC
+    )
+    return rasp_shutter.type_defs.HealthzResponse(
+        result="success" if healthy else "error",
+        scheduler_lag_sec=scheduler_lag,
+        sensor_age_sec=rasp_shutter.control.webapi.sensor.get_sensor_data_age(),
+        device=rasp_shutter.control.webapi.control.get_device_health(config),
+    )
+
+
+@blueprint.route("/api/healthz", methods=["GET"])
+def api_healthz() -> tuple[flask.Response, int]:
+    config: rasp_shutter.config.AppConfig = flask.current_app.config["CONFIG"]
+    response = check(config)
+    return flask.jsonify(dataclasses.asdict(response)), 200 if response.result == "success" else 503
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+実行ログの API
+
+GET /api/log?before_id=...&after_id=...&limit=...&level=...&q=... で、log.db の実行ログを
+新しい順に返します（rasp_shutter.log_store）。/api/log_view（my_lib.webapp.log）と違い全件は返さないので、
+フロントエンドは最初のページを読んだ後、SSE の log イベントを受けるたびに after_id で差分だけを取得し、
+古いページは before_id で必要になった時に取得します。
+"""
+
+import logging
+import sqlite3
+
+import flask
+from flask_pydantic import validate
+
+import rasp_shutter.log_store
+from rasp_shutter.schemas import LogRequest
+
+blueprint = flask.Blueprint("rasp-shutter-log", __name__)
+
+
+@blueprint.route("/api/log", methods=["GET"])
+@validate(query=LogRequest)
+def api_log(query: LogRequest) -> flask.Response | tuple[flask.Response, int]:
+    log_file_path = flask.current_app.config["CONFIG"].webapp.data.log_file_path
+
+    try:
+        return flask.jsonify(
+            rasp_shutter.log_store.fetch(
+                log_file_path,
+                before_id=query.before_id,
+                after_id=query.after_id,
+                limit=query.limit,
+                level=query.level,
+                keyword=query.keyword,
+            )
+        )
+    except rasp_shutter.log_store.LogStoreError as e:
+        # NOTE: my_lib.webapp.log がまだテーブルを作成していない
+        return flask.jsonify({"error": str(e)}), 503
+    except sqlite3.Error as e:
+        logging.exception("実行ログの取得エラー")
+        return flask.jsonify({"error": str(e)}), 500
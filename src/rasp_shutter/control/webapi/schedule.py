@@ -7,10 +7,11 @@ import flask
 import my_lib.flask_util
 import my_lib.pytest_util
 import my_lib.webapp.event
-import my_lib.webapp.log
 from flask_pydantic import validate
 
 import rasp_shutter.control.scheduler
+import rasp_shutter.metrics.dashboard
+import rasp_shutter.notify
 import rasp_shutter.type_defs
 from rasp_shutter.schemas import ScheduleCtrlRequest
 
@@ -93,48 +94,110 @@ def schedule_str(schedule_data: dict) -> str:
             continue
         str_buf.append(schedule_entry_str(name, entry))
 
+    for override in schedule_data.get("override", []):
+        target = ",".join(str(index) for index in override["target"])
+        for name in ["open", "close"]:
+            entry = override[name]
+            if not entry["is_active"]:
+                continue
+            str_buf.append(f"[{target}] {schedule_entry_str(name, entry)}")
+
     if len(str_buf) == 0:
         return "∅ 全て無効"
 
     return "、\n".join(str_buf)
 
 
+def _parse_schedule_data(data: str) -> dict | None:
+    try:
+        schedule_data = json.loads(data)
+    except json.JSONDecodeError:
+        return None
+
+    return _validate_schedule_data(schedule_data)
+
+
+def _validate_schedule_data(schedule_data: object) -> dict | None:
+    if not isinstance(schedule_data, dict) or not rasp_shutter.control.scheduler.schedule_validate(
+        schedule_data
+    ):
+        return None
+    return schedule_data
+
+
+def _apply_schedule(schedule_data: dict, message: str) -> None:
+    schedule_lock = get_schedule_lock()
+    schedule_queue = get_schedule_queue()
+    assert schedule_lock is not None  # noqa: S101
+    assert schedule_queue is not None  # noqa: S101
+
+    with schedule_lock:
+        schedule_queue.put(schedule_data)
+
+        rasp_shutter.control.scheduler.replace_current_schedule(schedule_data)
+        my_lib.webapp.event.notify_event(my_lib.webapp.event.EVENT_TYPE.SCHEDULE)
+        # NOTE: ダッシュボードには現在の閾値も表示するので、書き出したファイルをすぐに作り直す
+        rasp_shutter.metrics.dashboard.request_materialize(immediate=True)
+
+        user = my_lib.flask_util.auth_user(flask.request)
+        schedule_text = schedule_str(schedule_data)
+        by_text = f"by {user}" if user != "" else ""
+        rasp_shutter.notify.info(f"{message}\n{schedule_text}\n{by_text}")
+
+
 @blueprint.route("/api/schedule_ctrl", methods=["GET", "POST"])
 @validate(query=ScheduleCtrlRequest)
 def api_schedule_ctrl(query: ScheduleCtrlRequest) -> flask.Response | tuple[flask.Response, int]:
-    if query.cmd == "set" and query.data is not None:
+    if (query.cmd == "set" and query.data is not None) or query.cmd == "rollback":
         # NOTE: 状態変更は POST 限定（GET だとプリフェッチや CSRF で誤発火し得る）
         if flask.request.method != "POST":
-            return flask.jsonify({"result": "error", "reason": "set requires POST"}), 405
-
-        try:
-            schedule_data = json.loads(query.data)
-        except json.JSONDecodeError:
-            my_lib.webapp.log.error("😵 スケジュールの指定が不正です。")
-            return flask.jsonify({"result": "error"}), 400
-
-        if not isinstance(schedule_data, dict) or not rasp_shutter.control.scheduler.schedule_validate(
-            schedule_data
-        ):
-            my_lib.webapp.log.error("😵 スケジュールの指定が不正です。")
-            # NOTE: 200 で旧スケジュールを返すとクライアントが保存成功と誤認するため、
-            # バリデーション失敗はエラーとして返す。
-            return flask.jsonify({"result": "error"}), 400
-
-        schedule_lock = get_schedule_lock()
-        schedule_queue = get_schedule_queue()
-        assert schedule_lock is not None  # noqa: S101
-        assert schedule_queue is not None  # noqa: S101
-
-        with schedule_lock:
-            schedule_queue.put(schedule_data)
-
-            rasp_shutter.control.scheduler.schedule_store(schedule_data)
-            my_lib.webapp.event.notify_event(my_lib.webapp.event.EVENT_TYPE.SCHEDULE)
-
-            user = my_lib.flask_util.auth_user(flask.request)
-            schedule_text = schedule_str(schedule_data)
-            by_text = f"by {user}" if user != "" else ""
-            my_lib.webapp.log.info(f"📅 スケジュールを更新しました。\n{schedule_text}\n{by_text}")
-
-    return flask.jsonify(rasp_shutter.control.scheduler.schedule_load())
+            return flask.jsonify({"result": "error", "reason": f"{query.cmd} requires POST"}), 405
+
+        if query.cmd == "set":
+            assert query.data is not None  # noqa: S101
+            schedule_data = _parse_schedule_data(query.data)
+            if schedule_data is None:
+                rasp_shutter.notify.error("😵 スケジュールの指定が不正です。")
+                # NOTE: 200 で旧スケジュールを返すとクライアントが保存成功と誤認するため、
+                # バリデーション失敗はエラーとして返す。
+                return flask.jsonify({"result": "error"}), 400
+            _apply_schedule(schedule_data, "📅 スケジュールを更新しました。")
+        else:
+            revision = (
+                None
+                if query.version is None
+                else rasp_shutter.control.scheduler.get_schedule_revision(query.version)
+            )
+            if revision is None:
+                return flask.jsonify({"result": "error", "reason": "unknown version"}), 404
+            # NOTE: 保存済みの版でも、手で編集されたファイルや検証が厳しくなる前の版は
+            # 不正なことがあるので、set と同じ検証を通す
+            schedule_data = _validate_schedule_data(revision.schedule)
+            if schedule_data is None:
+                rasp_shutter.notify.error(f"😵 版 {revision.version} のスケジュールが不正なため戻せません。")
+                return flask.jsonify({"result": "error", "reason": "invalid schedule"}), 409
+            _apply_schedule(schedule_data, f"📅 スケジュールを版 {revision.version} に戻しました。")
+
+    current = rasp_shutter.control.scheduler.get_current_schedule()
+    # NOTE: 内容が変わっていなければ 304 を返し、本文を送らない。If-None-Match は
+    # エンティティタグのカンマ区切りリスト（W/ 付き・* を含む）なので、解析してから弱い比較で照合する
+    if flask.request.if_none_match.contains_weak(current.etag.strip('"')):
+        response = flask.Response(status=304)
+    else:
+        response = flask.jsonify(current.data)
+    response.headers["ETag"] = current.etag
+    response.headers["X-Schedule-Version"] = str(current.version)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@blueprint.route("/api/schedule_history", methods=["GET"])
+def api_schedule_history() -> flask.Response:
+    document = rasp_shutter.control.scheduler.get_current_schedule().document
+    return flask.jsonify(
+        {
+            "result": "success",
+            "version": document.current.version,
+            "history": [revision.to_dict() for revision in document.history],
+        }
+    )
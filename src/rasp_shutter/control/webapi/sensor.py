@@ -1,21 +1,47 @@
 #!/usr/bin/env python3
+"""
+センサーデータの取得と配信
+
+センサー値は 1 つの producer（スケジューラループから起動する broadcast_sensor_data）が
+SENSOR_BROADCAST_INTERVAL_SEC ごとに取得してキャッシュし、値が変わったら SSE
+（/api/event の "data" イベント）で通知します。/api/sensor はキャッシュを返すため、
+開いているクライアント数によらず InfluxDB への問い合わせ頻度は一定です。
+"""
+
 import dataclasses
 import datetime
+import logging
+import threading
 
 import flask
-import my_lib.sensor_data
+import my_lib.pytest_util
 import my_lib.time
-import pysolar.solar
+import my_lib.webapp.event
 
+import rasp_shutter.clock
 import rasp_shutter.config
 import rasp_shutter.type_defs
+import rasp_shutter.util
 
 blueprint = flask.Blueprint("rasp-shutter-sensor", __name__)
 
+# センサー値の配信間隔（秒）
+SENSOR_BROADCAST_INTERVAL_SEC = 10.0
+# キャッシュをこの時間（秒）以上更新できていなければ、/api/sensor で直接取得する
+SENSOR_CACHE_STALE_SEC = SENSOR_BROADCAST_INTERVAL_SEC * 3
+
+# 最新のセンサー値と取得時刻（rasp_shutter.clock.monotonic()、ワーカー別）
+_latest_sensor_data: dict[str, tuple[float, rasp_shutter.type_defs.SensorData]] = {}
+_last_broadcast_time: dict[str, float] = {}
+_broadcast_lock = threading.Lock()
+
 
 def get_solar_altitude(config: rasp_shutter.config.AppConfig) -> rasp_shutter.type_defs.SensorValue:
+    # NOTE: pysolar は読み込みが重いので、起動時ではなく初回の計算時にインポートする
+    import pysolar.solar
+
     # pysolar.solar.get_altitude() はUTC時刻を要求するため、明示的にUTCを使用
-    now = datetime.datetime.now(datetime.UTC)
+    now = rasp_shutter.clock.now().astimezone(datetime.UTC)
     return rasp_shutter.type_defs.SensorValue.create_valid(
         value=pysolar.solar.get_altitude(config.location.latitude, config.location.longitude, now),
         time=now,
@@ -28,6 +54,9 @@ def get_sensor_data_impl(config: rasp_shutter.config.AppConfig) -> rasp_shutter.
     NOTE: テストでは get_sensor_data() がセッションスコープでモックされるため、
     実装自体のユニットテストはこの関数を直接対象にする（tests/unit/test_sensor_logic.py）。
     """
+    # NOTE: InfluxDB クライアントは読み込みが重いので、起動時ではなく初回の取得時にインポートする
+    import my_lib.sensor_data
+
     timezone = my_lib.time.get_zoneinfo()
 
     sensor_values: dict[str, rasp_shutter.type_defs.SensorValue] = {}
@@ -62,7 +91,87 @@ def get_sensor_data(config: rasp_shutter.config.AppConfig) -> rasp_shutter.type_
     return get_sensor_data_impl(config)
 
 
+def _display_key(sense_data: rasp_shutter.type_defs.SensorData) -> tuple:
+    """画面表示が変わるかどうかの比較キー（太陽高度は表示と同じく整数に丸める）"""
+    altitude = sense_data.altitude.value
+    return (
+        sense_data.lux,
+        sense_data.solar_rad,
+        round(altitude) if sense_data.altitude.valid and altitude is not None else None,
+    )
+
+
+def publish_sensor_data(sense_data: rasp_shutter.type_defs.SensorData) -> None:
+    """センサー値をキャッシュし、表示が変わる場合はクライアントへ通知する"""
+    worker_id = my_lib.pytest_util.get_worker_id()
+    with _broadcast_lock:
+        previous = _latest_sensor_data.get(worker_id)
+        _latest_sensor_data[worker_id] = (rasp_shutter.clock.monotonic(), sense_data)
+
+    if previous is None or _display_key(previous[1]) != _display_key(sense_data):
+        my_lib.webapp.event.notify_event(my_lib.webapp.event.EVENT_TYPE.DATA)
+
+
+def get_latest_sensor_data(config: rasp_shutter.config.AppConfig) -> rasp_shutter.type_defs.SensorData:
+    """配信用にキャッシュしたセンサー値を返す（キャッシュが古ければ取得し直す）
+
+    DUMMY_MODE ではテストがセンサー値のモックを差し替えるため、常に取得し直す。
+    """
+    worker_id = my_lib.pytest_util.get_worker_id()
+    if not rasp_shutter.util.is_dummy_mode():
+        with _broadcast_lock:
+            latest = _latest_sensor_data.get(worker_id)
+        if latest is not None and rasp_shutter.clock.monotonic() - latest[0] < SENSOR_CACHE_STALE_SEC:
+            return latest[1]
+
+    sense_data = get_sensor_data(config)
+    publish_sensor_data(sense_data)
+    return sense_data
+
+
+def get_sensor_data_age() -> float | None:
+    """キャッシュしたセンサー値の経過秒を返す（未取得なら None）"""
+    with _broadcast_lock:
+        latest = _latest_sensor_data.get(my_lib.pytest_util.get_worker_id())
+    return None if latest is None else rasp_shutter.clock.monotonic() - latest[0]
+
+
+def maybe_broadcast_sensor_data(config: rasp_shutter.config.AppConfig) -> None:
+    """SENSOR_BROADCAST_INTERVAL_SEC 経過していればセンサー値を別スレッドで取得して配信する
+
+    スケジューラループから呼ばれる唯一の producer。InfluxDB I/O でループを止めないよう、
+    fire-and-forget で実行する。DUMMY_MODE では /api/sensor が直接取得するので何もしない。
+    """
+    if rasp_shutter.util.is_dummy_mode():
+        return
+
+    worker_id = my_lib.pytest_util.get_worker_id()
+    now = rasp_shutter.clock.monotonic()
+    with _broadcast_lock:
+        last = _last_broadcast_time.get(worker_id)
+        if last is not None and now - last < SENSOR_BROADCAST_INTERVAL_SEC:
+            return
+        # 重複起動防止のため、スレッド起動前に時刻を更新する
+        _last_broadcast_time[worker_id] = now
+
+    def _do_broadcast() -> None:
+        try:
+            publish_sensor_data(get_sensor_data(config))
+        except Exception:  # pragma: no cover
+            logging.warning("Failed to broadcast sensor data", exc_info=True)
+
+    threading.Thread(target=_do_broadcast, name="sensor-broadcast", daemon=True).start()
+
+
+def reset_sensor_broadcast_state() -> None:
+    """配信用のキャッシュと前回配信時刻をリセット（テスト用）"""
+    worker_id = my_lib.pytest_util.get_worker_id()
+    with _broadcast_lock:
+        _latest_sensor_data.pop(worker_id, None)
+        _last_broadcast_time.pop(worker_id, None)
+
+
 @blueprint.route("/api/sensor", methods=["GET"])
 def api_sensor_data() -> flask.Response:
     config: rasp_shutter.config.AppConfig = flask.current_app.config["CONFIG"]
-    return flask.jsonify(dataclasses.asdict(get_sensor_data(config)))
+    return flask.jsonify(dataclasses.asdict(get_latest_sensor_data(config)))
@@ -357,6 +357,9 @@ def get_shutter_state():
         close_elapsed = my_lib.footprint.elapsed(
             rasp_shutter.control.webapi.control.exec_stat_file("close", index)
         )
+        auto_close_elapsed = my_lib.footprint.elapsed(
+            rasp_shutter.control.webapi.control.auto_close_stat_file(index)
+        )
 
         states.append(
             {
@@ -364,21 +367,19 @@ def get_shutter_state():
                 "name": shutter.name if hasattr(shutter, "name") else f"shutter_{index}",
                 "open_elapsed_sec": open_elapsed,
                 "close_elapsed_sec": close_elapsed,
+                "auto_close_elapsed_sec": auto_close_elapsed,
             }
         )
 
     pending_open = my_lib.footprint.exists(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
     pending_open_elapsed = my_lib.footprint.elapsed(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
 
-    auto_close_elapsed = my_lib.footprint.elapsed(rasp_shutter.control.config.STAT_AUTO_CLOSE.to_path())
-
     return {
         "success": True,
         "current_time": my_lib.time.now().isoformat(),
         "shutters": states,
         "pending_open": pending_open,
         "pending_open_elapsed_sec": pending_open_elapsed,
-        "auto_close_elapsed_sec": auto_close_elapsed,
     }
 
 
@@ -397,7 +398,6 @@ def reset_test_state():
     rasp_shutter.control.webapi.control.clean_stat_exec(config)
 
     # 自動制御状態をクリア
-    rasp_shutter.control.config.STAT_AUTO_CLOSE.unlink(missing_ok=True)
     rasp_shutter.control.config.STAT_PENDING_OPEN.unlink(missing_ok=True)
 
     # Slack通知履歴をクリア
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+実行ログ（log.db）の索引付きの読み出しと保持期間の管理
+
+log.db は my_lib.webapp.log が書き込む `log` テーブル（id・date・message）です。
+/api/log_view は全件を返すため、ログが増えるとフロントエンドはイベントのたびに全件を受け取り直し、
+ファイルも無制限に大きくなります。このモジュールは同じテーブルに索引を追加して、次のことを行います。
+
+- ページング: 主キー（id）のカーソルで、before_id より古い行を limit 行、after_id より新しい差分を返す
+- レベル: メッセージから判定した error / warning / info（フロントエンドの表示と同じ判定）を
+  式インデックスで絞り込む
+- キーワード: FTS5 の trigram 索引（外部コンテンツ。トリガーで log テーブルと同期）で絞り込む。
+  3 文字未満のキーワードと、FTS5 が使えない SQLite では走査する
+- 保持期間: webapp.data.log_retention_days を過ぎた行を、リーダーのプロセスのスレッドが
+  COMPACTION_INTERVAL_SEC ごとにバッチで削除し、空いたページを incremental_vacuum でファイルから返す。
+  incremental_vacuum への切り替えはファイル全体を作り直す（VACUUM）ので、enable_incremental_vacuum()
+  （src/backup_db.py vacuum）で別途行う
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import pathlib
+import sqlite3
+import threading
+
+import my_lib.time
+
+import rasp_shutter.config
+
+# 1 回に返す行数の既定値と上限
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# 古い行の削除で 1 回（1 トランザクション）に削除する行数と、バッチの間の待ち時間（秒）
+DELETE_BATCH_ROWS = 1000
+DELETE_SLEEP_SEC = 0.05
+# incremental_vacuum で 1 回に返すページ数
+VACUUM_PAGES_PER_STEP = 256
+# 保持期間を過ぎた行を削除する間隔（秒）
+COMPACTION_INTERVAL_SEC = 24 * 60 * 60
+
+# ログのレベル（リストの位置が _LEVEL_SQL の値）
+LEVELS = ("info", "warning", "error")
+
+# NOTE: my_lib.webapp.log はレベルを保存しないので、メッセージから判定する
+# （AppLog.vue と同じ判定。式インデックスを使うため、クエリでもこの式をそのまま使う）
+_LEVEL_SQL = (
+    "(CASE WHEN instr(message, '😵') > 0 OR instr(message, '失敗') > 0 THEN 2"
+    " WHEN instr(message, '⚠') > 0 THEN 1 ELSE 0 END)"
+)
+
+# FTS5 の trigram で検索できるキーワードの最小の文字数
+_FTS_MIN_LENGTH = 3
+
+_LOG_COLUMNS = {"id", "date", "message"}
+
+
+class LogStoreError(Exception):
+    """log.db を読めない（my_lib.webapp.log のテーブルが無い・形式が違う）"""
+
+
+def _connect(log_file_path: pathlib.Path) -> sqlite3.Connection:
+    # NOTE: VACUUM やバッチごとのトランザクションを明示的に扱うため、自動でトランザクションを始めない
+    return sqlite3.connect(log_file_path, timeout=30, isolation_level=None)
+
+
+def _has_table(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    """log テーブルにレベルの式インデックスと FTS5 の索引を追加する
+
+    NOTE: 索引とトリガーは log テーブルに付くので、log テーブルが作り直された場合は一緒に消える。
+    そのため、式インデックスの有無で作成済みかどうかを判定する。
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(log)")}
+    if not _LOG_COLUMNS <= columns:
+        raise LogStoreError("log table (id, date, message) is not found")
+    if _has_table(conn, "idx_log_level"):
+        return
+
+    # NOTE: 複数のプロセスが同時に作成しないよう、ロックを取ってから確認し直す
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if not _has_table(conn, "idx_log_level"):
+            conn.execute(f"CREATE INDEX idx_log_level ON log({_LEVEL_SQL}, id)")
+            conn.execute("DROP TABLE IF EXISTS log_fts")
+            _create_fts(conn)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _create_fts(conn: sqlite3.Connection) -> None:
+    try:
+        conn.execute(
+            "CREATE VIRTUAL TABLE log_fts USING fts5("
+            "message, content='log', content_rowid='id', tokenize='trigram')"
+        )
+    except sqlite3.OperationalError:
+        # NOTE: FTS5・trigram（SQLite 3.34 以降）が無ければ、キーワードは走査で絞り込む
+        logging.warning("FTS5 trigram tokenizer is not available; log keyword search scans the table")
+        return
+
+    # NOTE: executescript は暗黙に COMMIT するので、トリガーは 1 つずつ作成する
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS log_fts_insert AFTER INSERT ON log BEGIN
+            INSERT INTO log_fts(rowid, message) VALUES (new.id, new.message);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS log_fts_delete AFTER DELETE ON log BEGIN
+            INSERT INTO log_fts(log_fts, rowid, message) VALUES ('delete', old.id, old.message);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS log_fts_update AFTER UPDATE OF message ON log BEGIN
+            INSERT INTO log_fts(log_fts, rowid, message) VALUES ('delete', old.id, old.message);
+            INSERT INTO log_fts(rowid, message) VALUES (new.id, new.message);
+        END
+    """)
+    conn.execute("INSERT INTO log_fts(log_fts) VALUES ('rebuild')")
+
+
+def fetch(
+    log_file_path: pathlib.Path,
+    before_id: int | None = None,
+    after_id: int | None = None,
+    limit: int = DEFAULT_LIMIT,
+    level: str | None = None,
+    keyword: str | None = None,
+) -> dict:
+    """新しい順に最大 limit 行のログを返す
+
+    before_id を指定すると、それより古い行（次のページ）を返す。after_id を指定すると、
+    それより新しい行（前回からの差分）だけを返す。level は指定したレベル以上の行に絞る。
+
+    Returns
+    -------
+        {"data": [{id, date, message, level}, ...], "has_more": limit 行を超えて残っているか}
+
+    """
+    conditions = []
+    params: list = []
+    indexed_by = ""
+    if before_id is not None:
+        conditions.append("id < ?")
+        params.append(before_id)
+    if after_id is not None:
+        conditions.append("id > ?")
+        params.append(after_id)
+    if level is not None and LEVELS.index(level) > 0:
+        conditions.append(f"{_LEVEL_SQL} >= ?")
+        params.append(LEVELS.index(level))
+        # NOTE: 統計が無いと、プランナは ORDER BY id DESC LIMIT のために主キーを走査してしまう。
+        # warning 以上の行は少ないので、式インデックスで絞ってから並べ替える方が速い
+        indexed_by = "INDEXED BY idx_log_level"
+
+    conn = _connect(log_file_path)
+    try:
+        _ensure_schema(conn)
+        if keyword:
+            if len(keyword) >= _FTS_MIN_LENGTH and _has_table(conn, "log_fts"):
+                conditions.append("id IN (SELECT rowid FROM log_fts WHERE log_fts MATCH ?)")
+                # NOTE: 記号を演算子として解釈させないよう、フレーズとして渡す
+                params.append('"{}"'.format(keyword.replace('"', '""')))
+            else:
+                conditions.append("instr(message, ?) > 0")
+                params.append(keyword)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = conn.execute(
+            f"SELECT id, date, message, {_LEVEL_SQL} FROM log {indexed_by} {where}"  # noqa: S608
+            " ORDER BY id DESC LIMIT ?",
+            [*params, limit + 1],
+        ).fetchall()
+    finally:
+        conn.close()
+
+    return {
+        "data": [
+            {"id": row_id, "date": date, "message": message, "level": LEVELS[level_code]}
+            for row_id, date, message, level_code in rows[:limit]
+        ],
+        "has_more": len(rows) > limit,
+    }
+
+
+def _cutoff_id(conn: sqlite3.Connection, retention_days: int) -> int | None:
+    """保持期間を過ぎた行のうち、最も新しい行の id"""
+    row = conn.execute("SELECT typeof(date) FROM log ORDER BY id DESC LIMIT 1").fetchone()
+    if row is None:
+        return None
+
+    cutoff = my_lib.time.now() - datetime.timedelta(days=retention_days)
+    if row[0] in ("integer", "real"):
+        value: str | float = cutoff.timestamp()
+    else:
+        # NOTE: 日付の文字列の書式（区切りが空白か T か）によらず比べられるよう、日付だけで比べる
+        value = cutoff.date().isoformat()
+
+    # NOTE: date に索引は無いが、1 日 1 回だけなので走査する（id は時刻の順に増える）
+    return conn.execute("SELECT MAX(id) FROM log WHERE date < ?", (value,)).fetchone()[0]
+
+
+def compact(
+    log_file_path: pathlib.Path, retention_days: int, should_terminate: threading.Event | None = None
+) -> int:
+    """保持期間を過ぎた行をバッチで削除し、空いたページをファイルから返す。削除した行数を返す"""
+    if should_terminate is None:
+        should_terminate = threading.Event()
+
+    conn = _connect(log_file_path)
+    try:
+        _ensure_schema(conn)
+        cutoff_id = _cutoff_id(conn, retention_days)
+        deleted = 0
+        while cutoff_id is not None:
+            # NOTE: 1 バッチを 1 トランザクションにして、ログの書き込みを長く待たせない
+            count = conn.execute(
+                "DELETE FROM log WHERE id IN (SELECT id FROM log WHERE id <= ? ORDER BY id LIMIT ?)",
+                (cutoff_id, DELETE_BATCH_ROWS),
+            ).rowcount
+            deleted += count
+            if count < DELETE_BATCH_ROWS or should_terminate.wait(DELETE_SLEEP_SEC):
+                break
+
+        if deleted > 0:
+            logging.info("Deleted %d log entries older than %d days", deleted, retention_days)
+            _vacuum(conn, should_terminate)
+        return deleted
+    finally:
+        conn.close()
+
+
+def _vacuum(conn: sqlite3.Connection, should_terminate: threading.Event) -> None:
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        # NOTE: 空いたページは SQLite が再利用するので、切り替えるまでファイルが小さくならないだけ
+        logging.info(
+            "Log database is not in incremental auto_vacuum mode, keep free pages (run backup_db.py vacuum)"
+        )
+        return
+
+    while conn.execute("PRAGMA freelist_count").fetchone()[0] > 0:
+        conn.execute(f"PRAGMA incremental_vacuum({VACUUM_PAGES_PER_STEP:d})").fetchall()
+        if should_terminate.wait(DELETE_SLEEP_SEC):
+            break
+
+
+def enable_incremental_vacuum(log_file_path: pathlib.Path) -> bool:
+    """log.db を incremental auto_vacuum に切り替える。切り替えた場合は True
+
+    NOTE: 切り替えは VACUUM でファイル全体を作り直した時に反映され、その間は書き込みが止まるので、
+    アプリを停止したメンテナンスの手順として実行する（古い行を削除するスレッドでは行わない）
+    """
+    conn = _connect(log_file_path)
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return True
+    finally:
+        conn.close()
+
+
+class _Compactor:
+    """COMPACTION_INTERVAL_SEC ごとに保持期間を過ぎたログを削除するスレッド"""
+
+    def __init__(self, log_file_path: pathlib.Path, retention_days: int):
+        self.log_file_path = log_file_path
+        self.retention_days = retention_days
+        self._should_terminate = threading.Event()
+        self._thread = threading.Thread(target=self._worker, name="log-compaction", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._should_terminate.set()
+
+    def _worker(self) -> None:
+        # NOTE: 起動直後はログの初期化（my_lib.webapp.log.init）を待つため、1 周期目も少し待つ
+        wait_sec = 60.0
+        while not self._should_terminate.wait(wait_sec):
+            try:
+                compact(self.log_file_path, self.retention_days, self._should_terminate)
+            except Exception:
+                logging.exception("Failed to compact log database: %s", self.log_file_path)
+            wait_sec = COMPACTION_INTERVAL_SEC
+
+
+_compactor: _Compactor | None = None
+
+
+def start_compactor(config: rasp_shutter.config.AppConfig) -> None:
+    """webapp.data.log_retention_days が設定されていれば、古いログの定期削除を開始する"""
+    global _compactor
+    retention_days = config.webapp.data.log_retention_days
+    if retention_days is None:
+        return
+
+    stop_compactor()
+    _compactor = _Compactor(config.webapp.data.log_file_path, retention_days)
+    _compactor.start()
+
+
+def stop_compactor() -> None:
+    global _compactor
+    compactor, _compactor = _compactor, None
+    if compactor is not None:
+        compactor.stop()
@@ -8,7 +8,10 @@ Flask 依存を持たない純粋なデータ変換ロジックのみを提供
 
 from __future__ import annotations
 
+import bisect
+import dataclasses
 import datetime
+import functools
 import typing
 
 if typing.TYPE_CHECKING:
@@ -26,6 +29,11 @@ POSTPONE_TABLE_LIMIT = 100
 # what-if 分析で試す閾値スケール係数
 WHAT_IF_SCALE_FACTORS = (1.0, 0.9, 0.8, 0.7, 0.6, 0.5)
 
+# what-if グリッドの分割数（lux / solar_rad は現行閾値の 1/N 刻み、altitude は 1 度刻み）
+WHAT_IF_GRID_STEPS = 50
+WHAT_IF_GRID_ALTITUDE_STEPS = 10
+WHAT_IF_GRID_ALTITUDE_STEP_DEG = 1.0
+
 POSTPONE_REASON_LABEL = {
     "sensor_invalid": "センサー値不明",
     "too_dark": "暗くて見合わせ",
@@ -86,15 +94,27 @@ def calculate_data_period(operation_metrics: list[dict]) -> dict:
     }
 
 
-def _extract_time_data(day_data: dict, key: str) -> float | None:
-    """時刻データを抽出して時間形式に変換"""
-    if not day_data.get(key):
+def _minute_of_day(row: dict) -> int | None:
+    """行の時刻（記録時のローカル時刻）をその日の 0 時からの分で返す
+
+    collector から取得した行は整数の ts・tz_offset を持つので、文字列をパースせずに求める
+    （手で組み立てた行など、timestamp しか無い場合は ISO 8601 の文字列をパースする）。
+    """
+    if (ts := row.get("ts")) is not None:
+        return (ts + row["tz_offset"]) % 86400 // 60
+    if not row.get("timestamp"):
         return None
     try:
-        dt = datetime.datetime.fromisoformat(day_data[key].replace("Z", "+00:00"))
-        return dt.hour + dt.minute / 60.0
-    except (ValueError, TypeError):
+        dt = datetime.datetime.fromisoformat(row["timestamp"].replace("Z", "+00:00"))
+    except (ValueError, TypeError, AttributeError):
         return None
+    return dt.hour * 60 + dt.minute
+
+
+def _hour_of_day(row: dict) -> float | None:
+    """行の時刻を時間単位（7:30 → 7.5）で返す"""
+    minute = _minute_of_day(row)
+    return None if minute is None else minute / 60.0
 
 
 def _collect_sensor_data_by_type(operation_metrics: list[dict], operation_type: str) -> dict:
@@ -149,32 +169,26 @@ def generate_statistics(operation_metrics: list[dict], failure_metrics: list[dic
             "failure_total": len(failure_metrics),
         }
 
-    # 日付ごとの最後の操作時刻を取得（時刻分析用）
-    daily_last_operations = {}
+    # 日付ごとの最後の操作を取得（時刻分析用）
+    daily_last_operations: dict[str, dict] = {}
     for op_data in operation_metrics:
         date = op_data.get("date")
         action = op_data.get("action")
-        timestamp = op_data.get("timestamp")
 
-        if date and action and timestamp:
-            key = f"{date}_{action}"
-            # より新しい時刻で上書き（最後の操作時刻を保持）
-            daily_last_operations[key] = timestamp
+        if date and action and _time_order(op_data) is not None:
+            # より新しい操作で上書き（最後の操作時刻を保持）
+            daily_last_operations[f"{date}_{action}"] = op_data
 
     # 時刻データを収集（最後の操作時刻のみ）
     open_times = []
     close_times = []
 
-    for key, timestamp in daily_last_operations.items():
-        if (
-            key.endswith("_open")
-            and (t := _extract_time_data({"timestamp": timestamp}, "timestamp")) is not None
-        ):
+    for key, op_data in daily_last_operations.items():
+        if (t := _hour_of_day(op_data)) is None:
+            continue
+        if key.endswith("_open"):
             open_times.append(t)
-        elif (
-            key.endswith("_close")
-            and (t := _extract_time_data({"timestamp": timestamp}, "timestamp")) is not None
-        ):
+        elif key.endswith("_close"):
             close_times.append(t)
 
     # センサーデータを操作タイプ別に収集（autoとscheduleを統合）
@@ -234,15 +248,7 @@ def generate_postpone_statistics(postpone_events: list[dict]) -> dict:
         trigger_counts[ev["trigger"]] = trigger_counts.get(ev["trigger"], 0) + 1
 
     # resolve までのラグ（分）
-    lag_minutes: list[float] = []
-    for ev in postpone_events:
-        if ev.get("resolved_at") and ev.get("timestamp"):
-            try:
-                started = datetime.datetime.fromisoformat(ev["timestamp"])
-                resolved = datetime.datetime.fromisoformat(ev["resolved_at"])
-                lag_minutes.append((resolved - started).total_seconds() / 60.0)
-            except (ValueError, TypeError):
-                continue
+    lag_minutes = [lag for ev in postpone_events if (lag := _calc_lag_minutes(ev)) is not None]
 
     return {
         "total": total,
@@ -296,14 +302,9 @@ def prepare_sensor_samples_data(sensor_samples: list[dict], current_schedule: di
     }
 
     for sample in sensor_samples:
-        timestamp_str = sample.get("timestamp")
-        if timestamp_str is None:
-            continue
-        try:
-            ts = datetime.datetime.fromisoformat(timestamp_str)
-        except ValueError:
+        minutes = _minute_of_day(sample)
+        if minutes is None:
             continue
-        minutes = ts.hour * 60 + ts.minute
         context = sample.get("context")
         context_key = context if context in SENSOR_SAMPLE_CONTEXTS else "unknown"
         for sensor in ("lux", "solar_rad", "altitude"):
@@ -372,49 +373,39 @@ def prepare_threshold_margin_data(operation_metrics: list[dict], current_schedul
 
 
 def _extract_daily_last_operations(operation_metrics: list[dict]) -> dict:
-    """日付ごとの最後の操作時刻とセンサーデータを取得"""
+    """日付ごとの最後の操作（時刻とセンサーデータ）を取得"""
     daily_last_operations: dict[str, dict] = {}
 
     for op_data in operation_metrics:
         date = op_data.get("date")
         action = op_data.get("action")
-        timestamp = op_data.get("timestamp")
+        order = _time_order(op_data)
 
-        if date and action and timestamp:
+        if date and action and order is not None:
             key = f"{date}_{action}"
             # より新しい時刻で上書き
-            if key not in daily_last_operations or timestamp > daily_last_operations[key]["timestamp"]:
-                daily_last_operations[key] = {
-                    "timestamp": timestamp,
-                    "lux": op_data.get("lux"),
-                    "solar_rad": op_data.get("solar_rad"),
-                    "altitude": op_data.get("altitude"),
-                }
+            if key not in daily_last_operations or order > _time_order(daily_last_operations[key]):
+                daily_last_operations[key] = op_data
 
     return daily_last_operations
 
 
+def _time_order(row: dict) -> int | str | None:
+    """行の時刻の並び順のキー（ts が無い行は timestamp の文字列）"""
+    ts = row.get("ts")
+    return ts if ts is not None else row.get("timestamp")
+
+
 def _extract_daily_data(date: str, action: str, daily_last_operations: dict) -> tuple[float | None, ...]:
     """指定した日付と操作の時刻とセンサーデータを抽出"""
-    key = f"{date}_{action}"
-    time_val = None
-    lux_val = None
-    solar_rad_val = None
-    altitude_val = None
-
-    if key in daily_last_operations:
-        try:
-            dt = datetime.datetime.fromisoformat(
-                daily_last_operations[key]["timestamp"].replace("Z", "+00:00")
-            )
-            time_val = dt.hour + dt.minute / 60.0
-            lux_val = daily_last_operations[key]["lux"]
-            solar_rad_val = daily_last_operations[key]["solar_rad"]
-            altitude_val = daily_last_operations[key]["altitude"]
-        except (ValueError, TypeError):
-            pass
+    op_data = daily_last_operations.get(f"{date}_{action}")
+    if op_data is None:
+        return None, None, None, None
 
-    return time_val, lux_val, solar_rad_val, altitude_val
+    time_val = _hour_of_day(op_data)
+    if time_val is None:
+        return None, None, None, None
+    return time_val, op_data.get("lux"), op_data.get("solar_rad"), op_data.get("altitude")
 
 
 def prepare_time_series_data(operation_metrics: list[dict]) -> dict:
@@ -534,6 +525,8 @@ def prepare_failure_time_series(daily_failure_counts: list[dict]) -> dict:
 
 def _calc_lag_minutes(event: dict) -> float | None:
     """見合わせイベントの解消ラグ（分）を計算。未解消・不正値は None"""
+    if (started_ts := event.get("ts")) is not None and (resolved_ts := event.get("resolved_ts")) is not None:
+        return (resolved_ts - started_ts) / 60.0
     if not event.get("resolved_at") or not event.get("timestamp"):
         return None
     try:
@@ -583,6 +576,7 @@ def analyze_threshold_tuning(postpone_events: list[dict], current_schedule: dict
     empty: dict = {
         "shortfall": {"lux": [], "solar_rad": []},
         "what_if": [],
+        "what_if_grid": None,
         "resolve_lag_minutes": [],
     }
     if current_schedule is None:
@@ -650,67 +644,242 @@ def analyze_threshold_tuning(postpone_events: list[dict], current_schedule: dict
     return {
         "shortfall": shortfall,
         "what_if": what_if,
+        "what_if_grid": analyze_threshold_grid(too_dark_open_events, current_schedule),
         "resolve_lag_minutes": resolve_lag_minutes,
     }
 
 
+def _grid_axes(current_open: dict) -> dict[str, list[float]] | None:
+    """現行の open 閾値から緩和方向の閾値軸（昇順）を作る"""
+    try:
+        lux = float(current_open["lux"])
+        solar_rad = float(current_open["solar_rad"])
+        altitude = float(current_open["altitude"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    steps = WHAT_IF_GRID_STEPS
+    altitude_steps = WHAT_IF_GRID_ALTITUDE_STEPS
+    return {
+        "lux": [lux * (i + 1) / steps for i in range(steps)],
+        "solar_rad": [solar_rad * (i + 1) / steps for i in range(steps)],
+        "altitude": [
+            altitude - (altitude_steps - 1 - i) * WHAT_IF_GRID_ALTITUDE_STEP_DEG
+            for i in range(altitude_steps)
+        ],
+    }
+
+
+def analyze_threshold_grid(too_dark_open_events: list[dict], current_schedule: dict | None) -> dict | None:
+    """lux・solar_rad・altitude の閾値を独立に振った what-if グリッドを生成
+
+    判定条件は check_brightness() の open 判定と同じ AND 条件（すべて閾値超え）。
+    閾値は現行スケジュールの open 閾値を基準に緩和方向へ振った絶対値で、
+    counts[altitude][lux][solar_rad] が「その閾値なら即時開けられたイベント数」。
+
+    NOTE: イベントごとに各軸で「超えている閾値の個数」を二分探索で求めて
+    3 次元ヒストグラムに積み、軸ごとの累積和（大きい側から）を取ることで、
+    グリッド全体をイベント数 + セル数に比例する計算量で求める。
+    """
+    if current_schedule is None:
+        return None
+    axes = _grid_axes(current_schedule.get("open", {}))
+    if axes is None:
+        return None
+
+    lux_axis = axes["lux"]
+    solar_rad_axis = axes["solar_rad"]
+    altitude_axis = axes["altitude"]
+    n_lux = len(lux_axis)
+    n_solar_rad = len(solar_rad_axis)
+    n_altitude = len(altitude_axis)
+
+    # hist[a][l][s]: 各軸で超えている閾値の個数が (a, l, s) のイベント数
+    hist = [[[0] * (n_solar_rad + 1) for _ in range(n_lux + 1)] for _ in range(n_altitude + 1)]
+    total_events = 0
+    for event in too_dark_open_events:
+        lux = event.get("lux")
+        solar_rad = event.get("solar_rad")
+        altitude = event.get("altitude")
+        if lux is None or solar_rad is None or altitude is None:
+            continue
+        total_events += 1
+        hist[bisect.bisect_left(altitude_axis, altitude)][bisect.bisect_left(lux_axis, lux)][
+            bisect.bisect_left(solar_rad_axis, solar_rad)
+        ] += 1
+
+    # 大きい側からの累積和（3 軸それぞれ）
+    for plane in hist:
+        for row in plane:
+            for s in range(n_solar_rad - 1, -1, -1):
+                row[s] += row[s + 1]
+        for l_index in range(n_lux - 1, -1, -1):
+            row, upper = plane[l_index], plane[l_index + 1]
+            for s in range(n_solar_rad + 1):
+                row[s] += upper[s]
+    for a_index in range(n_altitude - 1, -1, -1):
+        plane, upper_plane = hist[a_index], hist[a_index + 1]
+        for l_index in range(n_lux + 1):
+            row, upper = plane[l_index], upper_plane[l_index]
+            for s in range(n_solar_rad + 1):
+                row[s] += upper[s]
+
+    # NOTE: 閾値 j を超える = 超えている閾値の個数が j + 1 以上
+    counts = [[hist[a + 1][l_index + 1][1:] for l_index in range(n_lux)] for a in range(n_altitude)]
+
+    return {
+        "lux": lux_axis,
+        "solar_rad": solar_rad_axis,
+        "altitude": altitude_axis,
+        "counts": counts,
+        "total_events": total_events,
+    }
+
+
+# /api/metrics/data のトップレベルのキー（sections で個別に要求できる単位）
+DASHBOARD_SECTIONS = (
+    "data_period",
+    "stats",
+    "shutter_breakdown",
+    "postpone",
+    "charts",
+    "threshold_tuning",
+    "reason_labels",
+    "current_thresholds",
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class DashboardQuery:
+    """ダッシュボードデータの絞り込み条件
+
+    Attributes
+    ----------
+        start_date: 開始日（YYYY-MM-DD、None なら制限しない）
+        end_date: 終了日（YYYY-MM-DD、None なら制限しない）
+        shutter_index: シャッターのインデックス（None なら全シャッター、見合わせとセンサーには適用しない）
+        sections: 生成するセクション（None なら全部）
+
+    """
+
+    start_date: str | None = None
+    end_date: str | None = None
+    shutter_index: int | None = None
+    sections: frozenset[str] | None = None
+
+    @property
+    def has_period(self) -> bool:
+        return self.start_date is not None or self.end_date is not None
+
+    def includes(self, section: str) -> bool:
+        return self.sections is None or section in self.sections
+
+
+class _DashboardSource:
+    """ダッシュボードの各セクションが使うデータ（要求されたセクションが使うものだけ読み出す）"""
+
+    def __init__(
+        self, collector: rasp_shutter.metrics.collector.MetricsCollector, query: DashboardQuery
+    ) -> None:
+        self.collector = collector
+        self.query = query
+
+    @functools.cached_property
+    def operation_metrics(self) -> list[dict]:
+        query = self.query
+        return self.collector.get_operation_metrics(query.start_date, query.end_date, query.shutter_index)
+
+    @functools.cached_property
+    def failure_metrics(self) -> list[dict]:
+        query = self.query
+        return self.collector.get_failure_metrics(query.start_date, query.end_date, query.shutter_index)
+
+    @functools.cached_property
+    def postpone_events(self) -> list[dict]:
+        if self.query.has_period:
+            return self.collector.get_postpone_events(self.query.start_date, self.query.end_date)
+        return self.collector.get_recent_postpone_events(POSTPONE_RECENT_DAYS)
+
+    @functools.cached_property
+    def sensor_samples(self) -> list[dict]:
+        if self.query.has_period:
+            return self.collector.get_sensor_samples(self.query.start_date, self.query.end_date)
+        return self.collector.get_recent_sensor_samples(SENSOR_SAMPLE_DISPLAY_DAYS)
+
+    @functools.cached_property
+    def stats(self) -> dict:
+        return generate_statistics(self.operation_metrics, self.failure_metrics)
+
+    @functools.cached_property
+    def daily_failure_counts(self) -> list[dict]:
+        failure_dates = [str(date) for row in self.failure_metrics if (date := row.get("date"))]
+        if not failure_dates:
+            return []
+        return self.collector.get_daily_failure_counts(
+            min(failure_dates), max(failure_dates), self.query.shutter_index
+        )
+
+
+def _current_thresholds(current_schedule: dict | None) -> dict | None:
+    if current_schedule is None:
+        return None
+    return {
+        direction: {
+            sensor: current_schedule.get(direction, {}).get(sensor)
+            for sensor in ("lux", "solar_rad", "altitude")
+        }
+        for direction in ("open", "close")
+    }
+
+
 def build_dashboard_data(
-    collector: rasp_shutter.metrics.collector.MetricsCollector, current_schedule: dict | None
+    collector: rasp_shutter.metrics.collector.MetricsCollector,
+    current_schedule: dict | None,
+    query: DashboardQuery | None = None,
 ) -> dict:
-    """/api/metrics/data 用のダッシュボードデータを構築する唯一の入口"""
-    operation_metrics = collector.get_all_operation_metrics()
-    failure_metrics = collector.get_all_failure_metrics()
-    postpone_events = collector.get_recent_postpone_events(POSTPONE_RECENT_DAYS)
-    sensor_samples = collector.get_recent_sensor_samples(SENSOR_SAMPLE_DISPLAY_DAYS)
-
-    stats = generate_statistics(operation_metrics, failure_metrics)
-    data_period = calculate_data_period(operation_metrics)
-
-    failure_dates = [str(date) for row in failure_metrics if (date := row.get("date"))]
-    if failure_dates:
-        daily_failure_counts = collector.get_daily_failure_counts(min(failure_dates), max(failure_dates))
-    else:
-        daily_failure_counts = []
+    """/api/metrics/data 用のダッシュボードデータを構築する唯一の入口
 
-    current_thresholds = None
-    if current_schedule is not None:
-        current_thresholds = {
-            direction: {
-                sensor: current_schedule.get(direction, {}).get(sensor)
-                for sensor in ("lux", "solar_rad", "altitude")
-            }
-            for direction in ("open", "close")
-        }
+    query で期間・シャッター・セクションを絞り込める。要求されていないセクションは計算しない
+    （そのセクションだけが使うデータは DB からも読み出さない）。
+    """
+    query = query or DashboardQuery()
+    source = _DashboardSource(collector, query)
 
-    return {
-        "data_period": data_period,
-        "stats": {
-            "manual_open_total": stats["manual_open_total"],
-            "manual_close_total": stats["manual_close_total"],
-            "auto_open_total": stats["auto_open_total"],
-            "auto_close_total": stats["auto_close_total"],
-            "failure_total": stats["failure_total"],
-            "total_days": stats["total_days"],
+    builders: dict[str, typing.Callable[[], typing.Any]] = {
+        "data_period": lambda: calculate_data_period(source.operation_metrics),
+        "stats": lambda: {
+            key: source.stats[key]
+            for key in (
+                "manual_open_total",
+                "manual_close_total",
+                "auto_open_total",
+                "auto_close_total",
+                "failure_total",
+                "total_days",
+            )
         },
-        "shutter_breakdown": generate_shutter_statistics(
-            collector.get_shutter_operation_counts(), collector.get_shutter_failure_counts()
+        "shutter_breakdown": lambda: generate_shutter_statistics(
+            collector.get_shutter_operation_counts(query.start_date, query.end_date, query.shutter_index),
+            collector.get_shutter_failure_counts(query.start_date, query.end_date, query.shutter_index),
         ),
-        "postpone": {
-            "summary": generate_postpone_statistics(postpone_events),
-            "chart": prepare_postpone_chart_data(postpone_events),
-            "events": prepare_postpone_events_table(postpone_events),
+        "postpone": lambda: {
+            "summary": generate_postpone_statistics(source.postpone_events),
+            "chart": prepare_postpone_chart_data(source.postpone_events),
+            "events": prepare_postpone_events_table(source.postpone_events),
         },
-        "charts": {
-            "open_times": stats["open_times"],
-            "close_times": stats["close_times"],
-            "auto_sensor_data": stats["auto_sensor_data"],
-            "manual_sensor_data": stats["manual_sensor_data"],
-            "time_series": prepare_time_series_data(operation_metrics),
-            "failure_time_series": prepare_failure_time_series(daily_failure_counts),
-            "sensor_samples": prepare_sensor_samples_data(sensor_samples, current_schedule),
-            "threshold_margin": prepare_threshold_margin_data(operation_metrics, current_schedule),
+        "charts": lambda: {
+            "open_times": source.stats["open_times"],
+            "close_times": source.stats["close_times"],
+            "auto_sensor_data": source.stats["auto_sensor_data"],
+            "manual_sensor_data": source.stats["manual_sensor_data"],
+            "time_series": prepare_time_series_data(source.operation_metrics),
+            "failure_time_series": prepare_failure_time_series(source.daily_failure_counts),
+            "sensor_samples": prepare_sensor_samples_data(source.sensor_samples, current_schedule),
+            "threshold_margin": prepare_threshold_margin_data(source.operation_metrics, current_schedule),
         },
-        "threshold_tuning": analyze_threshold_tuning(postpone_events, current_schedule),
-        "reason_labels": POSTPONE_REASON_LABEL,
-        "current_thresholds": current_thresholds,
+        "threshold_tuning": lambda: analyze_threshold_tuning(source.postpone_events, current_schedule),
+        "reason_labels": lambda: POSTPONE_REASON_LABEL,
+        "current_thresholds": lambda: _current_thresholds(current_schedule),
     }
+
+    return {section: builders[section]() for section in DASHBOARD_SECTIONS if query.includes(section)}
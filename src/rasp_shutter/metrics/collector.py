@@ -10,22 +10,120 @@
 
 from __future__ import annotations
 
+import contextlib
 import datetime
 import logging
 import pathlib
 import sqlite3
 import threading
+from collections.abc import Callable, Iterator
 
 import my_lib.sqlite_util
 import my_lib.time
 
+import rasp_shutter.clock
+import rasp_shutter.metrics.migration
+import rasp_shutter.metrics.schema
 import rasp_shutter.type_defs
 
 # センサーサンプルの保持期間（日）。表示は直近 7 日のみのため、無制限に増やさない。
 SENSOR_SAMPLE_RETENTION_DAYS = 30
 
-# F-8: シャッター個体別メトリクス用の列（既存 DB へのマイグレーション対象）
-_SHUTTER_COLUMNS = (("shutter_index", "INTEGER"), ("shutter_name", "TEXT"))
+
+# 分析用に読み出す列（互換ビューの列のうち、SQL で組み立てる ISO 8601 の timestamp・created_at は除く）
+# NOTE: 文字列を組み立てる SQL の処理と Python でのパースの両方を省くため、時刻は整数の ts・tz_offset を使う
+_ANALYSIS_COLUMNS = {
+    "operation_metrics": (
+        "id, date, action, operation_type, lux, solar_rad, altitude, "
+        "shutter_index, shutter_name, ts, tz_offset, day"
+    ),
+    "daily_failures": "id, date, failure_count, shutter_index, shutter_name, ts, tz_offset, day",
+    "sensor_samples": "id, date, lux, solar_rad, altitude, context, ts, tz_offset, day",
+}
+
+
+# 書き込みのたびに呼び出すコールバック（ダッシュボードの再生成用、rasp_shutter.metrics.dashboard）。
+# センサーサンプルの記録では呼び出さない
+_write_listeners: list[Callable[[], None]] = []
+
+
+def add_write_listener(listener: Callable[[], None]) -> None:
+    if listener not in _write_listeners:
+        _write_listeners.append(listener)
+
+
+def remove_write_listener(listener: Callable[[], None]) -> None:
+    if listener in _write_listeners:
+        _write_listeners.remove(listener)
+
+
+def _notify_written() -> None:
+    for listener in _write_listeners.copy():
+        try:
+            listener()
+        except Exception:
+            logging.exception("Metrics write listener failed")
+
+
+def where_clause(
+    start_date: str | None, end_date: str | None, shutter_index: int | None = None
+) -> tuple[str, list]:
+    """期間・シャッターの絞り込み条件の WHERE 句とパラメータを返す
+
+    期間（YYYY-MM-DD）は day 列（整数）の範囲にする。v2 のテーブルと互換ビューのどちらにも使える。
+    NOTE: 条件の列の並びは複合インデックス（shutter_index, day）・（day, ...）の範囲検索になるようにしている
+    """
+    conditions = []
+    params: list = []
+    if shutter_index is not None:
+        conditions.append("shutter_index = ?")
+        params.append(shutter_index)
+    if start_date is not None:
+        conditions.append("day >= ?")
+        params.append(rasp_shutter.metrics.schema.encode_date(start_date))
+    if end_date is not None:
+        conditions.append("day <= ?")
+        params.append(rasp_shutter.metrics.schema.encode_date(end_date))
+
+    return (f"WHERE {' AND '.join(conditions)}" if conditions else "", params)
+
+
+class _PostponeIndex:
+    """1 日分の見合わせイベントのメモリ上の索引
+
+    見合わせは暗い間ずっと毎秒判定されるので、クールダウンの判定と、操作の記録時に解消する
+    未解決のイベントの特定を、DB を読まずに行うために持つ。クールダウン・解消はどちらも
+    同じ日のイベントだけが対象なので、記録する日の分だけを DB から読み込んで持つ。
+    """
+
+    def __init__(self, conn: sqlite3.Connection, day: int):
+        self.day = day
+        # (intended_action, reason) -> 最後に記録した時刻（エポック秒）
+        self.last_ts: dict[tuple[int, str], int] = {}
+        # intended_action -> 未解決のイベントの id
+        self.unresolved: dict[int, list[int]] = {}
+
+        for action, reason, ts in conn.execute(
+            """
+            SELECT e.intended_action, l.name, MAX(e.ts)
+            FROM postpone_events_v2 AS e JOIN metrics_label AS l ON l.id = e.reason
+            WHERE e.day = ?
+            GROUP BY e.intended_action, e.reason
+        """,
+            (day,),
+        ):
+            self.last_ts[(action, reason)] = ts
+        for event_id, action in conn.execute(
+            "SELECT id, intended_action FROM postpone_events_v2"
+            " WHERE day = ? AND resolved_ts IS NULL ORDER BY id",
+            (day,),
+        ):
+            self.unresolved.setdefault(action, []).append(event_id)
+
+    def is_cooling_down(self, key: tuple[int, str], threshold: float) -> bool:
+        """key の見合わせを threshold より後に記録済みか"""
+        last_ts = self.last_ts.get(key)
+        return last_ts is not None and last_ts > threshold
 
 
 class MetricsCollector:
@@ -43,125 +141,86 @@ class MetricsCollector:
         self.db_path = db_path
         self.lock = threading.Lock()
         # sensor_samples の日次クリーンアップを 1 日 1 回に抑えるための記録
-        self._last_cleanup_date: str | None = None
+        self._last_cleanup_date: int | None = None
+        # 見合わせイベントの索引（self.lock で保護する）
+        self._postpone_index: _PostponeIndex | None = None
         self._init_database()
 
     def _init_database(self):
-        """データベース初期化"""
-        with my_lib.sqlite_util.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS operation_metrics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TIMESTAMP NOT NULL,
-                    date TEXT NOT NULL,
-                    action TEXT NOT NULL CHECK (action IN ('open', 'close')),
-                    operation_type TEXT NOT NULL CHECK (operation_type IN ('manual', 'schedule', 'auto')),
-                    lux REAL,
-                    solar_rad REAL,
-                    altitude REAL,
-                    shutter_index INTEGER,
-                    shutter_name TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS daily_failures (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT NOT NULL,
-                    failure_count INTEGER DEFAULT 1,
-                    timestamp TIMESTAMP NOT NULL,
-                    shutter_index INTEGER,
-                    shutter_name TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS postpone_events (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TIMESTAMP NOT NULL,
-                    date TEXT NOT NULL,
-                    intended_action TEXT NOT NULL CHECK (intended_action IN ('open', 'close')),
-                    trigger TEXT NOT NULL CHECK (trigger IN ('schedule', 'auto')),
-                    scheduled_time TIMESTAMP,
-                    reason TEXT NOT NULL,
-                    lux REAL,
-                    solar_rad REAL,
-                    altitude REAL,
-                    threshold_lux REAL,
-                    threshold_solar_rad REAL,
-                    threshold_altitude REAL,
-                    resolved_at TIMESTAMP,
-                    resolved_operation_id INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS sensor_samples (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TIMESTAMP NOT NULL,
-                    date TEXT NOT NULL,
-                    lux REAL,
-                    solar_rad REAL,
-                    altitude REAL,
-                    context TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+        """データベース初期化（スキーマは rasp_shutter.metrics.schema）
 
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_operation_metrics_date
-                ON operation_metrics(date)
-            """)
-
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_operation_metrics_type
-                ON operation_metrics(operation_type, action)
-            """)
-
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_daily_failures_date
-                ON daily_failures(date)
-            """)
-
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_postpone_events_date
-                ON postpone_events(date)
-            """)
+        未適用のマイグレーションの DDL だけを行い、既存の行の書き換え（backfill）は
+        migrate() に任せる（起動を待たせない）。
+        """
+        with my_lib.sqlite_util.connect(self.db_path) as conn:
+            # NOTE: 複数のプロセスが同時に起動しても、各ステップの DDL は 1 回だけ行う
+            conn.execute("BEGIN IMMEDIATE")
+            for step in rasp_shutter.metrics.migration.upgrade(conn):
+                logging.info("Metrics schema upgraded to v%d (%s)", step.version, step.name)
+            conn.commit()
 
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_postpone_events_unresolved
-                ON postpone_events(date, intended_action, resolved_at)
-            """)
+            day = rasp_shutter.metrics.schema.encode_time(rasp_shutter.clock.now())[2]
+            self._postpone_index = _PostponeIndex(conn, day)
 
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_sensor_samples_timestamp
-                ON sensor_samples(timestamp)
-            """)
+    def _postpone_index_of(self, conn: sqlite3.Connection, day: int) -> _PostponeIndex:
+        """day の見合わせイベントの索引（self.lock を取って呼ぶこと）"""
+        if self._postpone_index is None or self._postpone_index.day != day:
+            self._postpone_index = _PostponeIndex(conn, day)
+        return self._postpone_index
 
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_sensor_samples_date
-                ON sensor_samples(date)
-            """)
+    def invalidate_cache(self) -> None:
+        """メモリ上の索引を捨て、次の記録で DB から読み直す
 
-            self._migrate_schema(conn)
+        他のプロセスが書き込んだ可能性がある場合（リーダーになった場合など）に呼ぶ。
+        """
+        with self.lock:
+            self._postpone_index = None
 
-            conn.commit()
+    @contextlib.contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """読み出し用の接続"""
+        with my_lib.sqlite_util.connect(self.db_path) as conn:
+            yield conn
 
-    def _migrate_schema(self, conn: sqlite3.Connection) -> None:
-        """既存 DB にシャッター個体列を追加する（無停止マイグレーション）
+    def migrate(
+        self,
+        should_terminate: threading.Event | None = None,
+        sleep_sec: float = 0.0,
+        batch_rows: int = rasp_shutter.metrics.migration.BATCH_ROWS,
+    ) -> bool:
+        """終わっていないマイグレーションの backfill を進める（中断された場合は False）
 
-        新規 DB は CREATE TABLE 文に列が含まれるため、ここは既存 DB 専用の保険。
-        過去の行は NULL のまま（「記録前」として扱う）。
+        1 バッチを 1 トランザクションで行い、バッチの間は lock を離して sleep_sec だけ待つので、
+        その間もメトリクスを記録できる。途中で止まっても次回に続きから進める。
         """
-        for table in ("operation_metrics", "daily_failures"):
-            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
-            for column, column_type in _SHUTTER_COLUMNS:
-                if column not in existing:
-                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
-                    logging.info("Migrated %s: added column %s", table, column)
+        if should_terminate is None:
+            should_terminate = threading.Event()
+
+        with self._reader() as conn:
+            steps = rasp_shutter.metrics.migration.pending(conn)
+
+        try:
+            for step in steps:
+                logging.info("Metrics migration v%d (%s) started", step.version, step.name)
+                while True:
+                    with self.lock, my_lib.sqlite_util.connect(self.db_path) as conn:
+                        conn.execute("BEGIN IMMEDIATE")
+                        processed = rasp_shutter.metrics.migration.run_batch(conn, step, batch_rows)
+                        conn.commit()
+                        # NOTE: 移した見合わせイベントを索引に含めるため、読み直させる
+                        self._postpone_index = None
+                    if processed == 0:
+                        logging.info("Metrics migration v%d (%s) completed", step.version, step.name)
+                        break
+                    logging.debug("Metrics migration v%d (%s): %d rows", step.version, step.name, processed)
+                    if should_terminate.wait(sleep_sec):
+                        return False
+            return True
+        finally:
+            if steps:
+                # NOTE: 移した行をダッシュボードに反映する（バッチごとに通知すると、移している間
+                # ずっと作り直し続けるので、終わった・中断したときに 1 回だけ）
+                _notify_written()
 
     def record_shutter_operation(
         self,
@@ -186,9 +245,15 @@ class MetricsCollector:
 
         """
         if timestamp is None:
-            timestamp = my_lib.time.now()
+            timestamp = rasp_shutter.clock.now()
 
-        date = timestamp.date().isoformat()
+        ts, tz_offset, day = rasp_shutter.metrics.schema.encode_time(timestamp)
+        action_code = rasp_shutter.metrics.schema.encode_enum(
+            rasp_shutter.metrics.schema.ACTIONS, action, "action"
+        )
+        mode_code = rasp_shutter.metrics.schema.encode_enum(
+            rasp_shutter.metrics.schema.OPERATION_TYPES, mode, "operation_type"
+        )
 
         # センサーデータを準備
         lux = None
@@ -205,38 +270,41 @@ class MetricsCollector:
 
         # NOTE: INSERT + UPDATE の原子性は my_lib.sqlite_util.connect の
         # コンテキストマネージャ（成功時 commit / 例外時 rollback）で担保される
-        with self.lock, my_lib.sqlite_util.connect(self.db_path) as conn:
-            # 個別操作として記録
-            cursor = conn.execute(
-                """
-                INSERT INTO operation_metrics
-                (timestamp, date, action, operation_type, lux, solar_rad, altitude,
-                 shutter_index, shutter_name)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    timestamp.isoformat(),
-                    date,
-                    action,
-                    mode,
-                    lux,
-                    solar_rad,
-                    altitude,
-                    shutter_index,
-                    shutter_name,
-                ),
-            )
-            operation_id = cursor.lastrowid
-
-            # 同日・同方向の未解決の見合わせを解消扱いにする
-            conn.execute(
-                """
-                UPDATE postpone_events
-                SET resolved_at = ?, resolved_operation_id = ?
-                WHERE date = ? AND intended_action = ? AND resolved_at IS NULL
-            """,
-                (timestamp.isoformat(), operation_id, date, action),
-            )
+        with self.lock:
+            with my_lib.sqlite_util.connect(self.db_path) as conn:
+                # 個別操作として記録
+                cursor = conn.execute(
+                    """
+                    INSERT INTO operation_metrics_v2
+                    (ts, tz_offset, day, action, operation_type, lux, solar_rad, altitude,
+                     shutter_index, shutter_name)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                    (
+                        ts,
+                        tz_offset,
+                        day,
+                        action_code,
+                        mode_code,
+                        lux,
+                        solar_rad,
+                        altitude,
+                        shutter_index,
+                        shutter_name,
+                    ),
+                )
+                operation_id = cursor.lastrowid
+
+                # 同日・同方向の未解決の見合わせを解消扱いにする（対象は索引から主キーで特定する）
+                postpone_index = self._postpone_index_of(conn, day)
+                event_ids = postpone_index.unresolved.get(action_code, [])
+                conn.executemany(
+                    "UPDATE postpone_events_v2 SET resolved_ts = ?, resolved_operation_id = ? WHERE id = ?",
+                    [(ts, operation_id, event_id) for event_id in event_ids],
+                )
+            # NOTE: 索引はコミットしてから更新する（ロールバックされた場合は索引もそのまま）
+            postpone_index.unresolved.pop(action_code, None)
+        _notify_written()
 
     def record_failure(
         self,
@@ -255,18 +323,19 @@ class MetricsCollector:
 
         """
         if timestamp is None:
-            timestamp = my_lib.time.now()
+            timestamp = rasp_shutter.clock.now()
 
-        date = timestamp.date().isoformat()
+        ts, tz_offset, day = rasp_shutter.metrics.schema.encode_time(timestamp)
 
         with self.lock, my_lib.sqlite_util.connect(self.db_path) as conn:
             conn.execute(
                 """
-                INSERT INTO daily_failures (date, timestamp, shutter_index, shutter_name)
-                VALUES (?, ?, ?, ?)
+                INSERT INTO daily_failures_v2 (ts, tz_offset, day, shutter_index, shutter_name)
+                VALUES (?, ?, ?, ?, ?)
             """,
-                (date, timestamp.isoformat(), shutter_index, shutter_name),
+                (ts, tz_offset, day, shutter_index, shutter_name),
             )
+        _notify_written()
 
     def record_postpone(
         self,
@@ -285,9 +354,15 @@ class MetricsCollector:
             実際に記録した場合 True、クールダウンで抑制された場合 False
         """
         if timestamp is None:
-            timestamp = my_lib.time.now()
+            timestamp = rasp_shutter.clock.now()
 
-        date = timestamp.date().isoformat()
+        ts, tz_offset, day = rasp_shutter.metrics.schema.encode_time(timestamp)
+        action_code = rasp_shutter.metrics.schema.encode_enum(
+            rasp_shutter.metrics.schema.ACTIONS, intended_action, "action"
+        )
+        trigger_code = rasp_shutter.metrics.schema.encode_enum(
+            rasp_shutter.metrics.schema.TRIGGERS, trigger, "trigger"
+        )
 
         lux = sensor_data.lux.value if sensor_data and sensor_data.lux.valid else None
         solar_rad = sensor_data.solar_rad.value if sensor_data and sensor_data.solar_rad.valid else None
@@ -297,45 +372,57 @@ class MetricsCollector:
         threshold_solar_rad = threshold.get("solar_rad") if threshold else None
         threshold_altitude = threshold.get("altitude") if threshold else None
 
-        cooldown_threshold = (timestamp - datetime.timedelta(seconds=cooldown_sec)).isoformat()
-
-        with self.lock, my_lib.sqlite_util.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                """
-                SELECT 1 FROM postpone_events
-                WHERE date = ? AND intended_action = ? AND reason = ?
-                  AND timestamp >= ?
-                LIMIT 1
-            """,
-                (date, intended_action, reason, cooldown_threshold),
-            )
-            if cursor.fetchone() is not None:
+        # NOTE: 秒単位で比較するので、同じ秒の記録は cooldown_sec=0 でも抑制しない
+        cooldown_threshold = ts - cooldown_sec
+        scheduled_ts = int(scheduled_time.timestamp()) if scheduled_time else None
+
+        key = (action_code, reason)
+        with self.lock:
+            # NOTE: 抑制するかどうかはメモリ上の索引だけで判定する（暗い間は毎秒呼ばれるので DB を開かない）
+            postpone_index = self._postpone_index
+            if (
+                postpone_index is not None
+                and postpone_index.day == day
+                and postpone_index.is_cooling_down(key, cooldown_threshold)
+            ):
                 return False
 
-            scheduled_iso = scheduled_time.isoformat() if scheduled_time else None
-            conn.execute(
-                """
-                INSERT INTO postpone_events
-                (timestamp, date, intended_action, trigger, scheduled_time, reason,
-                 lux, solar_rad, altitude,
-                 threshold_lux, threshold_solar_rad, threshold_altitude)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    timestamp.isoformat(),
-                    date,
-                    intended_action,
-                    trigger,
-                    scheduled_iso,
-                    reason,
-                    lux,
-                    solar_rad,
-                    altitude,
-                    threshold_lux,
-                    threshold_solar_rad,
-                    threshold_altitude,
-                ),
-            )
+            with my_lib.sqlite_util.connect(self.db_path) as conn:
+                # NOTE: 日付が変わった（索引が別の日の）場合は、その日の分を読み込んでから判定する
+                postpone_index = self._postpone_index_of(conn, day)
+                if postpone_index.is_cooling_down(key, cooldown_threshold):
+                    return False
+
+                cursor = conn.execute(
+                    """
+                    INSERT INTO postpone_events_v2
+                    (ts, tz_offset, day, intended_action, trigger, scheduled_ts, reason,
+                     lux, solar_rad, altitude,
+                     threshold_lux, threshold_solar_rad, threshold_altitude)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                    (
+                        ts,
+                        tz_offset,
+                        day,
+                        action_code,
+                        trigger_code,
+                        scheduled_ts,
+                        rasp_shutter.metrics.schema.label_id(conn, reason),
+                        lux,
+                        solar_rad,
+                        altitude,
+                        threshold_lux,
+                        threshold_solar_rad,
+                        threshold_altitude,
+                    ),
+                )
+                event_id = cursor.lastrowid
+
+            # NOTE: 索引はコミットしてから更新する
+            postpone_index.last_ts[key] = max(ts, postpone_index.last_ts.get(key, ts))
+            postpone_index.unresolved.setdefault(action_code, []).append(event_id)
+        _notify_written()
         return True
 
     def record_sensor_sample(
@@ -346,9 +433,9 @@ class MetricsCollector:
     ) -> None:
         """センサーサンプルを記録"""
         if timestamp is None:
-            timestamp = my_lib.time.now()
+            timestamp = rasp_shutter.clock.now()
 
-        date = timestamp.date().isoformat()
+        ts, tz_offset, day = rasp_shutter.metrics.schema.encode_time(timestamp)
 
         lux = sensor_data.lux.value if sensor_data and sensor_data.lux.valid else None
         solar_rad = sensor_data.solar_rad.value if sensor_data and sensor_data.solar_rad.valid else None
@@ -357,81 +444,95 @@ class MetricsCollector:
         with self.lock, my_lib.sqlite_util.connect(self.db_path) as conn:
             conn.execute(
                 """
-                INSERT INTO sensor_samples
-                (timestamp, date, lux, solar_rad, altitude, context)
-                VALUES (?, ?, ?, ?, ?, ?)
+                INSERT INTO sensor_samples_v2
+                (ts, tz_offset, day, lux, solar_rad, altitude, context)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
             """,
-                (timestamp.isoformat(), date, lux, solar_rad, altitude, context),
+                (
+                    ts,
+                    tz_offset,
+                    day,
+                    lux,
+                    solar_rad,
+                    altitude,
+                    rasp_shutter.metrics.schema.label_id(conn, context),
+                ),
             )
 
             # NOTE: 1 分間隔の記録で無制限に増えるのを防ぐため、日付が変わったタイミングで
             # 保持期間を過ぎた行を削除する（1 日 1 回、同一トランザクション内）
-            if self._last_cleanup_date != date:
-                self._last_cleanup_date = date
-                cutoff = (
-                    timestamp.date() - datetime.timedelta(days=SENSOR_SAMPLE_RETENTION_DAYS)
-                ).isoformat()
-                deleted = conn.execute("DELETE FROM sensor_samples WHERE date < ?", (cutoff,)).rowcount
+            if self._last_cleanup_date != day:
+                self._last_cleanup_date = day
+                cutoff = day - SENSOR_SAMPLE_RETENTION_DAYS
+                deleted = conn.execute("DELETE FROM sensor_samples_v2 WHERE day < ?", (cutoff,)).rowcount
                 if deleted > 0:
-                    logging.info("Deleted %d old sensor samples (before %s)", deleted, cutoff)
+                    logging.info(
+                        "Deleted %d old sensor samples (before %s)",
+                        deleted,
+                        rasp_shutter.metrics.schema.decode_day(cutoff),
+                    )
+        # NOTE: 1 分ごとの記録なので、ダッシュボードの作り直しは通知しない
+        # （センサーサンプルのグラフは dashboard.MATERIALIZE_REFRESH_SEC ごとに更新する）
 
     def cleanup_old_sensor_samples(self, retention_days: int = SENSOR_SAMPLE_RETENTION_DAYS) -> int:
         """保持期間を過ぎた sensor_samples 行を削除し、削除件数を返す"""
-        cutoff = (my_lib.time.now().date() - datetime.timedelta(days=retention_days)).isoformat()
+        _, _, day = rasp_shutter.metrics.schema.encode_time(rasp_shutter.clock.now())
         with self.lock, my_lib.sqlite_util.connect(self.db_path) as conn:
-            return conn.execute("DELETE FROM sensor_samples WHERE date < ?", (cutoff,)).rowcount
+            deleted = conn.execute(
+                "DELETE FROM sensor_samples_v2 WHERE day < ?", (day - retention_days,)
+            ).rowcount
+        return deleted
+
+    def _select(self, sql: str, params: list) -> list:
+        with self._reader() as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(sql, params).fetchall()]
 
-    def get_operation_metrics(self, start_date: str, end_date: str) -> list:
+    def get_operation_metrics(
+        self, start_date: str | None, end_date: str | None, shutter_index: int | None = None
+    ) -> list:
         """
         指定期間の操作メトリクスを取得
 
         Args:
         ----
-            start_date: 開始日（YYYY-MM-DD形式）
-            end_date: 終了日（YYYY-MM-DD形式）
+            start_date: 開始日（YYYY-MM-DD形式、None なら制限しない）
+            end_date: 終了日（YYYY-MM-DD形式、None なら制限しない）
+            shutter_index: シャッターのインデックス（None なら全シャッター）
 
         Returns:
         -------
             操作メトリクスデータのリスト
 
         """
-        with my_lib.sqlite_util.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                """
-                SELECT * FROM operation_metrics
-                WHERE date BETWEEN ? AND ?
-                ORDER BY timestamp
-            """,
-                (start_date, end_date),
-            )
-            return [dict(row) for row in cursor.fetchall()]
-
-    def get_failure_metrics(self, start_date: str, end_date: str) -> list:
+        where, params = where_clause(start_date, end_date, shutter_index)
+        return self._select(
+            f"SELECT {_ANALYSIS_COLUMNS['operation_metrics']} FROM operation_metrics {where} ORDER BY ts, id",  # noqa: S608
+            params,
+        )
+
+    def get_failure_metrics(
+        self, start_date: str | None, end_date: str | None, shutter_index: int | None = None
+    ) -> list:
         """
         指定期間の失敗メトリクスを取得
 
         Args:
         ----
-            start_date: 開始日（YYYY-MM-DD形式）
-            end_date: 終了日（YYYY-MM-DD形式）
+            start_date: 開始日（YYYY-MM-DD形式、None なら制限しない）
+            end_date: 終了日（YYYY-MM-DD形式、None なら制限しない）
+            shutter_index: シャッターのインデックス（None なら全シャッター）
 
         Returns:
         -------
             失敗メトリクスデータのリスト
 
         """
-        with my_lib.sqlite_util.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                """
-                SELECT * FROM daily_failures
-                WHERE date BETWEEN ? AND ?
-                ORDER BY timestamp
-            """,
-                (start_date, end_date),
-            )
-            return [dict(row) for row in cursor.fetchall()]
+        where, params = where_clause(start_date, end_date, shutter_index)
+        return self._select(
+            f"SELECT {_ANALYSIS_COLUMNS['daily_failures']} FROM daily_failures {where} ORDER BY ts, id",  # noqa: S608
+            params,
+        )
 
     def get_all_operation_metrics(self) -> list:
         """
@@ -442,15 +543,7 @@ class MetricsCollector:
         操作メトリクスデータのリスト
 
         """
-        with my_lib.sqlite_util.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                """
-                SELECT * FROM operation_metrics
-                ORDER BY timestamp
-            """
-            )
-            return [dict(row) for row in cursor.fetchall()]
+        return self.get_operation_metrics(None, None)
 
     def get_all_failure_metrics(self) -> list:
         """
@@ -461,15 +554,7 @@ class MetricsCollector:
         失敗メトリクスデータのリスト
 
         """
-        with my_lib.sqlite_util.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                """
-                SELECT * FROM daily_failures
-                ORDER BY timestamp
-            """
-            )
-            return [dict(row) for row in cursor.fetchall()]
+        return self.get_failure_metrics(None, None)
 
     def get_recent_operation_metrics(self, days: int = 30) -> list:
         """
@@ -484,7 +569,7 @@ class MetricsCollector:
             操作メトリクスデータのリスト
 
         """
-        end_date = my_lib.time.now().date()
+        end_date = rasp_shutter.clock.now().date()
         start_date = end_date - datetime.timedelta(days=days)
 
         return self.get_operation_metrics(start_date.isoformat(), end_date.isoformat())
@@ -502,52 +587,39 @@ class MetricsCollector:
             失敗メトリクスデータのリスト
 
         """
-        end_date = my_lib.time.now().date()
+        end_date = rasp_shutter.clock.now().date()
         start_date = end_date - datetime.timedelta(days=days)
 
         return self.get_failure_metrics(start_date.isoformat(), end_date.isoformat())
 
-    def get_postpone_events(self, start_date: str, end_date: str) -> list:
-        """指定期間の見合わせイベントを取得"""
-        with my_lib.sqlite_util.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                """
-                SELECT * FROM postpone_events
-                WHERE date BETWEEN ? AND ?
-                ORDER BY timestamp
-            """,
-                (start_date, end_date),
-            )
-            return [dict(row) for row in cursor.fetchall()]
+    def get_postpone_events(self, start_date: str | None, end_date: str | None) -> list:
+        """指定期間の見合わせイベントを取得（None の側は制限しない）"""
+        where, params = where_clause(start_date, end_date)
+        return self._select(f"SELECT * FROM postpone_events {where} ORDER BY ts, id", params)  # noqa: S608
 
     def get_recent_postpone_events(self, days: int = 30) -> list:
         """最近N日間の見合わせイベントを取得"""
-        end_date = my_lib.time.now().date()
+        end_date = rasp_shutter.clock.now().date()
         start_date = end_date - datetime.timedelta(days=days)
         return self.get_postpone_events(start_date.isoformat(), end_date.isoformat())
 
-    def get_sensor_samples(self, start_date: str, end_date: str) -> list:
-        """指定期間のセンサーサンプルを取得"""
-        with my_lib.sqlite_util.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                """
-                SELECT * FROM sensor_samples
-                WHERE date BETWEEN ? AND ?
-                ORDER BY timestamp
-            """,
-                (start_date, end_date),
-            )
-            return [dict(row) for row in cursor.fetchall()]
+    def get_sensor_samples(self, start_date: str | None, end_date: str | None) -> list:
+        """指定期間のセンサーサンプルを取得（None の側は制限しない）"""
+        where, params = where_clause(start_date, end_date)
+        return self._select(
+            f"SELECT {_ANALYSIS_COLUMNS['sensor_samples']} FROM sensor_samples {where} ORDER BY ts, id",  # noqa: S608
+            params,
+        )
 
     def get_recent_sensor_samples(self, days: int = 7) -> list:
         """最近N日間のセンサーサンプルを取得"""
-        end_date = my_lib.time.now().date()
+        end_date = rasp_shutter.clock.now().date()
         start_date = end_date - datetime.timedelta(days=days)
         return self.get_sensor_samples(start_date.isoformat(), end_date.isoformat())
 
-    def get_shutter_operation_counts(self) -> list:
+    def get_shutter_operation_counts(
+        self, start_date: str | None = None, end_date: str | None = None, shutter_index: int | None = None
+    ) -> list:
         """シャッター個体別の操作回数を取得（F-8）
 
         Returns
@@ -556,45 +628,71 @@ class MetricsCollector:
         （マイグレーション前の行は shutter_index / shutter_name が None）
 
         """
-        with my_lib.sqlite_util.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                """
+        where, params = where_clause(start_date, end_date, shutter_index)
+        return self._select(
+            f"""
                 SELECT shutter_index, shutter_name, action, operation_type, COUNT(*) AS count
-                FROM operation_metrics
+                FROM operation_metrics {where}
                 GROUP BY shutter_index, shutter_name, action, operation_type
-            """
-            )
-            return [dict(row) for row in cursor.fetchall()]
+            """,  # noqa: S608
+            params,
+        )
 
-    def get_shutter_failure_counts(self) -> list:
+    def get_shutter_failure_counts(
+        self, start_date: str | None = None, end_date: str | None = None, shutter_index: int | None = None
+    ) -> list:
         """シャッター個体別の失敗回数を取得（F-8）"""
-        with my_lib.sqlite_util.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                """
+        where, params = where_clause(start_date, end_date, shutter_index)
+        return self._select(
+            f"""
                 SELECT shutter_index, shutter_name, COUNT(*) AS count
-                FROM daily_failures
+                FROM daily_failures {where}
                 GROUP BY shutter_index, shutter_name
-            """
-            )
-            return [dict(row) for row in cursor.fetchall()]
+            """,  # noqa: S608
+            params,
+        )
 
-    def get_daily_failure_counts(self, start_date: str, end_date: str) -> list:
+    def get_daily_failure_counts(
+        self, start_date: str, end_date: str, shutter_index: int | None = None
+    ) -> list:
         """日別の失敗件数を取得（F-9）"""
-        with my_lib.sqlite_util.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                """
+        where, params = where_clause(start_date, end_date, shutter_index)
+        return self._select(
+            f"""
                 SELECT date, COUNT(*) AS count
-                FROM daily_failures
-                WHERE date BETWEEN ? AND ?
-                GROUP BY date
-                ORDER BY date
-            """,
-                (start_date, end_date),
-            )
-            return [dict(row) for row in cursor.fetchall()]
+                FROM daily_failures {where}
+                GROUP BY day
+                ORDER BY day
+            """,  # noqa: S608
+            params,
+        )
+
+
+def connect_read_only(db_path: pathlib.Path) -> sqlite3.Connection:
+    """読み出し専用で DB に接続する（書き込み中のプロセスとはロックを取り合わない）"""
+    return sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)
+
+
+class ReadOnlyMetricsCollector(MetricsCollector):
+    """読み出し専用のメトリクス収集クラス
+
+    ダッシュボードを計算するワーカープロセス（rasp_shutter.metrics.dashboard）で使う。
+    スキーマの作成は行わず、読み出し専用の接続を 1 本だけ開いて使い回す。
+    """
+
+    def __init__(self, db_path: pathlib.Path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self._last_cleanup_date = None
+        self._postpone_index = None
+        self._conn = connect_read_only(db_path)
+
+    @contextlib.contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        yield self._conn
+
+    def close(self) -> None:
+        self._conn.close()
 
 
 # グローバルインスタンス
@@ -623,6 +721,65 @@ def get_collector(metrics_data_path) -> MetricsCollector:
         return _collector_instance
 
 
+def warm_up(metrics_data_path) -> threading.Thread:
+    """メトリクス収集インスタンスをバックグラウンドで初期化する
+
+    DB の接続・スキーマ作成を起動処理から切り離し、制御・スケジューラを先に使えるようにする。
+    """
+
+    def _init() -> None:
+        try:
+            get_collector(metrics_data_path)
+        except Exception:
+            logging.exception("Failed to initialize metrics collector")
+
+    thread = threading.Thread(target=_init, name="metrics-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+class _MigrationRunner:
+    """マイグレーションの backfill をバックグラウンドで進めるスレッド"""
+
+    def __init__(self, metrics_data_path):
+        self.metrics_data_path = metrics_data_path
+        self._should_terminate = threading.Event()
+        self._thread = threading.Thread(target=self._worker, name="metrics-migration", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._should_terminate.set()
+
+    def _worker(self) -> None:
+        try:
+            get_collector(self.metrics_data_path).migrate(
+                self._should_terminate, rasp_shutter.metrics.migration.BATCH_SLEEP_SEC
+            )
+        except Exception:
+            # NOTE: 失敗したバッチはロールバックされるので、次回の起動で同じところから再試行する
+            logging.exception("Metrics migration failed")
+
+
+_migration_runner: _MigrationRunner | None = None
+
+
+def start_migration(metrics_data_path) -> None:
+    """マイグレーションの backfill をバックグラウンドで開始する（メトリクスを書き込むリーダーだけが呼ぶ）"""
+    global _migration_runner
+    stop_migration()
+    _migration_runner = _MigrationRunner(metrics_data_path)
+    _migration_runner.start()
+
+
+def stop_migration() -> None:
+    global _migration_runner
+    runner, _migration_runner = _migration_runner, None
+    if runner is not None:
+        runner.stop()
+
+
 def reset_collector():
     """グローバルコレクタインスタンスをリセット (テスト用)"""
     global _collector_instance
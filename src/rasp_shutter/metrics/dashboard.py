@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+メトリクスダッシュボード用データの生成
+
+analyzer.build_dashboard_data は純 Python の CPU 処理なので、Flask のリクエストスレッドで
+実行するとその間 GIL を握り続け、同じプロセスのスケジューラや制御 API を待たせてしまいます。
+そこで専用のワーカープロセス（1 プロセスを起動したまま使い回し、パイプで依頼する）で計算し、
+JSON にシリアライズしたバイト列だけを受け取ります。
+
+ワーカープロセスは読み出し専用の SQLite 接続（ReadOnlyMetricsCollector）を持ち続けます。
+
+さらに、メトリクスの書き込みが途絶えるまで待ってから（その間の書き込みはまとめる）
+ダッシュボードのデータを作り直し、JSON とその gzip 圧縮版をファイルに書き出しておきます
+（materializer）。/api/metrics/data はこのファイルをそのまま送るだけなので、
+履歴の量によらず一定の時間で応答できます。
+
+テスト時（環境変数 TEST=true）は時刻をモックしたプロセス内で、書き込み直後の内容を
+返す必要があるので、ワーカープロセスもファイルも使わずにその場で計算します。
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import pathlib
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+import rasp_shutter.metrics.analyzer
+import rasp_shutter.metrics.collector
+
+# ダッシュボードデータの計算を待つ最大時間（秒）
+BUILD_TIMEOUT_SEC = 60.0
+# ワーカープロセスを終了させるときに、SIGTERM から SIGKILL に切り替えるまでの待ち時間（秒）
+WORKER_TERMINATE_TIMEOUT_SEC = 5.0
+# メトリクスの書き込みが途絶えてからダッシュボードのファイルを作り直すまでの待ち時間（秒）
+MATERIALIZE_DEBOUNCE_SEC = 30.0
+# 書き込みが続いていても、最初の書き込みからこの時間（秒）が経ったら作り直す
+MATERIALIZE_MAX_WAIT_SEC = 5 * 60.0
+# 書き込みの通知が無くても作り直す間隔（秒）。センサーサンプル（1 分ごと）のグラフはこの間隔で更新する
+MATERIALIZE_REFRESH_SEC = 30 * 60.0
+
+
+class DashboardError(Exception):
+    """ワーカープロセスでダッシュボードデータを生成できない"""
+
+
+_worker: _Worker | None = None
+_worker_lock = threading.Lock()
+
+# ワーカープロセス側の状態
+_worker_db_path: pathlib.Path | None = None
+_worker_collector: rasp_shutter.metrics.collector.ReadOnlyMetricsCollector | None = None
+
+
+def _use_worker_process() -> bool:
+    return os.environ.get("TEST") != "true"
+
+
+def _encode(data: dict[str, Any]) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _build_in_worker(
+    current_schedule: dict | None, query: rasp_shutter.metrics.analyzer.DashboardQuery | None
+) -> bytes:
+    global _worker_collector
+    assert _worker_db_path is not None  # noqa: S101
+
+    # NOTE: DB はワーカー起動後に作られることがあるので、接続は初回の計算時に開く
+    if _worker_collector is None:
+        _worker_collector = rasp_shutter.metrics.collector.ReadOnlyMetricsCollector(_worker_db_path)
+    return _encode(
+        rasp_shutter.metrics.analyzer.build_dashboard_data(_worker_collector, current_schedule, query)
+    )
+
+
+def _worker_main(db_path: pathlib.Path, conn: multiprocessing.connection.Connection) -> None:
+    """ワーカープロセスの本体（パイプで受け取った関数を 1 件ずつ実行して結果を返す）"""
+    global _worker_db_path
+    _worker_db_path = db_path
+
+    while True:
+        try:
+            func, args = conn.recv()
+        except EOFError:
+            # NOTE: 親プロセスがパイプを閉じたら終了する
+            break
+        try:
+            conn.send((True, func(*args)))
+        except Exception as e:
+            conn.send((False, e))
+
+
+class _Worker:
+    """ダッシュボードデータを計算するワーカープロセス
+
+    NOTE: ProcessPoolExecutor は応答しないワーカープロセスを終了させる公開 API を持たない
+    （3.14 の terminate_workers() まで）ので、プロセスとパイプを自前で持つ。
+    """
+
+    def __init__(self, db_path: pathlib.Path) -> None:
+        self.db_path = db_path
+        # NOTE: スレッドを多数抱えたプロセスからの fork はロックの状態ごと複製してしまうので spawn にする
+        context = multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(db_path, child_conn), name="dashboard-worker", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        # NOTE: パイプには 1 件ずつ依頼する（応答の順番を取り違えないように）
+        self._lock = threading.Lock()
+
+    def call(self, func: Callable[..., Any], *args: Any, timeout: float) -> Any:
+        """ワーカープロセスで func(*args) を実行し、結果を返す（例外はそのまま送出する）
+
+        ワーカープロセスが異常終了した・timeout 秒以内に応答しない場合は DashboardError を送出する。
+        """
+        deadline = time.monotonic() + timeout
+        if not self._lock.acquire(timeout=timeout):
+            raise DashboardError(f"Dashboard worker did not respond within {timeout} sec")
+        try:
+            try:
+                self._conn.send((func, args))
+                if not self._conn.poll(max(0.0, deadline - time.monotonic())):
+                    raise DashboardError(f"Dashboard worker did not respond within {timeout} sec")
+                ok, value = self._conn.recv()
+            except (EOFError, OSError) as e:
+                raise DashboardError("Dashboard worker terminated unexpectedly") from e
+        finally:
+            self._lock.release()
+
+        if not ok:
+            raise value
+        return value
+
+    def terminate(self) -> None:
+        """ワーカープロセスを終了させる（SIGTERM で終わらなければ SIGKILL）
+
+        NOTE: 計算中のワーカープロセスはパイプを閉じても終わらないので、シグナルで終了させる。
+        """
+        self.process.terminate()
+        self.process.join(WORKER_TERMINATE_TIMEOUT_SEC)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self._conn.close()
+
+
+def _get_worker(db_path: pathlib.Path) -> _Worker:
+    global _worker
+
+    with _worker_lock:
+        if _worker is not None and _worker.db_path != db_path:
+            _worker.terminate()
+            _worker = None
+
+        if _worker is None:
+            _worker = _Worker(db_path)
+        return _worker
+
+
+def _discard_worker(worker: _Worker) -> None:
+    global _worker
+    with _worker_lock:
+        if _worker is worker:
+            _worker = None
+    worker.terminate()
+
+
+def warm_up(metrics_data_path) -> None:
+    """ワーカープロセスを起動しておく（初回のダッシュボード表示で起動を待たないように）"""
+    if not _use_worker_process():
+        return
+
+    try:
+        _get_worker(pathlib.Path(metrics_data_path))
+    except Exception:
+        logging.exception("Failed to start dashboard worker")
+
+
+def build_json(
+    metrics_data_path,
+    current_schedule: dict | None,
+    query: rasp_shutter.metrics.analyzer.DashboardQuery | None = None,
+) -> bytes:
+    """ダッシュボードデータを生成し、JSON のバイト列で返す（query で絞り込める）
+
+    DB の読み出しエラーは sqlite3.Error をそのまま送出し、ワーカープロセスが
+    異常終了した・応答しない場合は DashboardError を送出する（次回はワーカーを起動し直す）。
+    """
+    db_path = pathlib.Path(metrics_data_path)
+    if not _use_worker_process():
+        collector = rasp_shutter.metrics.collector.get_collector(db_path)
+        return _encode(rasp_shutter.metrics.analyzer.build_dashboard_data(collector, current_schedule, query))
+
+    worker = _get_worker(db_path)
+    try:
+        return worker.call(_build_in_worker, current_schedule, query, timeout=BUILD_TIMEOUT_SEC)
+    except DashboardError:
+        _discard_worker(worker)
+        raise
+
+
+def snapshot_path(metrics_data_path) -> pathlib.Path:
+    """書き出したダッシュボードデータ（JSON）のパス（メトリクスの DB と同じディレクトリ）"""
+    db_path = pathlib.Path(metrics_data_path)
+    return db_path.with_name(f"{db_path.stem}-dashboard.json")
+
+
+def snapshot_gzip_path(metrics_data_path) -> pathlib.Path:
+    """書き出したダッシュボードデータ（gzip 圧縮した JSON）のパス"""
+    path = snapshot_path(metrics_data_path)
+    return path.with_name(f"{path.name}.gz")
+
+
+def _write_atomic(path: pathlib.Path, content: bytes) -> None:
+    # NOTE: いつでも作り直せるデータなので fsync はしない（読み手が書きかけを見なければよい）
+    temp_path = path.with_name(f"{path.name}.tmp")
+    temp_path.write_bytes(content)
+    temp_path.replace(path)
+
+
+def materialize(metrics_data_path, current_schedule: dict | None) -> None:
+    """ダッシュボードデータを生成し、JSON と gzip 圧縮版をファイルに書き出す"""
+    body = build_json(metrics_data_path, current_schedule)
+    _write_atomic(snapshot_gzip_path(metrics_data_path), gzip.compress(body, mtime=0))
+    _write_atomic(snapshot_path(metrics_data_path), body)
+
+
+class _Materializer:
+    """メトリクスの書き込みを受けて、ダッシュボードのファイルを作り直すスレッド
+
+    書き込みが debounce_sec 途絶えたら（書き込みのたびに待ち直す）作り直す。書き込みが
+    途絶えなくても、最初の書き込みから max_wait_sec 経ったら作り直す。書き込みの通知が
+    無くても refresh_sec ごとに作り直す。
+    """
+
+    def __init__(
+        self,
+        metrics_data_path,
+        schedule_provider: Callable[[], dict | None],
+        debounce_sec: float,
+        max_wait_sec: float,
+        refresh_sec: float,
+    ) -> None:
+        self.metrics_data_path = metrics_data_path
+        self.schedule_provider = schedule_provider
+        self.debounce_sec = debounce_sec
+        self.max_wait_sec = max_wait_sec
+        self.refresh_sec = refresh_sec
+        self._condition = threading.Condition()
+        # 作り直していない書き込みのうち、最初と最後の時刻（time.monotonic()）
+        self._first_request: float | None = None
+        self._last_request: float | None = None
+        self._urgent = False
+        self._should_terminate = False
+        self._last_materialized = time.monotonic()
+        self._thread = threading.Thread(target=self._worker, name="dashboard-materializer", daemon=True)
+
+    def start(self) -> None:
+        # NOTE: 起動直後は前回の実行時のファイル（古い形式かもしれない）をすぐに作り直す
+        self.request(immediate=True)
+        self._thread.start()
+
+    def request(self, immediate: bool = False) -> None:
+        with self._condition:
+            now = time.monotonic()
+            if self._first_request is None:
+                self._first_request = now
+            self._last_request = now
+            self._urgent = self._urgent or immediate
+            self._condition.notify()
+
+    def stop(self) -> None:
+        # NOTE: 生成中の場合は終わるのを待たない（終わればそのままスレッドを抜ける）
+        with self._condition:
+            self._should_terminate = True
+            self._condition.notify()
+
+    def _deadline(self) -> float:
+        """次に作り直す時刻（time.monotonic()）"""
+        deadline = self._last_materialized + self.refresh_sec
+        if self._first_request is None or self._last_request is None:
+            return deadline
+        if self._urgent:
+            return self._first_request
+        return min(
+            deadline,
+            self._last_request + self.debounce_sec,
+            self._first_request + self.max_wait_sec,
+        )
+
+    def _worker(self) -> None:
+        while True:
+            with self._condition:
+                while not self._should_terminate and (timeout := self._deadline() - time.monotonic()) > 0:
+                    self._condition.wait(timeout)
+                if self._should_terminate:
+                    return
+                self._first_request = None
+                self._last_request = None
+                self._urgent = False
+
+            try:
+                materialize(self.metrics_data_path, self.schedule_provider())
+                logging.debug("Dashboard data materialized")
+            except Exception:
+                logging.exception("Failed to materialize dashboard data")
+
+            with self._condition:
+                self._last_materialized = time.monotonic()
+
+
+_materializer: _Materializer | None = None
+
+
+def start_materializer(
+    metrics_data_path,
+    schedule_provider: Callable[[], dict | None],
+    debounce_sec: float = MATERIALIZE_DEBOUNCE_SEC,
+    max_wait_sec: float = MATERIALIZE_MAX_WAIT_SEC,
+    refresh_sec: float = MATERIALIZE_REFRESH_SEC,
+) -> None:
+    """メトリクスの書き込みのたびにダッシュボードのファイルを作り直すようにする
+
+    スケジュール（閾値）も表示に使うので、schedule_provider で現在のスケジュールを取得する。
+    """
+    global _materializer
+    if not _use_worker_process():
+        return
+
+    stop_materializer()
+    _materializer = _Materializer(
+        metrics_data_path, schedule_provider, debounce_sec, max_wait_sec, refresh_sec
+    )
+    rasp_shutter.metrics.collector.add_write_listener(request_materialize)
+    _materializer.start()
+
+
+def request_materialize(immediate: bool = False) -> None:
+    """ダッシュボードのファイルの作り直しを依頼する（materializer が動いていなければ何もしない）"""
+    if _materializer is not None:
+        _materializer.request(immediate)
+
+
+def stop_materializer() -> None:
+    global _materializer
+    materializer, _materializer = _materializer, None
+    if materializer is not None:
+        rasp_shutter.metrics.collector.remove_write_listener(request_materialize)
+        materializer.stop()
+
+
+def term() -> None:
+    global _worker
+    stop_materializer()
+    with _worker_lock:
+        worker, _worker = _worker, None
+    if worker is not None:
+        worker.terminate()
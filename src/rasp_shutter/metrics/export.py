@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+メトリクスのテーブルのエクスポート
+
+メトリクス DB のテーブルを CSV・NDJSON・Parquet で書き出します。
+カーソルから CHUNK_ROWS 行ずつ読み出してはその分だけ変換して返すジェネレータなので、
+何年分のデータでもメモリ使用量は一定です（Web API はそのままストリーミングで返します）。
+
+Parquet は pyarrow がインストールされている場合のみ使えます（CHUNK_ROWS 行ごとに
+1 つの row group として zstd で圧縮して書き出します）。
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import pathlib
+import sqlite3
+from collections.abc import Iterator
+from typing import Any
+
+import rasp_shutter.metrics.collector
+
+# エクスポートできるテーブル
+TABLES = ("operation_metrics", "postpone_events", "daily_failures", "sensor_samples")
+
+# 出力形式と Content-Type
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# 1 回に読み出す行数（Parquet では row group の行数）
+CHUNK_ROWS = 1000
+
+
+class ExportError(Exception):
+    """エクスポートできない（未対応の形式など）"""
+
+
+def filename(table: str, fmt: str) -> str:
+    return f"{table}.{fmt}"
+
+
+def _iter_chunks(
+    conn: sqlite3.Connection, table: str, start_date: str | None, end_date: str | None
+) -> Iterator[tuple[list[str], list[tuple]]]:
+    """(列名, CHUNK_ROWS 行以下の行) を順に返す"""
+    where, params = rasp_shutter.metrics.collector.where_clause(start_date, end_date)
+    cursor = conn.execute(f"SELECT * FROM {table} {where} ORDER BY id", params)  # noqa: S608
+    columns = [description[0] for description in cursor.description]
+    while rows := cursor.fetchmany(CHUNK_ROWS):
+        yield columns, rows
+
+
+def _csv(chunks: Iterator[tuple[list[str], list[tuple]]], columns: list[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    # NOTE: Excel で開いたときに文字化けしないよう BOM を付ける
+    yield "﻿".encode() + buffer.getvalue().encode()
+
+    for _, rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+
+
+def _ndjson(chunks: Iterator[tuple[list[str], list[tuple]]]) -> Iterator[bytes]:
+    for columns, rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(columns, row, strict=True)), ensure_ascii=False) + "\n" for row in rows
+        ).encode()
+
+
+class _ParquetSink:
+    """ParquetWriter の出力を受け取り、書き出された分を都度取り出せるようにするファイル風オブジェクト"""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data: Any) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # NOTE: Parquet のフッターには各 row group のファイル先頭からの位置が入るので、取り出した分も数える
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema(conn: sqlite3.Connection, table: str) -> Any:
+    import pyarrow
+
+    types = {"INTEGER": pyarrow.int64(), "REAL": pyarrow.float64()}
+    return pyarrow.schema(
+        [
+            (row[1], types.get(str(row[2]).upper(), pyarrow.string()))
+            for row in conn.execute(f"PRAGMA table_info({table})")
+        ]
+    )
+
+
+def _parquet(
+    chunks: Iterator[tuple[list[str], list[tuple]]], conn: sqlite3.Connection, table: str
+) -> Iterator[bytes]:
+    import pyarrow
+    import pyarrow.parquet
+
+    schema = _parquet_schema(conn, table)
+    sink = _ParquetSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd")
+    for columns, rows in chunks:
+        # NOTE: SQLite は列の型を強制しないので、宣言した型に合わせて変換する（合わない値はエラー）
+        writer.write_table(
+            pyarrow.Table.from_pydict(
+                {name: [row[i] for row in rows] for i, name in enumerate(columns)}, schema=schema
+            )
+        )
+        yield sink.take()
+    writer.close()
+    yield sink.take()
+
+
+def _check_args(table: str, fmt: str) -> None:
+    if table not in TABLES:
+        raise ExportError(f"Unknown table: {table}")
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown format: {fmt}")
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError as e:
+            raise ExportError("Parquet export requires pyarrow") from e
+
+
+def stream(
+    metrics_data_path, table: str, fmt: str, start_date: str | None = None, end_date: str | None = None
+) -> Iterator[bytes]:
+    """テーブルの内容を指定した形式で少しずつ返すジェネレータを返す
+
+    テーブル名・形式が不正な場合や、Parquet で pyarrow が無い場合は、
+    読み出しを始める前に ExportError を送出する。
+    """
+    _check_args(table, fmt)
+    db_path = pathlib.Path(metrics_data_path)
+
+    def _generate() -> Iterator[bytes]:
+        # NOTE: レスポンスを返すスレッドで接続する（最後まで読まれずに切断された場合も閉じる）
+        conn = rasp_shutter.metrics.collector.connect_read_only(db_path)
+        try:
+            chunks = _iter_chunks(conn, table, start_date, end_date)
+            if fmt == "csv":
+                columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+                yield from _csv(chunks, columns)
+            elif fmt == "ndjson":
+                yield from _ndjson(chunks)
+            else:
+                yield from _parquet(chunks, conn, table)
+        finally:
+            conn.close()
+
+    return _generate()
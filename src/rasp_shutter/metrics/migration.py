@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+メトリクス DB のスキーマのバージョン管理とマイグレーション
+
+スキーマのバージョンは SQLite の `PRAGMA user_version` に持ちます
+（0 はバージョン管理を始める前の DB と新規の DB）。マイグレーションは `STEPS` にバージョン順に並べた
+ステップで、各ステップは次の 2 段階からなります。
+
+- apply: テーブル・ビューの作成や改名などの短い DDL。起動時（MetricsCollector の初期化）に、
+  user_version より新しいステップを順に 1 トランザクションで行い、user_version を進める
+- backfill（任意）: 既存の行の書き換え・インデックスの作成など時間のかかる処理。リーダーのプロセスの
+  バックグラウンドスレッドが 1 バッチずつ（1 バッチ = 1 トランザクション）進めるので、
+  起動を待たせず、その間もメトリクスの記録を続けられる
+
+backfill の進み具合は `metrics_migration` テーブルに記録します。途中で止まっても次回の起動で続きから
+再開でき、どのプロセスからも status() で読めます（/api/metrics/migration）。
+backfill は何度呼ばれても同じ結果になるように、処理済みの行を自分で判別できる形で書くこと。
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import sqlite3
+from collections.abc import Callable
+
+import my_lib.time
+
+import rasp_shutter.metrics.schema
+
+# backfill で 1 回（1 トランザクション）に処理する行数
+BATCH_ROWS = 5000
+# backfill のバッチの間に、記録の書き込みを受け付けるための待ち時間（秒）
+BATCH_SLEEP_SEC = 0.1
+
+
+class MigrationError(Exception):
+    """マイグレーションできない（このアプリより新しいスキーマの DB など）"""
+
+
+@dataclasses.dataclass(frozen=True)
+class Step:
+    """マイグレーションのステップ
+
+    Attributes
+    ----------
+        version: このステップを適用した後のスキーマのバージョン
+        name: ログ・進捗表示用の名前
+        apply: 起動時に行う DDL
+        backfill: 最大 batch_rows 行を処理し、処理した行数を返す（0 なら完了）
+        remaining: 残りの行数（進捗の分母。apply の直後に数える）
+
+    """
+
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Connection], object]
+    backfill: Callable[[sqlite3.Connection, int], int] | None = None
+    remaining: Callable[[sqlite3.Connection], int] | None = None
+
+
+# NOTE: バージョン 1 は user_version を使う前の文字列のスキーマ（v1）。既存の DB は 0 のまま残っている
+STEPS: tuple[Step, ...] = (
+    Step(
+        version=2,
+        name="integer_epoch",
+        apply=rasp_shutter.metrics.schema.create,
+        backfill=rasp_shutter.metrics.schema.migrate_legacy,
+        remaining=rasp_shutter.metrics.schema.legacy_row_count,
+    ),
+)
+
+LATEST_VERSION = STEPS[-1].version
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _has_progress_table(conn: sqlite3.Connection) -> bool:
+    return (
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'metrics_migration'"
+        ).fetchone()
+        is not None
+    )
+
+
+def upgrade(conn: sqlite3.Connection) -> list[Step]:
+    """未適用のステップの DDL を順に行い、適用したステップを返す
+
+    呼び出し側で BEGIN IMMEDIATE から commit までを 1 トランザクションにすること
+    （user_version の更新も同じトランザクションに含まれる）。
+    """
+    version = schema_version(conn)
+    if version > LATEST_VERSION:
+        raise MigrationError(
+            f"Metrics database schema v{version} is newer than this application (v{LATEST_VERSION})"
+        )
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS metrics_migration (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            total_rows INTEGER NOT NULL DEFAULT 0,
+            done_rows INTEGER NOT NULL DEFAULT 0,
+            applied_at INTEGER NOT NULL,
+            completed_at INTEGER
+        )
+    """)
+
+    applied = []
+    for step in STEPS:
+        if step.version <= version:
+            continue
+        step.apply(conn)
+        if step.backfill is not None:
+            now = int(my_lib.time.now().timestamp())
+            total_rows = step.remaining(conn) if step.remaining is not None else None
+            conn.execute(
+                "INSERT OR REPLACE INTO metrics_migration"
+                " (version, name, total_rows, applied_at, completed_at) VALUES (?, ?, ?, ?, ?)",
+                # NOTE: 残りが無いと分かっていれば（新規の DB など）、その場で完了にする
+                (step.version, step.name, total_rows or 0, now, now if total_rows == 0 else None),
+            )
+        # NOTE: PRAGMA はパラメータを使えない（値は STEPS の整数）
+        conn.execute(f"PRAGMA user_version = {step.version:d}")
+        applied.append(step)
+    return applied
+
+
+def pending(conn: sqlite3.Connection) -> list[Step]:
+    """backfill が終わっていないステップ"""
+    if not _has_progress_table(conn):
+        return []
+    versions = {
+        row[0] for row in conn.execute("SELECT version FROM metrics_migration WHERE completed_at IS NULL")
+    }
+    return [step for step in STEPS if step.version in versions and step.backfill is not None]
+
+
+def run_batch(conn: sqlite3.Connection, step: Step, batch_rows: int = BATCH_ROWS) -> int:
+    """step の backfill を 1 バッチ進め、処理した行数を返す（0 なら完了として記録する）
+
+    呼び出し側で 1 バッチを 1 トランザクションにすること（進捗の記録も同じトランザクションに含まれる）。
+    """
+    if step.backfill is None:
+        return 0
+
+    processed = step.backfill(conn, batch_rows)
+    if processed > 0:
+        conn.execute(
+            "UPDATE metrics_migration SET done_rows = done_rows + ? WHERE version = ?",
+            (processed, step.version),
+        )
+    else:
+        conn.execute(
+            "UPDATE metrics_migration SET completed_at = ? WHERE version = ? AND completed_at IS NULL",
+            (int(my_lib.time.now().timestamp()), step.version),
+        )
+    return processed
+
+
+def _isoformat(ts: int | None) -> str | None:
+    if ts is None:
+        return None
+    return datetime.datetime.fromtimestamp(ts, my_lib.time.get_zoneinfo()).isoformat()
+
+
+def status(conn: sqlite3.Connection) -> dict:
+    """スキーマのバージョンと backfill の進捗を返す（読み出し専用の接続でよい）"""
+    steps = []
+    if _has_progress_table(conn):
+        for version, name, total_rows, done_rows, applied_at, completed_at in conn.execute(
+            "SELECT version, name, total_rows, done_rows, applied_at, completed_at"
+            " FROM metrics_migration ORDER BY version"
+        ):
+            steps.append(
+                {
+                    "version": version,
+                    "name": name,
+                    "total_rows": total_rows,
+                    "done_rows": done_rows,
+                    "progress": 1.0 if completed_at is not None else done_rows / max(total_rows, 1),
+                    "applied_at": _isoformat(applied_at),
+                    "completed_at": _isoformat(completed_at),
+                }
+            )
+
+    return {
+        "version": schema_version(conn),
+        "latest_version": LATEST_VERSION,
+        "in_progress": any(step["completed_at"] is None for step in steps),
+        "steps": steps,
+    }
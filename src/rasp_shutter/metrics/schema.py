@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+メトリクス DB のスキーマ（v2）
+
+v1 では時刻を ISO 8601 の文字列、種別を文字列で保存していたため、DB が大きくなるうえ、
+分析のたびに 1 行ずつ datetime.fromisoformat でパースする必要がありました。
+v2 では実体のテーブル（`<テーブル名>_v2`）を次のように持ちます。
+
+- 時刻は UTC のエポック秒（`ts` など）と、記録時の UTC オフセット秒（`tz_offset`）の整数
+- 日付はローカル日付の 1970-01-01 からの日数（`day`）の整数（期間の絞り込みはこの列の範囲検索）
+- action・operation_type・trigger は固定の小さな整数（CHECK 制約付き）
+- reason・context は自由な文字列なので、ラベル表（`metrics_label`）の ID
+
+旧テーブルと同じ名前・同じ列のビュー（`operation_metrics` など）を互換レイヤーとして用意するので、
+エクスポートや手作業の SQL は従来どおり使えます。ビューには整数の `ts`・`tz_offset`・`day`
+（postpone_events は `resolved_ts` も）も含め、analyzer は文字列をパースせずにこちらを使います。
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import sqlite3
+from collections.abc import Iterable
+
+import my_lib.time
+
+# スキーマのバージョン
+VERSION = 2
+
+# 対象のテーブル（ビュー）
+TABLES = ("operation_metrics", "daily_failures", "postpone_events", "sensor_samples")
+
+# 種別の列の値と整数コード（リストの位置がコード）
+ACTIONS = ("open", "close")
+OPERATION_TYPES = ("manual", "schedule", "auto")
+TRIGGERS = ("schedule", "auto")
+
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+# NOTE: STRICT テーブルは SQLite 3.37 以降（それより古い場合は型を強制しないだけで、同じ内容になる）
+_STRICT = " STRICT" if sqlite3.sqlite_version_info >= (3, 37, 0) else ""
+
+
+def physical_table(table: str) -> str:
+    """ビューに対応する実体のテーブル名"""
+    return f"{table}_v2"
+
+
+def _legacy_table(table: str) -> str:
+    return f"{table}_v1"
+
+
+def encode_time(timestamp: datetime.datetime) -> tuple[int, int, int]:
+    """時刻を (エポック秒, UTC オフセット秒, ローカル日付の日数) に変換する
+
+    タイムゾーンの無い時刻はアプリのタイムゾーン（my_lib.time）の時刻として扱う。
+    """
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=my_lib.time.get_zoneinfo())
+    offset = timestamp.utcoffset()
+    tz_offset = int(offset.total_seconds()) if offset is not None else 0
+    ts = int(timestamp.timestamp())
+    return ts, tz_offset, (ts + tz_offset) // 86400
+
+
+def encode_date(date: str) -> int:
+    """YYYY-MM-DD を day 列の値（1970-01-01 からの日数）に変換する"""
+    return datetime.date.fromisoformat(date).toordinal() - _EPOCH_ORDINAL
+
+
+def decode_day(day: int) -> datetime.date:
+    return datetime.date.fromordinal(day + _EPOCH_ORDINAL)
+
+
+def encode_enum(values: tuple[str, ...], value: str, name: str) -> int:
+    try:
+        return values.index(value)
+    except ValueError:
+        raise ValueError(f"Unknown {name}: {value}") from None
+
+
+def label_id(conn: sqlite3.Connection, name: str | None) -> int | None:
+    """ラベル表での ID を返す（未登録なら登録する）"""
+    if name is None:
+        return None
+    row = conn.execute("SELECT id FROM metrics_label WHERE name = ?", (name,)).fetchone()
+    if row is not None:
+        return row[0]
+    return conn.execute("INSERT INTO metrics_label (name) VALUES (?)", (name,)).lastrowid
+
+
+def _check(column: str, values: tuple[str, ...]) -> str:
+    return f"CHECK ({column} IN ({', '.join(str(code) for code in range(len(values)))}))"
+
+
+def _decode_enum(column: str, values: tuple[str, ...]) -> str:
+    cases = " ".join(f"WHEN {code} THEN '{value}'" for code, value in enumerate(values))
+    return f"CASE {column} {cases} END"
+
+
+def _iso(column: str) -> str:
+    """エポック秒の列を、記録時の UTC オフセット付きの ISO 8601 文字列にする SQL 式"""
+    return (
+        f"strftime('%Y-%m-%dT%H:%M:%S', {column} + t.tz_offset, 'unixepoch')"
+        " || printf('%+03d:%02d', t.tz_offset / 3600, abs(t.tz_offset) % 3600 / 60)"
+    )
+
+
+_DATE = "date(t.day * 86400, 'unixepoch')"
+_CREATED_AT = "datetime(t.created_at, 'unixepoch')"
+
+_TABLE_DDL = {
+    "operation_metrics": f"""
+        CREATE TABLE IF NOT EXISTS operation_metrics_v2 (
+            id INTEGER PRIMARY KEY,
+            ts INTEGER NOT NULL,
+            tz_offset INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            action INTEGER NOT NULL {_check("action", ACTIONS)},
+            operation_type INTEGER NOT NULL {_check("operation_type", OPERATION_TYPES)},
+            lux REAL,
+            solar_rad REAL,
+            altitude REAL,
+            shutter_index INTEGER,
+            shutter_name TEXT,
+            created_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+        ){_STRICT}
+    """,
+    "daily_failures": f"""
+        CREATE TABLE IF NOT EXISTS daily_failures_v2 (
+            id INTEGER PRIMARY KEY,
+            ts INTEGER NOT NULL,
+            tz_offset INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            failure_count INTEGER NOT NULL DEFAULT 1,
+            shutter_index INTEGER,
+            shutter_name TEXT,
+            created_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+        ){_STRICT}
+    """,
+    "postpone_events": f"""
+        CREATE TABLE IF NOT EXISTS postpone_events_v2 (
+            id INTEGER PRIMARY KEY,
+            ts INTEGER NOT NULL,
+            tz_offset INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            intended_action INTEGER NOT NULL {_check("intended_action", ACTIONS)},
+            trigger INTEGER NOT NULL {_check("trigger", TRIGGERS)},
+            scheduled_ts INTEGER,
+            reason INTEGER NOT NULL REFERENCES metrics_label(id),
+            lux REAL,
+            solar_rad REAL,
+            altitude REAL,
+            threshold_lux REAL,
+            threshold_solar_rad REAL,
+            threshold_altitude REAL,
+            resolved_ts INTEGER,
+            resolved_operation_id INTEGER,
+            created_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+        ){_STRICT}
+    """,
+    "sensor_samples": f"""
+        CREATE TABLE IF NOT EXISTS sensor_samples_v2 (
+            id INTEGER PRIMARY KEY,
+            ts INTEGER NOT NULL,
+            tz_offset INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            lux REAL,
+            solar_rad REAL,
+            altitude REAL,
+            context INTEGER REFERENCES metrics_label(id),
+            created_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+        ){_STRICT}
+    """,
+}
+
+# NOTE: 互換ビューの列は v1 のテーブルと同じ並びで、その後ろに整数の時刻・日付の列を置く
+_VIEW_COLUMNS = {
+    "operation_metrics": f"""
+        t.id, {_iso("t.ts")} AS timestamp, {_DATE} AS date,
+        {_decode_enum("t.action", ACTIONS)} AS action,
+        {_decode_enum("t.operation_type", OPERATION_TYPES)} AS operation_type,
+        t.lux, t.solar_rad, t.altitude, t.shutter_index, t.shutter_name, {_CREATED_AT} AS created_at,
+        t.ts, t.tz_offset, t.day
+        FROM operation_metrics_v2 AS t
+    """,
+    "daily_failures": f"""
+        t.id, {_DATE} AS date, t.failure_count, {_iso("t.ts")} AS timestamp,
+        t.shutter_index, t.shutter_name, {_CREATED_AT} AS created_at,
+        t.ts, t.tz_offset, t.day
+        FROM daily_failures_v2 AS t
+    """,
+    "postpone_events": f"""
+        t.id, {_iso("t.ts")} AS timestamp, {_DATE} AS date,
+        {_decode_enum("t.intended_action", ACTIONS)} AS intended_action,
+        {_decode_enum("t.trigger", TRIGGERS)} AS trigger,
+        {_iso("t.scheduled_ts")} AS scheduled_time, reason.name AS reason,
+        t.lux, t.solar_rad, t.altitude, t.threshold_lux, t.threshold_solar_rad, t.threshold_altitude,
+        {_iso("t.resolved_ts")} AS resolved_at, t.resolved_operation_id, {_CREATED_AT} AS created_at,
+        t.ts, t.tz_offset, t.day, t.resolved_ts
+        FROM postpone_events_v2 AS t
+        JOIN metrics_label AS reason ON reason.id = t.reason
+    """,
+    "sensor_samples": f"""
+        t.id, {_iso("t.ts")} AS timestamp, {_DATE} AS date,
+        t.lux, t.solar_rad, t.altitude, context.name AS context, {_CREATED_AT} AS created_at,
+        t.ts, t.tz_offset, t.day
+        FROM sensor_samples_v2 AS t
+        LEFT JOIN metrics_label AS context ON context.id = t.context
+    """,
+}
+
+# NOTE: インデックス名は v1 と同じ（date 列の代わりに day 列を使う）
+_INDEX_DDL = (
+    "CREATE INDEX IF NOT EXISTS idx_operation_metrics_date_type"
+    " ON operation_metrics_v2(day, operation_type, action)",
+    "CREATE INDEX IF NOT EXISTS idx_operation_metrics_type ON operation_metrics_v2(operation_type, action)",
+    "CREATE INDEX IF NOT EXISTS idx_operation_metrics_shutter_date"
+    " ON operation_metrics_v2(shutter_index, day)",
+    "CREATE INDEX IF NOT EXISTS idx_daily_failures_date ON daily_failures_v2(day)",
+    "CREATE INDEX IF NOT EXISTS idx_daily_failures_shutter_date ON daily_failures_v2(shutter_index, day)",
+    "CREATE INDEX IF NOT EXISTS idx_postpone_events_date ON postpone_events_v2(day)",
+    "CREATE INDEX IF NOT EXISTS idx_postpone_events_unresolved"
+    " ON postpone_events_v2(day, intended_action, resolved_ts)",
+    "CREATE INDEX IF NOT EXISTS idx_sensor_samples_date ON sensor_samples_v2(day)",
+)
+
+
+def _object_type(conn: sqlite3.Connection, name: str) -> str | None:
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+    return None if row is None else row[0]
+
+
+def _rename_legacy_tables(conn: sqlite3.Connection) -> list[str]:
+    """v1 のテーブルを `<テーブル名>_v1` に改名し、改名したテーブルを返す
+
+    v1 のインデックスは v2 と同じ名前なので削除する（移行の読み出しは主キー順なので使わない）。
+    """
+    renamed = []
+    for table in TABLES:
+        if _object_type(conn, table) != "table":
+            continue
+        for (index,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table,),
+        ).fetchall():
+            conn.execute(f"DROP INDEX {index}")
+        conn.execute(f"ALTER TABLE {table} RENAME TO {_legacy_table(table)}")
+        renamed.append(table)
+    return renamed
+
+
+def create(conn: sqlite3.Connection) -> list[str]:
+    """v2 のテーブル・インデックス・互換ビューを作成する
+
+    v1 のテーブルがあれば改名して残し、その名前のリストを返す（中身は migrate_legacy で移す）。
+    何度呼んでもよい（rasp_shutter.metrics.migration のステップの apply）。
+    """
+    legacy = _rename_legacy_tables(conn)
+
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS metrics_label (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        ){_STRICT}
+    """)
+    for table in TABLES:
+        conn.execute(_TABLE_DDL[table])
+        conn.execute(f"CREATE VIEW IF NOT EXISTS {table} AS SELECT {_VIEW_COLUMNS[table]}")
+    for ddl in _INDEX_DDL:
+        conn.execute(ddl)
+
+    # NOTE: 各テーブルの最も新しい行だけを先に移し、v2 の最大 id を v1 の最大 id にしておく。
+    # 残りを移す前に記録された行の id（最大 id + 1）が、未移行の行と重ならない
+    for table in legacy:
+        migrate_legacy_batch(conn, table, 1)
+    return legacy
+
+
+def legacy_tables(conn: sqlite3.Connection) -> list[str]:
+    """移行が終わっていない v1 のテーブル"""
+    return [table for table in TABLES if _object_type(conn, _legacy_table(table)) == "table"]
+
+
+def legacy_row_count(conn: sqlite3.Connection) -> int:
+    """移行が終わっていない v1 の行数"""
+    return sum(
+        conn.execute(f"SELECT COUNT(*) FROM {_legacy_table(table)}").fetchone()[0]  # noqa: S608
+        for table in legacy_tables(conn)
+    )
+
+
+def _decode_legacy_time(value: str | None) -> datetime.datetime | None:
+    if not value:
+        return None
+    timestamp = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=my_lib.time.get_zoneinfo())
+    return timestamp
+
+
+def _decode_legacy_created_at(value: str | None) -> int | None:
+    # NOTE: CURRENT_TIMESTAMP は UTC の "YYYY-MM-DD HH:MM:SS"
+    if not value:
+        return None
+    timestamp = datetime.datetime.fromisoformat(str(value))
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=datetime.UTC)
+    return int(timestamp.timestamp())
+
+
+# v1 から値をそのまま引き継ぐ列
+_COPIED_COLUMNS = (
+    "lux",
+    "solar_rad",
+    "altitude",
+    "shutter_index",
+    "shutter_name",
+    "failure_count",
+    "threshold_lux",
+    "threshold_solar_rad",
+    "threshold_altitude",
+    "resolved_operation_id",
+)
+
+
+def _convert_legacy_row(conn: sqlite3.Connection, table: str, row: sqlite3.Row) -> dict:
+    timestamp = _decode_legacy_time(row["timestamp"])
+    if timestamp is None:
+        raise ValueError(f"{table} id={row['id']} has no timestamp")
+    ts, tz_offset, _ = encode_time(timestamp)
+    columns = set(row.keys())
+    converted = {
+        "id": row["id"],
+        "ts": ts,
+        "tz_offset": tz_offset,
+        # NOTE: 日付は記録時のものを残す（タイムゾーンを変えていても集計がずれないように）
+        "day": encode_date(row["date"]) if row["date"] else (ts + tz_offset) // 86400,
+        "created_at": _decode_legacy_created_at(row["created_at"]) or ts,
+    }
+    for column in _COPIED_COLUMNS:
+        if column in columns:
+            converted[column] = row[column]
+
+    if table == "operation_metrics":
+        converted["action"] = encode_enum(ACTIONS, row["action"], "action")
+        converted["operation_type"] = encode_enum(OPERATION_TYPES, row["operation_type"], "operation_type")
+    elif table == "postpone_events":
+        converted["intended_action"] = encode_enum(ACTIONS, row["intended_action"], "action")
+        converted["trigger"] = encode_enum(TRIGGERS, row["trigger"], "trigger")
+        converted["reason"] = label_id(conn, row["reason"])
+        scheduled = _decode_legacy_time(row["scheduled_time"])
+        converted["scheduled_ts"] = None if scheduled is None else int(scheduled.timestamp())
+        resolved = _decode_legacy_time(row["resolved_at"])
+        converted["resolved_ts"] = None if resolved is None else int(resolved.timestamp())
+    elif table == "sensor_samples":
+        converted["context"] = label_id(conn, row["context"])
+    return converted
+
+
+def _insert(conn: sqlite3.Connection, table: str, rows: Iterable[dict]) -> None:
+    for row in rows:
+        columns = list(row)
+        conn.execute(
+            f"INSERT INTO {physical_table(table)} ({', '.join(columns)})"  # noqa: S608
+            f" VALUES ({', '.join('?' for _ in columns)})",
+            [row[column] for column in columns],
+        )
+
+
+def migrate_legacy_batch(conn: sqlite3.Connection, table: str, batch_rows: int) -> int:
+    """v1 のテーブルから最大 batch_rows 行を v2 に移し、移した行数を返す
+
+    移した行は v1 のテーブルから消すので、途中で中断しても続きから再開できる
+    （v1 のテーブルが空になったら削除する）。呼び出し側で 1 バッチを 1 トランザクションにすること。
+
+    NOTE: id の大きい方から移す（create で最も新しい行を移してあるので、移行中に記録された行とは重ならない）。
+    """
+    legacy = _legacy_table(table)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute(
+            f"SELECT * FROM {legacy} ORDER BY id DESC LIMIT ?",  # noqa: S608
+            (batch_rows,),
+        ).fetchall()
+    finally:
+        conn.row_factory = None
+
+    if not rows:
+        conn.execute(f"DROP TABLE {legacy}")
+        logging.info("Migrated %s to schema v%d", table, VERSION)
+        return 0
+
+    # NOTE: id を引き継ぐので、resolved_operation_id などの参照はそのまま使える
+    _insert(conn, table, [_convert_legacy_row(conn, table, row) for row in rows])
+    conn.execute(f"DELETE FROM {legacy} WHERE id >= ?", (rows[-1]["id"],))  # noqa: S608
+    return len(rows)
+
+
+def migrate_legacy(conn: sqlite3.Connection, batch_rows: int) -> int:
+    """v1 のテーブルの行を最大 batch_rows 行 v2 に移し、移した行数を返す（0 なら移行済み）
+
+    rasp_shutter.metrics.migration のステップの backfill。
+    """
+    for table in legacy_tables(conn):
+        moved = migrate_legacy_batch(conn, table, batch_rows)
+        if moved > 0:
+            return moved
+    return 0
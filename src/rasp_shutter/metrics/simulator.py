@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+制御判定のリプレイ・シミュレーション
+
+記録済みのセンサーサンプル（sensor_samples）の時系列に候補スケジュールを当てはめ、
+スケジュール制御・自動開け・自動閉めの判定ロジックを仮想時間で再生します。
+footprint に相当する状態はメモリ上に持ち、結果として発生する操作と見合わせを返します。
+
+- 判定は scheduler と同じ条件（brightness.judge の明るさ条件と control.config の時間帯・間隔定数）で行う
+- brightness_filter を指定すると、自動開け・自動閉めの明るさは scheduler と同じく
+  BrightnessFilter.decide で判定する
+- デバイス制御は常に成功する前提なので、shutter_pending_close（閉め失敗の再試行）は発生しない
+- 時刻ジョブはその日の指定時刻以降の最初のサンプルで発火する（サンプル間隔の分だけ遅れ得る）
+- シャッター別の override を含むスケジュールは扱えない（ValueError を送出する）
+
+sweep() は時系列の前処理を 1 回だけ行い、閾値の組み合わせをプロセスプールで並列に評価します。
+Flask 依存を持たない純粋なロジックのみを提供します。
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import dataclasses
+import datetime
+import itertools
+import os
+from typing import Any
+
+import rasp_shutter.config
+import rasp_shutter.control.brightness
+import rasp_shutter.control.config
+import rasp_shutter.control.schedule_plan
+import rasp_shutter.type_defs
+
+BRIGHTNESS_STATE = rasp_shutter.control.brightness.BRIGHTNESS_STATE
+
+# 見合わせ記録のクールダウン（collector.record_postpone と同じ）
+POSTPONE_COOLDOWN_SEC = 60.0
+
+# (UNIX 時刻, 日付の序数, 曜日（日曜=0）, 0 時からの分, 時, lux, solar_rad, altitude)
+Tick = tuple[float, int, int, float, int, float | None, float | None, float | None]
+
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+@dataclasses.dataclass(frozen=True)
+class SimulationResult:
+    """シミュレーション結果
+
+    Attributes
+    ----------
+        operations: 実際に制御した操作（timestamp / action / mode）
+        postpones: 見合わせ（timestamp / intended_action / trigger / reason）
+
+    """
+
+    operations: list[dict[str, Any]]
+    postpones: list[dict[str, Any]]
+
+    def summary(self) -> dict[str, int]:
+        """操作・見合わせの件数を集計する"""
+        result = {"postpone_total": len(self.postpones)}
+        for action, mode in itertools.product(("open", "close"), ("schedule", "auto")):
+            result[f"{mode}_{action}"] = sum(
+                1 for op in self.operations if op["action"] == action and op["mode"] == mode
+            )
+        return result
+
+
+def prepare_timeline(sensor_samples: list[dict]) -> list[Tick]:
+    """sensor_samples の行を時刻順のタプル列に変換する（sweep 全体で 1 回だけ行う）"""
+    timeline: list[Tick] = []
+    for sample in sensor_samples:
+        if (ts := sample.get("ts")) is not None:
+            # NOTE: collector から取得した行は整数の時刻を持つので、datetime を経由しない
+            local_sec = ts + sample["tz_offset"]
+            day, second = divmod(local_sec, 86400)
+            ordinal = day + _EPOCH_ORDINAL
+            timeline.append(
+                (
+                    float(ts),
+                    ordinal,
+                    ordinal % 7,  # NOTE: 序数 1 は月曜なので、7 で割った余りが日曜始まりの曜日
+                    second / 60.0,
+                    second // 3600,
+                    sample.get("lux"),
+                    sample.get("solar_rad"),
+                    sample.get("altitude"),
+                )
+            )
+            continue
+
+        timestamp = sample["timestamp"]
+        if isinstance(timestamp, str):
+            timestamp = datetime.datetime.fromisoformat(timestamp)
+        timeline.append(
+            (
+                timestamp.timestamp(),
+                timestamp.toordinal(),
+                rasp_shutter.control.schedule_plan.weekday_index(timestamp),
+                timestamp.hour * 60 + timestamp.minute + timestamp.second / 60.0,
+                timestamp.hour,
+                sample.get("lux"),
+                sample.get("solar_rad"),
+                sample.get("altitude"),
+            )
+        )
+    timeline.sort(key=lambda tick: tick[0])
+    return timeline
+
+
+def _check_supported(schedule_data: dict) -> None:
+    # NOTE: 全シャッター共通の open / close だけで判定するので、override があると結果が実際と食い違う
+    if schedule_data.get("override"):
+        raise ValueError("Schedules with per-shutter override cannot be simulated")
+
+
+def _sensor_data(
+    now: float, lux: float, solar_rad: float, altitude: float
+) -> rasp_shutter.type_defs.SensorData:
+    time = datetime.datetime.fromtimestamp(now, datetime.UTC)
+    return rasp_shutter.type_defs.SensorData(
+        lux=rasp_shutter.type_defs.SensorValue.create_valid(lux, time),
+        solar_rad=rasp_shutter.type_defs.SensorValue.create_valid(solar_rad, time),
+        altitude=rasp_shutter.type_defs.SensorValue.create_valid(altitude, time),
+    )
+
+
+def simulate(
+    timeline: list[Tick],
+    schedule_data: dict,
+    brightness_filter: rasp_shutter.config.BrightnessFilterConfig | None = None,
+) -> SimulationResult:
+    """候補スケジュールで時系列を再生し、操作と見合わせを返す
+
+    数百の候補 × 30 日分を評価するため、判定は 1 つのループに展開している。
+    明るさの条件は brightness.judge と同じ（開ける: AND で閾値超え、閉める: OR で閾値未満）。
+    brightness_filter が有効な場合、自動開け・自動閉めは BrightnessFilter.decide で判定する。
+    """
+    _check_supported(schedule_data)
+
+    cfg = rasp_shutter.control.config
+    # NOTE: フィルタが無効なら decide() は瞬時値の judge() と同じなので、ループ内の比較で済ませる
+    stabilizer = (
+        rasp_shutter.control.brightness.BrightnessFilter(brightness_filter)
+        if brightness_filter is not None
+        else None
+    )
+    if stabilizer is not None and not stabilizer.enabled:
+        stabilizer = None
+    open_entry = schedule_data["open"]
+    close_entry = schedule_data["close"]
+    open_minutes = rasp_shutter.control.schedule_plan.time_to_minutes(open_entry["time"])
+    close_minutes = rasp_shutter.control.schedule_plan.time_to_minutes(close_entry["time"])
+    open_wday = [open_entry["is_active"] and enabled for enabled in open_entry["wday"]]
+    close_wday = [close_entry["is_active"] and enabled for enabled in close_entry["wday"]]
+    open_lux, open_solar_rad, open_altitude = rasp_shutter.control.schedule_plan.threshold_key(open_entry)
+    close_lux, close_solar_rad, close_altitude = rasp_shutter.control.schedule_plan.threshold_key(close_entry)
+
+    exec_interval_sec = cfg.EXEC_INTERVAL_SCHEDULE_HOUR * 3600
+    auto_interval_sec = cfg.EXEC_INTERVAL_AUTO_MIN * 60
+    auto_open_hours = range(cfg.HOUR_MORNING_START + 1, cfg.HOUR_AUTO_OPEN_END)
+    auto_close_hours = range(cfg.HOUR_MORNING_START + 1, cfg.HOUR_AUTO_CLOSE_END)
+    pending_open_hours = range(cfg.HOUR_MORNING_START + 1, cfg.HOUR_PENDING_OPEN_END)
+
+    # footprint 相当（設定された時刻、未設定は None）
+    pending_open: float | None = None
+    auto_close: float | None = None
+    last_exec: dict[str, float | None] = {"open": None, "close": None}
+
+    operations: list[dict[str, Any]] = []
+    postpones: list[dict[str, Any]] = []
+    last_postpone: dict[tuple[str, str], tuple[int, float]] = {}
+
+    def exec_control(action: str, mode: str, now: float) -> None:
+        nonlocal pending_open, auto_close
+        last = last_exec[action]
+        # NOTE: 制御間隔が短い場合は見合わせ（POSTPONED）になるが、制御としては成功扱い
+        if last is None or now - last >= exec_interval_sec:
+            operations.append({"timestamp": now, "action": action, "mode": mode})
+            last_exec[action] = now
+            last_exec["close" if action == "open" else "open"] = None
+        if action == "open":
+            auto_close = None
+        else:
+            pending_open = None
+
+    def postpone(trigger: str, reason: str, now: float, day: int) -> None:
+        # NOTE: サンプル 1 件がその 1 分間の毎秒の判定を代表するので、クールダウン丁度なら記録する
+        last = last_postpone.get(("open", reason))
+        if last is not None and last[0] == day and now - last[1] < POSTPONE_COOLDOWN_SEC:
+            return
+        last_postpone[("open", reason)] = (day, now)
+        postpones.append({"timestamp": now, "intended_action": "open", "trigger": trigger, "reason": reason})
+
+    current_day = None
+    open_fired = close_fired = False
+    for now, day, wday, minutes, hour, lux, solar_rad, altitude in timeline:
+        if day != current_day:
+            current_day = day
+            open_fired = close_fired = False
+
+        valid = lux is not None and solar_rad is not None and altitude is not None
+        bright = valid and lux > open_lux and solar_rad > open_solar_rad and altitude > open_altitude  # type: ignore[operator]
+
+        # 時刻ジョブ（scheduler の run_pending に相当）
+        if not open_fired and minutes >= open_minutes:
+            open_fired = True
+            if open_wday[wday]:
+                if bright:
+                    exec_control("open", "schedule", now)
+                else:
+                    pending_open = now
+                    postpone("schedule", "too_dark" if valid else "sensor_invalid", now, day)
+        if not close_fired and minutes >= close_minutes:
+            close_fired = True
+            if close_wday[wday]:
+                exec_control("close", "schedule", now)
+
+        # 毎秒ジョブ（shutter_auto_control に相当）
+        if (
+            hour in auto_open_hours
+            and open_wday[wday]
+            and pending_open is not None
+            and now - pending_open <= cfg.ELAPSED_PENDING_OPEN_MAX_SEC
+            and (auto_close is None or now - auto_close >= auto_interval_sec)
+        ):
+            last_open = last_exec["open"]
+            if last_open is not None and last_open > pending_open:
+                # NOTE: pending 中に既に開けている
+                pending_open = None
+            else:
+                if not valid:
+                    brightness = BRIGHTNESS_STATE.UNKNOWN
+                elif stabilizer is None:
+                    brightness = BRIGHTNESS_STATE.BRIGHT if bright else BRIGHTNESS_STATE.DARK
+                else:
+                    sense_data = _sensor_data(now, lux, solar_rad, altitude)  # type: ignore[arg-type]
+                    brightness = stabilizer.decide(sense_data, "open", open_entry, now)
+
+                if brightness == BRIGHTNESS_STATE.BRIGHT:
+                    exec_control("open", "auto", now)
+                    pending_open = None
+                elif not valid:
+                    postpone("auto", "sensor_invalid", now, day)
+                elif brightness == BRIGHTNESS_STATE.DARK:
+                    # NOTE: BrightnessFilter の判定が確定するまで（UNKNOWN）は見合わせとして記録しない
+                    postpone("auto", "too_dark", now, day)
+
+        if (
+            hour in auto_close_hours
+            and close_wday[wday]
+            and pending_open is None
+            and (auto_close is None or now - auto_close > cfg.ELAPSED_AUTO_CLOSE_MAX_SEC)
+            and open_minutes + 1 <= minutes < close_minutes
+            and valid
+            and (last_exec["open"] is None or now - last_exec["open"] >= auto_interval_sec)
+        ):
+            if stabilizer is None:
+                dark = lux < close_lux or solar_rad < close_solar_rad or altitude < close_altitude  # type: ignore[operator]
+            else:
+                sense_data = _sensor_data(now, lux, solar_rad, altitude)  # type: ignore[arg-type]
+                dark = stabilizer.decide(sense_data, "close", close_entry, now) == BRIGHTNESS_STATE.DARK
+            if dark:
+                exec_control("close", "auto", now)
+                auto_close = now
+                if hour in pending_open_hours:
+                    pending_open = now
+
+    return SimulationResult(operations=operations, postpones=postpones)
+
+
+def apply_thresholds(schedule_data: dict, thresholds: dict[str, dict[str, int]]) -> dict:
+    """スケジュールの閾値を差し替えた候補スケジュールを作る
+
+    thresholds は {"open": {"lux": ...}, "close": {...}} の形で、指定したキーだけを上書きする。
+    """
+    return {
+        state: {**schedule_data[state], **thresholds.get(state, {})}
+        for state in rasp_shutter.control.schedule_plan.STATES
+    }
+
+
+def threshold_grid(**axes: list[int]) -> list[dict[str, dict[str, int]]]:
+    """open_lux=[...], close_solar_rad=[...] のような軸指定から閾値の組み合わせを作る"""
+    names = list(axes.keys())
+    grid = []
+    for values in itertools.product(*(axes[name] for name in names)):
+        thresholds: dict[str, dict[str, int]] = {}
+        for name, value in zip(names, values, strict=True):
+            state, field = name.split("_", 1)
+            thresholds.setdefault(state, {})[field] = value
+        grid.append(thresholds)
+    return grid
+
+
+# NOTE: プロセスプールの各ワーカーに時系列とフィルタの設定を 1 回だけ渡すためのグローバル
+_worker_timeline: list[Tick] = []
+_worker_brightness_filter: rasp_shutter.config.BrightnessFilterConfig | None = None
+
+
+def _init_worker(
+    timeline: list[Tick], brightness_filter: rasp_shutter.config.BrightnessFilterConfig | None
+) -> None:
+    global _worker_timeline, _worker_brightness_filter
+    _worker_timeline = timeline
+    _worker_brightness_filter = brightness_filter
+
+
+def _simulate_summary(schedule_data: dict) -> dict[str, int]:
+    return simulate(_worker_timeline, schedule_data, _worker_brightness_filter).summary()
+
+
+def sweep(
+    sensor_samples: list[dict],
+    schedule_data: dict,
+    candidates: list[dict[str, dict[str, int]]],
+    max_workers: int | None = None,
+    brightness_filter: rasp_shutter.config.BrightnessFilterConfig | None = None,
+) -> list[dict[str, Any]]:
+    """閾値の候補ごとにシミュレーションし、件数の集計を返す
+
+    max_workers=1 の場合はプロセスを起動せずに逐次実行する。
+    """
+    # NOTE: apply_thresholds() は override を引き継がないので、候補を作る前に確認する
+    _check_supported(schedule_data)
+
+    timeline = prepare_timeline(sensor_samples)
+    schedules = [apply_thresholds(schedule_data, thresholds) for thresholds in candidates]
+
+    if max_workers == 1 or len(schedules) <= 1:
+        summaries = [simulate(timeline, schedule, brightness_filter).summary() for schedule in schedules]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=(timeline, brightness_filter)
+        ) as executor:
+            # NOTE: 候補 1 件ごとの処理は軽いので、まとめて渡してプロセス間通信を減らす
+            chunksize = max(1, len(schedules) // ((max_workers or os.cpu_count() or 1) * 4))
+            summaries = list(executor.map(_simulate_summary, schedules, chunksize=chunksize))
+
+    return [
+        {"thresholds": thresholds, **summary}
+        for thresholds, summary in zip(candidates, summaries, strict=True)
+    ]
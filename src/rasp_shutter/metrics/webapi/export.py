@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+メトリクスのテーブルのエクスポート API
+
+GET /api/metrics/export?table=...&format=csv|ndjson|parquet&from=...&to=... で、
+メトリクス DB のテーブルをストリーミングで返します（rasp_shutter.metrics.export）。
+"""
+
+import flask
+from flask_pydantic import validate
+
+import rasp_shutter.metrics.export
+from rasp_shutter.schemas import MetricsExportRequest
+
+blueprint = flask.Blueprint("metrics-export", __name__)
+
+
+@blueprint.route("/api/metrics/export", methods=["GET"])
+@validate(query=MetricsExportRequest)
+def metrics_export(query: MetricsExportRequest) -> flask.Response | tuple[flask.Response, int]:
+    db_path = flask.current_app.config["CONFIG"].metrics.data
+    if not db_path.exists():
+        return flask.jsonify({"error": "メトリクスデータベースが見つかりません"}), 503
+
+    try:
+        chunks = rasp_shutter.metrics.export.stream(
+            db_path, query.table, query.format, query.start_date, query.end_date
+        )
+    except rasp_shutter.metrics.export.ExportError as e:
+        # NOTE: テーブル名・形式はスキーマで検証済みなので、ここに来るのは pyarrow が無い場合
+        return flask.jsonify({"error": str(e)}), 501
+
+    return flask.Response(
+        flask.stream_with_context(chunks),
+        mimetype=rasp_shutter.metrics.export.FORMATS[query.format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{rasp_shutter.metrics.export.filename(query.table, query.format)}"'
+            ),
+            # NOTE: リバースプロキシでバッファリングさせず、読み出した分から返す
+            "X-Accel-Buffering": "no",
+        },
+    )
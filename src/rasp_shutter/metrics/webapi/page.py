@@ -6,21 +6,26 @@
 その表示用データを返す JSON API を提供します。
 """
 
-from __future__ import annotations
-
 import functools
 import io
 import logging
 import pathlib
 import sqlite3
+import typing
 
 import flask
-import PIL.Image
-import PIL.ImageDraw
+from flask_pydantic import validate
 
+import rasp_shutter.control.leader
 import rasp_shutter.control.scheduler
 import rasp_shutter.metrics.analyzer
 import rasp_shutter.metrics.collector
+import rasp_shutter.metrics.dashboard
+import rasp_shutter.metrics.migration
+from rasp_shutter.schemas import MetricsDataRequest
+
+if typing.TYPE_CHECKING:
+    import PIL.Image
 
 # favicon のブラウザキャッシュ期間（秒）
 FAVICON_CACHE_MAX_AGE_SEC = 3600
@@ -40,10 +45,13 @@ def _get_metrics_db_path() -> pathlib.Path:
     return config.metrics.data
 
 
-def _load_current_schedule() -> dict | None:
+def load_current_schedule() -> dict | None:
     """現時点の閾値参照用スケジュールを取得（取得失敗時は None）"""
     try:
-        return rasp_shutter.control.scheduler.schedule_load()
+        if not rasp_shutter.control.leader.is_leader():
+            # NOTE: フォロワーのメモリ上のスケジュールは更新されないので、保存済みの内容を読む
+            return rasp_shutter.control.scheduler.schedule_load().current.schedule
+        return rasp_shutter.control.scheduler.get_current_schedule().data
     except (AssertionError, OSError, RuntimeError):
         logging.warning("Failed to load current schedule for threshold reference", exc_info=True)
         return None
@@ -71,22 +79,76 @@ def metrics_view():
     )
 
 
+def _send_snapshot(path: pathlib.Path, gzip_path: pathlib.Path) -> flask.Response:
+    """書き出したダッシュボードデータを送る（gzip を受け付けるクライアントには圧縮版を送る）"""
+    if flask.request.accept_encodings["gzip"] > 0 and gzip_path.exists():
+        response = flask.send_file(gzip_path, mimetype="application/json", conditional=True)
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = flask.send_file(path, mimetype="application/json", conditional=True)
+
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def _dashboard_query(query: MetricsDataRequest) -> rasp_shutter.metrics.analyzer.DashboardQuery:
+    return rasp_shutter.metrics.analyzer.DashboardQuery(
+        start_date=query.start_date,
+        end_date=query.end_date,
+        shutter_index=query.shutter_index,
+        sections=frozenset(query.sections) if query.sections is not None else None,
+    )
+
+
 @blueprint.route("/api/metrics/data", methods=["GET"])
-def metrics_data():
-    """メトリクスダッシュボード用データを JSON で返す"""
+@validate(query=MetricsDataRequest)
+def metrics_data(query: MetricsDataRequest):
+    """メトリクスダッシュボード用データを JSON で返す
+
+    from / to（YYYY-MM-DD）・shutter_index・sections（カンマ区切り）で絞り込める。
+    """
     db_path = _get_metrics_db_path()
     if not db_path.exists():
         return flask.jsonify({"error": "メトリクスデータベースが見つかりません"}), 503
 
+    # NOTE: 書き出してあるのは絞り込み無しのデータだけ
+    snapshot_path = rasp_shutter.metrics.dashboard.snapshot_path(db_path)
+    if not query.is_filtered and snapshot_path.exists():
+        return _send_snapshot(snapshot_path, rasp_shutter.metrics.dashboard.snapshot_gzip_path(db_path))
+
     try:
-        collector = rasp_shutter.metrics.collector.get_collector(db_path)
-        current_schedule = _load_current_schedule()
-        return flask.jsonify(rasp_shutter.metrics.analyzer.build_dashboard_data(collector, current_schedule))
-    except (sqlite3.Error, OSError) as e:
+        # NOTE: 絞り込む場合と、書き出したファイルがまだ無い場合は、その場で（別プロセスで）計算する
+        body = rasp_shutter.metrics.dashboard.build_json(
+            db_path, load_current_schedule(), _dashboard_query(query)
+        )
+        if not query.is_filtered:
+            rasp_shutter.metrics.dashboard.request_materialize(immediate=True)
+        return flask.Response(body, mimetype="application/json")
+    except (sqlite3.Error, OSError, rasp_shutter.metrics.dashboard.DashboardError) as e:
         logging.exception("メトリクスデータの生成エラー")
         return flask.jsonify({"error": str(e)}), 500
 
 
+@blueprint.route("/api/metrics/migration", methods=["GET"])
+def metrics_migration():
+    """メトリクス DB のスキーマのバージョンとマイグレーションの進捗を JSON で返す"""
+    db_path = _get_metrics_db_path()
+    if not db_path.exists():
+        return flask.jsonify({"error": "メトリクスデータベースが見つかりません"}), 503
+
+    try:
+        # NOTE: 進捗は DB に記録されているので、リーダー以外のプロセスでも返せる
+        conn = rasp_shutter.metrics.collector.connect_read_only(db_path)
+        try:
+            return flask.jsonify(rasp_shutter.metrics.migration.status(conn))
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logging.exception("マイグレーションの進捗の取得エラー")
+        return flask.jsonify({"error": str(e)}), 500
+
+
 @blueprint.route("/favicon.ico", methods=["GET"])
 def favicon():
     """動的生成されたシャッターメトリクス用favicon.icoを返す"""
@@ -113,8 +175,12 @@ def _generate_favicon_ico() -> bytes:
     return output.getvalue()
 
 
-def generate_shutter_metrics_icon() -> PIL.Image.Image:
+def generate_shutter_metrics_icon() -> "PIL.Image.Image":
     """シャッターメトリクス用のアイコンを動的生成（アンチエイリアス対応）"""
+    # NOTE: PIL は読み込みが重く、favicon 以外では使わないので初回生成時にインポートする
+    import PIL.Image
+    import PIL.ImageDraw
+
     # アンチエイリアスのため4倍サイズで描画してから縮小
     scale = 4
     size = 32
@@ -651,6 +651,8 @@ function generateThresholdTuningCharts(thresholdTuning) {
         });
     }
 
+    renderWhatIfGridChart(tuning.what_if_grid);
+
     renderSimpleHistogram(
         "tuningResolveLagChart",
         tuning.resolve_lag_minutes || [],
@@ -661,6 +663,80 @@ function generateThresholdTuningCharts(thresholdTuning) {
     );
 }
 
+// what-if グリッド（lux × solar_rad のヒートマップ、太陽高度は選択式）
+function renderWhatIfGridChart(grid) {
+    const ctx = document.getElementById("tuningWhatIfGridChart");
+    const select = document.getElementById("tuningWhatIfGridAltitude");
+    if (!ctx || !select || !grid || grid.total_events === 0) return;
+
+    const cellData = (altitudeIndex) => {
+        const points = [];
+        grid.lux.forEach((lux, luxIndex) => {
+            grid.solar_rad.forEach((solarRad, solarRadIndex) => {
+                const count = grid.counts[altitudeIndex][luxIndex][solarRadIndex];
+                points.push({ x: lux, y: solarRad, ratio: count / grid.total_events });
+            });
+        });
+        return points;
+    };
+
+    select.replaceChildren(
+        ...grid.altitude.map((altitude, index) => {
+            const option = document.createElement("option");
+            option.value = index;
+            option.textContent = "太陽高度 > " + altitude.toFixed(1) + "°";
+            return option;
+        })
+    );
+    // NOTE: 末尾が現行の太陽高度閾値
+    select.value = grid.altitude.length - 1;
+
+    const chart = new Chart(ctx, {
+        type: "scatter",
+        data: {
+            datasets: [
+                {
+                    label: "即時開けられた率",
+                    data: cellData(grid.altitude.length - 1),
+                    pointStyle: "rect",
+                    pointRadius: 4,
+                    backgroundColor: (context) =>
+                        "rgba(16, 185, 129, " + ((context.raw && context.raw.ratio) || 0).toFixed(3) + ")",
+                    borderWidth: 0,
+                },
+            ],
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: { display: false },
+                tooltip: {
+                    callbacks: {
+                        label: (context) =>
+                            "lux > " +
+                            Math.round(context.raw.x).toLocaleString() +
+                            ", solar_rad > " +
+                            Math.round(context.raw.y) +
+                            ": " +
+                            (context.raw.ratio * 100).toFixed(1) +
+                            "%",
+                    },
+                },
+            },
+            scales: {
+                x: { title: { display: true, text: "照度閾値 (lux)" } },
+                y: { title: { display: true, text: "日射閾値 (W/m²)" } },
+            },
+        },
+    });
+
+    select.addEventListener("change", () => {
+        chart.data.datasets[0].data = cellData(Number(select.value));
+        chart.update();
+    });
+}
+
 // 全チャートの描画エントリポイント
 function renderAllCharts(data) {
     // 凡例を正方形に設定
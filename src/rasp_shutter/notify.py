@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+実行ログ・Slack 通知の非同期の書き込み
+
+制御の経路（control_lock の中やスケジューラのループ）から my_lib.webapp.log を直接呼ぶと、
+log.db への書き込みと、エラーの場合は Slack への送信を待つことになります。このモジュールの
+info() / error() はログを上限付きのキューに積むだけで戻り、プロセスごとの書き込みスレッドが
+キューに溜まった分をまとめて my_lib.webapp.log に渡します。
+
+- まとめ: batch() の中で記録したログは、抜けた時に 1 つの塊としてキューに積む。塊の中で、
+  subject（シャッター名）だけが違う同じ内容のログが AGGREGATE_MIN_COUNT 件以上あれば、
+  subject を並べた 1 件にする（例: 8 台をスケジューラで閉めた時のログが 1 件になる）
+- 背圧: キューが一杯の時は積まずに捨てて件数を数え、書き込みスレッドが追い付いた時に
+  省略した件数を 1 件のログにする。制御の経路は Slack や SD カードが遅くても待たない
+- start() の前と stop() の後（テスト・CLI など）は、呼び出したスレッドでそのまま書き込む
+
+log.db のテーブル・SSE のイベント・Slack の通知間隔の抑制は my_lib.webapp.log のものを使うため、
+書き込み自体は 1 件ずつ my_lib.webapp.log に渡します。
+"""
+
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import enum
+import logging
+import queue
+import threading
+from collections.abc import Iterator
+
+import my_lib.webapp.log
+
+# キューに積める塊の数
+QUEUE_SIZE = 1000
+# 書き込みスレッドが 1 回に取り出す塊の数
+BATCH_MAX = 100
+# subject だけが違う同じ内容のログを 1 件にまとめる件数
+# NOTE: 2 件なら別々の方が読みやすく、まとめても書き込みはほとんど減らない
+AGGREGATE_MIN_COUNT = 3
+# stop() で書き込みスレッドの終了を待つ時間（秒）
+STOP_TIMEOUT_SEC = 10.0
+
+
+class LEVEL(enum.Enum):
+    INFO = "info"
+    ERROR = "error"
+
+
+@dataclasses.dataclass(frozen=True)
+class Entry:
+    level: LEVEL
+    message: str
+    # まとめる時に並べる名前（message に含まれていること）
+    subject: str | None = None
+
+
+def aggregate(entry_list: list[Entry]) -> list[Entry]:
+    """subject だけが違う同じ内容のログを、AGGREGATE_MIN_COUNT 件以上あれば 1 件にまとめる
+
+    まとめたログは、まとめた中で最初のログの位置に置く。
+    """
+    group_map: dict[tuple[LEVEL, str, str], list[tuple[int, str]]] = {}
+    for i, entry in enumerate(entry_list):
+        if entry.subject is None or entry.subject not in entry.message:
+            continue
+        prefix, _, suffix = entry.message.partition(entry.subject)
+        group_map.setdefault((entry.level, prefix, suffix), []).append((i, entry.subject))
+
+    merged: dict[int, Entry] = {}
+    skipped: set[int] = set()
+    for (level, prefix, suffix), member_list in group_map.items():
+        if len(member_list) < AGGREGATE_MIN_COUNT:
+            continue
+        subject = "・".join(subject for _, subject in member_list)
+        merged[member_list[0][0]] = Entry(level, f"{prefix}{subject}{suffix}", subject)
+        skipped.update(i for i, _ in member_list[1:])
+
+    return [merged.get(i, entry) for i, entry in enumerate(entry_list) if i not in skipped]
+
+
+def _write(entry_list: list[Entry]) -> None:
+    for entry in aggregate(entry_list):
+        try:
+            if entry.level == LEVEL.ERROR:
+                my_lib.webapp.log.error(entry.message)
+            else:
+                my_lib.webapp.log.info(entry.message)
+        except Exception:
+            logging.exception("Failed to write log: %s", entry.message)
+
+
+class _Writer:
+    """キューに積まれたログを my_lib.webapp.log に書き込むスレッド"""
+
+    def __init__(self) -> None:
+        # NOTE: 要素はログの塊。None は終了、Event は flush() の目印
+        self._queue: queue.Queue[list[Entry] | threading.Event | None] = queue.Queue(maxsize=QUEUE_SIZE)
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._worker, name="notify-writer", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: float) -> None:
+        # NOTE: 終了の目印は捨てられないよう、空くまで待つ
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            logging.warning("Log writer queue is full; pending logs are discarded")
+            return
+        self._thread.join(timeout)
+
+    def put(self, entry_list: list[Entry]) -> None:
+        try:
+            self._queue.put_nowait(entry_list)
+        except queue.Full:
+            with self._dropped_lock:
+                self._dropped += len(entry_list)
+            for entry in entry_list:
+                if entry.level == LEVEL.ERROR:
+                    # NOTE: エラーはせめてアプリのログには残す
+                    logging.error("Log writer queue is full: %s", entry.message)
+
+    def flush(self, timeout: float) -> bool:
+        marker = threading.Event()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.wait(timeout)
+
+    def _take_dropped(self) -> int:
+        with self._dropped_lock:
+            dropped, self._dropped = self._dropped, 0
+        return dropped
+
+    def _worker(self) -> None:
+        while True:
+            item_list = [self._queue.get()]
+            while len(item_list) < BATCH_MAX:
+                try:
+                    item_list.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            entry_list = [entry for item in item_list if isinstance(item, list) for entry in item]
+            dropped = self._take_dropped()
+            if dropped > 0:
+                entry_list.append(Entry(LEVEL.INFO, f"⚠️ ログが多すぎるため、{dropped} 件を省略しました。"))
+            _write(entry_list)
+
+            for item in item_list:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if None in item_list:
+                return
+
+
+_writer: _Writer | None = None
+
+# NOTE: batch() はスレッドをまたいで使われる（dispatch_shutter_state のスレッドプール）ので、
+# スレッドローカルではなくプロセスで 1 つにする。制御は control_lock で直列化されている
+_hold_lock = threading.Lock()
+_hold_depth = 0
+_hold_list: list[Entry] = []
+
+
+def _submit(entry_list: list[Entry]) -> None:
+    writer = _writer
+    if writer is None:
+        _write(entry_list)
+    else:
+        writer.put(entry_list)
+
+
+def _add(entry: Entry) -> None:
+    with _hold_lock:
+        if _hold_depth > 0:
+            _hold_list.append(entry)
+            return
+    _submit([entry])
+
+
+def info(message: str, subject: str | None = None) -> None:
+    _add(Entry(LEVEL.INFO, message, subject))
+
+
+def error(message: str, subject: str | None = None) -> None:
+    """エラーとして記録する（my_lib.webapp.log により Slack にも通知される）"""
+    _add(Entry(LEVEL.ERROR, message, subject))
+
+
+@contextlib.contextmanager
+def batch() -> Iterator[None]:
+    """この中で記録したログを、抜けた時に 1 つの塊として書き込む（入れ子にできる）"""
+    global _hold_depth, _hold_list
+    with _hold_lock:
+        _hold_depth += 1
+    try:
+        yield
+    finally:
+        with _hold_lock:
+            _hold_depth -= 1
+            entry_list: list[Entry] = []
+            if _hold_depth == 0:
+                entry_list, _hold_list = _hold_list, []
+        if entry_list:
+            _submit(entry_list)
+
+
+def start() -> None:
+    """書き込みスレッドを開始する（my_lib.webapp.log.init の後に呼ぶこと）"""
+    global _writer
+    stop()
+    writer = _Writer()
+    writer.start()
+    _writer = writer
+
+
+def stop(timeout: float = STOP_TIMEOUT_SEC) -> None:
+    """キューに残ったログを書き込んでから、書き込みスレッドを終了する"""
+    global _writer
+    writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop(timeout)
+
+
+def flush(timeout: float = STOP_TIMEOUT_SEC) -> bool:
+    """それまでにキューに積まれたログを書き込むまで待つ"""
+    writer = _writer
+    if writer is None:
+        return True
+    return writer.flush(timeout)
@@ -6,6 +6,7 @@ These schemas are used for request validation and response serialization.
 Internal data structures remain as dataclasses in types.py.
 """
 
+import datetime
 import typing
 
 import pydantic
@@ -21,6 +22,43 @@ class ShutterCtrlRequest(BaseSchema):
     cmd: int = 0
     index: int = -1
     state: typing.Literal["open", "close"] = "close"
+    since: int | None = None
+    mode: typing.Literal["sync", "async"] = "sync"
+
+
+class SceneCtrlRequest(BaseSchema):
+    """Scene control request query parameters.
+
+    Either ``scene`` or the pair of ``group`` and ``state`` is required.
+    """
+
+    scene: str | None = None
+    group: str | None = None
+    state: typing.Literal["open", "close"] | None = None
+
+
+class ShutterOperation(BaseSchema):
+    """A single shutter/state pair of a bulk control request."""
+
+    index: int = pydantic.Field(ge=0)
+    state: typing.Literal["open", "close"]
+
+
+class BulkCtrlRequest(BaseSchema):
+    """Bulk control request body.
+
+    Each shutter may appear at most once.
+    """
+
+    operations: list[ShutterOperation] = pydantic.Field(min_length=1)
+
+    @pydantic.field_validator("operations")
+    @classmethod
+    def _check_unique_index(cls, operations: list[ShutterOperation]) -> list[ShutterOperation]:
+        index_list = [operation.index for operation in operations]
+        if len(set(index_list)) != len(index_list):
+            raise ValueError("duplicated shutter index")
+        return operations
 
 
 class ScheduleCtrlRequest(BaseSchema):
@@ -28,6 +66,7 @@ class ScheduleCtrlRequest(BaseSchema):
 
     cmd: str | None = None
     data: str | None = None
+    version: int | None = None
 
 
 class CtrlLogRequest(BaseSchema):
@@ -36,6 +75,89 @@ class CtrlLogRequest(BaseSchema):
     cmd: str = "get"
 
 
+# NOTE: rasp_shutter.log_store の LEVELS・DEFAULT_LIMIT・MAX_LIMIT と揃える
+LogLevel = typing.Literal["info", "warning", "error"]
+
+
+class LogRequest(BaseSchema):
+    """Operation log request query parameters.
+
+    ``before_id`` pages back to older entries and ``after_id`` returns only the new ones.
+    """
+
+    before_id: int | None = pydantic.Field(default=None, ge=0)
+    after_id: int | None = pydantic.Field(default=None, ge=0)
+    limit: int = pydantic.Field(default=50, ge=1, le=500)
+    level: LogLevel | None = None
+    keyword: str | None = pydantic.Field(default=None, alias="q")
+
+
+# NOTE: rasp_shutter.metrics.analyzer.DASHBOARD_SECTIONS と揃える
+DashboardSection = typing.Literal[
+    "data_period",
+    "stats",
+    "shutter_breakdown",
+    "postpone",
+    "charts",
+    "threshold_tuning",
+    "reason_labels",
+    "current_thresholds",
+]
+
+
+class MetricsPeriodRequest(BaseSchema):
+    """Date range (``from`` / ``to``, inclusive) of metrics requests."""
+
+    from_date: datetime.date | None = pydantic.Field(default=None, alias="from")
+    to_date: datetime.date | None = pydantic.Field(default=None, alias="to")
+
+    @pydantic.model_validator(mode="after")
+    def _check_period(self) -> "MetricsPeriodRequest":
+        if self.from_date is not None and self.to_date is not None and self.from_date > self.to_date:
+            raise ValueError("from must not be later than to")
+        return self
+
+    @property
+    def start_date(self) -> str | None:
+        return self.from_date.isoformat() if self.from_date is not None else None
+
+    @property
+    def end_date(self) -> str | None:
+        return self.to_date.isoformat() if self.to_date is not None else None
+
+
+class MetricsDataRequest(MetricsPeriodRequest):
+    """Metrics dashboard data request query parameters.
+
+    ``sections`` accepts a comma-separated list or repeated parameters.
+    """
+
+    shutter_index: int | None = pydantic.Field(default=None, ge=0)
+    sections: list[DashboardSection] | None = None
+
+    @pydantic.field_validator("sections", mode="before")
+    @classmethod
+    def _split_sections(cls, value: typing.Any) -> typing.Any:
+        if isinstance(value, str):
+            value = [value]
+        if isinstance(value, list):
+            return [name.strip() for item in value for name in str(item).split(",") if name.strip()]
+        return value
+
+    @property
+    def is_filtered(self) -> bool:
+        return any(
+            value is not None for value in (self.from_date, self.to_date, self.shutter_index, self.sections)
+        )
+
+
+class MetricsExportRequest(MetricsPeriodRequest):
+    """Metrics table export request query parameters."""
+
+    table: typing.Literal["operation_metrics", "postpone_events", "daily_failures", "sensor_samples"]
+    format: typing.Literal["csv", "ndjson", "parquet"] = "csv"
+
+
 # ======================================================================
 # Response Schemas
 # ======================================================================
@@ -68,6 +190,53 @@ class ShutterStateResponseSchema(BaseSchema):
     state: list[ShutterStateEntrySchema]
     result: str = "success"
     postponed: list[str] = pydantic.Field(default_factory=list)
+    version: int = 0
+    cmd: str | None = None
+
+
+class ShutterStateChangeSchema(BaseSchema):
+    """Changed shutter state entry."""
+
+    index: int
+    name: str
+    state: int
+
+
+class ShutterStateDeltaResponseSchema(BaseSchema):
+    """Shutter state delta response for ``since`` queries."""
+
+    version: int
+    full: bool
+    changed: list[ShutterStateChangeSchema] = pydantic.Field(default_factory=list)
+    result: str = "success"
+    cmd: str | None = None
+
+
+class ShutterExecEntrySchema(BaseSchema):
+    """Per-shutter result of a batched control."""
+
+    index: int
+    name: str
+    state: str
+    result: typing.Literal["success", "postponed", "failure"]
+
+
+class SceneResponseSchema(BaseSchema):
+    """Scene control response."""
+
+    name: str
+    result: str = "success"
+    detail: list[ShutterExecEntrySchema] = pydantic.Field(default_factory=list)
+    state: list[ShutterStateEntrySchema] = pydantic.Field(default_factory=list)
+    cmd: str | None = None
+
+
+class BulkCtrlResponseSchema(BaseSchema):
+    """Bulk control response."""
+
+    result: str = "success"
+    detail: list[ShutterExecEntrySchema] = pydantic.Field(default_factory=list)
+    state: list[ShutterStateEntrySchema] = pydantic.Field(default_factory=list)
     cmd: str | None = None
 
 
@@ -82,11 +251,20 @@ class ScheduleEntrySchema(BaseSchema):
     altitude: int
 
 
+class ScheduleOverrideSchema(BaseSchema):
+    """Per-shutter schedule override response."""
+
+    target: list[int]
+    open: ScheduleEntrySchema
+    close: ScheduleEntrySchema
+
+
 class ScheduleDataSchema(BaseSchema):
     """Schedule data response."""
 
     open: ScheduleEntrySchema
     close: ScheduleEntrySchema
+    override: list[ScheduleOverrideSchema] = pydantic.Field(default_factory=list)
 
 
 class CtrlLogResponseSchema(BaseSchema):
@@ -7,7 +7,7 @@ rasp-shutter アプリケーション用の型定義
 
 import datetime
 from dataclasses import dataclass, field
-from typing import TypedDict
+from typing import NotRequired, TypedDict
 
 
 @dataclass
@@ -83,12 +83,143 @@ class ShutterStateResponse:
         state: シャッター状態のリスト
         result: 処理結果
         postponed: 制御間隔が短く見合わせたシャッター名のリスト
+        version: シャッター状態のバージョン
 
     """
 
     state: list[ShutterStateEntry] = field(default_factory=list)
     result: str = "success"
     postponed: list[str] = field(default_factory=list)
+    version: int = 0
+
+
+@dataclass
+class ShutterStateChange:
+    """変化したシャッター 1 台分の状態
+
+    Attributes
+    ----------
+        index: シャッターのインデックス
+        name: シャッター名
+        state: シャッター状態（0=開、1=閉、2=不明）
+
+    """
+
+    index: int
+    name: str
+    state: int
+
+
+@dataclass
+class ShutterStateDeltaResponse:
+    """指定バージョン以降のシャッター状態の差分レスポンス
+
+    Attributes
+    ----------
+        version: 現在のシャッター状態のバージョン
+        full: 差分を求められず、全シャッターを返した場合は True
+        changed: 変化したシャッターのリスト
+        result: 処理結果
+
+    """
+
+    version: int
+    full: bool
+    changed: list[ShutterStateChange] = field(default_factory=list)
+    result: str = "success"
+
+
+@dataclass
+class ShutterExecEntry:
+    """一括制御における 1 台分の実行結果
+
+    Attributes
+    ----------
+        index: シャッターのインデックス
+        name: シャッター名
+        state: 目標状態（"open" / "close"）
+        result: 実行結果（"success" / "postponed" / "failure"）
+
+    """
+
+    index: int
+    name: str
+    state: str
+    result: str
+
+
+@dataclass
+class SceneResponse:
+    """シーン（一括制御）レスポンスの型定義
+
+    Attributes
+    ----------
+        name: シーン名（グループ指定の場合はグループ名）
+        result: 処理結果（1 台でも失敗すれば "error"）
+        detail: シャッターごとの実行結果
+        state: 制御後のシャッター状態のリスト
+
+    """
+
+    name: str
+    result: str = "success"
+    detail: list[ShutterExecEntry] = field(default_factory=list)
+    state: list[ShutterStateEntry] = field(default_factory=list)
+
+
+@dataclass
+class BulkCtrlResponse:
+    """複数シャッター・状態の組の一括制御レスポンスの型定義
+
+    Attributes
+    ----------
+        result: 処理結果（1 台でも失敗すれば "error"）
+        detail: 操作ごとの実行結果（リクエストと同じ順序）
+        state: 制御後のシャッター状態のリスト
+
+    """
+
+    result: str = "success"
+    detail: list[ShutterExecEntry] = field(default_factory=list)
+    state: list[ShutterStateEntry] = field(default_factory=list)
+
+
+@dataclass
+class DeviceHealth:
+    """シャッター（ESP32）との通信状態
+
+    Attributes
+    ----------
+        index: シャッターのインデックス
+        name: シャッター名
+        consecutive_failures: 連続した制御失敗の回数
+        state: "ok" または "failing"（連続失敗が DEVICE_FAILURE_THRESHOLD 回以上）
+
+    """
+
+    index: int
+    name: str
+    consecutive_failures: int
+    state: str
+
+
+@dataclass
+class HealthzResponse:
+    """プロセス内 liveness チェックのレスポンスの型定義
+
+    Attributes
+    ----------
+        result: "success"（スケジューラが動いている）または "error"
+        scheduler_lag_sec: スケジューラループの最終実行からの経過秒（未起動なら None）
+        sensor_age_sec: キャッシュしたセンサー値の経過秒（未取得なら None）
+        device: シャッターごとの通信状態
+
+    """
+
+    result: str
+    scheduler_lag_sec: float | None
+    sensor_age_sec: float | None
+    device: list[DeviceHealth] = field(default_factory=list)
 
 
 # ======================================================================
@@ -118,6 +249,24 @@ class ScheduleEntry(TypedDict):
     altitude: int
 
 
+class ScheduleOverride(TypedDict):
+    """シャッター別スケジュールの型定義
+
+    target に含まれるシャッターは、共通の open/close の代わりにこのエントリに従います。
+
+    Attributes
+    ----------
+        target: 対象シャッターのインデックスのリスト
+        open: 開く制御のスケジュール
+        close: 閉じる制御のスケジュール
+
+    """
+
+    target: list[int]
+    open: ScheduleEntry
+    close: ScheduleEntry
+
+
 class ScheduleData(TypedDict):
     """スケジュールデータ全体の型定義
 
@@ -125,10 +274,12 @@ class ScheduleData(TypedDict):
 
     Attributes
     ----------
-        open: 開く制御のスケジュール
-        close: 閉じる制御のスケジュール
+        open: 開く制御のスケジュール（全シャッター共通）
+        close: 閉じる制御のスケジュール（全シャッター共通）
+        override: シャッター別のスケジュール（省略可）
 
     """
 
     open: ScheduleEntry
     close: ScheduleEntry
+    override: NotRequired[list[ScheduleOverride]]
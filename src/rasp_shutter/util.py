@@ -4,13 +4,12 @@ rasp-shutter アプリケーション用のユーティリティ関数
 """
 
 import functools
-import math
 import os
 import pathlib
 from collections.abc import Callable
 from typing import TypeVar
 
-import my_lib.footprint
+import rasp_shutter.clock
 
 F = TypeVar("F", bound=Callable)
 
@@ -61,18 +60,37 @@ def footprint_elapsed(path: pathlib.Path) -> float:
     どちらのバージョンでも「無限大に古い」というセマンティクスで扱えるよう、
     フットプリントの経過時間はこのヘルパー経由で参照する。
 
+    NOTE: 制御ロジックの footprint は、仮想の時刻でも動くよう rasp_shutter.clock の時計を経由する
+    （footprint_update / footprint_clear / footprint_exists / footprint_compare も同様）。
+
     Returns
     -------
         float: 経過秒数。ファイルが存在しない・破損している場合は math.inf
 
     """
-    if not my_lib.footprint.exists(path):
-        return math.inf
+    return rasp_shutter.clock.get().footprint_elapsed(path)
+
+
+def footprint_update(path: pathlib.Path) -> None:
+    rasp_shutter.clock.get().footprint_update(path)
+
+
+def footprint_clear(path: pathlib.Path) -> None:
+    rasp_shutter.clock.get().footprint_clear(path)
+
+
+def footprint_exists(path: pathlib.Path) -> bool:
+    return rasp_shutter.clock.get().footprint_exists(path)
+
+
+def footprint_compare(path_a: pathlib.Path, path_b: pathlib.Path) -> bool:
+    """path_a の方が新しければ True"""
+    return rasp_shutter.clock.get().footprint_compare(path_a, path_b)
+
 
-    elapsed = my_lib.footprint.elapsed(path)
-    if elapsed is None:  # 新バージョンの my_lib は欠如・破損時に None を返す
-        return math.inf
-    return elapsed
+def footprint_stamp(path: pathlib.Path) -> float | None:
+    """フットプリントの更新を検出するための値（欠如時は None）"""
+    return rasp_shutter.clock.get().footprint_stamp(path)
 
 
 def is_pytest_running() -> bool:
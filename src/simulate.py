@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+記録済みのセンサーサンプルで制御判定を再生し、閾値の候補を比較します
+
+Usage:
+  simulate.py [-c CONFIG] [-n DAYS] [-j JOBS] [-D]
+
+Options:
+  -c CONFIG         : CONFIG を設定ファイルとして読み込んで実行します。[default: config.yaml]
+  -n DAYS           : 直近 DAYS 日分のセンサーサンプルを使います。[default: 30]
+  -j JOBS           : 並列に実行するプロセス数を指定します（省略時は CPU 数）。
+  -D                : デバッグモードで動作します。
+"""
+
+import logging
+import pathlib
+import time
+
+import docopt
+import my_lib.logger
+
+import rasp_shutter.config
+import rasp_shutter.control.schedule_storage
+import rasp_shutter.control.scheduler
+import rasp_shutter.metrics.collector
+import rasp_shutter.metrics.simulator
+
+SCHEMA_CONFIG = "config.schema"
+
+# 現在の閾値に対して試す倍率
+SCALE_FACTORS = (0.7, 0.85, 1.0, 1.15, 1.3)
+
+
+def _candidates(schedule_data: dict) -> list[dict[str, dict[str, int]]]:
+    axes = {
+        f"{state}_{field}": sorted({int(schedule_data[state][field] * scale) for scale in SCALE_FACTORS})
+        for state in ("open", "close")
+        for field in ("lux", "solar_rad")
+    }
+    return rasp_shutter.metrics.simulator.threshold_grid(**axes)
+
+
+def main(config: rasp_shutter.config.AppConfig, days: int, max_workers: int | None) -> None:
+    document = rasp_shutter.control.schedule_storage.load(
+        config.webapp.data.schedule_file_path, rasp_shutter.control.scheduler.schedule_validate
+    )
+    schedule_data = (
+        rasp_shutter.control.scheduler.gen_schedule_default()
+        if document is None
+        else document.current.schedule
+    )
+    collector = rasp_shutter.metrics.collector.get_collector(config.metrics.data)
+    sensor_samples = collector.get_recent_sensor_samples(days)
+    candidates = _candidates(schedule_data)
+
+    logging.info("Simulate %d candidates with %d samples", len(candidates), len(sensor_samples))
+    start = time.perf_counter()
+    result_list = rasp_shutter.metrics.simulator.sweep(
+        sensor_samples,
+        schedule_data,
+        candidates,
+        max_workers=max_workers,
+        brightness_filter=config.brightness_filter,
+    )
+    logging.info("Finished in %.1f sec", time.perf_counter() - start)
+
+    # NOTE: 見合わせ・自動制御が少ないほど、判定が安定している
+    result_list.sort(
+        key=lambda result: (result["postpone_total"], result["auto_open"] + result["auto_close"])
+    )
+    for result in result_list[:20]:
+        logging.info(result)
+
+
+if __name__ == "__main__":
+    assert __doc__ is not None  # noqa: S101
+    args = docopt.docopt(__doc__)
+
+    my_lib.logger.init("hems.rasp-shutter", level=logging.DEBUG if args["-D"] else logging.INFO)
+
+    config = rasp_shutter.config.load(args["-c"], pathlib.Path(SCHEMA_CONFIG))
+    main(config, int(args["-n"]), int(args["-j"]) if args["-j"] is not None else None)
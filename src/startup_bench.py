@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+起動時間を計測します（モジュールごとのインポート時間と、シャッター制御 API が応答するまでの時間）
+
+Usage:
+  startup_bench.py [-c CONFIG] [-p PORT] [-n COUNT] [-t TIMEOUT] [-D]
+
+Options:
+  -c CONFIG         : CONFIG を設定ファイルとして読み込んで実行します。[default: config.yaml]
+  -p PORT           : 計測用に起動する WEB サーバのポートを指定します。[default: 5099]
+  -n COUNT          : インポート時間の上位 COUNT 件を表示します。[default: 20]
+  -t TIMEOUT        : API が応答するまで待つ最大時間（秒）です。[default: 120]
+  -D                : デバッグモードで動作します。
+"""
+
+import logging
+import os
+import pathlib
+import re
+import subprocess
+import sys
+import time
+
+import docopt
+import my_lib.logger
+import requests
+
+import rasp_shutter.config
+
+# create_app() がインポートするモジュール
+APP_MODULES = (
+    "app",
+    "rasp_shutter.backup",
+    "rasp_shutter.control.webapi.control",
+    "rasp_shutter.control.webapi.healthz",
+    "rasp_shutter.control.webapi.log",
+    "rasp_shutter.control.webapi.schedule",
+    "rasp_shutter.control.webapi.sensor",
+    "rasp_shutter.metrics.collector",
+    "rasp_shutter.metrics.dashboard",
+    "rasp_shutter.metrics.webapi.page",
+)
+
+SRC_DIR = pathlib.Path(__file__).parent
+
+# python -X importtime の出力行（self [us] | cumulative [us] | モジュール名）
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)$")
+
+
+def measure_import_time() -> list[tuple[str, int, int]]:
+    """APP_MODULES のインポート時間を計測し、(モジュール名, self [us], cumulative [us]) を返す"""
+    proc = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(APP_MODULES)}"],
+        cwd=SRC_DIR,
+        env={**os.environ, "DUMMY_MODE": "true"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match is not None:
+            result.append((match.group(3), int(match.group(1)), int(match.group(2))))
+    return result
+
+
+def measure_time_to_ready(config_file: str, port: int, timeout_sec: float) -> float | None:
+    """ダミーモードでサーバを起動し、/api/shutter_ctrl が成功を返すまでの秒数を返す"""
+    url = f"http://localhost:{port}{rasp_shutter.config.URL_PREFIX}/api/shutter_ctrl"
+    start = time.perf_counter()
+    proc = subprocess.Popen(  # noqa: S603
+        [sys.executable, "app.py", "-c", str(pathlib.Path(config_file).resolve()), "-p", str(port), "-d"],
+        cwd=SRC_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout_sec:
+            try:
+                response = requests.get(url, timeout=1)
+                if response.status_code == 200 and response.json().get("result") == "success":
+                    return time.perf_counter() - start
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(0.05)
+        return None
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main(config_file: str, port: int, count: int, timeout_sec: float) -> None:
+    import_list = measure_import_time()
+    total_us = sum(self_us for _, self_us, _ in import_list)
+    logging.info("Import time: %.0f ms (%d modules)", total_us / 1000, len(import_list))
+    for name, self_us, cumulative_us in sorted(import_list, key=lambda item: item[2], reverse=True)[:count]:
+        logging.info("  %8.1f ms (self %7.1f ms)  %s", cumulative_us / 1000, self_us / 1000, name)
+
+    elapsed = measure_time_to_ready(config_file, port, timeout_sec)
+    if elapsed is None:
+        logging.error("/api/shutter_ctrl did not respond within %.0f sec", timeout_sec)
+        sys.exit(1)
+    logging.info("Time to first successful /api/shutter_ctrl: %.2f sec", elapsed)
+
+
+if __name__ == "__main__":
+    assert __doc__ is not None  # noqa: S101
+    args = docopt.docopt(__doc__)
+
+    my_lib.logger.init("hems.rasp-shutter", level=logging.DEBUG if args["-D"] else logging.INFO)
+
+    main(args["-c"], int(args["-p"]), int(args["-n"]), float(args["-t"]))
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+gunicorn などのマルチプロセス WSGI サーバ用のエントリポイントです
+
+    RASP_SHUTTER_CONFIG=config.yaml gunicorn -w 4 -b 0.0.0.0:5000 wsgi:application
+
+各ワーカープロセスが Web リクエストを処理し、スケジューラはリーダーに選出された
+1 プロセスだけが動かします（rasp_shutter.control.leader）。
+
+NOTE: --preload は使わないこと。マスタープロセスで起動したスレッドは fork 後のワーカーに引き継がれない。
+"""
+
+import logging
+import os
+import pathlib
+
+import my_lib.logger
+
+import app
+import rasp_shutter.config
+
+my_lib.logger.init("hems.rasp-shutter", level=logging.INFO)
+
+application = app.create_app(
+    rasp_shutter.config.load(
+        os.environ.get("RASP_SHUTTER_CONFIG", "config.yaml"), pathlib.Path(app.SCHEMA_CONFIG)
+    ),
+    multi_process=True,
+)
@@ -226,12 +226,12 @@ def config():
 
 
 @pytest.fixture(autouse=True)
-def _clear(app, config):  # app is dependency only, not used directly
+def _clear(app, config):
     """各テスト前に状態をクリア
 
     NOTE: app fixtureに依存することで、ワーカー固有のパス設定が
     この fixture より先に実行されることを保証する。
-    app 引数は直接使用しないが、fixture実行順序の制御に必要。
+    app 引数は fixture 実行順序の制御と、ワーカー固有のパスの取得に使う。
     """
     import my_lib.footprint
     import my_lib.notify.slack
@@ -245,6 +245,8 @@ def _clear(app, config):  # app is dependency only, not used directly
     # set_environment()後にインポートする必要があるモジュール
     import rasp_shutter.control.config
     import rasp_shutter.control.scheduler
+    import rasp_shutter.control.webapi.control
+    import rasp_shutter.control.webapi.sensor
     import rasp_shutter.metrics.collector
 
     my_lib.footprint.clear(config.liveness.file.scheduler)
@@ -254,14 +256,17 @@ def _clear(app, config):  # app is dependency only, not used directly
     # 各テスト前にクリアして前のテストのスケジュールが影響しないようにする
     rasp_shutter.control.scheduler.clear_scheduler_jobs()
     rasp_shutter.control.scheduler.reset_sensor_sample_state()
+    rasp_shutter.control.webapi.sensor.reset_sensor_broadcast_state()
     rasp_shutter.control.scheduler.reset_auto_control_failure_state()
+    rasp_shutter.control.webapi.control.reset_device_failures()
 
     # Clear schedule file to ensure clean state for each test
-    # NOTE: my_lib.serializer は get_path() でワーカーサフィックスを付与して読み書きするため、
+    # NOTE: スケジュールは get_path() でワーカーサフィックスを付与して読み書きするため、
     # 実際に読み書きされるファイルを削除する
     schedule_path = rasp_shutter.config.get_environment().schedule_file_path
     if schedule_path is not None:
         my_lib.pytest_util.get_path(schedule_path).unlink(missing_ok=True)
+    rasp_shutter.control.scheduler.reset_current_schedule()
 
     my_lib.notify.slack._interval_clear()
     my_lib.notify.slack._hist_clear()
@@ -270,7 +275,6 @@ def _clear(app, config):  # app is dependency only, not used directly
     import rasp_shutter.control.webapi.control
 
     rasp_shutter.control.webapi.control.clean_stat_exec(config)
-    rasp_shutter.control.config.STAT_AUTO_CLOSE.unlink(missing_ok=True)
     rasp_shutter.control.config.STAT_PENDING_OPEN.unlink(missing_ok=True)
 
     # Clear control log (worker-specific)
@@ -279,6 +283,14 @@ def _clear(app, config):  # app is dependency only, not used directly
     # Reset metrics collector singleton to prevent database connection leaks
     rasp_shutter.metrics.collector.reset_collector()
 
+    # NOTE: 書き出したダッシュボードのファイルがあると、/api/metrics/data はそれを返す
+    import rasp_shutter.metrics.dashboard
+
+    # （メトリクスの DB はワーカー固有のパスになっているので、app の設定から取る）
+    metrics_data_path = app.config["CONFIG"].metrics.data
+    rasp_shutter.metrics.dashboard.snapshot_path(metrics_data_path).unlink(missing_ok=True)
+    rasp_shutter.metrics.dashboard.snapshot_gzip_path(metrics_data_path).unlink(missing_ok=True)
+
     # Clear webapp logs to reduce database connection warnings
     import my_lib.webapp.log
 
@@ -300,7 +312,7 @@ def app(config):
     # データファイルパスをワーカー固有に変更（並列実行時の競合を回避）
     # NOTE: my_lib.pytest_util.get_path() は PYTEST_XDIST_WORKER が設定されている場合のみ
     # サフィックスを付与し、通常実行時はそのままのパスを返す。
-    # my_lib.serializer（スケジュール）と my_lib.webapp.log（ログ）は内部で get_path() を
+    # スケジュール（scheduler._get_schedule_path）と my_lib.webapp.log（ログ）は内部で get_path() を
     # 適用するため、ここでさらに適用すると二重サフィックス（例: schedule.dat.gw0.gw0）になり、
     # クリーンアップやテストからの直接ファイルアクセスが実ファイルとずれる。
     # そのため、スケジュール・ログのパスは素のまま渡し、get_path() を適用しない
@@ -323,6 +335,7 @@ def app(config):
 
     # create_app() 後にインポートする必要があるモジュール
     import rasp_shutter.control.webapi.schedule
+    import rasp_shutter.notify
 
     with unittest.mock.patch.dict("os.environ", {"WERKZEUG_RUN_MAIN": "true"}):
         # NOTE: serializer が実際に読み書きするワーカー固有ファイルを削除する
@@ -334,6 +347,7 @@ def app(config):
             yield app
 
         # Cleanup
+        rasp_shutter.notify.stop()
         my_lib.webapp.log.term()
         rasp_shutter.control.webapi.schedule.term()
 
@@ -342,11 +356,15 @@ def app(config):
 def client(app):
     """テストクライアントを作成"""
     import rasp_shutter.config
+    import rasp_shutter.notify
 
     test_client = app.test_client()
 
     time.sleep(0.1)
 
+    # NOTE: 前のテストのログがクリアの後に書き込まれないよう、キューに残っている分を書き込んでおく
+    rasp_shutter.notify.flush()
+
     # Clear logs
     response = test_client.get(f"{rasp_shutter.config.URL_PREFIX}/api/log_clear")
     assert response.status_code == 200
@@ -398,3 +416,20 @@ def mock_sensor_data(sensor_data_mock):
 
     # テスト終了時にデフォルト値に戻す
     sensor_data_mock.return_value = original_return_value
+
+
+@pytest.fixture
+def step_scheduler(app, client):
+    """仮想の時計（深夜 3 時から）で制御を進める StepScheduler
+
+    現在のスケジュールに従い、API で更新したスケジュールは次に進めるときに反映する。
+    NOTE: 仮想の時計の間、スケジューラスレッドはスケジュールの受け取りだけを行い、制御は実行しない。
+    client に依存することで、ログのクリアが仮想の時計に切り替える前に終わることを保証する。
+    """
+    import rasp_shutter.clock
+    import rasp_shutter.control.scheduler
+    from tests.helpers.time_utils import get_midnight_time
+
+    clock = rasp_shutter.clock.VirtualClock(get_midnight_time())
+    with rasp_shutter.clock.use(clock):
+        yield rasp_shutter.control.scheduler.StepScheduler(app.config["CONFIG"], clock)
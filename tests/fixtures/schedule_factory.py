@@ -9,6 +9,8 @@ from typing import Any, ClassVar
 
 import my_lib.time
 
+import rasp_shutter.clock
+
 
 class _Defaults:
     """デフォルト値を保持する内部クラス"""
@@ -203,6 +205,22 @@ class ScheduleFactory:
         wday = [True, False, False, False, False, False, True]
         return cls.create(wday=wday)
 
+    @classmethod
+    def with_override(cls, target: list[int], **kwargs: Any) -> dict[str, Any]:
+        """シャッター別スケジュール (override) を 1 つ持つスケジュールを生成
+
+        Args:
+            target: override の対象シャッターのインデックス
+            **kwargs: override 側のエントリに渡す create() の引数
+
+        Returns:
+            override を含むスケジュールデータ
+        """
+        schedule_data = cls.create()
+        override = cls.create(**kwargs)
+        schedule_data["override"] = [{"target": target, "open": override["open"], "close": override["close"]}]
+        return schedule_data
+
     @classmethod
     def no_weekday(cls) -> dict[str, Any]:
         """曜日が全て無効なスケジュールを生成
@@ -215,12 +233,12 @@ class ScheduleFactory:
 
 def time_morning(offset_min: int = 0) -> datetime.datetime:
     """朝の時刻（7:00 + オフセット分）を返す"""
-    return my_lib.time.now().replace(hour=7, minute=0 + offset_min, second=0, microsecond=0)
+    return rasp_shutter.clock.now().replace(hour=7, minute=0 + offset_min, second=0, microsecond=0)
 
 
 def time_evening(offset_min: int = 0) -> datetime.datetime:
     """夕方の時刻（17:00 + オフセット分）を返す"""
-    return my_lib.time.now().replace(hour=17, minute=0 + offset_min, second=0, microsecond=0)
+    return rasp_shutter.clock.now().replace(hour=17, minute=0 + offset_min, second=0, microsecond=0)
 
 
 def time_str(target_time: datetime.datetime) -> str:
@@ -6,6 +6,7 @@
 """
 
 import json
+import time
 from typing import TYPE_CHECKING, Any
 
 import rasp_shutter.config
@@ -53,16 +54,78 @@ class ShutterAPI:
         """
         return self._control("close", index, expect_result)
 
-    def get_state(self) -> dict[str, Any]:
+    def get_state(self, since: int | None = None) -> dict[str, Any]:
         """シャッターの状態を取得
 
+        Args:
+            since: 指定した場合、このバージョン以降の差分を取得
+
         Returns:
             APIレスポンスのJSON
         """
-        response = self.client.get(f"{self.url_prefix}/api/shutter_ctrl")
+        query: dict[str, Any] = {} if since is None else {"since": since}
+        response = self.client.get(f"{self.url_prefix}/api/shutter_ctrl", query_string=query)
         assert response.status_code == 200
         return _get_json(response)
 
+    def control_async(self, state: str, index: int | None = None) -> str:
+        """シャッター制御を非同期ジョブとして登録
+
+        Args:
+            state: "open" または "close"
+            index: シャッターのインデックス（Noneの場合は全シャッター）
+
+        Returns:
+            ジョブ ID
+        """
+        query: dict[str, Any] = {"cmd": 1, "state": state, "mode": "async"}
+        if index is not None:
+            query["index"] = index
+
+        response = self.client.post(f"{self.url_prefix}/api/shutter_ctrl", query_string=query)
+        assert response.status_code == 202
+        result = _get_json(response)
+        assert result["result"] == "accepted"
+        return result["job_id"]
+
+    def wait_job(self, job_id: str, timeout_sec: float = 10.0) -> dict[str, Any]:
+        """非同期ジョブの完了を待って内容を返す
+
+        Args:
+            job_id: ジョブ ID
+            timeout_sec: タイムアウト秒数
+
+        Returns:
+            ジョブの内容
+        """
+        start_time = time.perf_counter()
+        while True:
+            response = self.client.get(f"{self.url_prefix}/api/jobs/{job_id}")
+            assert response.status_code == 200
+            job = _get_json(response)
+            if job["status"] in ("success", "error"):
+                return job
+            assert time.perf_counter() - start_time < timeout_sec, f"Job {job_id} did not finish"
+            time.sleep(0.05)
+
+    def bulk(self, operations: list[dict[str, Any]], expect_result: str = "success") -> dict[str, Any]:
+        """シャッター・状態の組を一括で制御
+
+        Args:
+            operations: {"index": ..., "state": ...} のリスト
+            expect_result: 期待する result の値
+
+        Returns:
+            APIレスポンスのJSON
+        """
+        response = self.client.post(
+            f"{self.url_prefix}/api/shutter_ctrl/bulk", json={"operations": operations}
+        )
+        assert response.status_code == 200
+        result = _get_json(response)
+        assert result["result"] == expect_result
+        return result
+
     def get_list(self) -> dict[str, Any]:
         """シャッターリストを取得
 
@@ -101,6 +164,46 @@ class ShutterAPI:
         return result
 
 
+class SceneAPI:
+    """シーン（一括制御）APIヘルパー"""
+
+    def __init__(self, client: "FlaskClient"):
+        self.client = client
+        self.url_prefix = rasp_shutter.config.URL_PREFIX
+
+    def run(self, scene: str, expect_result: str = "success") -> dict[str, Any]:
+        """シーンを実行
+
+        Args:
+            scene: シーン名
+            expect_result: 期待する result の値
+
+        Returns:
+            APIレスポンスのJSON
+        """
+        return self._control({"scene": scene}, expect_result)
+
+    def run_group(self, group: str, state: str, expect_result: str = "success") -> dict[str, Any]:
+        """グループ内の全シャッターを同じ状態に制御
+
+        Args:
+            group: グループ名
+            state: "open" または "close"
+            expect_result: 期待する result の値
+
+        Returns:
+            APIレスポンスのJSON
+        """
+        return self._control({"group": group, "state": state}, expect_result)
+
+    def _control(self, query: dict[str, Any], expect_result: str) -> dict[str, Any]:
+        response = self.client.post(f"{self.url_prefix}/api/scene_ctrl", query_string=query)
+        assert response.status_code == 200
+        result = _get_json(response)
+        assert result["result"] == expect_result
+        return result
+
+
 class ScheduleAPI:
     """スケジュール制御APIヘルパー"""
 
@@ -172,6 +275,15 @@ class LogAPI:
         result = _get_json(response)
         return result.get("data", [])
 
+    def page(self, **params: Any) -> tuple[int, dict[str, Any]]:
+        """ログを新しい順に 1 ページ取得（before_id・after_id・limit・level・q）
+
+        Returns:
+            (ステータスコード, レスポンス JSON) のタプル
+        """
+        response = self.client.get(f"{self.url_prefix}/api/log", query_string=params)
+        return response.status_code, _get_json(response)
+
     def clear(self) -> dict[str, Any]:
         """ログをクリア
 
@@ -268,13 +380,25 @@ class MetricsAPI:
         response = self.client.get(f"{self.url_prefix}/api/metrics")
         return response.status_code, response.data.decode("utf-8")
 
-    def get_data(self) -> tuple[int, dict[str, Any]]:
+    def get_data(self, **params: Any) -> tuple[int, dict[str, Any]]:
         """メトリクスダッシュボード用データを取得
 
+        Args:
+            **params: クエリパラメータ（from / to / shutter_index / sections）
+
+        Returns:
+            (ステータスコード, レスポンス JSON) のタプル
+        """
+        response = self.client.get(f"{self.url_prefix}/api/metrics/data", query_string=params)
+        return response.status_code, _get_json(response)
+
+    def get_migration(self) -> tuple[int, dict[str, Any]]:
+        """メトリクス DB のスキーマのバージョンとマイグレーションの進捗を取得
+
         Returns:
             (ステータスコード, レスポンス JSON) のタプル
         """
-        response = self.client.get(f"{self.url_prefix}/api/metrics/data")
+        response = self.client.get(f"{self.url_prefix}/api/metrics/migration")
         return response.status_code, _get_json(response)
 
 
@@ -26,6 +26,7 @@ class LogChecker:
     LOG_PATTERNS: ClassVar[dict[str, str]] = {
         "OPEN_MANUAL": "手動で開けました",
         "OPEN_AUTO": "自動で開けました",
+        "OPEN_SCHEDULE": "スケジューラで開けました",
         "OPEN_FAIL": "開けるのに失敗しました",
         "OPEN_PENDING": "開けるのを見合わせました",
         "OPEN_BRIGHT": "明るくなってきたので開けます",
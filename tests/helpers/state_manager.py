@@ -41,7 +41,6 @@ class StateManager:
         import rasp_shutter.control.webapi.control
 
         rasp_shutter.control.webapi.control.clean_stat_exec(self.config)
-        rasp_shutter.control.config.STAT_AUTO_CLOSE.unlink(missing_ok=True)
         rasp_shutter.control.config.STAT_PENDING_OPEN.unlink(missing_ok=True)
 
     def clear_slack_history(self) -> None:
@@ -12,6 +12,7 @@ from typing import TYPE_CHECKING, TypeVar
 
 import my_lib.time
 
+import rasp_shutter.clock
 import rasp_shutter.config
 
 if TYPE_CHECKING:
@@ -115,7 +116,7 @@ def time_morning(offset_min: int = 0) -> datetime.datetime:
     Returns:
         設定された時刻のdatetime
     """
-    return my_lib.time.now().replace(hour=7, minute=0 + offset_min, second=0, microsecond=0)
+    return rasp_shutter.clock.now().replace(hour=7, minute=0 + offset_min, second=0, microsecond=0)
 
 
 def time_evening(offset_min: int = 0) -> datetime.datetime:
@@ -127,7 +128,7 @@ def time_evening(offset_min: int = 0) -> datetime.datetime:
     Returns:
         設定された時刻のdatetime
     """
-    return my_lib.time.now().replace(hour=17, minute=0 + offset_min, second=0, microsecond=0)
+    return rasp_shutter.clock.now().replace(hour=17, minute=0 + offset_min, second=0, microsecond=0)
 
 
 def time_str(target_time: datetime.datetime) -> str:
@@ -142,6 +143,21 @@ def time_str(target_time: datetime.datetime) -> str:
     return target_time.strftime("%H:%M")
 
 
+def advance_to(step_scheduler, target_time: datetime.datetime) -> None:
+    """StepScheduler で指定時刻まで制御を進め、ログの書き込みを待つ
+
+    実際の時間を待たずに、途中のスケジュール実行・自動制御を 1 分刻みで行う。
+
+    Args:
+        step_scheduler: step_scheduler fixture の StepScheduler
+        target_time: 進める先の時刻
+    """
+    import rasp_shutter.notify
+
+    step_scheduler.advance_to(target_time)
+    rasp_shutter.notify.flush()
+
+
 def move_to(time_machine, target_time: datetime.datetime) -> None:
     """time_machineを使用して指定時刻に移動
 
@@ -5,7 +5,7 @@
 import os
 import time
 
-from tests.helpers.api_utils import CtrlLogAPI, ShutterAPI
+from tests.helpers.api_utils import CtrlLogAPI, LogAPI, SceneAPI, ShutterAPI
 from tests.helpers.assertions import CtrlLogChecker, LogChecker, SlackChecker
 from tests.helpers.time_utils import setup_midnight_time
 
@@ -372,3 +372,262 @@ class TestShutterStateInconsistent:
         ctrl_checker.wait_and_check([])
         log_checker.wait_and_check(["CLEAR"])
         slack_checker.check_no_error()
+
+
+class TestShutterControlAsync:
+    """非同期制御ジョブテスト
+
+    NOTE: time_machineで深夜に設定し、センサーベースの自動制御が発動しないようにする。
+    """
+
+    def test_shutter_ctrl_async(self, client, time_machine):
+        """非同期モードでは 202 とジョブ ID が返り、ジョブで進捗と結果を取得できる"""
+        setup_midnight_time(client, time_machine)
+
+        shutter_api = ShutterAPI(client)
+        ctrl_checker = CtrlLogChecker(client)
+        log_checker = LogChecker(client)
+        slack_checker = SlackChecker()
+
+        job_id = shutter_api.control_async("open")
+        job = shutter_api.wait_job(job_id)
+
+        assert job["status"] == "success"
+        assert [(entry["index"], entry["result"]) for entry in job["progress"]] == [
+            (0, "success"),
+            (1, "success"),
+        ]
+        assert job["response"]["result"] == "success"
+        assert len(job["response"]["state"]) == 2
+
+        ctrl_checker.wait_and_check([{"index": 0, "state": "open"}, {"index": 1, "state": "open"}])
+        log_checker.wait_and_check(["CLEAR", "OPEN_MANUAL", "OPEN_MANUAL"])
+        slack_checker.check_no_error()
+
+    def test_job_unknown(self, client):
+        """存在しないジョブは 404"""
+        import rasp_shutter.config
+
+        response = client.get(f"{rasp_shutter.config.URL_PREFIX}/api/jobs/unknown")
+
+        assert response.status_code == 404
+
+
+class TestShutterStateVersion:
+    """シャッター状態のバージョンと差分取得テスト
+
+    NOTE: time_machineで深夜に設定し、センサーベースの自動制御が発動しないようにする。
+    """
+
+    def test_shutter_ctrl_since(self, client, time_machine):
+        """制御で状態が変わるとバージョンが進み、since で変化したシャッターだけ取得できる"""
+        setup_midnight_time(client, time_machine)
+
+        import rasp_shutter.control.webapi.control
+
+        shutter_api = ShutterAPI(client)
+
+        version = shutter_api.get_state()["version"]
+
+        shutter_api.open(index=1)
+        result = shutter_api.get_state(since=version)
+
+        assert result["version"] > version
+        assert result["full"] is False
+        assert [(entry["index"], entry["state"]) for entry in result["changed"]] == [
+            (1, rasp_shutter.control.webapi.control.SHUTTER_STATE.OPEN)
+        ]
+
+        # 最新バージョンからの差分は空
+        result = shutter_api.get_state(since=result["version"])
+        assert result["changed"] == []
+
+    def test_shutter_ctrl_since_unknown_version(self, client, time_machine, config):
+        """差分を求められないバージョンを指定すると全体が返る"""
+        setup_midnight_time(client, time_machine)
+
+        shutter_api = ShutterAPI(client)
+
+        version = shutter_api.get_state()["version"]
+        result = shutter_api.get_state(since=version + 100)
+
+        assert result["full"] is True
+        assert [entry["index"] for entry in result["changed"]] == list(range(len(config.shutter)))
+
+    def test_footprint_updated_elsewhere(self, client, time_machine, config):
+        """他のプロセスなどが footprint を更新した場合も、突き合わせ後は差分として取得できる"""
+        setup_midnight_time(client, time_machine)
+
+        import rasp_shutter.control.webapi.control
+        import rasp_shutter.util
+
+        shutter_api = ShutterAPI(client)
+
+        version = shutter_api.get_state()["version"]
+
+        rasp_shutter.util.footprint_update(rasp_shutter.control.webapi.control.exec_stat_file("close", 0))
+        # NOTE: スケジューラのループの突き合わせを待たずに実行する
+        rasp_shutter.control.webapi.control.reconcile_shutter_state(config)
+        result = shutter_api.get_state(since=version)
+
+        assert result["version"] > version
+        assert [(entry["index"], entry["state"]) for entry in result["changed"]] == [
+            (0, rasp_shutter.control.webapi.control.SHUTTER_STATE.CLOSE)
+        ]
+
+
+class TestSceneControl:
+    """シーン（一括制御）テスト
+
+    NOTE: time_machineで深夜に設定し、センサーベースの自動制御が発動しないようにする。
+    NOTE: デバイスへのリクエストは並列に発行されるため、制御ログの順序は検証しない。
+    """
+
+    def test_scene_ctrl(self, client, time_machine):
+        """シーンを実行するとシャッターごとの結果が返る"""
+        setup_midnight_time(client, time_machine)
+
+        scene_api = SceneAPI(client)
+        ctrl_checker = CtrlLogChecker(client)
+        slack_checker = SlackChecker()
+
+        result = scene_api.run("おやすみ")
+
+        assert [(entry["index"], entry["state"], entry["result"]) for entry in result["detail"]] == [
+            (0, "close", "success"),
+            (1, "close", "success"),
+        ]
+        assert sorted(ctrl_checker.get_logs(), key=lambda log: log["index"]) == [
+            {"index": 0, "state": "close"},
+            {"index": 1, "state": "close"},
+        ]
+
+        # NOTE: 直後の再実行は制御間隔により見合わせになる
+        result = scene_api.run("おやすみ")
+        assert [entry["result"] for entry in result["detail"]] == ["postponed", "postponed"]
+
+        slack_checker.check_no_error()
+
+    def test_group_ctrl(self, client, time_machine):
+        """グループと状態を指定して一括制御できる"""
+        setup_midnight_time(client, time_machine)
+
+        scene_api = SceneAPI(client)
+        log_checker = LogChecker(client)
+
+        result = scene_api.run_group("リビング", "open")
+
+        assert result["name"] == "リビング"
+        assert [entry["result"] for entry in result["detail"]] == ["success", "success"]
+        log_checker.wait_and_check(["CLEAR", "OPEN_MANUAL", "OPEN_MANUAL"])
+
+    def test_scene_ctrl_invalid(self, client, time_machine):
+        """存在しないシーン・グループは 400"""
+        setup_midnight_time(client, time_machine)
+
+        import rasp_shutter.config
+
+        for query in [
+            {"scene": "存在しない"},
+            {"group": "存在しない", "state": "open"},
+            {"group": "リビング"},
+        ]:
+            response = client.post(f"{rasp_shutter.config.URL_PREFIX}/api/scene_ctrl", query_string=query)
+            assert response.status_code == 400, query
+
+    def test_bulk_ctrl(self, client, time_machine):
+        """シャッターごとに異なる状態を 1 回のリクエストで制御できる"""
+        setup_midnight_time(client, time_machine)
+
+        shutter_api = ShutterAPI(client)
+        ctrl_checker = CtrlLogChecker(client)
+        slack_checker = SlackChecker()
+
+        result = shutter_api.bulk([{"index": 1, "state": "close"}, {"index": 0, "state": "open"}])
+
+        assert result["cmd"] == "bulk"
+        assert [(entry["index"], entry["state"], entry["result"]) for entry in result["detail"]] == [
+            (1, "close", "success"),
+            (0, "open", "success"),
+        ]
+        assert sorted(ctrl_checker.get_logs(), key=lambda log: log["index"]) == [
+            {"index": 0, "state": "open"},
+            {"index": 1, "state": "close"},
+        ]
+        slack_checker.check_no_error()
+
+    def test_bulk_ctrl_invalid(self, client, time_machine):
+        """範囲外・重複したインデックスや空の操作は 400"""
+        setup_midnight_time(client, time_machine)
+
+        import rasp_shutter.config
+
+        for operations in [
+            [{"index": 2, "state": "open"}],
+            [{"index": 0, "state": "open"}, {"index": 0, "state": "close"}],
+            [{"index": 0, "state": "stop"}],
+            [],
+        ]:
+            response = client.post(
+                f"{rasp_shutter.config.URL_PREFIX}/api/shutter_ctrl/bulk", json={"operations": operations}
+            )
+            assert response.status_code == 400, operations
+
+    def test_scene_list(self, client):
+        """グループとシーンの一覧を取得できる"""
+        import rasp_shutter.config
+
+        response = client.get(f"{rasp_shutter.config.URL_PREFIX}/api/scene_list")
+        assert response.status_code == 200
+        result = response.json
+        assert result is not None
+        assert [group["name"] for group in result["group"]] == ["リビング"]
+        assert [scene["name"] for scene in result["scene"]] == ["おやすみ", "おはよう"]
+
+
+class TestLogAPI:
+    """実行ログ API（/api/log）のテスト"""
+
+    def test_log_page_and_delta(self, client, time_machine):
+        """ページ単位で取得でき、after_id で新しい差分だけを取得できる"""
+        setup_midnight_time(client, time_machine)
+
+        shutter_api = ShutterAPI(client)
+        log_checker = LogChecker(client)
+        log_api = LogAPI(client)
+
+        shutter_api.open(index=0)
+        log_checker.wait_and_check(["CLEAR", "OPEN_MANUAL"])
+
+        status, result = log_api.page(limit=1)
+        assert status == 200
+        assert len(result["data"]) == 1
+        assert "手動で開けました" in result["data"][0]["message"]
+        assert result["has_more"]
+        newest_id = result["data"][0]["id"]
+
+        status, result = log_api.page(before_id=newest_id)
+        assert status == 200
+        assert "クリアされました" in result["data"][0]["message"]
+        assert not result["has_more"]
+
+        shutter_api.close(index=0)
+        log_checker.wait_and_check(["CLEAR", "OPEN_MANUAL", "CLOSE_MANUAL"])
+
+        status, result = log_api.page(after_id=newest_id)
+        assert status == 200
+        assert len(result["data"]) == 1
+        assert "手動で閉めました" in result["data"][0]["message"]
+        close_id = result["data"][0]["id"]
+
+        status, result = log_api.page(q="手動で閉め")
+        assert status == 200
+        assert [entry["id"] for entry in result["data"]] == [close_id]
+
+    def test_log_invalid_query(self, client):
+        """範囲外の limit や未知のレベルは 400"""
+        log_api = LogAPI(client)
+
+        assert log_api.page(limit=0)[0] == 400
+        assert log_api.page(limit=501)[0] == 400
+        assert log_api.page(level="debug")[0] == 400
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# ruff: noqa: S101
+"""liveness チェックAPIの統合テスト"""
+
+import rasp_shutter.config
+
+
+class TestHealthz:
+    """/api/healthz のテスト"""
+
+    def test_healthz(self, client, config):
+        """スケジューラが動いていれば 200 を返す"""
+        response = client.get(f"{rasp_shutter.config.URL_PREFIX}/api/healthz")
+
+        assert response.status_code == 200
+        assert response.json is not None
+        assert response.json["result"] == "success"
+        assert response.json["scheduler_lag_sec"] is not None
+        assert [device["state"] for device in response.json["device"]] == ["ok"] * len(config.shutter)
+
+    def test_healthz_scheduler_stalled(self, client, monkeypatch):
+        """スケジューラループの最終実行が古ければ 503 を返す"""
+        import rasp_shutter.control.config
+
+        monkeypatch.setattr(rasp_shutter.control.config, "HEALTHZ_SCHEDULER_LAG_MAX_SEC", 0)
+
+        response = client.get(f"{rasp_shutter.config.URL_PREFIX}/api/healthz")
+
+        assert response.status_code == 503
+        assert response.json is not None
+        assert response.json["result"] == "error"
@@ -161,6 +161,132 @@ class TestMetricsDataAPI:
         assert config.shutter[0].name in shutter_names
 
 
+class TestMetricsDataQuery:
+    """メトリクスデータ API の絞り込みのテスト"""
+
+    def test_sections_and_shutter(self, client, time_machine):
+        """sections で指定したセクションだけを返し、shutter_index で絞り込める"""
+        setup_midnight_time(client, time_machine)
+
+        shutter_api = ShutterAPI(client)
+        shutter_api.open(index=0)
+        shutter_api.open(index=1)
+
+        metrics_api = MetricsAPI(client)
+        status_code, data = metrics_api.get_data(sections="stats,shutter_breakdown", shutter_index=1)
+
+        assert status_code == 200
+        assert list(data) == ["stats", "shutter_breakdown"]
+        assert data["stats"]["manual_open_total"] == 1
+        assert [entry["shutter_index"] for entry in data["shutter_breakdown"]] == [1]
+
+    def test_period(self, client, time_machine):
+        """期間外の操作は含まれない"""
+        setup_midnight_time(client, time_machine)
+        ShutterAPI(client).open(index=0)
+
+        metrics_api = MetricsAPI(client)
+        status_code, data = metrics_api.get_data(
+            sections="stats", **{"from": "2000-01-01", "to": "2000-01-31"}
+        )
+
+        assert status_code == 200
+        assert data["stats"]["manual_open_total"] == 0
+
+    def test_invalid_query(self, client):
+        """不正なセクション・期間は 400"""
+        metrics_api = MetricsAPI(client)
+
+        status_code, _ = metrics_api.get_data(sections="unknown")
+        assert status_code == 400
+
+        status_code, _ = metrics_api.get_data(**{"from": "2026-02-01", "to": "2026-01-01"})
+        assert status_code == 400
+
+
+class TestMetricsMigrationAPI:
+    """マイグレーションの進捗 API のテスト"""
+
+    def test_migration_status(self, client, time_machine):
+        """GET /api/metrics/migration がスキーマのバージョンと進捗を返す"""
+        import rasp_shutter.metrics.migration
+
+        setup_midnight_time(client, time_machine)
+        ShutterAPI(client).open(index=0)
+
+        status_code, data = MetricsAPI(client).get_migration()
+
+        assert status_code == 200
+        assert data["version"] == rasp_shutter.metrics.migration.LATEST_VERSION
+        assert data["latest_version"] == rasp_shutter.metrics.migration.LATEST_VERSION
+        assert data["in_progress"] is False
+        assert all(step["progress"] == 1.0 for step in data["steps"])
+
+
+class TestMetricsExport:
+    """メトリクスのエクスポート API のテスト"""
+
+    def test_export_csv(self, client, time_machine):
+        """テーブルを CSV で返す"""
+        import rasp_shutter.config
+
+        setup_midnight_time(client, time_machine)
+        ShutterAPI(client).open(index=0)
+
+        response = client.get(
+            f"{rasp_shutter.config.URL_PREFIX}/api/metrics/export",
+            query_string={"table": "operation_metrics", "format": "csv"},
+        )
+
+        assert response.status_code == 200
+        assert response.mimetype == "text/csv"
+        assert 'filename="operation_metrics.csv"' in response.headers["Content-Disposition"]
+        lines = response.data.decode("utf-8-sig").splitlines()
+        assert lines[0].startswith("id,timestamp,date,action")
+        assert len(lines) == 2
+
+    def test_export_invalid_table(self, client):
+        """不正なテーブルは 400"""
+        import rasp_shutter.config
+
+        response = client.get(
+            f"{rasp_shutter.config.URL_PREFIX}/api/metrics/export", query_string={"table": "sqlite_master"}
+        )
+
+        assert response.status_code == 400
+
+
+class TestMetricsDataSnapshot:
+    """書き出したダッシュボードデータの配信テスト"""
+
+    def test_snapshot_served(self, client, app, time_machine):
+        """書き出したファイルがあればそれを返し、gzip を受け付ければ圧縮版を返す"""
+        import gzip
+        import json
+
+        import rasp_shutter.config
+        import rasp_shutter.metrics.dashboard
+
+        setup_midnight_time(client, time_machine)
+        ShutterAPI(client).open(index=0)
+
+        metrics_data_path = app.config["CONFIG"].metrics.data
+        rasp_shutter.metrics.dashboard.materialize(metrics_data_path, None)
+        expected = json.loads(rasp_shutter.metrics.dashboard.snapshot_path(metrics_data_path).read_bytes())
+        url = f"{rasp_shutter.config.URL_PREFIX}/api/metrics/data"
+
+        response = client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert json.loads(gzip.decompress(response.data)) == expected
+
+        response = client.get(url, headers={"Accept-Encoding": "identity"})
+        assert response.status_code == 200
+        assert "Content-Encoding" not in response.headers
+        assert response.json == expected
+
+
 class TestMetricsStaticFiles:
     """メトリクス静的ファイル配信のテスト"""
 
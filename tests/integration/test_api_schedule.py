@@ -2,7 +2,10 @@
 # ruff: noqa: S101
 """スケジュールAPIの統合テスト"""
 
+import pickle
+
 import my_lib.pytest_util
+import pytest
 
 import rasp_shutter.config
 from tests.fixtures.schedule_factory import ScheduleFactory
@@ -24,12 +27,15 @@ class TestScheduleRead:
         assert "open" in result
         assert "close" in result
 
-    def test_schedule_ctrl_read_fail_missing_key(self, client, mocker):
+    def test_schedule_ctrl_read_fail_missing_key(self, client):
         """キーが欠けているスケジュールの読み取り"""
         schedule_data = ScheduleFactory.create()
         del schedule_data["open"]
 
-        mocker.patch("pickle.load", return_value=schedule_data)
+        # NOTE: 旧形式（pickle）のファイルとして書き込む
+        schedule_path = rasp_shutter.config.get_environment().schedule_file_path
+        assert schedule_path is not None
+        my_lib.pytest_util.get_path(schedule_path).write_bytes(pickle.dumps(schedule_data))
 
         schedule_api = ScheduleAPI(client)
         result = schedule_api.get()
@@ -41,7 +47,7 @@ class TestScheduleRead:
         """破損したスケジュールファイルの読み取り"""
         schedule_path = rasp_shutter.config.get_environment().schedule_file_path
         if schedule_path is not None:
-            # NOTE: my_lib.serializer は get_path() でワーカーサフィックスを付与して
+            # NOTE: スケジュールは get_path() でワーカーサフィックスを付与して
             # 読み書きするため、実際に読まれるファイルに破損データを書き込む
             with my_lib.pytest_util.get_path(schedule_path).open(mode="wb") as f:
                 f.write(b"TEST")
@@ -53,6 +59,121 @@ class TestScheduleRead:
             assert len(result) == 2
 
 
+class TestScheduleConditionalRead:
+    """スケジュールの条件付き取得テスト"""
+
+    def test_schedule_ctrl_etag(self, client):
+        """ETag が一致すれば 304 を返す"""
+        url = f"{rasp_shutter.config.URL_PREFIX}/api/schedule_ctrl"
+
+        response = client.get(url)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+
+    @pytest.mark.parametrize(
+        ("if_none_match", "status_code"),
+        [
+            ('"other", {etag}', 304),
+            ("W/{etag}", 304),
+            ("*", 304),
+            ('"other"', 200),
+            ('"{prefix}"', 200),
+        ],
+    )
+    def test_schedule_ctrl_etag_list(self, client, if_none_match, status_code):
+        """If-None-Match をエンティティタグのリストとして照合する"""
+        url = f"{rasp_shutter.config.URL_PREFIX}/api/schedule_ctrl"
+
+        etag = client.get(url).headers["ETag"]
+        header = if_none_match.format(etag=etag, prefix=etag.strip('"')[:8])
+
+        response = client.get(url, headers={"If-None-Match": header})
+        assert response.status_code == status_code
+
+    def test_schedule_ctrl_etag_after_update(self, client):
+        """更新するとバージョンと ETag が変わる"""
+        url = f"{rasp_shutter.config.URL_PREFIX}/api/schedule_ctrl"
+        schedule_api = ScheduleAPI(client)
+
+        response = client.get(url)
+        etag = response.headers["ETag"]
+        version = int(response.headers["X-Schedule-Version"])
+
+        schedule_data = ScheduleFactory.create(open_time="08:30", close_time="18:30")
+        schedule_api.update(schedule_data)
+
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert int(response.headers["X-Schedule-Version"]) == version + 1
+        assert response.json is not None
+        assert response.json["open"]["time"] == "08:30"
+
+
+class TestScheduleRollback:
+    """スケジュールのロールバックテスト"""
+
+    def test_schedule_rollback(self, client):
+        """以前の版に戻せる"""
+        url_prefix = rasp_shutter.config.URL_PREFIX
+        schedule_api = ScheduleAPI(client)
+
+        schedule_api.update(ScheduleFactory.create(open_time="08:30"))
+        schedule_api.update(ScheduleFactory.create(open_time="09:30"))
+
+        response = client.get(f"{url_prefix}/api/schedule_history")
+        assert response.json is not None
+        assert response.json["version"] == 2
+        assert [revision["version"] for revision in response.json["history"]] == [1]
+
+        response = client.post(
+            f"{url_prefix}/api/schedule_ctrl", query_string={"cmd": "rollback", "version": 1}
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        assert response.json["open"]["time"] == "08:30"
+        assert response.headers["X-Schedule-Version"] == "3"
+
+        # NOTE: ロールバックも新しい版として保存される
+        response = client.get(f"{url_prefix}/api/schedule_history")
+        assert response.json is not None
+        assert [revision["version"] for revision in response.json["history"]] == [2, 1]
+
+    def test_schedule_rollback_unknown_version(self, client):
+        """存在しない版を指定するとエラー"""
+        response = client.post(
+            f"{rasp_shutter.config.URL_PREFIX}/api/schedule_ctrl",
+            query_string={"cmd": "rollback", "version": 99},
+        )
+        assert response.status_code == 404
+
+    def test_schedule_rollback_invalid(self, client, mocker):
+        """不正な版には戻さずエラー"""
+        import rasp_shutter.control.schedule_storage
+
+        url_prefix = rasp_shutter.config.URL_PREFIX
+        schedule_api = ScheduleAPI(client)
+
+        schedule_api.update(ScheduleFactory.create(open_time="08:30"))
+        current = schedule_api.get()
+
+        revision = rasp_shutter.control.schedule_storage.ScheduleRevision(
+            version=1, saved_at=None, schedule={"open": current["open"], "unknown": current["close"]}
+        )
+        mocker.patch("rasp_shutter.control.scheduler.get_schedule_revision", return_value=revision)
+
+        response = client.post(
+            f"{url_prefix}/api/schedule_ctrl", query_string={"cmd": "rollback", "version": 1}
+        )
+        assert response.status_code == 409
+
+        assert schedule_api.get() == current
+
+
 class TestScheduleUpdate:
     """スケジュール更新テスト"""
 
@@ -72,7 +193,7 @@ class TestScheduleUpdate:
 
     def test_schedule_ctrl_write_fail(self, client, mocker):
         """スケジュール書き込み失敗"""
-        mocker.patch("pickle.dump", side_effect=RuntimeError())
+        mocker.patch("os.fsync", side_effect=OSError())
 
         schedule_api = ScheduleAPI(client)
         schedule_data = ScheduleFactory.create()
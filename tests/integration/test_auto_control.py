@@ -6,17 +6,14 @@ from tests.fixtures.schedule_factory import ScheduleFactory, time_evening, time_
 from tests.fixtures.sensor_factory import SensorDataFactory
 from tests.helpers.api_utils import ScheduleAPI, ShutterAPI
 from tests.helpers.assertions import CtrlLogChecker, LogChecker, SlackChecker
-from tests.helpers.time_utils import move_time_and_wait, setup_midnight_time
+from tests.helpers.time_utils import advance_to
 
 
 class TestAutoClose:
     """自動閉め制御のテスト"""
 
-    def test_schedule_ctrl_auto_close(self, client, time_machine, mock_sensor_data):
+    def test_schedule_ctrl_auto_close(self, client, step_scheduler, mock_sensor_data):
         """暗くなったら自動で閉める"""
-        # 深夜に設定して自動制御が発動しないようにする
-        setup_midnight_time(client, time_machine)
-
         sensor_data_mock = mock_sensor_data(SensorDataFactory.bright())
 
         shutter_api = ShutterAPI(client)
@@ -25,7 +22,7 @@ class TestAutoClose:
         log_checker = LogChecker(client)
         slack_checker = SlackChecker()
 
-        move_time_and_wait(time_machine, client, time_evening(0))
+        advance_to(step_scheduler, time_evening(0))
 
         shutter_api.open()
 
@@ -37,8 +34,7 @@ class TestAutoClose:
         )
         schedule_api.update(schedule_data)
 
-        move_time_and_wait(time_machine, client, time_evening(1))
-        move_time_and_wait(time_machine, client, time_evening(2))
+        advance_to(step_scheduler, time_evening(2))
 
         # まだ明るいので閉まっていない
         ctrl_checker.wait_and_check(
@@ -51,8 +47,7 @@ class TestAutoClose:
         # 暗くする
         sensor_data_mock.return_value = SensorDataFactory.dark()
 
-        move_time_and_wait(time_machine, client, time_evening(3))
-        move_time_and_wait(time_machine, client, time_evening(4))
+        advance_to(step_scheduler, time_evening(4))
 
         # 暗くなったので閉まった
         ctrl_checker.wait_and_check(
@@ -65,8 +60,7 @@ class TestAutoClose:
         )
 
         # スケジュール時刻を過ぎても既に閉まっているので何もしない
-        move_time_and_wait(time_machine, client, time_evening(5))
-        move_time_and_wait(time_machine, client, time_evening(6))
+        advance_to(step_scheduler, time_evening(6))
 
         ctrl_checker.wait_and_check(
             [
@@ -96,11 +90,8 @@ class TestAutoClose:
 class TestAutoReopen:
     """自動再開制御のテスト"""
 
-    def test_schedule_ctrl_auto_reopen(self, client, time_machine, mock_sensor_data):
+    def test_schedule_ctrl_auto_reopen(self, client, step_scheduler, mock_sensor_data):
         """暗くて開けれなかった後、明るくなったら開ける"""
-        # 深夜に設定して自動制御が発動しないようにする
-        setup_midnight_time(client, time_machine)
-
         sensor_data_mock = mock_sensor_data(SensorDataFactory.dark())
 
         shutter_api = ShutterAPI(client)
@@ -112,7 +103,7 @@ class TestAutoReopen:
         # 閉める
         shutter_api.close()
 
-        move_time_and_wait(time_machine, client, time_morning(0))
+        advance_to(step_scheduler, time_morning(0))
 
         # 開けるスケジュールを設定
         schedule_data = ScheduleFactory.create(
@@ -129,8 +120,7 @@ class TestAutoReopen:
         )
 
         # スケジュール時刻に移動（まだ暗い）
-        move_time_and_wait(time_machine, client, time_morning(2))
-        move_time_and_wait(time_machine, client, time_morning(3))
+        advance_to(step_scheduler, time_morning(3))
 
         # 暗いので pending
         ctrl_checker.wait_and_check(
@@ -144,7 +134,7 @@ class TestAutoReopen:
         # 明るくする
         sensor_data_mock.return_value = SensorDataFactory.bright()
 
-        move_time_and_wait(time_machine, client, time_morning(4))
+        advance_to(step_scheduler, time_morning(4))
 
         # 明るくなったので開いた
         ctrl_checker.wait_and_check(
@@ -160,7 +150,7 @@ class TestAutoReopen:
         # 暗くする
         sensor_data_mock.return_value = SensorDataFactory.dark()
 
-        move_time_and_wait(time_machine, client, time_morning(5))
+        advance_to(step_scheduler, time_morning(5))
 
         # 自動で開けてから時間が経っていないので閉まらない
         ctrl_checker.wait_and_check(
@@ -174,7 +164,7 @@ class TestAutoReopen:
         )
 
         # 時間を進める（5分以上）
-        move_time_and_wait(time_machine, client, time_morning(10))
+        advance_to(step_scheduler, time_morning(10))
 
         # 閉まった
         ctrl_checker.wait_and_check(
@@ -211,11 +201,8 @@ class TestAutoReopen:
 class TestPendingOpen:
     """開けるペンディング状態のテスト"""
 
-    def test_schedule_ctrl_pending_open(self, client, time_machine, mock_sensor_data):
+    def test_schedule_ctrl_pending_open(self, client, step_scheduler, mock_sensor_data):
         """暗くて開けれなかった後、明るくなったら開ける"""
-        # 深夜に設定して自動制御が発動しないようにする
-        setup_midnight_time(client, time_machine)
-
         sensor_data_mock = mock_sensor_data(SensorDataFactory.dark())
 
         shutter_api = ShutterAPI(client)
@@ -224,7 +211,7 @@ class TestPendingOpen:
         log_checker = LogChecker(client)
         slack_checker = SlackChecker()
 
-        move_time_and_wait(time_machine, client, time_morning(0))
+        advance_to(step_scheduler, time_morning(0))
 
         shutter_api.close()
 
@@ -242,14 +229,12 @@ class TestPendingOpen:
             ]
         )
 
-        move_time_and_wait(time_machine, client, time_morning(1))
-        move_time_and_wait(time_machine, client, time_morning(2))
-        move_time_and_wait(time_machine, client, time_morning(3))
+        advance_to(step_scheduler, time_morning(3))
 
         # 暗いので pending
         sensor_data_mock.return_value = SensorDataFactory.bright()
 
-        move_time_and_wait(time_machine, client, time_morning(4))
+        advance_to(step_scheduler, time_morning(4))
 
         ctrl_checker.wait_and_check(
             [
@@ -275,11 +260,8 @@ class TestPendingOpen:
         )
         slack_checker.check_no_error()
 
-    def test_schedule_ctrl_pending_open_inactive(self, client, time_machine, mock_sensor_data):
+    def test_schedule_ctrl_pending_open_inactive(self, client, step_scheduler, mock_sensor_data):
         """pending open後にスケジュールを無効にした場合"""
-        # 深夜に設定して自動制御が発動しないようにする
-        setup_midnight_time(client, time_machine)
-
         sensor_data_mock = mock_sensor_data(SensorDataFactory.dark())
 
         shutter_api = ShutterAPI(client)
@@ -290,7 +272,7 @@ class TestPendingOpen:
 
         shutter_api.close()
 
-        move_time_and_wait(time_machine, client, time_morning(0))
+        advance_to(step_scheduler, time_morning(0))
 
         schedule_data = ScheduleFactory.create(
             open_time=time_str(time_morning(1)),
@@ -306,9 +288,7 @@ class TestPendingOpen:
             ]
         )
 
-        move_time_and_wait(time_machine, client, time_morning(1))
-        move_time_and_wait(time_machine, client, time_morning(2))
-        move_time_and_wait(time_machine, client, time_morning(3))
+        advance_to(step_scheduler, time_morning(3))
 
         ctrl_checker.wait_and_check(
             [
@@ -324,9 +304,7 @@ class TestPendingOpen:
 
         sensor_data_mock.return_value = SensorDataFactory.bright()
 
-        move_time_and_wait(time_machine, client, time_morning(4))
-        move_time_and_wait(time_machine, client, time_morning(5))
-        move_time_and_wait(time_machine, client, time_morning(6))
+        advance_to(step_scheduler, time_morning(6))
 
         # 無効なので開かない
         ctrl_checker.wait_and_check(
@@ -349,6 +327,79 @@ class TestPendingOpen:
         )
         slack_checker.check_no_error()
 
+    def test_schedule_ctrl_pending_open_override_time(self, client, step_scheduler, mock_sensor_data):
+        """pending open 中でも、開ける時刻がまだ来ていないシャッターは開けない"""
+        sensor_data_mock = mock_sensor_data(SensorDataFactory.dark())
+
+        shutter_api = ShutterAPI(client)
+        schedule_api = ScheduleAPI(client)
+        ctrl_checker = CtrlLogChecker(client)
+        log_checker = LogChecker(client)
+        slack_checker = SlackChecker()
+
+        shutter_api.close()
+
+        advance_to(step_scheduler, time_morning(0))
+
+        # シャッター0は 7:01、シャッター1は 9:00 に開ける
+        late_time = time_morning(0).replace(hour=9)
+        schedule_data = ScheduleFactory.create(open_time=time_str(time_morning(1)), close_active=False)
+        schedule_data["override"] = [
+            {"target": [index], **ScheduleFactory.create(open_time=time_str(open_time), close_active=False)}
+            for index, open_time in enumerate([time_morning(1), late_time])
+        ]
+        schedule_api.update(schedule_data)
+
+        advance_to(step_scheduler, time_morning(2))
+
+        # 暗いので pending
+        ctrl_checker.wait_and_check(
+            [
+                {"index": 0, "state": "close"},
+                {"index": 1, "state": "close"},
+                {"cmd": "pending", "state": "open"},
+            ]
+        )
+
+        # 明るくなったら、開ける時刻を過ぎたシャッター0だけを開ける
+        sensor_data_mock.return_value = SensorDataFactory.bright()
+        advance_to(step_scheduler, time_morning(30))
+
+        ctrl_checker.wait_and_check(
+            [
+                {"index": 0, "state": "close"},
+                {"index": 1, "state": "close"},
+                {"cmd": "pending", "state": "open"},
+                {"index": 0, "state": "open"},
+            ]
+        )
+
+        # シャッター1は自身の時刻にスケジュールで開ける
+        advance_to(step_scheduler, late_time.replace(minute=1))
+
+        ctrl_checker.wait_and_check(
+            [
+                {"index": 0, "state": "close"},
+                {"index": 1, "state": "close"},
+                {"cmd": "pending", "state": "open"},
+                {"index": 0, "state": "open"},
+                {"index": 1, "state": "open"},
+            ]
+        )
+        log_checker.wait_and_check(
+            [
+                "CLEAR",
+                "CLOSE_MANUAL",
+                "CLOSE_MANUAL",
+                "SCHEDULE",
+                "OPEN_PENDING",
+                "OPEN_BRIGHT",
+                "OPEN_AUTO",
+                "OPEN_SCHEDULE",
+            ]
+        )
+        slack_checker.check_no_error()
+
 
 class TestAutoControlFailure:
     """自動制御の制御失敗時のテスト
@@ -357,13 +408,10 @@ class TestAutoControlFailure:
     リトライ間隔（AUTO_CONTROL_RETRY_INTERVAL_SEC）経過後に再試行することを検証する。
     """
 
-    def test_auto_open_failure_keeps_pending(self, client, mocker, time_machine, mock_sensor_data):
+    def test_auto_open_failure_keeps_pending(self, client, mocker, step_scheduler, mock_sensor_data):
         """自動開け制御が失敗しても pending を維持し、リトライ間隔経過後に再試行して開ける"""
-        import my_lib.footprint
-
         import rasp_shutter.control.config
-
-        setup_midnight_time(client, time_machine)
+        import rasp_shutter.util
 
         sensor_data_mock = mock_sensor_data(SensorDataFactory.dark())
 
@@ -374,7 +422,7 @@ class TestAutoControlFailure:
 
         shutter_api.close()
 
-        move_time_and_wait(time_machine, client, time_morning(0))
+        advance_to(step_scheduler, time_morning(0))
 
         schedule_data = ScheduleFactory.create(
             open_time=time_str(time_morning(1)),
@@ -383,8 +431,7 @@ class TestAutoControlFailure:
         )
         schedule_api.update(schedule_data)
 
-        move_time_and_wait(time_machine, client, time_morning(1))
-        move_time_and_wait(time_machine, client, time_morning(2))
+        advance_to(step_scheduler, time_morning(2))
 
         # 暗いので pending
         ctrl_checker.wait_and_check(
@@ -399,7 +446,7 @@ class TestAutoControlFailure:
         mocker.patch("rasp_shutter.control.scheduler.exec_shutter_control_impl", return_value=False)
         sensor_data_mock.return_value = SensorDataFactory.bright()
 
-        move_time_and_wait(time_machine, client, time_morning(3))
+        advance_to(step_scheduler, time_morning(3))
 
         log_checker.wait_and_check(
             [
@@ -414,10 +461,10 @@ class TestAutoControlFailure:
         )
 
         # 制御に失敗しても pending は維持される
-        assert my_lib.footprint.exists(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
+        assert rasp_shutter.util.footprint_exists(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
 
         # リトライ間隔内は再試行しない（ログが増えない）
-        move_time_and_wait(time_machine, client, time_morning(4))
+        advance_to(step_scheduler, time_morning(4))
         log_checker.wait_and_check(
             [
                 "CLEAR",
@@ -432,7 +479,7 @@ class TestAutoControlFailure:
 
         # 制御が復旧したら、リトライ間隔経過後に自動で開ける
         mocker.stopall()
-        move_time_and_wait(time_machine, client, time_morning(6))
+        advance_to(step_scheduler, time_morning(6))
 
         ctrl_checker.wait_and_check(
             [
@@ -443,7 +490,7 @@ class TestAutoControlFailure:
                 {"index": 1, "state": "open"},
             ]
         )
-        assert not my_lib.footprint.exists(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
+        assert not rasp_shutter.util.footprint_exists(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
 
         log_checker.wait_and_check(
             [
@@ -460,13 +507,10 @@ class TestAutoControlFailure:
             ]
         )
 
-    def test_auto_close_failure_keeps_state(self, client, mocker, time_machine, mock_sensor_data):
+    def test_auto_close_failure_keeps_state(self, client, mocker, step_scheduler, mock_sensor_data):
         """自動閉め制御が失敗しても閉め履歴を進めず、リトライ間隔経過後に再試行して閉める"""
-        import my_lib.footprint
-
         import rasp_shutter.control.config
-
-        setup_midnight_time(client, time_machine)
+        import rasp_shutter.util
 
         sensor_data_mock = mock_sensor_data(SensorDataFactory.bright())
 
@@ -475,7 +519,7 @@ class TestAutoControlFailure:
         ctrl_checker = CtrlLogChecker(client)
         log_checker = LogChecker(client)
 
-        move_time_and_wait(time_machine, client, time_evening(0))
+        advance_to(step_scheduler, time_evening(0))
 
         shutter_api.open()
 
@@ -487,13 +531,13 @@ class TestAutoControlFailure:
         schedule_api.update(schedule_data)
 
         # 「開けてから時間が経っていない」ガードを越える
-        move_time_and_wait(time_machine, client, time_evening(3))
+        advance_to(step_scheduler, time_evening(3))
 
         # 暗くなったが、制御は失敗する
         mocker.patch("rasp_shutter.control.scheduler.exec_shutter_control_impl", return_value=False)
         sensor_data_mock.return_value = SensorDataFactory.dark()
 
-        move_time_and_wait(time_machine, client, time_evening(4))
+        advance_to(step_scheduler, time_evening(4))
 
         log_checker.wait_and_check(
             [
@@ -507,11 +551,11 @@ class TestAutoControlFailure:
         )
 
         # 制御に失敗した場合は自動クローズ履歴を進めない
-        assert not my_lib.footprint.exists(rasp_shutter.control.config.STAT_AUTO_CLOSE.to_path())
+        assert not rasp_shutter.util.footprint_exists(rasp_shutter.control.config.get_auto_close_stat_path(0))
 
         # 制御が復旧したら、リトライ間隔経過後に自動で閉める
         mocker.stopall()
-        move_time_and_wait(time_machine, client, time_evening(7))
+        advance_to(step_scheduler, time_evening(7))
 
         ctrl_checker.wait_and_check(
             [
@@ -521,7 +565,7 @@ class TestAutoControlFailure:
                 {"index": 1, "state": "close"},
             ]
         )
-        assert my_lib.footprint.exists(rasp_shutter.control.config.STAT_AUTO_CLOSE.to_path())
+        assert rasp_shutter.util.footprint_exists(rasp_shutter.control.config.get_auto_close_stat_path(0))
 
         log_checker.wait_and_check(
             [
@@ -541,11 +585,8 @@ class TestAutoControlFailure:
 class TestSensorError:
     """センサーエラー時のテスト"""
 
-    def test_schedule_ctrl_invalid_sensor_lux(self, client, time_machine, mock_sensor_data):
+    def test_schedule_ctrl_invalid_sensor_lux(self, client, step_scheduler, mock_sensor_data):
         """照度センサー無効時: 開けるのを見合わせて pending を設定し、復旧後に開ける (BUG-4)"""
-        # 深夜に設定して自動制御が発動しないようにする
-        setup_midnight_time(client, time_machine)
-
         sensor_data_mock = mock_sensor_data(SensorDataFactory.invalid_lux())
 
         schedule_api = ScheduleAPI(client)
@@ -553,7 +594,7 @@ class TestSensorError:
         log_checker = LogChecker(client)
         slack_checker = SlackChecker()
 
-        move_time_and_wait(time_machine, client, time_morning(0))
+        advance_to(step_scheduler, time_morning(0))
 
         schedule_data = ScheduleFactory.create(
             open_time=time_str(time_morning(1)),
@@ -562,8 +603,7 @@ class TestSensorError:
         )
         schedule_api.update(schedule_data)
 
-        move_time_and_wait(time_machine, client, time_morning(1))
-        move_time_and_wait(time_machine, client, time_morning(2))
+        advance_to(step_scheduler, time_morning(2))
 
         # センサー無効なので開けるのを見合わせるが、復旧後に開けられるよう pending を設定する
         ctrl_checker.wait_and_check([{"cmd": "pending", "state": "open"}])
@@ -572,7 +612,7 @@ class TestSensorError:
 
         # センサーが復旧して明るくなったら自動で開ける
         sensor_data_mock.return_value = SensorDataFactory.bright()
-        move_time_and_wait(time_machine, client, time_morning(3))
+        advance_to(step_scheduler, time_morning(3))
 
         ctrl_checker.wait_and_check(
             [
@@ -585,11 +625,8 @@ class TestSensorError:
             ["CLEAR", "SCHEDULE", "FAIL_SENSOR", "OPEN_BRIGHT", "OPEN_AUTO", "OPEN_AUTO"]
         )
 
-    def test_schedule_ctrl_invalid_sensor_solar_rad(self, client, time_machine, mock_sensor_data):
+    def test_schedule_ctrl_invalid_sensor_solar_rad(self, client, step_scheduler, mock_sensor_data):
         """日射センサー無効時: 開けるのを見合わせて pending を設定し、復旧後に開ける (BUG-4)"""
-        # 深夜に設定して自動制御が発動しないようにする
-        setup_midnight_time(client, time_machine)
-
         sensor_data_mock = mock_sensor_data(SensorDataFactory.invalid_solar_rad())
 
         schedule_api = ScheduleAPI(client)
@@ -597,7 +634,7 @@ class TestSensorError:
         log_checker = LogChecker(client)
         slack_checker = SlackChecker()
 
-        move_time_and_wait(time_machine, client, time_morning(0))
+        advance_to(step_scheduler, time_morning(0))
 
         schedule_data = ScheduleFactory.create(
             open_time=time_str(time_morning(1)),
@@ -606,8 +643,7 @@ class TestSensorError:
         )
         schedule_api.update(schedule_data)
 
-        move_time_and_wait(time_machine, client, time_morning(1))
-        move_time_and_wait(time_machine, client, time_morning(2))
+        advance_to(step_scheduler, time_morning(2))
 
         # センサー無効なので開けるのを見合わせるが、復旧後に開けられるよう pending を設定する
         ctrl_checker.wait_and_check([{"cmd": "pending", "state": "open"}])
@@ -616,7 +652,7 @@ class TestSensorError:
 
         # センサーが復旧して明るくなったら自動で開ける
         sensor_data_mock.return_value = SensorDataFactory.bright()
-        move_time_and_wait(time_machine, client, time_morning(3))
+        advance_to(step_scheduler, time_morning(3))
 
         ctrl_checker.wait_and_check(
             [
@@ -633,11 +669,8 @@ class TestSensorError:
 class TestSensorErrorClose:
     """センサーエラー時でも閉める制御は実行されることのテスト (BUG-3)"""
 
-    def test_schedule_ctrl_close_with_invalid_sensor(self, client, time_machine, mock_sensor_data):
+    def test_schedule_ctrl_close_with_invalid_sensor(self, client, step_scheduler, mock_sensor_data):
         """センサー無効でもスケジュールされた閉める制御は実行される"""
-        # 深夜に設定して自動制御が発動しないようにする
-        setup_midnight_time(client, time_machine)
-
         sensor_data_mock = mock_sensor_data(SensorDataFactory.bright())
 
         shutter_api = ShutterAPI(client)
@@ -646,7 +679,7 @@ class TestSensorErrorClose:
         log_checker = LogChecker(client)
         slack_checker = SlackChecker()
 
-        move_time_and_wait(time_machine, client, time_morning(0))
+        advance_to(step_scheduler, time_morning(0))
 
         # シャッターを開けておく
         shutter_api.open()
@@ -670,8 +703,7 @@ class TestSensorErrorClose:
         sensor_data_mock.return_value = SensorDataFactory.invalid_lux()
 
         # 閉めるスケジュール時刻に移動
-        move_time_and_wait(time_machine, client, time_evening(1))
-        move_time_and_wait(time_machine, client, time_evening(2))
+        advance_to(step_scheduler, time_evening(2))
 
         # センサー無効でもスケジュールに従って閉まる
         ctrl_checker.wait_and_check(
@@ -6,20 +6,14 @@ from tests.fixtures.schedule_factory import ScheduleFactory, time_evening, time_
 from tests.fixtures.sensor_factory import SensorDataFactory
 from tests.helpers.api_utils import ScheduleAPI, ShutterAPI
 from tests.helpers.assertions import CtrlLogChecker, LogChecker, SlackChecker
-from tests.helpers.time_utils import (
-    move_time_and_wait,
-    setup_midnight_time,
-)
+from tests.helpers.time_utils import advance_to
 
 
 class TestScheduleInactive:
     """スケジュール無効時のテスト"""
 
-    def test_schedule_ctrl_inactive(self, client, time_machine, mock_sensor_data):
+    def test_schedule_ctrl_inactive(self, client, step_scheduler, mock_sensor_data):
         """無効なスケジュールでは制御されない"""
-        # 深夜に設定して自動制御が発動しないようにする
-        setup_midnight_time(client, time_machine)
-
         # 明るい状態に設定して自動制御を防止
         mock_sensor_data(SensorDataFactory.bright())
 
@@ -35,23 +29,18 @@ class TestScheduleInactive:
         schedule_api.update(schedule_data)
 
         # 朝の時刻に移動
-        move_time_and_wait(time_machine, client, time_morning(1))
-        move_time_and_wait(time_machine, client, time_morning(2))
+        advance_to(step_scheduler, time_morning(2))
 
         # 夕方の時刻に移動
-        move_time_and_wait(time_machine, client, time_evening(1))
-        move_time_and_wait(time_machine, client, time_evening(2))
+        advance_to(step_scheduler, time_evening(2))
 
         # 制御されていないことを確認
         ctrl_checker.wait_and_check([])
         log_checker.wait_and_check(["CLEAR", "SCHEDULE"])
         slack_checker.check_no_error()
 
-    def test_schedule_ctrl_weekday_inactive(self, client, time_machine, mock_sensor_data):
+    def test_schedule_ctrl_weekday_inactive(self, client, step_scheduler, mock_sensor_data):
         """曜日が無効なスケジュールでは制御されない"""
-        # 深夜に設定して自動制御が発動しないようにする
-        setup_midnight_time(client, time_machine)
-
         # 明るい状態に設定して自動制御を防止
         mock_sensor_data(SensorDataFactory.bright())
 
@@ -69,8 +58,7 @@ class TestScheduleInactive:
         schedule_api.update(schedule_data)
 
         # 朝の時刻に移動
-        move_time_and_wait(time_machine, client, time_morning(1))
-        move_time_and_wait(time_machine, client, time_morning(2))
+        advance_to(step_scheduler, time_morning(2))
 
         # 制御されていないことを確認
         ctrl_checker.wait_and_check([])
@@ -81,11 +69,8 @@ class TestScheduleInactive:
 class TestScheduleExecution:
     """スケジュール実行のテスト"""
 
-    def test_schedule_ctrl_execute_close(self, client, time_machine, mock_sensor_data):
+    def test_schedule_ctrl_execute_close(self, client, step_scheduler, mock_sensor_data):
         """スケジュールに従って閉める"""
-        # 深夜に設定して自動制御が発動しないようにする
-        setup_midnight_time(client, time_machine)
-
         mock_sensor_data(SensorDataFactory.bright())
 
         shutter_api = ShutterAPI(client)
@@ -98,7 +83,7 @@ class TestScheduleExecution:
         shutter_api.open()
 
         # 夕方に移動（スケジューラのループ完了を待機）
-        move_time_and_wait(time_machine, client, time_evening(0))
+        advance_to(step_scheduler, time_evening(0))
 
         # シャッター1だけ閉める
         shutter_api.close(index=1)
@@ -112,8 +97,7 @@ class TestScheduleExecution:
         schedule_api.update(schedule_data)
 
         # スケジュール時刻に移動
-        move_time_and_wait(time_machine, client, time_evening(1))
-        move_time_and_wait(time_machine, client, time_evening(2))
+        advance_to(step_scheduler, time_evening(2))
 
         # シャッター0だけ閉まったことを確認
         ctrl_checker.wait_and_check(
@@ -142,13 +126,10 @@ class TestScheduleExecution:
 class TestPendingCloseRetry:
     """閉め制御失敗後の再試行テスト（F-2）"""
 
-    def test_schedule_close_fail_retries_and_succeeds(self, client, mocker, time_machine, mock_sensor_data):
+    def test_schedule_close_fail_retries_and_succeeds(self, client, mocker, step_scheduler, mock_sensor_data):
         """スケジュール閉め失敗後、リトライ間隔経過で再試行して閉める"""
-        import my_lib.footprint
-
         import rasp_shutter.control.config
-
-        setup_midnight_time(client, time_machine)
+        import rasp_shutter.util
 
         mock_sensor_data(SensorDataFactory.bright())
 
@@ -157,7 +138,7 @@ class TestPendingCloseRetry:
         ctrl_checker = CtrlLogChecker(client)
         log_checker = LogChecker(client)
 
-        move_time_and_wait(time_machine, client, time_evening(0))
+        advance_to(step_scheduler, time_evening(0))
 
         shutter_api.open()
 
@@ -171,17 +152,16 @@ class TestPendingCloseRetry:
         # スケジュール閉め制御が失敗する
         mocker.patch("rasp_shutter.control.scheduler.exec_shutter_control_impl", return_value=False)
 
-        move_time_and_wait(time_machine, client, time_evening(1))
-        move_time_and_wait(time_machine, client, time_evening(2))
+        advance_to(step_scheduler, time_evening(2))
 
         log_checker.wait_and_check(["CLEAR", "OPEN_MANUAL", "OPEN_MANUAL", "SCHEDULE", "FAIL_CONTROL"])
 
         # 失敗時は閉め再試行の footprint が設定される
-        assert my_lib.footprint.exists(rasp_shutter.control.config.STAT_PENDING_CLOSE.to_path())
+        assert rasp_shutter.util.footprint_exists(rasp_shutter.control.config.STAT_PENDING_CLOSE.to_path())
 
         # 制御が復旧したら、リトライ間隔経過後に再試行して閉まる
         mocker.stopall()
-        move_time_and_wait(time_machine, client, time_evening(4))
+        advance_to(step_scheduler, time_evening(4))
 
         ctrl_checker.wait_and_check(
             [
@@ -191,7 +171,9 @@ class TestPendingCloseRetry:
                 {"index": 1, "state": "close"},
             ]
         )
-        assert not my_lib.footprint.exists(rasp_shutter.control.config.STAT_PENDING_CLOSE.to_path())
+        assert not rasp_shutter.util.footprint_exists(
+            rasp_shutter.control.config.STAT_PENDING_CLOSE.to_path()
+        )
 
         log_checker.wait_and_check(
             [
@@ -206,14 +188,14 @@ class TestPendingCloseRetry:
             ]
         )
 
-    def test_schedule_close_fail_gives_up_after_expiry(self, client, mocker, time_machine, mock_sensor_data):
+    def test_schedule_close_fail_gives_up_after_expiry(
+        self, client, mocker, step_scheduler, mock_sensor_data
+    ):
         """再試行の上限時間を超えたら諦めて Slack 通知する"""
-        import my_lib.footprint
-        import my_lib.time
-
+        import rasp_shutter.clock
         import rasp_shutter.control.config
-
-        setup_midnight_time(client, time_machine)
+        import rasp_shutter.notify
+        import rasp_shutter.util
 
         mock_sensor_data(SensorDataFactory.bright())
 
@@ -222,7 +204,7 @@ class TestPendingCloseRetry:
         log_checker = LogChecker(client)
         slack_checker = SlackChecker()
 
-        move_time_and_wait(time_machine, client, time_evening(0))
+        advance_to(step_scheduler, time_evening(0))
 
         shutter_api.open()
 
@@ -235,17 +217,20 @@ class TestPendingCloseRetry:
 
         mocker.patch("rasp_shutter.control.scheduler.exec_shutter_control_impl", return_value=False)
 
-        move_time_and_wait(time_machine, client, time_evening(1))
-        move_time_and_wait(time_machine, client, time_evening(2))
+        advance_to(step_scheduler, time_evening(2))
 
-        assert my_lib.footprint.exists(rasp_shutter.control.config.STAT_PENDING_CLOSE.to_path())
+        assert rasp_shutter.util.footprint_exists(rasp_shutter.control.config.STAT_PENDING_CLOSE.to_path())
 
         # 上限時間（6時間）を超えた時刻に移動
-        expiry_time = my_lib.time.now().replace(hour=23, minute=30, second=0, microsecond=0)
-        move_time_and_wait(time_machine, client, expiry_time)
+        # NOTE: 1 分刻みで進めるとリトライ間隔ごとに再試行してしまうので、1 回で時刻を飛ばす
+        expiry_time = rasp_shutter.clock.now().replace(hour=23, minute=30, second=0, microsecond=0)
+        step_scheduler.step((expiry_time - rasp_shutter.clock.now()).total_seconds())
+        rasp_shutter.notify.flush()
 
         # footprint がクリアされ、Slack エラー通知される
-        assert not my_lib.footprint.exists(rasp_shutter.control.config.STAT_PENDING_CLOSE.to_path())
+        assert not rasp_shutter.util.footprint_exists(
+            rasp_shutter.control.config.STAT_PENDING_CLOSE.to_path()
+        )
         log_checker.wait_and_check(
             ["CLEAR", "OPEN_MANUAL", "OPEN_MANUAL", "SCHEDULE", "FAIL_CONTROL", "CLOSE_GIVEUP"]
         )
@@ -255,11 +240,8 @@ class TestPendingCloseRetry:
 class TestScheduleControlFail:
     """スケジュール制御失敗テスト"""
 
-    def test_schedule_ctrl_control_fail_impl(self, client, mocker, time_machine, mock_sensor_data):
+    def test_schedule_ctrl_control_fail_impl(self, client, mocker, step_scheduler, mock_sensor_data):
         """制御実装が失敗する場合"""
-        # 深夜に設定して自動制御が発動しないようにする
-        setup_midnight_time(client, time_machine)
-
         mocker.patch("rasp_shutter.control.scheduler.exec_shutter_control_impl", return_value=False)
         mock_sensor_data(SensorDataFactory.dark())
 
@@ -269,7 +251,7 @@ class TestScheduleControlFail:
         log_checker = LogChecker(client)
         slack_checker = SlackChecker()
 
-        move_time_and_wait(time_machine, client, time_evening(0))
+        advance_to(step_scheduler, time_evening(0))
 
         shutter_api.open()
 
@@ -280,8 +262,7 @@ class TestScheduleControlFail:
         )
         schedule_api.update(schedule_data)
 
-        move_time_and_wait(time_machine, client, time_evening(1))
-        move_time_and_wait(time_machine, client, time_evening(2))
+        advance_to(step_scheduler, time_evening(2))
 
         ctrl_checker.wait_and_check(
             [
@@ -301,13 +282,10 @@ class TestScheduleControlFail:
         )
         slack_checker.check_no_error()
 
-    def test_schedule_close_fail_keeps_pending(self, client, mocker, time_machine, mock_sensor_data):
+    def test_schedule_close_fail_keeps_pending(self, client, mocker, step_scheduler, mock_sensor_data):
         """スケジュールの閉め制御が失敗した場合、pending open を維持する"""
-        import my_lib.footprint
-
         import rasp_shutter.control.config
-
-        setup_midnight_time(client, time_machine)
+        import rasp_shutter.util
 
         mock_sensor_data(SensorDataFactory.dark())
 
@@ -315,7 +293,7 @@ class TestScheduleControlFail:
         ctrl_checker = CtrlLogChecker(client)
         log_checker = LogChecker(client)
 
-        move_time_and_wait(time_machine, client, time_morning(0))
+        advance_to(step_scheduler, time_morning(0))
 
         # 開けるのは暗くて見合わせ（pending 設定）、その後の閉めるは失敗させる
         schedule_data = ScheduleFactory.create(
@@ -324,29 +302,24 @@ class TestScheduleControlFail:
         )
         schedule_api.update(schedule_data)
 
-        move_time_and_wait(time_machine, client, time_morning(1))
-        move_time_and_wait(time_machine, client, time_morning(2))
+        advance_to(step_scheduler, time_morning(2))
 
         ctrl_checker.wait_and_check([{"cmd": "pending", "state": "open"}])
-        assert my_lib.footprint.exists(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
+        assert rasp_shutter.util.footprint_exists(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
 
         mocker.patch("rasp_shutter.control.scheduler.exec_shutter_control_impl", return_value=False)
 
-        move_time_and_wait(time_machine, client, time_morning(5))
-        move_time_and_wait(time_machine, client, time_morning(6))
+        advance_to(step_scheduler, time_morning(6))
 
         log_checker.wait_and_check(["CLEAR", "SCHEDULE", "OPEN_PENDING", "FAIL_CONTROL"])
 
         # 閉め制御に失敗した場合、暗くて延期されていた開ける制御は取り消されない
-        assert my_lib.footprint.exists(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
+        assert rasp_shutter.util.footprint_exists(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
 
-    def test_schedule_open_fail_sets_pending(self, client, mocker, time_machine, mock_sensor_data):
+    def test_schedule_open_fail_sets_pending(self, client, mocker, step_scheduler, mock_sensor_data):
         """スケジュール開け制御が失敗した場合、pending open を設定して自動再試行する"""
-        import my_lib.footprint
-
         import rasp_shutter.control.config
-
-        setup_midnight_time(client, time_machine)
+        import rasp_shutter.util
 
         mock_sensor_data(SensorDataFactory.bright())
 
@@ -357,7 +330,7 @@ class TestScheduleControlFail:
 
         shutter_api.close()
 
-        move_time_and_wait(time_machine, client, time_morning(0))
+        advance_to(step_scheduler, time_morning(0))
 
         schedule_data = ScheduleFactory.create(
             open_time=time_str(time_morning(1)),
@@ -369,17 +342,16 @@ class TestScheduleControlFail:
         # 明るいのでスケジュールに従って開けようとするが、制御は失敗する
         mocker.patch("rasp_shutter.control.scheduler.exec_shutter_control_impl", return_value=False)
 
-        move_time_and_wait(time_machine, client, time_morning(1))
-        move_time_and_wait(time_machine, client, time_morning(2))
+        advance_to(step_scheduler, time_morning(2))
 
         log_checker.wait_and_check(["CLEAR", "CLOSE_MANUAL", "CLOSE_MANUAL", "SCHEDULE", "FAIL_CONTROL"])
 
         # 失敗時は pending open が設定され、自動再試行が有効になる
-        assert my_lib.footprint.exists(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
+        assert rasp_shutter.util.footprint_exists(rasp_shutter.control.config.STAT_PENDING_OPEN.to_path())
 
         # 制御が復旧したら、リトライ間隔経過後に自動で開ける
         mocker.stopall()
-        move_time_and_wait(time_machine, client, time_morning(4))
+        advance_to(step_scheduler, time_morning(4))
 
         ctrl_checker.wait_and_check(
             [
@@ -403,11 +375,8 @@ class TestScheduleControlFail:
             ]
         )
 
-    def test_schedule_ctrl_control_fail_exception(self, client, mocker, time_machine, mock_sensor_data):
+    def test_schedule_ctrl_control_fail_exception(self, client, mocker, step_scheduler, mock_sensor_data):
         """制御中に例外が発生する場合"""
-        # 深夜に設定して自動制御が発動しないようにする
-        setup_midnight_time(client, time_machine)
-
         mock_sensor_data(SensorDataFactory.bright())
 
         shutter_api = ShutterAPI(client)
@@ -423,7 +392,7 @@ class TestScheduleControlFail:
             side_effect=RuntimeError(),
         )
 
-        move_time_and_wait(time_machine, client, time_evening(0))
+        advance_to(step_scheduler, time_evening(0))
 
         schedule_data = ScheduleFactory.create(
             open_time=time_str(time_morning(1)),
@@ -432,8 +401,7 @@ class TestScheduleControlFail:
         )
         schedule_api.update(schedule_data)
 
-        move_time_and_wait(time_machine, client, time_evening(1))
-        move_time_and_wait(time_machine, client, time_evening(2))
+        advance_to(step_scheduler, time_evening(2))
 
         ctrl_checker.wait_and_check(
             [
@@ -246,6 +246,56 @@ class TestShutterStateResponseSchema:
         assert result["state"][1]["state"] == 1
 
 
+class TestSceneResponseSchema:
+    """SceneResponse API のスキーマ整合性テスト
+
+    エンドポイント: POST /api/scene_ctrl
+    """
+
+    def test_scene_response_full_structure(self) -> None:
+        """SceneResponse の完全なフィールド構造を確認"""
+        response = rasp_shutter.type_defs.SceneResponse(name="おやすみ")
+        result = dataclasses.asdict(response)
+
+        expected_fields = {"name", "result", "detail", "state"}
+        assert set(result.keys()) == expected_fields, (
+            f"SceneResponse のフィールドが期待と異なります: {set(result.keys())} != {expected_fields}"
+        )
+
+    def test_scene_response_with_detail(self) -> None:
+        """SceneResponse にシャッターごとの実行結果を含む場合の構造を確認"""
+        detail = [
+            rasp_shutter.type_defs.ShutterExecEntry(
+                index=0, name="シャッター1", state="close", result="success"
+            ),
+            rasp_shutter.type_defs.ShutterExecEntry(
+                index=1, name="シャッター2", state="close", result="postponed"
+            ),
+        ]
+        response = rasp_shutter.type_defs.SceneResponse(name="おやすみ", detail=detail)
+        result = json.loads(json.dumps(dataclasses.asdict(response), ensure_ascii=False))
+
+        assert set(result["detail"][0].keys()) == {"index", "name", "state", "result"}
+        assert [entry["result"] for entry in result["detail"]] == ["success", "postponed"]
+
+
+class TestBulkCtrlResponseSchema:
+    """BulkCtrlResponse API のスキーマ整合性テスト
+
+    エンドポイント: POST /api/shutter_ctrl/bulk
+    """
+
+    def test_bulk_ctrl_response_full_structure(self) -> None:
+        """BulkCtrlResponse の完全なフィールド構造を確認"""
+        response = rasp_shutter.type_defs.BulkCtrlResponse()
+        result = dataclasses.asdict(response)
+
+        expected_fields = {"result", "detail", "state"}
+        assert set(result.keys()) == expected_fields, (
+            f"BulkCtrlResponse のフィールドが期待と異なります: {set(result.keys())} != {expected_fields}"
+        )
+
+
 class TestScheduleEntrySchema:
     """ScheduleEntry (TypedDict) のスキーマ整合性テスト
 
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# ruff: noqa: S101
+"""DB のオンラインバックアップのユニットテスト"""
+
+import sqlite3
+import threading
+
+import pytest
+
+
+def _create_db(path, count=1000):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE sample (id INTEGER PRIMARY KEY, value TEXT)")
+    conn.executemany("INSERT INTO sample (value) VALUES (?)", [(f"value-{i}" * 10,) for i in range(count)])
+    conn.commit()
+    conn.close()
+
+
+def _count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM sample").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class TestBackup:
+    """backup / integrity_check / restore のテスト"""
+
+    def test_backup_while_writing(self, tmp_path):
+        """書き込みが続いていても、整合性の取れた複製ができる"""
+        import rasp_shutter.backup
+
+        db_path = tmp_path / "metrics.db"
+        _create_db(db_path)
+        should_stop = threading.Event()
+
+        def _writer():
+            conn = sqlite3.connect(db_path, timeout=10)
+            while not should_stop.is_set():
+                conn.execute("INSERT INTO sample (value) VALUES ('new')")
+                conn.commit()
+            conn.close()
+
+        thread = threading.Thread(target=_writer)
+        thread.start()
+        try:
+            dest_path = tmp_path / "copy.db"
+            rasp_shutter.backup.backup(db_path, dest_path, pages=4, sleep=0.001)
+        finally:
+            should_stop.set()
+            thread.join()
+
+        assert rasp_shutter.backup.integrity_check(dest_path) == []
+        assert _count(dest_path) >= 1000
+        assert not (tmp_path / "copy.db.tmp").exists()
+
+    def test_missing_source(self, tmp_path):
+        """元の DB が無ければ BackupError"""
+        import rasp_shutter.backup
+
+        with pytest.raises(rasp_shutter.backup.BackupError):
+            rasp_shutter.backup.backup(tmp_path / "missing.db", tmp_path / "copy.db")
+        assert not (tmp_path / "copy.db").exists()
+
+    def test_integrity_check_corrupted(self, tmp_path):
+        """壊れたファイルは問題が報告され、リストアできない"""
+        import rasp_shutter.backup
+
+        db_path = tmp_path / "metrics.db"
+        _create_db(db_path)
+        broken_path = tmp_path / "metrics-20240101-000000.db"
+        content = bytearray(db_path.read_bytes())
+        content[:16] = b"x" * 16
+        broken_path.write_bytes(bytes(content))
+
+        assert rasp_shutter.backup.integrity_check(broken_path) != []
+        with pytest.raises(rasp_shutter.backup.BackupError):
+            rasp_shutter.backup.restore(broken_path, db_path)
+        assert _count(db_path) == 1000
+
+    def test_snapshot_rotate_restore(self, tmp_path):
+        """スナップショットは keep 個だけ残り、リストアで元の内容に戻る"""
+        import rasp_shutter.backup
+
+        db_path = tmp_path / "metrics.db"
+        backup_dir = tmp_path / "backup"
+        _create_db(db_path, count=10)
+
+        for name in ["metrics-20240101-000000.db", "metrics-20240102-000000.db", "log-20240101-000000.db"]:
+            backup_dir.mkdir(exist_ok=True)
+            (backup_dir / name).write_bytes(b"")
+
+        snapshot_path = rasp_shutter.backup.snapshot(db_path, backup_dir, keep=2)
+
+        assert rasp_shutter.backup.snapshot_list(backup_dir, db_path) == [
+            backup_dir / "metrics-20240102-000000.db",
+            snapshot_path,
+        ]
+        # NOTE: 他の DB のスナップショットは消さない
+        assert (backup_dir / "log-20240101-000000.db").exists()
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("DELETE FROM sample")
+        conn.commit()
+        conn.close()
+
+        rasp_shutter.backup.restore(snapshot_path, db_path)
+        assert _count(db_path) == 10
+
+
+class TestBackupConfig:
+    """backup セクションのパースのテスト"""
+
+    def test_parse(self, tmp_path):
+        import rasp_shutter.config
+
+        assert rasp_shutter.config._parse_backup(None) is None
+
+        backup = rasp_shutter.config._parse_backup({"dir_path": str(tmp_path)})
+        assert backup is not None
+        assert backup.dir_path == tmp_path
+        assert backup.interval_hour == 24.0
+        assert backup.keep == 7
@@ -177,3 +177,131 @@ class TestBrightnessText:
         sense_data = SensorDataFactory.custom(solar_rad=150, lux=1000, altitude=10)
         result = rasp_shutter.control.scheduler.brightness_text(sense_data, schedule_data)
         assert "=" in result
+
+
+class TestBrightnessFilter:
+    """BrightnessFilter（移動平均・ヒステリシス・最小継続時間）のテスト"""
+
+    OPEN_ENTRY = {"solar_rad": 150, "lux": 1000, "altitude": 10}  # noqa: RUF012
+
+    @staticmethod
+    def _filter(**kwargs):
+        import rasp_shutter.config
+        import rasp_shutter.control.brightness
+
+        return rasp_shutter.control.brightness.BrightnessFilter(
+            rasp_shutter.config.BrightnessFilterConfig(**kwargs)
+        )
+
+    def _decide(self, brightness_filter, lux, timestamp, sense_data=None):
+        if sense_data is None:
+            sense_data = SensorDataFactory.custom(solar_rad=500, lux=lux, altitude=30)
+        return brightness_filter.decide(sense_data, "open", self.OPEN_ENTRY, timestamp)
+
+    def test_disabled_is_instantaneous(self):
+        """設定が省略されていれば瞬時値で判定する"""
+        import rasp_shutter.control.brightness
+
+        BRIGHTNESS_STATE = rasp_shutter.control.brightness.BRIGHTNESS_STATE
+        brightness_filter = self._filter()
+
+        assert self._decide(brightness_filter, 1100, 0) == BRIGHTNESS_STATE.BRIGHT
+        assert self._decide(brightness_filter, 900, 1) == BRIGHTNESS_STATE.DARK
+        assert self._decide(brightness_filter, 1100, 2) == BRIGHTNESS_STATE.BRIGHT
+
+    def test_hysteresis(self):
+        """閾値付近のノイズでは判定が反転しない"""
+        import rasp_shutter.control.brightness
+
+        BRIGHTNESS_STATE = rasp_shutter.control.brightness.BRIGHTNESS_STATE
+        brightness_filter = self._filter(hysteresis_ratio=0.1)
+
+        assert self._decide(brightness_filter, 900, 0) == BRIGHTNESS_STATE.DARK
+        # 閾値は越えたが不感帯（+10%）の内側
+        assert self._decide(brightness_filter, 1050, 1) == BRIGHTNESS_STATE.DARK
+        assert self._decide(brightness_filter, 1150, 2) == BRIGHTNESS_STATE.BRIGHT
+        # 閾値を下回ったが不感帯（-10%）の内側
+        assert self._decide(brightness_filter, 950, 3) == BRIGHTNESS_STATE.BRIGHT
+        assert self._decide(brightness_filter, 850, 4) == BRIGHTNESS_STATE.DARK
+
+    def test_dwell(self):
+        """反転候補が最小継続時間続くまで判定を維持する"""
+        import rasp_shutter.control.brightness
+
+        BRIGHTNESS_STATE = rasp_shutter.control.brightness.BRIGHTNESS_STATE
+        brightness_filter = self._filter(dwell_sec=10)
+
+        # 最初の判定も最小継続時間が経つまでは確定しない
+        assert self._decide(brightness_filter, 900, 0) == BRIGHTNESS_STATE.UNKNOWN
+        assert self._decide(brightness_filter, 900, 10) == BRIGHTNESS_STATE.DARK
+        assert self._decide(brightness_filter, 1100, 11) == BRIGHTNESS_STATE.DARK
+        # 候補が途切れると計測し直す
+        assert self._decide(brightness_filter, 900, 15) == BRIGHTNESS_STATE.DARK
+        assert self._decide(brightness_filter, 1100, 16) == BRIGHTNESS_STATE.DARK
+        assert self._decide(brightness_filter, 1100, 25) == BRIGHTNESS_STATE.DARK
+        assert self._decide(brightness_filter, 1100, 26) == BRIGHTNESS_STATE.BRIGHT
+
+    def test_rolling_mean(self):
+        """時間窓内の平均値で判定する"""
+        import rasp_shutter.control.brightness
+
+        BRIGHTNESS_STATE = rasp_shutter.control.brightness.BRIGHTNESS_STATE
+        brightness_filter = self._filter(window_sec=3)
+
+        assert self._decide(brightness_filter, 900, 0) == BRIGHTNESS_STATE.DARK
+        # 平均 (900 + 900 + 1500) / 3 = 1100
+        assert self._decide(brightness_filter, 900, 1) == BRIGHTNESS_STATE.DARK
+        assert self._decide(brightness_filter, 1500, 2) == BRIGHTNESS_STATE.BRIGHT
+        # 先頭のサンプルが窓から外れて平均 (900 + 1500 + 500) / 3 < 1000
+        assert self._decide(brightness_filter, 500, 3) == BRIGHTNESS_STATE.DARK
+
+    def test_reset_after_gap(self):
+        """読み取りが途切れたら状態をリセットし、判定は最小継続時間が経ってから確定する"""
+        import rasp_shutter.control.brightness
+
+        BRIGHTNESS_STATE = rasp_shutter.control.brightness.BRIGHTNESS_STATE
+        brightness_filter = self._filter(dwell_sec=10)
+
+        assert self._decide(brightness_filter, 900, 0) == BRIGHTNESS_STATE.UNKNOWN
+        assert self._decide(brightness_filter, 900, 10) == BRIGHTNESS_STATE.DARK
+
+        gap_end = 10 + brightness_filter.stale_sec + 1
+        assert self._decide(brightness_filter, 1100, gap_end) == BRIGHTNESS_STATE.UNKNOWN
+        assert self._decide(brightness_filter, 1100, gap_end + 10) == BRIGHTNESS_STATE.BRIGHT
+
+    def test_no_reset_within_retry_interval(self):
+        """自動制御のリトライ間隔程度の途切れでは状態をリセットしない"""
+        import rasp_shutter.control.brightness
+        import rasp_shutter.control.config
+
+        BRIGHTNESS_STATE = rasp_shutter.control.brightness.BRIGHTNESS_STATE
+        brightness_filter = self._filter(dwell_sec=10)
+
+        assert self._decide(brightness_filter, 900, 0) == BRIGHTNESS_STATE.UNKNOWN
+        assert self._decide(brightness_filter, 900, 10) == BRIGHTNESS_STATE.DARK
+
+        resumed = 10 + rasp_shutter.control.config.AUTO_CONTROL_RETRY_INTERVAL_SEC + 30
+        assert self._decide(brightness_filter, 1100, resumed) == BRIGHTNESS_STATE.DARK
+        assert self._decide(brightness_filter, 1100, resumed + 10) == BRIGHTNESS_STATE.BRIGHT
+
+    def test_cached_reading_counted_once(self):
+        """測定時刻が同じセンサー値を繰り返し読んでも、移動平均には 1 回だけ加える"""
+        import rasp_shutter.control.brightness
+
+        BRIGHTNESS_STATE = rasp_shutter.control.brightness.BRIGHTNESS_STATE
+        brightness_filter = self._filter(window_sec=10)
+
+        cached = SensorDataFactory.custom(solar_rad=500, lux=900, altitude=30)
+        for timestamp in range(3):
+            assert self._decide(brightness_filter, 900, timestamp, cached) == BRIGHTNESS_STATE.DARK
+        # 平均 (900 + 1200) / 2 = 1050（3 回読んだ分を数えると (900 * 3 + 1200) / 4 = 975）
+        assert self._decide(brightness_filter, 1200, 3) == BRIGHTNESS_STATE.BRIGHT
+
+    def test_invalid_sensor(self):
+        """センサー値が無効なら UNKNOWN"""
+        import rasp_shutter.control.brightness
+
+        brightness_filter = self._filter(dwell_sec=10)
+        result = brightness_filter.decide(SensorDataFactory.invalid_lux(), "open", self.OPEN_ENTRY, 0)
+
+        assert result == rasp_shutter.control.brightness.BRIGHTNESS_STATE.UNKNOWN
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# ruff: noqa: S101
+"""仮想の時計（rasp_shutter.clock）と StepScheduler のユニットテスト"""
+
+import datetime
+import pathlib
+import time
+import types
+import zoneinfo
+
+import pytest
+
+from tests.fixtures.schedule_factory import ScheduleFactory
+from tests.fixtures.sensor_factory import SensorDataFactory
+
+TZ = zoneinfo.ZoneInfo("Asia/Tokyo")
+# NOTE: 2026-06-01 は月曜日
+START = datetime.datetime(2026, 6, 1, 0, 0, tzinfo=TZ)
+
+
+class TestVirtualClock:
+    """VirtualClock のテスト"""
+
+    def test_advance_and_sleep(self):
+        """advance() と sleep() は待たずに時刻を進める"""
+        import rasp_shutter.clock
+
+        clock = rasp_shutter.clock.VirtualClock(START)
+
+        wall_start = time.perf_counter()
+        clock.sleep(3600)
+        clock.advance(30)
+        assert time.perf_counter() - wall_start < 1
+
+        assert clock.now() == START + datetime.timedelta(hours=1, seconds=30)
+        assert clock.monotonic() == 3630
+
+    def test_naive_start(self):
+        """タイムゾーンの無い開始時刻はローカルの時刻として扱う"""
+        import my_lib.time
+
+        import rasp_shutter.clock
+
+        clock = rasp_shutter.clock.VirtualClock(datetime.datetime(2026, 6, 1, 8, 0))
+        assert clock.now().tzinfo == my_lib.time.get_zoneinfo()
+
+    def test_footprint(self):
+        """footprint は仮想の時刻で記録され、ファイルは作成しない"""
+        import rasp_shutter.clock
+
+        clock = rasp_shutter.clock.VirtualClock(START)
+        path_a = pathlib.Path("/nonexistent/a")
+        path_b = pathlib.Path("/nonexistent/b")
+
+        assert not clock.footprint_exists(path_a)
+        assert clock.footprint_elapsed(path_a) == float("inf")
+
+        clock.footprint_update(path_a)
+        clock.advance(60)
+        clock.footprint_update(path_b)
+        clock.advance(30)
+
+        assert clock.footprint_elapsed(path_a) == 90
+        assert clock.footprint_compare(path_b, path_a)
+        assert not path_a.exists()
+
+        clock.footprint_clear(path_a)
+        assert not clock.footprint_exists(path_a)
+
+    def test_use(self):
+        """use() の間だけ now() と footprint が差し替わる"""
+        import rasp_shutter.clock
+        import rasp_shutter.util
+
+        clock = rasp_shutter.clock.VirtualClock(START)
+        path = pathlib.Path("/nonexistent/footprint")
+
+        with rasp_shutter.clock.use(clock):
+            assert rasp_shutter.clock.now() == START
+            rasp_shutter.util.footprint_update(path)
+            clock.advance(10)
+            assert rasp_shutter.util.footprint_elapsed(path) == 10
+
+        assert isinstance(rasp_shutter.clock.get(), rasp_shutter.clock.SystemClock)
+        assert not isinstance(rasp_shutter.clock.get(), rasp_shutter.clock.VirtualClock)
+
+
+@pytest.fixture
+def step_env(tmp_path, monkeypatch, mocker):
+    """StepScheduler で 1 台のシャッターを制御する環境（センサー値は仮想の時刻で決まる）"""
+    import rasp_shutter.clock
+    import rasp_shutter.config
+    import rasp_shutter.control.scheduler
+    import rasp_shutter.control.webapi.control
+    import rasp_shutter.metrics.collector
+
+    monkeypatch.setenv("DUMMY_MODE", "true")
+    monkeypatch.setattr(rasp_shutter.config, "_environment", types.SimpleNamespace(stat_dir_path=tmp_path))
+    mocker.patch("my_lib.webapp.log.info")
+    mocker.patch("my_lib.webapp.log.error")
+
+    config = types.SimpleNamespace(
+        shutter=[
+            rasp_shutter.config.ShutterConfig(
+                name="リビング",
+                endpoint=rasp_shutter.config.ShutterEndpointConfig(open="", close=""),
+            )
+        ],
+        metrics=rasp_shutter.config.MetricsConfig(data=tmp_path / "metrics.db"),
+        brightness_filter=rasp_shutter.config.BrightnessFilterConfig(),
+    )
+    clock = rasp_shutter.clock.VirtualClock(START)
+
+    def get_sensor_data(_config):
+        # NOTE: 7 時から 17 時まで明るい
+        hour = clock.now().hour
+        return SensorDataFactory.bright() if 7 <= hour < 17 else SensorDataFactory.dark()
+
+    mocker.patch("rasp_shutter.control.webapi.sensor.get_sensor_data", side_effect=get_sensor_data)
+
+    rasp_shutter.metrics.collector.reset_collector()
+    rasp_shutter.control.webapi.control.init()
+    rasp_shutter.control.scheduler.reset_auto_control_failure_state()
+
+    with rasp_shutter.clock.use(clock):
+        yield config, clock
+
+    rasp_shutter.control.scheduler.set_schedule_data(None)
+    rasp_shutter.control.scheduler.reset_auto_control_failure_state()
+    rasp_shutter.control.webapi.control.init()
+    rasp_shutter.metrics.collector.reset_collector()
+
+
+def _device_commands():
+    import rasp_shutter.control.webapi.control
+
+    return [
+        (cmd["state"], cmd["index"]) for cmd in rasp_shutter.control.webapi.control.cmd_hist if "index" in cmd
+    ]
+
+
+class TestStepScheduler:
+    """StepScheduler のテスト"""
+
+    def test_due_jobs(self, step_env):
+        """進める区間に実行時刻が入るジョブを、曜日を考慮して時刻順に返す"""
+        import rasp_shutter.control.scheduler
+
+        config, clock = step_env
+        # NOTE: 月曜日だけ有効
+        wday = [False, True, False, False, False, False, False]
+        step_scheduler = rasp_shutter.control.scheduler.StepScheduler(
+            config, clock, ScheduleFactory.create(open_time="08:00", close_time="17:30", wday=wday)
+        )
+
+        job_list = step_scheduler.due_jobs(START, START + datetime.timedelta(days=2))
+        assert [(run_at.strftime("%a %H:%M"), state) for run_at, state, _ in job_list] == [
+            ("Mon 08:00", "open"),
+            ("Mon 17:30", "close"),
+        ]
+        # NOTE: 区間の開始時刻ちょうどのジョブは前の区間で実行済み
+        assert step_scheduler.due_jobs(START.replace(hour=8), START.replace(hour=9)) == []
+
+    def test_simulated_day(self, step_env):
+        """1 日分のスケジュール制御・自動制御を、実際の時間を待たずに実行する"""
+        import rasp_shutter.control.scheduler
+
+        config, clock = step_env
+        step_scheduler = rasp_shutter.control.scheduler.StepScheduler(
+            config, clock, ScheduleFactory.create(open_time="08:00", close_time="18:00")
+        )
+
+        wall_start = time.perf_counter()
+        step_scheduler.advance(24 * 60 * 60)
+        wall_elapsed = time.perf_counter() - wall_start
+
+        assert clock.now() == START + datetime.timedelta(days=1)
+        # NOTE: 8 時に開け、暗くなった 17 時に自動で閉める（18 時のスケジュールは閉めた直後なので見合わせる）
+        assert _device_commands() == [("open", 0), ("close", 0)]
+        assert wall_elapsed < 5
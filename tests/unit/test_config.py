@@ -59,6 +59,58 @@ class TestConfigLoad:
             assert hasattr(error_config, "channel")
 
 
+class TestGroupSceneConfig:
+    """グループ・シーン設定のテスト"""
+
+    def test_example_group_scene(self):
+        """example設定のグループとシーンがインデックスに解決される"""
+        import rasp_shutter.config
+
+        config = rasp_shutter.config.load("config.example.yaml", pathlib.Path("config.schema"))
+
+        group = config.find_group("リビング")
+        assert group is not None
+        assert group.index_list == [0, 1]
+
+        scene = config.find_scene("おやすみ")
+        assert scene is not None
+        assert scene.target_list() == [(0, "close"), (1, "close")]
+
+        scene = config.find_scene("おはよう")
+        assert scene is not None
+        assert scene.target_list() == [(0, "open")]
+
+        assert config.find_scene("存在しない") is None
+
+    def test_unknown_shutter_name(self):
+        """存在しないシャッター名を指定するとエラー"""
+        import rasp_shutter.config
+
+        raw_config = my_lib.config.load("config.example.yaml", pathlib.Path("config.schema"))
+        raw_config["scene"] = [{"name": "test", "action": [{"target": "存在しない", "state": "open"}]}]
+
+        with pytest.raises(ValueError, match="Unknown shutter name"):
+            rasp_shutter.config.parse_config(raw_config)
+
+    def test_duplicated_shutter_in_scene(self):
+        """シーン内で同じシャッターを重複指定するとエラー"""
+        import rasp_shutter.config
+
+        raw_config = my_lib.config.load("config.example.yaml", pathlib.Path("config.schema"))
+        raw_config["scene"] = [
+            {
+                "name": "test",
+                "action": [
+                    {"target": "リビング", "state": "open"},
+                    {"target": "リビング①", "state": "close"},
+                ],
+            }
+        ]
+
+        with pytest.raises(ValueError, match="duplicated"):
+            rasp_shutter.config.parse_config(raw_config)
+
+
 class TestBuildEnvironment:
     """WebappEnvironment 生成のテスト"""
 
@@ -164,6 +164,39 @@ class TestCallShutterApi:
 
         assert result is False
 
+    def test_device_health(self, monkeypatch):
+        """連続して失敗すると failing になり、成功するとリセットされる"""
+        import types
+
+        import rasp_shutter.config
+        import rasp_shutter.control.config
+        import rasp_shutter.control.webapi.control
+
+        control = rasp_shutter.control.webapi.control
+        shutter = rasp_shutter.config.ShutterConfig(
+            name="test",
+            endpoint=rasp_shutter.config.ShutterEndpointConfig(
+                open="http://localhost:1/open",
+                close="http://localhost:1/close",
+            ),
+        )
+        config = types.SimpleNamespace(shutter=[shutter])
+        control.reset_device_failures()
+
+        try:
+            for _ in range(rasp_shutter.control.config.DEVICE_FAILURE_THRESHOLD):
+                control._record_device_result(0, False)
+            health = control.get_device_health(config)  # type: ignore[arg-type]
+            assert health[0].state == "failing"
+            assert health[0].consecutive_failures == rasp_shutter.control.config.DEVICE_FAILURE_THRESHOLD
+
+            control._record_device_result(0, True)
+            health = control.get_device_health(config)  # type: ignore[arg-type]
+            assert health[0].state == "ok"
+            assert health[0].consecutive_failures == 0
+        finally:
+            control.reset_device_failures()
+
 
 class TestCmdHist:
     """制御履歴のテスト"""
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# ruff: noqa: S101
+"""マルチプロセス構成のリーダー選出・転送のユニットテスト"""
+
+import threading
+import types
+
+import flask
+import pytest
+import werkzeug.serving
+
+import rasp_shutter.config
+
+
+class TestLeaderElection:
+    """LeaderElection のテスト"""
+
+    def test_exclusive(self, tmp_path):
+        """ロックを持つのは 1 つだけで、解放されると他が引き継げる"""
+        import rasp_shutter.control.leader
+
+        lock_path = tmp_path / "leader" / "lock"
+        first = rasp_shutter.control.leader.LeaderElection(lock_path)
+        second = rasp_shutter.control.leader.LeaderElection(lock_path)
+
+        try:
+            assert first.try_acquire()
+            assert not second.try_acquire()
+
+            # NOTE: リーダーのプロセス終了時は OS がロックを解放する
+            first.release()
+            assert second.try_acquire()
+            assert not first.try_acquire()
+        finally:
+            first.release()
+            second.release()
+
+
+def _app(name: str) -> flask.Flask:
+    app = flask.Flask(name)
+
+    @app.route(f"{rasp_shutter.config.URL_PREFIX}/api/healthz")
+    def healthz():
+        return flask.jsonify({"name": name, "query": flask.request.args.get("q")})
+
+    @app.route(f"{rasp_shutter.config.URL_PREFIX}/api/sensor")
+    def sensor():
+        return flask.jsonify({"name": name})
+
+    @app.route(f"{rasp_shutter.config.URL_PREFIX}/api/log")
+    def log():
+        return flask.jsonify({"name": name})
+
+    return app
+
+
+@pytest.fixture
+def follower(tmp_path, monkeypatch):
+    import rasp_shutter.control.config
+    import rasp_shutter.control.leader
+
+    socket_path = tmp_path / "sock"
+    monkeypatch.setattr(
+        rasp_shutter.control.config, "LEADER_SOCKET", types.SimpleNamespace(to_path=lambda: socket_path)
+    )
+    monkeypatch.setattr(rasp_shutter.control.leader, "_multi_process", True)
+
+    app = _app("follower")
+    rasp_shutter.control.leader.install(app)
+    yield app.test_client(), socket_path
+
+    rasp_shutter.control.leader._elected.clear()
+
+
+class TestForwardToLeader:
+    """フォロワーからリーダーへの転送のテスト"""
+
+    def test_forward(self, follower):
+        """LEADER_PATHS のルートはリーダーが処理し、それ以外はフォロワーが処理する"""
+        client, socket_path = follower
+        server = werkzeug.serving.make_server(f"unix://{socket_path}", 0, _app("leader"), threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        try:
+            response = client.get(f"{rasp_shutter.config.URL_PREFIX}/api/healthz?q=1")
+            assert response.json == {"name": "leader", "query": "1"}
+
+            # NOTE: センサー値のキャッシュはリーダーにだけある
+            response = client.get(f"{rasp_shutter.config.URL_PREFIX}/api/sensor")
+            assert response.json == {"name": "leader"}
+
+            response = client.get(f"{rasp_shutter.config.URL_PREFIX}/api/log")
+            assert response.json == {"name": "follower"}
+        finally:
+            server.shutdown()
+
+    def test_leader_handles_itself(self, follower):
+        """リーダーに選出されたプロセスは転送しない"""
+        import rasp_shutter.control.leader
+
+        client, _ = follower
+        rasp_shutter.control.leader._elected.set()
+
+        response = client.get(f"{rasp_shutter.config.URL_PREFIX}/api/healthz")
+        assert response.json is not None
+        assert response.json["name"] == "follower"
+
+    def test_leader_unavailable(self, follower):
+        """リーダーが不在なら 503"""
+        client, _ = follower
+
+        response = client.get(f"{rasp_shutter.config.URL_PREFIX}/api/healthz")
+        assert response.status_code == 503
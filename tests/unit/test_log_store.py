@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# ruff: noqa: S101
+"""実行ログ（log.db）の読み出しと保持期間の管理のユニットテスト"""
+
+import datetime
+import sqlite3
+
+import pytest
+
+
+def _create_log_db(path, messages=(), date=None):
+    # NOTE: my_lib.webapp.log が作成するテーブルと同じ形
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS log (id INTEGER primary key autoincrement, date TEXT, message TEXT)"
+    )
+    if date is None:
+        date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn.executemany("INSERT INTO log (date, message) VALUES (?, ?)", [(date, m) for m in messages])
+    conn.commit()
+    conn.close()
+
+
+def _ids(result):
+    return [entry["id"] for entry in result["data"]]
+
+
+class TestFetch:
+    """fetch のテスト"""
+
+    def test_cursor_pagination(self, tmp_path):
+        """before_id で古い方へ、after_id で新しい差分だけを取得できる"""
+        import rasp_shutter.log_store
+
+        db_path = tmp_path / "log.db"
+        _create_log_db(db_path, [f"ログ {i}" for i in range(1, 121)])
+
+        first = rasp_shutter.log_store.fetch(db_path, limit=50)
+        assert _ids(first) == list(range(120, 70, -1))
+        assert first["has_more"]
+
+        last = rasp_shutter.log_store.fetch(db_path, before_id=21, limit=50)
+        assert _ids(last) == list(range(20, 0, -1))
+        assert not last["has_more"]
+
+        _create_log_db(db_path, ["新しいログ 1", "新しいログ 2"])
+        delta = rasp_shutter.log_store.fetch(db_path, after_id=120)
+        assert _ids(delta) == [122, 121]
+        assert delta["data"][0]["message"] == "新しいログ 2"
+        assert not delta["has_more"]
+
+    def test_level_filter(self, tmp_path):
+        """レベルを指定すると、そのレベル以上の行だけを返す"""
+        import rasp_shutter.log_store
+
+        db_path = tmp_path / "log.db"
+        _create_log_db(
+            db_path,
+            [
+                "🔔 シャッターを開けました。",
+                "⚠ センサの値が古いです。",
+                "😵 シャッターの制御に失敗しました。",
+                "📝 暗いので開けるのを見合わせました。",
+            ],
+        )
+
+        result = rasp_shutter.log_store.fetch(db_path, level="error")
+        assert _ids(result) == [3]
+        assert result["data"][0]["level"] == "error"
+
+        assert _ids(rasp_shutter.log_store.fetch(db_path, level="warning")) == [3, 2]
+        assert _ids(rasp_shutter.log_store.fetch(db_path, level="info")) == [4, 3, 2, 1]
+
+        conn = sqlite3.connect(db_path)
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM log INDEXED BY idx_log_level"  # noqa: S608
+            f" WHERE {rasp_shutter.log_store._LEVEL_SQL} >= 1 ORDER BY id DESC LIMIT 10"
+        ).fetchall()
+        conn.close()
+        assert any("idx_log_level" in row[-1] for row in plan)
+
+    def test_keyword_filter(self, tmp_path):
+        """キーワードで絞り込め、索引の作成後に追加・削除した行も反映される"""
+        import rasp_shutter.log_store
+
+        db_path = tmp_path / "log.db"
+        _create_log_db(db_path, ["リビングのシャッターを開けました。", "寝室のシャッターを閉めました。"])
+
+        assert _ids(rasp_shutter.log_store.fetch(db_path, keyword="シャッターを開け")) == [1]
+        # NOTE: trigram で引けない短いキーワードは走査で絞り込む
+        assert _ids(rasp_shutter.log_store.fetch(db_path, keyword="寝室")) == [2]
+
+        _create_log_db(db_path, ["書斎のシャッターを開けました。"])
+        conn = sqlite3.connect(db_path)
+        conn.execute("DELETE FROM log WHERE id = 1")
+        conn.commit()
+        conn.close()
+
+        assert _ids(rasp_shutter.log_store.fetch(db_path, keyword="シャッターを開け")) == [3]
+
+    def test_missing_table(self, tmp_path):
+        """my_lib.webapp.log がテーブルを作成する前は LogStoreError"""
+        import rasp_shutter.log_store
+
+        db_path = tmp_path / "log.db"
+        sqlite3.connect(db_path).close()
+
+        with pytest.raises(rasp_shutter.log_store.LogStoreError):
+            rasp_shutter.log_store.fetch(db_path)
+
+
+class TestCompact:
+    """compact のテスト"""
+
+    def test_retention(self, tmp_path):
+        """保持期間を過ぎた行だけを削除し、空いたページを incremental_vacuum でファイルから返す"""
+        import rasp_shutter.log_store
+
+        db_path = tmp_path / "log.db"
+        old_date = (datetime.datetime.now() - datetime.timedelta(days=400)).strftime("%Y-%m-%d %H:%M:%S")
+        _create_log_db(db_path, ["古いログ" * 50] * 3000, date=old_date)
+        _create_log_db(db_path, ["新しいログ"] * 10)
+        assert rasp_shutter.log_store.enable_incremental_vacuum(db_path)
+        assert not rasp_shutter.log_store.enable_incremental_vacuum(db_path)
+        size_before = db_path.stat().st_size
+
+        deleted = rasp_shutter.log_store.compact(db_path, retention_days=365)
+
+        assert deleted == 3000
+        result = rasp_shutter.log_store.fetch(db_path)
+        assert len(result["data"]) == 10
+        assert not result["has_more"]
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        conn.close()
+        assert db_path.stat().st_size < size_before
+
+        # NOTE: 2 回目は削除する行が無い
+        assert rasp_shutter.log_store.compact(db_path, retention_days=365) == 0
+
+    def test_retention_without_incremental_vacuum(self, tmp_path):
+        """incremental_vacuum に切り替えていなければ、削除だけ行い VACUUM しない"""
+        import rasp_shutter.log_store
+
+        db_path = tmp_path / "log.db"
+        old_date = (datetime.datetime.now() - datetime.timedelta(days=400)).strftime("%Y-%m-%d %H:%M:%S")
+        _create_log_db(db_path, ["古いログ" * 50] * 3000, date=old_date)
+        _create_log_db(db_path, ["新しいログ"] * 10)
+
+        assert rasp_shutter.log_store.compact(db_path, retention_days=365) == 3000
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+        # NOTE: 空いたページはファイルに残り、SQLite が再利用する
+        assert conn.execute("PRAGMA freelist_count").fetchone()[0] > 0
+        conn.close()
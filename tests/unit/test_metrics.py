@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-# ruff: noqa: S101
+# ruff: noqa: S101, S608
 """メトリクスのユニットテスト"""
 
 import datetime
@@ -179,6 +179,71 @@ class TestMetricsCollector:
         events = collector.get_recent_postpone_events(1)
         assert events[0]["resolved_at"] is None
 
+    def test_postpone_cooldown_without_db_access(self, temp_metrics_path, mocker):
+        """クールダウンで抑制する場合は DB を開かない"""
+        import my_lib.sqlite_util
+
+        import rasp_shutter.metrics.collector
+
+        collector = rasp_shutter.metrics.collector.MetricsCollector(temp_metrics_path)
+        assert collector.record_postpone(intended_action="open", trigger="auto", reason="too_dark")
+
+        connect_spy = mocker.spy(my_lib.sqlite_util, "connect")
+        assert not collector.record_postpone(intended_action="open", trigger="auto", reason="too_dark")
+        connect_spy.assert_not_called()
+
+        # NOTE: 理由が違えば記録する
+        assert collector.record_postpone(intended_action="open", trigger="auto", reason="too_cold")
+
+    def test_postpone_index_rebuilt_at_startup(self, temp_metrics_path):
+        """起動し直しても、DB からクールダウンと未解決のイベントを引き継ぐ"""
+        import rasp_shutter.metrics.collector
+
+        timestamp = datetime.datetime(2026, 1, 1, 7, 0, 0)
+        before = rasp_shutter.metrics.collector.MetricsCollector(temp_metrics_path)
+        for minute, action in ((0, "open"), (1, "open"), (2, "close")):
+            assert before.record_postpone(
+                intended_action=action,
+                trigger="schedule",
+                reason="too_dark",
+                timestamp=timestamp + datetime.timedelta(minutes=minute),
+                cooldown_sec=30,
+            )
+
+        collector = rasp_shutter.metrics.collector.MetricsCollector(temp_metrics_path)
+        assert not collector.record_postpone(
+            intended_action="open",
+            trigger="schedule",
+            reason="too_dark",
+            timestamp=timestamp + datetime.timedelta(minutes=1, seconds=10),
+            cooldown_sec=30,
+        )
+
+        collector.record_shutter_operation(
+            action="open", mode="auto", timestamp=timestamp + datetime.timedelta(minutes=5)
+        )
+        events = collector.get_postpone_events(None, None)
+        operation_id = collector.get_all_operation_metrics()[0]["id"]
+        assert [(event["intended_action"], event["resolved_operation_id"]) for event in events] == [
+            ("open", operation_id),
+            ("open", operation_id),
+            ("close", None),
+        ]
+
+        # NOTE: 別の日の見合わせはクールダウンの対象外で、その日の操作では解消しない
+        assert collector.record_postpone(
+            intended_action="close",
+            trigger="schedule",
+            reason="too_dark",
+            timestamp=timestamp + datetime.timedelta(days=1),
+        )
+        collector.record_shutter_operation(
+            action="close", mode="auto", timestamp=timestamp + datetime.timedelta(days=1, minutes=1)
+        )
+        events = collector.get_postpone_events(None, None)
+        assert events[2]["resolved_at"] is None
+        assert events[3]["resolved_at"] is not None
+
     def test_record_sensor_sample(self, temp_metrics_path):
         """センサーサンプル記録のテスト"""
         import rasp_shutter.metrics.collector
@@ -194,6 +259,199 @@ class TestMetricsCollector:
         assert samples[0]["lux"] == 800.0
         assert samples[0]["context"] == "auto_open_window"
 
+    def test_read_only_collector(self, temp_metrics_path):
+        """読み出し専用コレクターは同じ内容を読めて、書き込めない"""
+        import sqlite3
+
+        import rasp_shutter.metrics.collector
+
+        collector = rasp_shutter.metrics.collector.MetricsCollector(temp_metrics_path)
+        collector.record_shutter_operation(action="open", mode="manual", shutter_index=0, shutter_name="居間")
+
+        reader = rasp_shutter.metrics.collector.ReadOnlyMetricsCollector(temp_metrics_path)
+        try:
+            assert reader.get_all_operation_metrics() == collector.get_all_operation_metrics()
+            assert reader.get_shutter_operation_counts() == collector.get_shutter_operation_counts()
+
+            # NOTE: 接続を使い回しても、後から書き込まれた内容が見える
+            collector.record_shutter_operation(action="close", mode="manual")
+            assert len(reader.get_all_operation_metrics()) == 2
+
+            with pytest.raises(sqlite3.OperationalError), reader._reader() as conn:
+                conn.execute("DELETE FROM operation_metrics_v2")
+        finally:
+            reader.close()
+
+
+class TestDashboardWorker:
+    """ダッシュボードデータ生成（ワーカープロセス）のテスト"""
+
+    def test_build_json_in_worker(self, tmp_path, monkeypatch):
+        """ワーカープロセスで生成した JSON がプロセス内で生成したものと一致する"""
+        import json
+
+        import rasp_shutter.metrics.analyzer
+        import rasp_shutter.metrics.collector
+        import rasp_shutter.metrics.dashboard
+        from tests.fixtures.schedule_factory import ScheduleFactory
+
+        db_path = tmp_path / "metrics.db"
+        collector = rasp_shutter.metrics.collector.MetricsCollector(db_path)
+        collector.record_shutter_operation(action="open", mode="manual", shutter_index=0, shutter_name="居間")
+        collector.record_failure(shutter_index=1, shutter_name="寝室")
+        schedule_data = ScheduleFactory.create()
+
+        monkeypatch.delenv("TEST")
+        try:
+            body = rasp_shutter.metrics.dashboard.build_json(db_path, schedule_data)
+        finally:
+            rasp_shutter.metrics.dashboard.term()
+
+        assert json.loads(body) == json.loads(
+            json.dumps(rasp_shutter.metrics.analyzer.build_dashboard_data(collector, schedule_data))
+        )
+
+    def test_discard_hung_worker(self, tmp_path, monkeypatch):
+        """応答しないワーカープロセスは破棄するときに終了させる"""
+        import os
+        import time
+
+        import rasp_shutter.metrics.dashboard
+
+        monkeypatch.delenv("TEST")
+        worker = rasp_shutter.metrics.dashboard._get_worker(tmp_path / "metrics.db")
+        try:
+            pid = worker.call(os.getpid, timeout=30)
+            assert pid == worker.process.pid
+
+            with pytest.raises(rasp_shutter.metrics.dashboard.DashboardError):
+                worker.call(time.sleep, 60, timeout=0.5)
+
+            rasp_shutter.metrics.dashboard._discard_worker(worker)
+        finally:
+            rasp_shutter.metrics.dashboard.term()
+
+        assert not worker.process.is_alive()
+        with pytest.raises(ProcessLookupError):
+            os.kill(pid, 0)
+
+    def test_worker_error(self, tmp_path, monkeypatch):
+        """ワーカープロセスで発生した例外はそのまま送出し、ワーカーは使い続ける"""
+        import os
+
+        import rasp_shutter.metrics.dashboard
+
+        monkeypatch.delenv("TEST")
+        worker = rasp_shutter.metrics.dashboard._get_worker(tmp_path / "metrics.db")
+        try:
+            with pytest.raises(ZeroDivisionError):
+                worker.call(divmod, 1, 0, timeout=30)
+            assert worker.call(os.getpid, timeout=30) == worker.process.pid
+        finally:
+            rasp_shutter.metrics.dashboard.term()
+
+    def test_materializer_debounce(self, tmp_path, monkeypatch):
+        """メトリクスの書き込みをまとめて 1 回だけファイルを作り直す"""
+        import threading
+
+        import rasp_shutter.metrics.collector
+        import rasp_shutter.metrics.dashboard
+
+        db_path = tmp_path / "metrics.db"
+        collector = rasp_shutter.metrics.collector.MetricsCollector(db_path)
+        calls = []
+        materialized = threading.Event()
+
+        def materialize(metrics_data_path, current_schedule):
+            calls.append(current_schedule)
+            materialized.set()
+
+        monkeypatch.setattr(rasp_shutter.metrics.dashboard, "materialize", materialize)
+        monkeypatch.delenv("TEST")
+        rasp_shutter.metrics.dashboard.start_materializer(db_path, lambda: {"open": {}}, debounce_sec=0.5)
+        try:
+            # NOTE: 起動直後の 1 回
+            assert materialized.wait(5)
+            materialized.clear()
+
+            for _ in range(3):
+                collector.record_failure()
+            assert materialized.wait(5)
+            materialized.clear()
+            assert not materialized.wait(1)
+        finally:
+            rasp_shutter.metrics.dashboard.term()
+
+        assert calls == [{"open": {}}, {"open": {}}]
+
+    def _start_materializer(self, tmp_path, monkeypatch, **kwargs):
+        import threading
+
+        import rasp_shutter.metrics.collector
+        import rasp_shutter.metrics.dashboard
+
+        db_path = tmp_path / "metrics.db"
+        collector = rasp_shutter.metrics.collector.MetricsCollector(db_path)
+        materialized = threading.Event()
+
+        monkeypatch.setattr(
+            rasp_shutter.metrics.dashboard,
+            "materialize",
+            lambda metrics_data_path, current_schedule: materialized.set(),
+        )
+        monkeypatch.delenv("TEST")
+        rasp_shutter.metrics.dashboard.start_materializer(db_path, lambda: None, **kwargs)
+
+        # NOTE: 起動直後の 1 回
+        assert materialized.wait(5)
+        materialized.clear()
+        return collector, materialized
+
+    def test_materializer_ignores_sensor_samples(self, tmp_path, monkeypatch):
+        """センサーサンプルの記録では作り直さない"""
+        import rasp_shutter.metrics.dashboard
+        from tests.fixtures.sensor_factory import SensorDataFactory
+
+        try:
+            collector, materialized = self._start_materializer(tmp_path, monkeypatch, debounce_sec=0.2)
+            collector.record_sensor_sample(SensorDataFactory.bright())
+            collector.cleanup_old_sensor_samples()
+            assert not materialized.wait(1)
+        finally:
+            rasp_shutter.metrics.dashboard.term()
+
+    def test_materializer_trailing_debounce(self, tmp_path, monkeypatch):
+        """書き込みのたびに待ち直し、書き込みが続いても max_wait_sec で作り直す"""
+        import time
+
+        import rasp_shutter.metrics.dashboard
+
+        try:
+            collector, materialized = self._start_materializer(
+                tmp_path, monkeypatch, debounce_sec=0.5, max_wait_sec=2.0
+            )
+            start = time.monotonic()
+            # NOTE: debounce_sec より短い間隔で書き込み続ける
+            while not materialized.is_set() and time.monotonic() - start < 5:
+                collector.record_failure()
+                time.sleep(0.2)
+            elapsed = time.monotonic() - start
+        finally:
+            rasp_shutter.metrics.dashboard.term()
+
+        assert materialized.is_set()
+        assert 1.5 <= elapsed < 3.5
+
+    def test_materializer_refresh(self, tmp_path, monkeypatch):
+        """書き込みが無くても refresh_sec ごとに作り直す"""
+        import rasp_shutter.metrics.dashboard
+
+        try:
+            _, materialized = self._start_materializer(tmp_path, monkeypatch, refresh_sec=0.5)
+            assert materialized.wait(5)
+        finally:
+            rasp_shutter.metrics.dashboard.term()
+
 
 class TestMetricsStatistics:
     """メトリクス統計のテスト"""
@@ -491,6 +749,7 @@ class TestSchemaMigration:
         import rasp_shutter.metrics.collector
 
         collector = rasp_shutter.metrics.collector.MetricsCollector(old_schema_db_path)
+        assert collector.migrate()
 
         conn = sqlite3.connect(old_schema_db_path)
         try:
@@ -519,6 +778,233 @@ class TestSchemaMigration:
         assert failures[0]["shutter_index"] == 1
         assert failures[0]["shutter_name"] == "リビング②"
 
+    @pytest.fixture
+    def v1_db_path(self, tmp_path):
+        """文字列で時刻・種別を保存する v1 スキーマの DB を作成"""
+        import sqlite3
+
+        db_path = tmp_path / "v1_metrics.db"
+        conn = sqlite3.connect(db_path)
+        conn.executescript("""
+            CREATE TABLE operation_metrics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TIMESTAMP NOT NULL, date TEXT NOT NULL,
+                action TEXT NOT NULL, operation_type TEXT NOT NULL, lux REAL, solar_rad REAL, altitude REAL,
+                shutter_index INTEGER, shutter_name TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE daily_failures (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT NOT NULL, failure_count INTEGER DEFAULT 1,
+                timestamp TIMESTAMP NOT NULL, shutter_index INTEGER, shutter_name TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE postpone_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TIMESTAMP NOT NULL, date TEXT NOT NULL,
+                intended_action TEXT NOT NULL, trigger TEXT NOT NULL, scheduled_time TIMESTAMP,
+                reason TEXT NOT NULL, lux REAL, solar_rad REAL, altitude REAL, threshold_lux REAL,
+                threshold_solar_rad REAL, threshold_altitude REAL, resolved_at TIMESTAMP,
+                resolved_operation_id INTEGER, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE sensor_samples (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TIMESTAMP NOT NULL, date TEXT NOT NULL,
+                lux REAL, solar_rad REAL, altitude REAL, context TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE INDEX idx_operation_metrics_date_type ON operation_metrics(date, operation_type, action);
+
+            INSERT INTO operation_metrics
+                (timestamp, date, action, operation_type, lux, shutter_index, shutter_name, created_at)
+                VALUES ('2026-01-01T07:30:15.123456+09:00', '2026-01-01', 'open', 'auto', 1200.0, 0, 'S0',
+                        '2025-12-31 22:30:15');
+            INSERT INTO operation_metrics (timestamp, date, action, operation_type)
+                VALUES ('2026-01-01T17:00:00', '2026-01-01', 'close', 'manual');
+            INSERT INTO daily_failures (date, timestamp) VALUES ('2026-01-02', '2026-01-02T08:00:00+09:00');
+            INSERT INTO postpone_events
+                (timestamp, date, intended_action, trigger, scheduled_time, reason, threshold_lux,
+                 resolved_at, resolved_operation_id)
+                VALUES ('2026-01-01T07:00:00+09:00', '2026-01-01', 'open', 'schedule',
+                        '2026-01-01T07:00:00+09:00', 'too_dark', 1000.0, '2026-01-01T07:30:15+09:00', 1);
+            INSERT INTO postpone_events (timestamp, date, intended_action, trigger, reason)
+                VALUES ('2026-01-01T18:00:00+09:00', '2026-01-01', 'close', 'auto', 'custom_reason');
+            INSERT INTO sensor_samples (timestamp, date, lux, context)
+                VALUES ('2026-01-01T07:00:00+09:00', '2026-01-01', 10.0, 'auto_open_window');
+            INSERT INTO sensor_samples (timestamp, date, lux, context)
+                VALUES ('2026-01-01T23:59:00+09:00', '2026-01-01', 0.0, NULL);
+        """)
+        conn.commit()
+        conn.close()
+        return db_path
+
+    def test_migration_to_v2(self, v1_db_path):
+        """v1 の行が v2 に移り、互換ビューから v1 と同じ形で読める"""
+        import sqlite3
+
+        import rasp_shutter.metrics.collector
+
+        collector = rasp_shutter.metrics.collector.MetricsCollector(v1_db_path)
+        assert collector.migrate()
+
+        conn = sqlite3.connect(v1_db_path)
+        try:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            assert not any(table.endswith("_v1") for table in tables)
+            assert "operation_metrics_v2" in tables
+        finally:
+            conn.close()
+
+        with collector._reader() as conn:
+            rows = conn.execute(
+                "SELECT timestamp, date, action, operation_type, created_at "
+                "FROM operation_metrics ORDER BY id"
+            ).fetchall()
+        assert rows == [
+            ("2026-01-01T07:30:15+09:00", "2026-01-01", "open", "auto", "2025-12-31 22:30:15"),
+            # NOTE: タイムゾーンの無い時刻はアプリのタイムゾーンの時刻として扱う
+            ("2026-01-01T17:00:00+09:00", "2026-01-01", "close", "manual", rows[1][4]),
+        ]
+
+        metrics = collector.get_all_operation_metrics()
+        assert metrics[0]["lux"] == 1200.0
+        assert metrics[0]["shutter_name"] == "S0"
+
+        failures = collector.get_all_failure_metrics()
+        assert [(row["date"], row["failure_count"]) for row in failures] == [("2026-01-02", 1)]
+
+        events = collector.get_postpone_events(None, None)
+        assert [(row["reason"], row["trigger"], row["resolved_at"]) for row in events] == [
+            ("too_dark", "schedule", "2026-01-01T07:30:15+09:00"),
+            ("custom_reason", "auto", None),
+        ]
+        assert events[0]["scheduled_time"] == "2026-01-01T07:00:00+09:00"
+        assert events[0]["resolved_operation_id"] == metrics[0]["id"]
+
+        samples = collector.get_sensor_samples(None, None)
+        assert [sample["context"] for sample in samples] == ["auto_open_window", None]
+
+        # NOTE: 移行後の記録は移した行と id が重ならない
+        collector.record_shutter_operation(action="open", mode="schedule")
+        assert len({row["id"] for row in collector.get_all_operation_metrics()}) == 3
+
+    def test_migration_resumable(self, v1_db_path):
+        """移行が途中で止まっても、次回の起動で残りを移す"""
+        import sqlite3
+
+        import rasp_shutter.metrics.collector
+        import rasp_shutter.metrics.schema
+
+        conn = sqlite3.connect(v1_db_path)
+        rasp_shutter.metrics.schema.create(conn)
+        assert rasp_shutter.metrics.schema.migrate_legacy_batch(conn, "sensor_samples", batch_rows=1) == 1
+        conn.commit()
+        assert rasp_shutter.metrics.schema.legacy_tables(conn) == list(rasp_shutter.metrics.schema.TABLES)
+        conn.close()
+
+        collector = rasp_shutter.metrics.collector.MetricsCollector(v1_db_path)
+        assert collector.migrate()
+
+        assert len(collector.get_sensor_samples(None, None)) == 2
+        assert len(collector.get_all_operation_metrics()) == 2
+        with collector._reader() as conn:
+            assert rasp_shutter.metrics.schema.legacy_tables(conn) == []
+
+    def test_schema_version(self, tmp_path):
+        """新規 DB は最新のバージョンになり、backfill するものは無い"""
+        import sqlite3
+
+        import rasp_shutter.metrics.collector
+        import rasp_shutter.metrics.migration
+        import rasp_shutter.metrics.schema
+
+        steps = rasp_shutter.metrics.migration.STEPS
+        assert [step.version for step in steps] == sorted({step.version for step in steps})
+        assert rasp_shutter.metrics.migration.LATEST_VERSION == rasp_shutter.metrics.schema.VERSION
+
+        db_path = tmp_path / "test_metrics.db"
+        rasp_shutter.metrics.collector.MetricsCollector(db_path)
+
+        conn = sqlite3.connect(db_path)
+        try:
+            status = rasp_shutter.metrics.migration.status(conn)
+            assert status["version"] == rasp_shutter.metrics.migration.LATEST_VERSION
+            assert status["in_progress"] is False
+            assert rasp_shutter.metrics.migration.pending(conn) == []
+        finally:
+            conn.close()
+
+    def test_background_migration_progress(self, v1_db_path):
+        """起動時は DDL だけを行い、backfill はバッチごとに進んで進捗が記録される"""
+        import sqlite3
+        import threading
+
+        import rasp_shutter.metrics.collector
+        import rasp_shutter.metrics.migration
+
+        collector = rasp_shutter.metrics.collector.MetricsCollector(v1_db_path)
+
+        conn = sqlite3.connect(v1_db_path)
+        try:
+            status = rasp_shutter.metrics.migration.status(conn)
+        finally:
+            conn.close()
+        assert status["version"] == rasp_shutter.metrics.migration.LATEST_VERSION
+        assert status["in_progress"] is True
+        # NOTE: 起動時に移すのは各テーブルの最も新しい行だけ（7 行のうち 4 行）
+        assert [(step["total_rows"], step["done_rows"]) for step in status["steps"]] == [(3, 0)]
+        assert [row["id"] for row in collector.get_all_operation_metrics()] == [2]
+
+        # NOTE: 移行中も記録でき、未移行の行と id が重ならない
+        collector.record_shutter_operation(action="open", mode="manual")
+        assert [row["id"] for row in collector.get_all_operation_metrics()] == [2, 3]
+
+        # NOTE: 停止の指示があれば、1 バッチ進めたところで中断する
+        should_terminate = threading.Event()
+        should_terminate.set()
+        assert not collector.migrate(should_terminate, batch_rows=1)
+        assert [row["id"] for row in collector.get_all_operation_metrics()] == [1, 2, 3]
+
+        assert collector.migrate(batch_rows=3)
+        conn = sqlite3.connect(v1_db_path)
+        try:
+            status = rasp_shutter.metrics.migration.status(conn)
+        finally:
+            conn.close()
+        assert status["in_progress"] is False
+        assert status["steps"][0]["done_rows"] == 3
+        assert status["steps"][0]["progress"] == 1.0
+        assert status["steps"][0]["completed_at"] is not None
+        assert len(collector.get_all_operation_metrics()) == 3
+
+    def test_newer_schema_rejected(self, tmp_path):
+        """このアプリより新しいスキーマの DB は扱わない"""
+        import sqlite3
+
+        import rasp_shutter.metrics.collector
+        import rasp_shutter.metrics.migration
+
+        db_path = tmp_path / "test_metrics.db"
+        conn = sqlite3.connect(db_path)
+        conn.execute(f"PRAGMA user_version = {rasp_shutter.metrics.migration.LATEST_VERSION + 1}")
+        conn.close()
+
+        with pytest.raises(rasp_shutter.metrics.migration.MigrationError):
+            rasp_shutter.metrics.collector.MetricsCollector(db_path)
+
+    def test_minute_of_day_without_parsing(self, tmp_path):
+        """v2 の行の時刻は文字列をパースせずに求められ、パースした結果と一致する"""
+        import rasp_shutter.metrics.analyzer
+        import rasp_shutter.metrics.collector
+
+        collector = rasp_shutter.metrics.collector.MetricsCollector(tmp_path / "test_metrics.db")
+        timestamp = datetime.datetime(2026, 1, 1, 23, 45, 30)
+        collector.record_shutter_operation(action="close", mode="auto", timestamp=timestamp)
+
+        row = collector.get_all_operation_metrics()[0]
+        assert row["date"] == "2026-01-01"
+        assert rasp_shutter.metrics.analyzer._minute_of_day(row) == 23 * 60 + 45
+
+        with collector._reader() as conn:
+            (timestamp,) = conn.execute("SELECT timestamp FROM operation_metrics").fetchone()
+        assert timestamp == "2026-01-01T23:45:30+09:00"
+        assert rasp_shutter.metrics.analyzer._minute_of_day({"timestamp": timestamp}) == 23 * 60 + 45
+
 
 class TestSensorSampleCleanup:
     """センサーサンプルのクリーンアップのテスト"""
@@ -645,6 +1131,98 @@ class TestShutterCounts:
         assert counts_day1_only == [{"date": "2026-01-01", "count": 2}]
 
 
+class TestDashboardQuery:
+    """期間・シャッター・セクションでの絞り込みのテスト"""
+
+    @pytest.fixture
+    def collector(self, tmp_path):
+        import rasp_shutter.metrics.collector
+
+        collector = rasp_shutter.metrics.collector.MetricsCollector(tmp_path / "test_metrics.db")
+        for day, index in ((1, 0), (2, 1), (3, 0)):
+            timestamp = datetime.datetime(2026, 1, day, 8, 0, 0)
+            collector.record_shutter_operation(
+                action="open",
+                mode="manual",
+                timestamp=timestamp,
+                shutter_index=index,
+                shutter_name=f"S{index}",
+            )
+            collector.record_failure(timestamp=timestamp, shutter_index=index, shutter_name=f"S{index}")
+        return collector
+
+    def test_filtered_queries(self, collector):
+        """期間とシャッターで絞り込める"""
+        metrics = collector.get_operation_metrics("2026-01-02", None)
+        assert [row["date"] for row in metrics] == ["2026-01-02", "2026-01-03"]
+
+        metrics = collector.get_operation_metrics(None, "2026-01-02", shutter_index=0)
+        assert [row["date"] for row in metrics] == ["2026-01-01"]
+
+        counts = collector.get_daily_failure_counts("2026-01-01", "2026-01-03", shutter_index=0)
+        assert counts == [{"date": "2026-01-01", "count": 1}, {"date": "2026-01-03", "count": 1}]
+
+        counts = collector.get_shutter_failure_counts("2026-01-02", "2026-01-03")
+        assert sorted((row["shutter_index"], row["count"]) for row in counts) == [(0, 1), (1, 1)]
+
+    def test_index_used(self, collector):
+        """絞り込みは複合インデックスの範囲検索になる"""
+        import rasp_shutter.metrics.collector
+
+        for table in ("operation_metrics", "daily_failures"):
+            where, params = rasp_shutter.metrics.collector.where_clause("2026-01-01", "2026-01-02", 0)
+            with collector._reader() as conn:
+                plan = conn.execute(f"EXPLAIN QUERY PLAN SELECT * FROM {table} {where}", params).fetchall()
+            assert f"idx_{table}_shutter_date" in str(plan)
+
+        where, params = rasp_shutter.metrics.collector.where_clause("2026-01-01", "2026-01-02")
+        with collector._reader() as conn:
+            plan = conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT * FROM operation_metrics {where}", params
+            ).fetchall()
+        assert "idx_operation_metrics_date_type" in str(plan)
+
+    def test_sections(self, collector, mocker):
+        """要求したセクションだけを返し、それ以外に必要なデータは読み出さない"""
+        import rasp_shutter.metrics.analyzer
+
+        postpone_spy = mocker.spy(collector, "get_recent_postpone_events")
+        sensor_spy = mocker.spy(collector, "get_recent_sensor_samples")
+        counts_spy = mocker.spy(collector, "get_shutter_operation_counts")
+
+        query = rasp_shutter.metrics.analyzer.DashboardQuery(
+            start_date="2026-01-02", shutter_index=0, sections=frozenset({"stats", "data_period"})
+        )
+        data = rasp_shutter.metrics.analyzer.build_dashboard_data(collector, None, query)
+
+        assert list(data) == ["data_period", "stats"]
+        assert data["stats"]["manual_open_total"] == 1
+        assert data["stats"]["failure_total"] == 1
+        postpone_spy.assert_not_called()
+        sensor_spy.assert_not_called()
+        counts_spy.assert_not_called()
+
+    def test_all_sections(self, collector):
+        """絞り込まなければ全セクションを返す"""
+        import rasp_shutter.metrics.analyzer
+
+        data = rasp_shutter.metrics.analyzer.build_dashboard_data(collector, None)
+
+        assert tuple(data) == rasp_shutter.metrics.analyzer.DASHBOARD_SECTIONS
+        assert data["stats"]["manual_open_total"] == 3
+
+    def test_sections_match_schema(self):
+        """リクエストのスキーマで受け付けるセクションと analyzer のセクションが一致する"""
+        import typing
+
+        import rasp_shutter.metrics.analyzer
+        import rasp_shutter.schemas
+
+        assert typing.get_args(rasp_shutter.schemas.DashboardSection) == (
+            rasp_shutter.metrics.analyzer.DASHBOARD_SECTIONS
+        )
+
+
 class TestShutterStatistics:
     """generate_shutter_statistics のテスト"""
 
@@ -916,9 +1494,53 @@ class TestThresholdTuning:
         assert result == {
             "shortfall": {"lux": [], "solar_rad": []},
             "what_if": [],
+            "what_if_grid": None,
             "resolve_lag_minutes": [],
         }
 
+    def test_what_if_grid_axes(self):
+        """グリッドの軸は現行の open 閾値から緩和方向に昇順で並ぶ"""
+        import rasp_shutter.metrics.analyzer
+
+        result = rasp_shutter.metrics.analyzer.analyze_threshold_tuning([], self._schedule())
+        grid = result["what_if_grid"]
+
+        assert len(grid["lux"]) == rasp_shutter.metrics.analyzer.WHAT_IF_GRID_STEPS
+        assert grid["lux"][-1] == pytest.approx(1000.0)
+        assert grid["solar_rad"][0] == pytest.approx(200.0 / rasp_shutter.metrics.analyzer.WHAT_IF_GRID_STEPS)
+        assert grid["altitude"][-1] == pytest.approx(10.0)
+        assert grid["altitude"] == sorted(grid["altitude"])
+        assert grid["total_events"] == 0
+
+    def test_what_if_grid_counts(self):
+        """各セルの件数は AND 条件（すべて閾値超え）の総当たりと一致する"""
+        import rasp_shutter.metrics.analyzer
+
+        events = [
+            self._too_dark_open_event(lux=lux, solar_rad=solar_rad, altitude=altitude)
+            for lux in (100.0, 400.0, 980.0)
+            for solar_rad in (4.0, 60.0, 190.0)
+            for altitude in (1.0, 8.0, 9.5)
+        ]
+        events.append(self._too_dark_open_event(lux=None))
+
+        grid = rasp_shutter.metrics.analyzer.analyze_threshold_tuning(events, self._schedule())[
+            "what_if_grid"
+        ]
+
+        assert grid["total_events"] == 27
+        for a_index, altitude in enumerate(grid["altitude"]):
+            for l_index, lux in enumerate(grid["lux"]):
+                for s_index, solar_rad in enumerate(grid["solar_rad"]):
+                    expected = sum(
+                        1
+                        for event in events[:-1]
+                        if event["lux"] > lux
+                        and event["solar_rad"] > solar_rad
+                        and event["altitude"] > altitude
+                    )
+                    assert grid["counts"][a_index][l_index][s_index] == expected
+
 
 class TestSensorSamplesData:
     """prepare_sensor_samples_data のテスト"""
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# ruff: noqa: S101
+"""メトリクスのエクスポートのユニットテスト"""
+
+import csv
+import datetime
+import io
+import json
+
+import pytest
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    import rasp_shutter.metrics.collector
+    import rasp_shutter.metrics.export
+
+    # NOTE: 少ない行数で複数チャンクに分かれるようにする
+    monkeypatch.setattr(rasp_shutter.metrics.export, "CHUNK_ROWS", 3)
+
+    db_path = tmp_path / "metrics.db"
+    collector = rasp_shutter.metrics.collector.MetricsCollector(db_path)
+    for day in range(1, 9):
+        collector.record_shutter_operation(
+            action="open",
+            mode="manual",
+            timestamp=datetime.datetime(2026, 1, day, 8, 0, 0),
+            shutter_index=0,
+            shutter_name="リビング①",
+        )
+    return db_path
+
+
+class TestExport:
+    """rasp_shutter.metrics.export のテスト"""
+
+    def test_csv(self, db_path):
+        """ヘッダー付きの CSV を期間で絞り込んで返す"""
+        import rasp_shutter.metrics.export
+
+        chunks = list(
+            rasp_shutter.metrics.export.stream(
+                db_path, "operation_metrics", "csv", "2026-01-02", "2026-01-07"
+            )
+        )
+        rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode("utf-8-sig"))))
+
+        # NOTE: ヘッダー + 6 行を 3 行ずつ
+        assert len(chunks) == 3
+        assert [row["date"] for row in rows] == [f"2026-01-0{day}" for day in range(2, 8)]
+        assert rows[0]["shutter_name"] == "リビング①"
+
+    def test_ndjson(self, db_path):
+        """1 行 1 オブジェクトの JSON を返す"""
+        import rasp_shutter.metrics.export
+
+        body = b"".join(rasp_shutter.metrics.export.stream(db_path, "operation_metrics", "ndjson"))
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+
+        assert len(rows) == 8
+        assert rows[0]["action"] == "open"
+        assert rows[0]["shutter_index"] == 0
+
+    def test_parquet(self, db_path):
+        """チャンクごとに row group を持つ圧縮された Parquet を返す"""
+        pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+        import rasp_shutter.metrics.export
+
+        body = b"".join(rasp_shutter.metrics.export.stream(db_path, "operation_metrics", "parquet"))
+        parquet_file = pyarrow_parquet.ParquetFile(io.BytesIO(body))
+        table = parquet_file.read()
+
+        assert table.num_rows == 8
+        assert parquet_file.metadata.num_row_groups == 3
+        assert parquet_file.metadata.row_group(0).column(0).compression == "ZSTD"
+        assert table.column("shutter_index").to_pylist() == [0] * 8
+
+    def test_invalid(self, db_path):
+        """不正なテーブル・形式は読み出す前にエラー"""
+        import rasp_shutter.metrics.export
+
+        with pytest.raises(rasp_shutter.metrics.export.ExportError):
+            rasp_shutter.metrics.export.stream(db_path, "sqlite_master", "csv")
+        with pytest.raises(rasp_shutter.metrics.export.ExportError):
+            rasp_shutter.metrics.export.stream(db_path, "operation_metrics", "xlsx")
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# ruff: noqa: S101
+"""実行ログの非同期の書き込み（rasp_shutter.notify）のユニットテスト"""
+
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def written(mocker):
+    """my_lib.webapp.log に渡されたログを (レベル, メッセージ) で記録する"""
+    import rasp_shutter.notify
+
+    written = []
+    mocker.patch("my_lib.webapp.log.info", side_effect=lambda message: written.append(("info", message)))
+    mocker.patch("my_lib.webapp.log.error", side_effect=lambda message: written.append(("error", message)))
+
+    yield written
+
+    rasp_shutter.notify.stop()
+
+
+class TestAggregate:
+    """batch() の中のログのまとめのテスト"""
+
+    def test_same_message_aggregated(self, written):
+        """シャッター名だけが違う同じ内容のログは 1 件になり、他のログの順序は保たれる"""
+        import rasp_shutter.notify
+
+        with rasp_shutter.notify.batch():
+            rasp_shutter.notify.info("🌇 暗くなってきたので閉めます。")
+            for name in ["リビング", "寝室", "書斎"]:
+                rasp_shutter.notify.info(f"{name}のシャッターを自動で閉めました。", subject=name)
+            rasp_shutter.notify.error(
+                "子供部屋のシャッターを自動で閉めるのに失敗しました。", subject="子供部屋"
+            )
+            assert written == []
+
+        assert written == [
+            ("info", "🌇 暗くなってきたので閉めます。"),
+            ("info", "リビング・寝室・書斎のシャッターを自動で閉めました。"),
+            ("error", "子供部屋のシャッターを自動で閉めるのに失敗しました。"),
+        ]
+
+    def test_not_aggregated(self, written):
+        """件数が AGGREGATE_MIN_COUNT 未満のものと、内容が違うものはまとめない"""
+        import rasp_shutter.notify
+
+        with rasp_shutter.notify.batch():
+            for name in ["リビング", "寝室"]:
+                rasp_shutter.notify.info(f"{name}のシャッターを手動で開けました。", subject=name)
+            for name, elapsed in [("リビング", "1分"), ("寝室", "2分"), ("書斎", "3分")]:
+                rasp_shutter.notify.info(
+                    f"🔔 {name}のシャッターを開けるのを見合わせました。{elapsed}前", subject=name
+                )
+
+        assert [message for _, message in written] == [
+            "リビングのシャッターを手動で開けました。",
+            "寝室のシャッターを手動で開けました。",
+            "🔔 リビングのシャッターを開けるのを見合わせました。1分前",
+            "🔔 寝室のシャッターを開けるのを見合わせました。2分前",
+            "🔔 書斎のシャッターを開けるのを見合わせました。3分前",
+        ]
+
+    def test_batch_across_threads(self, written):
+        """batch() の中で別のスレッドが記録したログもまとめる"""
+        import rasp_shutter.notify
+
+        with rasp_shutter.notify.batch():
+            thread_list = [
+                threading.Thread(
+                    target=rasp_shutter.notify.info,
+                    args=(f"{name}のシャッターを閉めました。",),
+                    kwargs={"subject": name},
+                )
+                for name in ["A", "B", "C"]
+            ]
+            for thread in thread_list:
+                thread.start()
+            for thread in thread_list:
+                thread.join()
+
+        assert len(written) == 1
+        assert sorted(written[0][1].removesuffix("のシャッターを閉めました。").split("・")) == ["A", "B", "C"]
+
+
+class TestWriter:
+    """書き込みスレッドのテスト"""
+
+    def test_async_write(self, written, mocker):
+        """書き込みスレッドが動いている間は、呼び出し側は my_lib.webapp.log を待たない"""
+        import rasp_shutter.notify
+
+        release = threading.Event()
+        mocker.patch(
+            "my_lib.webapp.log.info",
+            side_effect=lambda message: release.wait(5) and written.append(("info", message)),
+        )
+        rasp_shutter.notify.start()
+
+        rasp_shutter.notify.info("1 件目")
+        rasp_shutter.notify.info("2 件目")
+        assert written == []
+
+        release.set()
+        assert rasp_shutter.notify.flush()
+        assert written == [("info", "1 件目"), ("info", "2 件目")]
+
+    def test_queue_full(self, written, mocker):
+        """キューが一杯の時は待たずに捨て、追い付いた時に省略した件数を記録する"""
+        import rasp_shutter.notify
+
+        mocker.patch.object(rasp_shutter.notify, "QUEUE_SIZE", 2)
+        release = threading.Event()
+        mocker.patch(
+            "my_lib.webapp.log.info",
+            side_effect=lambda message: release.wait(5) and written.append(("info", message)),
+        )
+        rasp_shutter.notify.start()
+
+        rasp_shutter.notify.info("書き込み中")
+        # NOTE: 書き込みスレッドが 1 件目を取り出すまで待つ
+        for _ in range(100):
+            if rasp_shutter.notify._writer._queue.empty():
+                break
+            time.sleep(0.01)
+        for i in range(5):
+            rasp_shutter.notify.info(f"ログ {i}")
+
+        release.set()
+        assert rasp_shutter.notify.flush()
+        assert [message for _, message in written] == [
+            "書き込み中",
+            "ログ 0",
+            "ログ 1",
+            "⚠️ ログが多すぎるため、3 件を省略しました。",
+        ]
+
+    def test_stop_writes_pending(self, written):
+        """stop() はキューに残っているログを書き込んでから終了し、その後は同期で書き込む"""
+        import rasp_shutter.notify
+
+        rasp_shutter.notify.start()
+        rasp_shutter.notify.error("😵 失敗しました。")
+        rasp_shutter.notify.stop()
+        assert written == [("error", "😵 失敗しました。")]
+
+        rasp_shutter.notify.info("停止後")
+        assert written[-1] == ("info", "停止後")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# ruff: noqa: S101
+"""シャッター別スケジュール展開のユニットテスト"""
+
+from tests.fixtures.schedule_factory import ScheduleFactory
+
+
+class TestResolveEntries:
+    """resolve_entries関数のテスト"""
+
+    def test_without_override(self):
+        """override が無い場合は全シャッターが共通エントリ"""
+        import rasp_shutter.control.schedule_plan
+
+        schedule_data = ScheduleFactory.create()
+        entries = rasp_shutter.control.schedule_plan.resolve_entries(schedule_data, 3, "open")
+
+        assert entries == [schedule_data["open"]] * 3
+
+    def test_with_override(self):
+        """override の対象シャッターだけエントリが置き換わる"""
+        import rasp_shutter.control.schedule_plan
+
+        schedule_data = ScheduleFactory.with_override([1], open_time="09:00")
+        entries = rasp_shutter.control.schedule_plan.resolve_entries(schedule_data, 3, "open")
+
+        assert [entry["time"] for entry in entries] == ["07:01", "09:00", "07:01"]
+
+    def test_out_of_range_target_ignored(self):
+        """範囲外のインデックスを指す override は無視される"""
+        import rasp_shutter.control.schedule_plan
+
+        schedule_data = ScheduleFactory.with_override([5], open_time="09:00")
+        entries = rasp_shutter.control.schedule_plan.resolve_entries(schedule_data, 2, "open")
+
+        assert [entry["time"] for entry in entries] == ["07:01", "07:01"]
+
+
+class TestBuildJobTable:
+    """build_job_table関数のテスト"""
+
+    def test_same_time_grouped(self):
+        """同じ時刻・曜日のシャッターは 1 ジョブにまとまる"""
+        import rasp_shutter.control.schedule_plan
+
+        schedule_data = ScheduleFactory.create()
+        table = rasp_shutter.control.schedule_plan.build_job_table(schedule_data, 4)
+
+        # open/close × 7 曜日
+        assert len(table) == 14
+        assert table[("open", "07:01", 0)] == [0, 1, 2, 3]
+
+    def test_override_splits_job(self):
+        """時刻の異なる override は別ジョブになる"""
+        import rasp_shutter.control.schedule_plan
+
+        schedule_data = ScheduleFactory.with_override([2], close_time="19:30")
+        table = rasp_shutter.control.schedule_plan.build_job_table(schedule_data, 3)
+
+        assert table[("close", "17:01", 1)] == [0, 1]
+        assert table[("close", "19:30", 1)] == [2]
+
+    def test_inactive_and_disabled_wday(self):
+        """無効なエントリや曜日はジョブに含まれない"""
+        import rasp_shutter.control.schedule_plan
+
+        wday = [False] + [True] * 6
+        schedule_data = ScheduleFactory.with_override([0], open_active=False, wday=wday)
+        table = rasp_shutter.control.schedule_plan.build_job_table(schedule_data, 2)
+
+        assert table[("open", "07:01", 1)] == [1]
+        assert ("close", "17:01", 0) in table
+        assert table[("close", "17:01", 0)] == [1]
+
+
+class TestSchedulePlan:
+    """SchedulePlanのテスト"""
+
+    def test_group_by_threshold(self):
+        """同じ閾値のシャッターはまとめて判定される"""
+        import rasp_shutter.control.schedule_plan
+
+        schedule_data = ScheduleFactory.with_override([1], open_lux=3000)
+        plan = rasp_shutter.control.schedule_plan.build_plan(schedule_data, 3)
+
+        groups = plan.group("open", [0, 1, 2])
+        assert [(entry["lux"], members) for entry, members in groups] == [(1000, [0, 2]), (3000, [1])]
+
+        groups = plan.group("open", [1])
+        assert [members for _, members in groups] == [[1]]
+
+    def test_active_groups(self):
+        """指定曜日に有効なシャッターだけが返る"""
+        import rasp_shutter.control.schedule_plan
+
+        wday = [False] + [True] * 6
+        schedule_data = ScheduleFactory.with_override([0], wday=wday)
+        plan = rasp_shutter.control.schedule_plan.build_plan(schedule_data, 2)
+
+        assert [members for _, members in plan.active_groups("open", 0)] == [[1]]
+        assert [members for _, members in plan.active_groups("open", 1)] == [[0, 1]]
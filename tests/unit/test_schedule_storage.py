@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# ruff: noqa: S101
+"""スケジュール永続化のユニットテスト"""
+
+import pickle
+
+import pytest
+
+from tests.fixtures.schedule_factory import ScheduleFactory
+
+SAVED_AT = "2026-06-01T08:00:00+09:00"
+
+
+def _validate(schedule_data):
+    import rasp_shutter.control.scheduler
+
+    return rasp_shutter.control.scheduler.schedule_validate(schedule_data)
+
+
+def _revise(document, schedule_data, history_size=10):
+    return document.revise(schedule_data, saved_at=SAVED_AT, history_size=history_size)
+
+
+class TestScheduleStorage:
+    """schedule_storage のテスト"""
+
+    def test_store_and_load(self, tmp_path):
+        """保存した版と履歴を読み込める"""
+        import rasp_shutter.control.schedule_storage
+
+        path = tmp_path / "schedule.dat"
+        document = rasp_shutter.control.schedule_storage.initial(ScheduleFactory.create())
+        document = _revise(document, ScheduleFactory.create(open_time="08:30"))
+        document = _revise(document, ScheduleFactory.create(open_time="09:30"))
+
+        rasp_shutter.control.schedule_storage.store(path, document)
+        loaded = rasp_shutter.control.schedule_storage.load(path, _validate)
+
+        assert loaded == document
+        assert loaded.current.version == 2
+        assert [revision.version for revision in loaded.history] == [1]
+        # NOTE: 一時ファイルは rename で消える
+        assert list(tmp_path.iterdir()) == [path]
+
+    def test_history_size(self):
+        """履歴は上限を超えると古いものから捨てる"""
+        import rasp_shutter.control.schedule_storage
+
+        document = rasp_shutter.control.schedule_storage.initial(ScheduleFactory.create())
+        for _ in range(5):
+            document = _revise(document, ScheduleFactory.create(), history_size=3)
+
+        assert document.current.version == 5
+        assert [revision.version for revision in document.history] == [4, 3, 2]
+        assert document.find(3) is not None
+        assert document.find(1) is None
+
+    def test_load_missing(self, tmp_path):
+        """ファイルが無ければ None"""
+        import rasp_shutter.control.schedule_storage
+
+        assert rasp_shutter.control.schedule_storage.load(tmp_path / "schedule.dat", _validate) is None
+
+    def test_load_torn(self, tmp_path):
+        """途中で切れたファイルは読み込みエラーになる"""
+        import rasp_shutter.control.schedule_storage
+
+        path = tmp_path / "schedule.dat"
+        document = _revise(
+            rasp_shutter.control.schedule_storage.initial(ScheduleFactory.create()), ScheduleFactory.create()
+        )
+        rasp_shutter.control.schedule_storage.store(path, document)
+        path.write_bytes(path.read_bytes()[:-10])
+
+        with pytest.raises(rasp_shutter.control.schedule_storage.ScheduleStorageError):
+            rasp_shutter.control.schedule_storage.load(path, _validate)
+
+    def test_load_invalid_current(self, tmp_path):
+        """現在の版が不正なら、履歴のうち最新の正しい版を使う"""
+        import rasp_shutter.control.schedule_storage
+
+        path = tmp_path / "schedule.dat"
+        invalid = ScheduleFactory.create()
+        del invalid["open"]
+        document = rasp_shutter.control.schedule_storage.initial(ScheduleFactory.create())
+        document = _revise(document, ScheduleFactory.create(open_time="08:30"))
+        document = _revise(document, invalid)
+        rasp_shutter.control.schedule_storage.store(path, document)
+
+        loaded = rasp_shutter.control.schedule_storage.load(path, _validate)
+
+        assert loaded is not None
+        assert loaded.current.version == 2
+        assert loaded.current.schedule["open"]["time"] == "08:30"
+
+    def test_load_legacy(self, tmp_path):
+        """旧形式（pickle）のファイルを版 1 として読み込める"""
+        import rasp_shutter.control.schedule_storage
+
+        path = tmp_path / "schedule.dat"
+        schedule_data = ScheduleFactory.create(open_time="08:30")
+        path.write_bytes(pickle.dumps(schedule_data))
+
+        loaded = rasp_shutter.control.schedule_storage.load(path, _validate)
+
+        assert loaded is not None
+        assert loaded.current.version == 1
+        assert loaded.current.schedule == schedule_data
+
+    def test_load_malformed_history(self, tmp_path):
+        """履歴の壊れた版は読み飛ばし、残りの版は読み込める"""
+        import json
+
+        import rasp_shutter.control.schedule_storage
+
+        path = tmp_path / "schedule.dat"
+        document = rasp_shutter.control.schedule_storage.initial(ScheduleFactory.create())
+        for open_time in ["07:30", "08:30", "09:30"]:
+            document = _revise(document, ScheduleFactory.create(open_time=open_time))
+        rasp_shutter.control.schedule_storage.store(path, document)
+
+        content = json.loads(path.read_bytes())
+        content["history"][0]["version"] = "broken"
+        path.write_text(json.dumps(content))
+
+        loaded = rasp_shutter.control.schedule_storage.load(path, _validate)
+
+        assert loaded is not None
+        assert loaded.current.version == 3
+        assert [revision.version for revision in loaded.history] == [1]
+
+
+class TestScheduleLoad:
+    """scheduler.schedule_load のテスト"""
+
+    def test_quarantine_unreadable(self, tmp_path, mocker):
+        """読み込めないファイルは *.corrupt に退避してから既定のスケジュールに戻す"""
+        import rasp_shutter.control.scheduler
+
+        path = tmp_path / "schedule.dat"
+        path.write_bytes(b"{broken")
+        mocker.patch("rasp_shutter.control.scheduler._get_schedule_path", return_value=path)
+        mocker.patch("rasp_shutter.notify.error")
+
+        document = rasp_shutter.control.scheduler.schedule_load()
+
+        assert document.current.version == 0
+        assert not path.exists()
+        assert (tmp_path / "schedule.dat.corrupt").read_bytes() == b"{broken"
@@ -2,7 +2,14 @@
 # ruff: noqa: S101
 """スケジューラーロジックのユニットテスト"""
 
+import datetime
+import types
+import zoneinfo
+
+import pytest
+
 from tests.fixtures.schedule_factory import ScheduleFactory
+from tests.fixtures.sensor_factory import SensorDataFactory
 
 
 class TestScheduleValidate:
@@ -150,6 +157,45 @@ class TestScheduleValidate:
         schedule_data["open"]["wday"] = ["True"] * 7  # boolでない
         assert rasp_shutter.control.scheduler.schedule_validate(schedule_data) is False
 
+    def test_validate_with_override(self):
+        """シャッター別の override を含むスケジュールの検証"""
+        import rasp_shutter.control.scheduler
+
+        schedule_data = ScheduleFactory.with_override([1], open_time="09:00")
+        assert rasp_shutter.control.scheduler.schedule_validate(schedule_data) is True
+
+    def test_validate_invalid_override_target(self):
+        """override の target が不正な場合"""
+        import rasp_shutter.control.scheduler
+
+        for invalid_target in [[], [-1], [True], ["1"], 1]:
+            schedule_data = ScheduleFactory.with_override([0])
+            schedule_data["override"][0]["target"] = invalid_target
+            assert rasp_shutter.control.scheduler.schedule_validate(schedule_data) is False, invalid_target
+
+    def test_validate_duplicate_override_target(self):
+        """同じシャッターが複数の override に含まれる場合"""
+        import rasp_shutter.control.scheduler
+
+        schedule_data = ScheduleFactory.with_override([0, 1])
+        schedule_data["override"].append(ScheduleFactory.with_override([1])["override"][0])
+        assert rasp_shutter.control.scheduler.schedule_validate(schedule_data) is False
+
+        schedule_data = ScheduleFactory.with_override([0, 0])
+        assert rasp_shutter.control.scheduler.schedule_validate(schedule_data) is False
+
+    def test_validate_invalid_override_keys(self):
+        """override のキーが不正な場合"""
+        import rasp_shutter.control.scheduler
+
+        schedule_data = ScheduleFactory.with_override([0])
+        del schedule_data["override"][0]["close"]
+        assert rasp_shutter.control.scheduler.schedule_validate(schedule_data) is False
+
+        schedule_data = ScheduleFactory.with_override([0])
+        schedule_data["override"][0]["open"]["time"] = "25:00"
+        assert rasp_shutter.control.scheduler.schedule_validate(schedule_data) is False
+
 
 class TestGenScheduleDefault:
     """gen_schedule_default関数のテスト"""
@@ -278,3 +324,133 @@ class TestScheduleDataManagement:
 
         # 作成されたワーカーエントリを掃除
         rasp_shutter.control.scheduler._schedule_data_instances.pop("test_worker_unique", None)
+
+
+class TestCurrentSchedule:
+    """メモリ上のスケジュールのテスト"""
+
+    def test_load_once_and_replace(self, monkeypatch, mocker):
+        """ディスクからの読み込みは初回のみで、差し替えるとバージョンと ETag が変わる"""
+        import rasp_shutter.control.schedule_storage
+        import rasp_shutter.control.scheduler
+
+        monkeypatch.setenv("PYTEST_XDIST_WORKER", "test_worker_current_schedule")
+        schedule_data = ScheduleFactory.create()
+        load = mocker.patch(
+            "rasp_shutter.control.scheduler.schedule_load",
+            return_value=rasp_shutter.control.schedule_storage.initial(schedule_data),
+        )
+        store = mocker.patch("rasp_shutter.control.scheduler.schedule_store")
+
+        try:
+            first = rasp_shutter.control.scheduler.get_current_schedule()
+            assert rasp_shutter.control.scheduler.get_current_schedule() is first
+            assert load.call_count == 1
+            assert first.version == 0
+
+            # NOTE: 内容が同じなら ETag も同じ（キーの順序には依存しない）
+            same = rasp_shutter.control.scheduler.replace_current_schedule(
+                dict(reversed(list(schedule_data.items())))
+            )
+            assert same.version == 1
+            assert same.etag == first.etag
+
+            changed = rasp_shutter.control.scheduler.replace_current_schedule(
+                ScheduleFactory.create(open_time="09:00")
+            )
+            assert changed.version == 2
+            # NOTE: 保存していない初期状態（版 0）は履歴に残さない
+            assert [revision.version for revision in changed.document.history] == [1]
+            assert changed.etag != first.etag
+            assert store.call_count == 2
+        finally:
+            rasp_shutter.control.scheduler.reset_current_schedule()
+
+
+@pytest.fixture
+def auto_close_env(mocker):
+    """2 台のシャッターで shutter_auto_close を呼ぶ環境（シャッター 1 だけ閉める閾値が違う）"""
+    import rasp_shutter.clock
+    import rasp_shutter.config
+    import rasp_shutter.control.scheduler
+
+    config = types.SimpleNamespace(
+        shutter=[
+            rasp_shutter.config.ShutterConfig(
+                name=name, endpoint=rasp_shutter.config.ShutterEndpointConfig(open="", close="")
+            )
+            for name in ["リビング", "寝室"]
+        ],
+        brightness_filter=rasp_shutter.config.BrightnessFilterConfig(),
+    )
+    rasp_shutter.control.scheduler.set_schedule_data(
+        ScheduleFactory.with_override([1], open_time="07:01", close_time="17:01", close_lux=500)
+    )
+    rasp_shutter.control.scheduler.reset_auto_control_failure_state()
+    mocker.patch("rasp_shutter.notify.info")
+    exec_control = mocker.patch("rasp_shutter.control.scheduler.exec_shutter_control", return_value=True)
+    clock = rasp_shutter.clock.VirtualClock(
+        datetime.datetime(2026, 6, 1, 15, 0, tzinfo=zoneinfo.ZoneInfo("Asia/Tokyo"))
+    )
+
+    with rasp_shutter.clock.use(clock):
+        yield config, clock, exec_control
+
+    rasp_shutter.control.scheduler.set_schedule_data(None)
+    rasp_shutter.control.scheduler.reset_auto_control_failure_state()
+
+
+class TestAutoCloseGroups:
+    """shutter_auto_close の閾値グループごとの判定のテスト"""
+
+    def test_just_opened_excludes_only_that_shutter(self, auto_close_env, mocker):
+        """開けたばかりのシャッターだけを除き、別のグループのシャッターは閉める"""
+        import rasp_shutter.control.scheduler
+        import rasp_shutter.control.webapi.control
+
+        config, clock, exec_control = auto_close_env
+        mocker.patch(
+            "rasp_shutter.control.webapi.sensor.get_sensor_data", return_value=SensorDataFactory.dark()
+        )
+
+        clock.footprint_update(rasp_shutter.control.webapi.control.exec_stat_file("open", 1))
+        clock.advance(60)
+        rasp_shutter.control.scheduler.shutter_auto_close(config)
+
+        exec_control.assert_called_once()
+        assert exec_control.call_args.kwargs["index_list"] == [0]
+
+    def test_not_dark(self, auto_close_env, mocker):
+        """どのグループも暗くなければ制御しない"""
+        import rasp_shutter.control.scheduler
+
+        config, _, exec_control = auto_close_env
+        mocker.patch(
+            "rasp_shutter.control.webapi.sensor.get_sensor_data", return_value=SensorDataFactory.bright()
+        )
+
+        rasp_shutter.control.scheduler.shutter_auto_close(config)
+
+        exec_control.assert_not_called()
+
+    def test_auto_close_tracked_per_shutter(self, auto_close_env, mocker):
+        """一部のシャッターを自動で閉めた後も、後から暗くなったグループは自動で閉める"""
+        import rasp_shutter.control.scheduler
+
+        config, clock, exec_control = auto_close_env
+        # NOTE: シャッター 0（閉める照度 1200）だけが暗い
+        sensor_data = mocker.patch(
+            "rasp_shutter.control.webapi.sensor.get_sensor_data",
+            return_value=SensorDataFactory.custom(solar_rad=200, lux=800, altitude=50),
+        )
+
+        rasp_shutter.control.scheduler.shutter_auto_close(config)
+        assert exec_control.call_args.kwargs["index_list"] == [0]
+
+        # NOTE: シャッター 1（閉める照度 500）も暗くなった
+        clock.advance(30 * 60)
+        sensor_data.return_value = SensorDataFactory.custom(solar_rad=200, lux=300, altitude=50)
+        rasp_shutter.control.scheduler.shutter_auto_close(config)
+
+        assert exec_control.call_count == 2
+        assert exec_control.call_args.kwargs["index_list"] == [1]
@@ -129,3 +129,54 @@ class TestGetSensorDataImpl:
         assert result.valid is True
         assert result.value is not None
         assert -90.0 <= result.value <= 90.0
+
+
+class TestSensorBroadcast:
+    """センサー値の配信キャッシュのテスト"""
+
+    def test_cached_value_returned(self, config, mocker):
+        """配信済みの値があれば /api/sensor 用に取得し直さずに返す"""
+        import rasp_shutter.control.webapi.sensor
+        from tests.fixtures.sensor_factory import SensorDataFactory
+
+        mocker.patch("rasp_shutter.util.is_dummy_mode", return_value=False)
+        notify_mock = mocker.patch("my_lib.webapp.event.notify_event")
+        fetch_mock = mocker.patch(
+            "rasp_shutter.control.webapi.sensor.get_sensor_data", return_value=SensorDataFactory.dark()
+        )
+
+        bright = SensorDataFactory.bright()
+        rasp_shutter.control.webapi.sensor.publish_sensor_data(bright)
+
+        assert rasp_shutter.control.webapi.sensor.get_latest_sensor_data(config) is bright
+        fetch_mock.assert_not_called()
+        notify_mock.assert_called_once()
+
+    def test_notify_only_when_changed(self, mocker):
+        """表示が変わらない値の配信では通知しない"""
+        import rasp_shutter.control.webapi.sensor
+        from tests.fixtures.sensor_factory import SensorDataFactory
+
+        notify_mock = mocker.patch("my_lib.webapp.event.notify_event")
+
+        rasp_shutter.control.webapi.sensor.publish_sensor_data(SensorDataFactory.bright())
+        rasp_shutter.control.webapi.sensor.publish_sensor_data(SensorDataFactory.bright())
+        assert notify_mock.call_count == 1
+
+        rasp_shutter.control.webapi.sensor.publish_sensor_data(SensorDataFactory.dark())
+        assert notify_mock.call_count == 2
+
+    def test_stale_cache_refetched(self, config, mocker):
+        """キャッシュが古い場合は取得し直す"""
+        import rasp_shutter.control.webapi.sensor
+        from tests.fixtures.sensor_factory import SensorDataFactory
+
+        mocker.patch("rasp_shutter.util.is_dummy_mode", return_value=False)
+        mocker.patch("my_lib.webapp.event.notify_event")
+        dark = SensorDataFactory.dark()
+        mocker.patch("rasp_shutter.control.webapi.sensor.get_sensor_data", return_value=dark)
+
+        rasp_shutter.control.webapi.sensor.publish_sensor_data(SensorDataFactory.bright())
+        mocker.patch("rasp_shutter.control.webapi.sensor.SENSOR_CACHE_STALE_SEC", -1.0)
+
+        assert rasp_shutter.control.webapi.sensor.get_latest_sensor_data(config) is dark
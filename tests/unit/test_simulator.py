@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# ruff: noqa: S101
+"""制御判定シミュレーターのユニットテスト"""
+
+import datetime
+import zoneinfo
+
+import pytest
+
+from tests.fixtures.schedule_factory import ScheduleFactory
+
+TZ = zoneinfo.ZoneInfo("Asia/Tokyo")
+
+
+def _samples(day_count: int = 1, lux_at=None) -> list[dict]:
+    """1 分間隔のセンサーサンプルを生成（lux_at(時, 分) で照度を決める）"""
+    if lux_at is None:
+
+        def lux_at(hour, minute):
+            return 5000 if 7 <= hour < 18 else 10
+
+    start = datetime.datetime(2026, 6, 1, tzinfo=TZ)
+    samples = []
+    for minutes in range(day_count * 24 * 60):
+        timestamp = start + datetime.timedelta(minutes=minutes)
+        lux = lux_at(timestamp.hour, timestamp.minute)
+        samples.append(
+            {
+                "timestamp": timestamp.isoformat(),
+                "lux": lux,
+                "solar_rad": lux / 10,
+                "altitude": 30 if 6 <= timestamp.hour < 18 else -10,
+            }
+        )
+    return samples
+
+
+def _simulate(samples, schedule_data, brightness_filter=None):
+    import rasp_shutter.metrics.simulator
+
+    timeline = rasp_shutter.metrics.simulator.prepare_timeline(samples)
+    return rasp_shutter.metrics.simulator.simulate(timeline, schedule_data, brightness_filter)
+
+
+class TestSimulate:
+    """simulate関数のテスト"""
+
+    def test_schedule_open_close(self):
+        """明るい時刻に開け、閉め時刻に閉める"""
+        result = _simulate(_samples(), ScheduleFactory.create(open_time="08:00", close_time="17:30"))
+
+        assert [(op["action"], op["mode"]) for op in result.operations] == [
+            ("open", "schedule"),
+            ("close", "schedule"),
+        ]
+        assert result.postpones == []
+
+    def test_pending_open_then_auto_open(self):
+        """暗くて見合わせた後、明るくなったら自動で開ける"""
+
+        def lux_at(hour, minute):
+            return 5000 if (hour, minute) >= (8, 30) and hour < 18 else 10
+
+        result = _simulate(
+            _samples(lux_at=lux_at), ScheduleFactory.create(open_time="08:00", close_time="17:30")
+        )
+
+        assert [(op["action"], op["mode"]) for op in result.operations] == [
+            ("open", "auto"),
+            ("close", "schedule"),
+        ]
+        assert result.postpones[0]["trigger"] == "schedule"
+        assert {event["reason"] for event in result.postpones} == {"too_dark"}
+        # 8:00 〜 8:29 の間、1 分ごとに見合わせが記録される
+        assert len(result.postpones) == 30
+
+        opened_at = datetime.datetime.fromtimestamp(result.operations[0]["timestamp"], TZ)
+        assert (opened_at.hour, opened_at.minute) == (8, 30)
+
+    def test_auto_close_and_reopen(self):
+        """日中に暗くなると先回りで閉め、明るくなったら開け直す"""
+
+        def lux_at(hour, minute):
+            return 10 if hour < 7 or hour >= 18 or (hour == 9 and minute < 30) else 5000
+
+        result = _simulate(
+            _samples(lux_at=lux_at), ScheduleFactory.create(open_time="08:00", close_time="17:30")
+        )
+
+        assert [(op["action"], op["mode"]) for op in result.operations] == [
+            ("open", "schedule"),
+            ("close", "auto"),
+            ("open", "auto"),
+            ("close", "schedule"),
+        ]
+
+    def test_sensor_invalid(self):
+        """センサー値が無い場合は sensor_invalid で見合わせる"""
+        samples = _samples()
+        for sample in samples:
+            sample["lux"] = None
+
+        result = _simulate(samples, ScheduleFactory.create(open_time="08:00", close_time="17:30"))
+
+        assert [(op["action"], op["mode"]) for op in result.operations] == [("close", "schedule")]
+        assert {event["reason"] for event in result.postpones} == {"sensor_invalid"}
+
+    def test_brightness_filter(self):
+        """BrightnessFilter を指定すると、自動開けは最小継続時間だけ遅れる"""
+        import rasp_shutter.config
+
+        def lux_at(hour, minute):
+            return 5000 if (hour, minute) >= (8, 30) and hour < 18 else 10
+
+        result = _simulate(
+            _samples(lux_at=lux_at),
+            ScheduleFactory.create(open_time="08:00", close_time="17:30"),
+            rasp_shutter.config.BrightnessFilterConfig(dwell_sec=300),
+        )
+
+        assert [(op["action"], op["mode"]) for op in result.operations] == [
+            ("open", "auto"),
+            ("close", "schedule"),
+        ]
+        opened_at = datetime.datetime.fromtimestamp(result.operations[0]["timestamp"], TZ)
+        assert (opened_at.hour, opened_at.minute) == (8, 35)
+
+    def test_override_rejected(self):
+        """シャッター別の override を含むスケジュールは扱えない"""
+        import rasp_shutter.metrics.simulator
+
+        schedule_data = ScheduleFactory.create()
+        schedule_data["override"] = [
+            {"target": [0], "open": schedule_data["open"], "close": schedule_data["close"]}
+        ]
+
+        with pytest.raises(ValueError, match="override"):
+            _simulate(_samples(), schedule_data)
+        with pytest.raises(ValueError, match="override"):
+            rasp_shutter.metrics.simulator.sweep(_samples(), schedule_data, [{}], max_workers=1)
+
+    def test_inactive_wday(self):
+        """無効な曜日は何もしない"""
+        result = _simulate(_samples(), ScheduleFactory.no_weekday())
+
+        assert result.operations == []
+        assert result.postpones == []
+
+
+class TestSweep:
+    """sweep関数のテスト"""
+
+    def test_threshold_grid(self):
+        """軸指定から閾値の組み合わせを作る"""
+        import rasp_shutter.metrics.simulator
+
+        grid = rasp_shutter.metrics.simulator.threshold_grid(
+            open_lux=[100, 200], close_solar_rad=[10, 20, 30]
+        )
+
+        assert len(grid) == 6
+        assert grid[0] == {"open": {"lux": 100}, "close": {"solar_rad": 10}}
+
+    def test_sweep(self):
+        """閾値の候補ごとの集計が返る"""
+        import rasp_shutter.metrics.simulator
+
+        schedule_data = ScheduleFactory.create(open_time="08:00", close_time="17:30")
+        candidates = rasp_shutter.metrics.simulator.threshold_grid(open_lux=[1000, 10000])
+
+        result_list = rasp_shutter.metrics.simulator.sweep(
+            _samples(day_count=2), schedule_data, candidates, max_workers=1
+        )
+
+        assert [result["thresholds"] for result in result_list] == candidates
+        assert result_list[0]["schedule_open"] == 2
+        assert result_list[0]["postpone_total"] == 0
+        # 照度が閾値に届かないので開けられない
+        assert result_list[1]["schedule_open"] == 0
+        assert result_list[1]["auto_open"] == 0
+        assert result_list[1]["postpone_total"] > 0
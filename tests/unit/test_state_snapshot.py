@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# ruff: noqa: S101
+"""シャッター状態スナップショットのユニットテスト"""
+
+import datetime
+import types
+import zoneinfo
+
+import pytest
+
+
+class TestStateSnapshot:
+    """StateSnapshotのテスト"""
+
+    def test_update_advances_version(self):
+        """状態が変化した場合だけバージョンが進む"""
+        import rasp_shutter.control.state_snapshot
+
+        snapshot = rasp_shutter.control.state_snapshot.StateSnapshot(16)
+        assert snapshot.reconcile([2, 2], ("stamp",)) is False
+        version, _ = snapshot.get()
+
+        assert snapshot.update(0, 0) == version + 1
+        assert snapshot.update(0, 0) is None
+        assert snapshot.get() == (version + 1, [0, 2])
+
+    def test_reconcile(self):
+        """stamp が変わった場合だけ判定し直しが必要で、状態が変化したときだけバージョンが進む"""
+        import rasp_shutter.control.state_snapshot
+
+        snapshot = rasp_shutter.control.state_snapshot.StateSnapshot(16)
+        assert snapshot.is_current(("a",)) is False
+        assert snapshot.update(0, 0) is None
+
+        snapshot.reconcile([2], ("a",))
+        version, _ = snapshot.get()
+        assert snapshot.is_current(("a",))
+        assert snapshot.is_current(("b",)) is False
+
+        # 状態が同じなら stamp だけ更新する
+        assert snapshot.reconcile([2], ("b",)) is False
+        assert snapshot.is_current(("b",))
+        assert snapshot.get() == (version, [2])
+
+        assert snapshot.reconcile([1], ("c",)) is True
+        assert snapshot.get() == (version + 1, [1])
+
+    def test_since(self):
+        """指定バージョン以降に変化したインデックスを返す"""
+        import rasp_shutter.control.state_snapshot
+
+        snapshot = rasp_shutter.control.state_snapshot.StateSnapshot(16)
+        snapshot.reconcile([2, 2, 2], ("a",))
+        base, _ = snapshot.get()
+        snapshot.update(2, 1)
+        middle = snapshot.update(0, 0)
+        snapshot.update(2, 0)
+
+        assert snapshot.since(base)[2] == [0, 2]
+        assert snapshot.since(middle) == (middle + 1, [0, 2, 0], [2])
+        # 未来のバージョン・初回の読み込みより前のバージョンは差分を求められない
+        assert snapshot.since(middle + 10)[2] is None
+        assert snapshot.since(base - 1)[2] is None
+
+    def test_reconcile_records_changes(self):
+        """footprint から判定し直して変化したシャッターも差分として返す"""
+        import rasp_shutter.control.state_snapshot
+
+        snapshot = rasp_shutter.control.state_snapshot.StateSnapshot(16)
+        snapshot.reconcile([2, 2, 2], ("a",))
+        base, _ = snapshot.get()
+
+        assert snapshot.reconcile([0, 2, 1], ("b",)) is True
+        assert snapshot.since(base) == (base + 1, [0, 2, 1], [0, 2])
+
+        # シャッター数が変わった場合は差分を求められない
+        assert snapshot.reconcile([0, 2], ("c",)) is True
+        assert snapshot.since(base + 1)[2] is None
+
+    def test_history_overflow(self):
+        """履歴からあふれたバージョンは差分を求められない"""
+        import rasp_shutter.control.state_snapshot
+
+        snapshot = rasp_shutter.control.state_snapshot.StateSnapshot(2)
+        snapshot.reconcile([2, 2], ("a",))
+        base, _ = snapshot.get()
+        snapshot.update(0, 0)
+        second = snapshot.update(1, 0)
+        snapshot.update(0, 1)
+
+        assert snapshot.since(base)[2] is None
+        assert snapshot.since(second)[2] == [0]
+
+
+@pytest.fixture
+def snapshot_env(tmp_path, monkeypatch, mocker):
+    """仮想の時計の footprint でシャッター状態を判定する環境"""
+    import my_lib.webapp.event
+
+    import rasp_shutter.clock
+    import rasp_shutter.config
+    import rasp_shutter.control.webapi.control
+
+    monkeypatch.setattr(rasp_shutter.config, "_environment", types.SimpleNamespace(stat_dir_path=tmp_path))
+    monkeypatch.setattr(rasp_shutter.control.webapi.control, "_state_snapshots", {})
+    notify_event = mocker.patch.object(my_lib.webapp.event, "notify_event")
+
+    config = types.SimpleNamespace(shutter=[types.SimpleNamespace(name="リビング")])
+    clock = rasp_shutter.clock.VirtualClock(
+        datetime.datetime(2026, 6, 1, 0, 0, tzinfo=zoneinfo.ZoneInfo("Asia/Tokyo"))
+    )
+
+    with rasp_shutter.clock.use(clock):
+        yield config, clock, notify_event
+
+
+class TestStateReconcile:
+    """footprint との突き合わせのテスト"""
+
+    def test_footprint_updated_elsewhere(self, snapshot_env):
+        """set_shutter_state_impl を経由しない footprint の更新も突き合わせで反映して通知する"""
+        import rasp_shutter.control.webapi.control
+        import rasp_shutter.util
+
+        config, clock, notify_event = snapshot_env
+        control = rasp_shutter.control.webapi.control
+
+        response = control.get_shutter_state(config)
+        assert response.state[0].state == control.SHUTTER_STATE.UNKNOWN
+        notify_event.assert_not_called()
+
+        rasp_shutter.util.footprint_update(control.exec_stat_file("open", 0))
+        clock.advance(60)
+        rasp_shutter.util.footprint_update(control.exec_stat_file("close", 0))
+
+        # NOTE: 取得するだけでは footprint を見直さない（スケジューラのループで突き合わせる）
+        assert control.get_shutter_state(config).version == response.version
+        notify_event.assert_not_called()
+
+        control.reconcile_shutter_state(config)
+        updated = control.get_shutter_state(config)
+        assert updated.state[0].state == control.SHUTTER_STATE.CLOSE
+        assert updated.version > response.version
+        notify_event.assert_called_once()
+
+        # NOTE: clean_stat_exec は直後に突き合わせるので、すぐに反映される
+        control.clean_stat_exec(config)
+        assert control.get_shutter_state(config).state[0].state == control.SHUTTER_STATE.UNKNOWN
+        assert control.get_shutter_state_since(config, updated.version).changed[0].state == (
+            control.SHUTTER_STATE.UNKNOWN
+        )